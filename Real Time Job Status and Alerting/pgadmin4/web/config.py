@@ -948,6 +948,104 @@ MAX_SERVER_TAGS_ALLOWED = 5
 
 ON_DEMAND_LOG_COUNT = 10000
 
+##########################################################################
+# pgAgent job status settings
+##########################################################################
+
+# The job status notifications of all the pgAgent servers are read by a
+# single background event loop. A lost LISTEN connection is reconnected
+# after PGAGENT_LISTENER_RETRY_DELAY seconds, doubling the delay on every
+# failed attempt up to PGAGENT_LISTENER_MAX_RETRY_DELAY seconds.
+PGAGENT_LISTENER_RETRY_DELAY = 1  # In seconds
+PGAGENT_LISTENER_MAX_RETRY_DELAY = 60  # In seconds
+
+# The notifications of a server received within PGAGENT_JOB_STATUS_BATCH_WINDOW
+# seconds are coalesced, keeping the latest state of every job, and sent to
+# the clients as a single job_status_batch event. Set to 0 to send every
+# notification as a job_status_update event.
+PGAGENT_JOB_STATUS_BATCH_WINDOW = 0.25  # In seconds
+
+# When pgAdmin runs several processes, for example several gunicorn workers,
+# set PGAGENT_JOB_STATUS_BROKER to the path of a Unix socket shared by them,
+# such as os.path.join(DATA_DIR, 'pgagent_job_status.sock'). One process is
+# elected to hold the LISTEN connection of every server, and to send the email
+# alerts, and forwards the job status events to the others. Another one takes
+# over if it exits. Up to PGAGENT_JOB_STATUS_BROKER_QUEUE_SIZE events wait to
+# be sent to a process, the next ones are dropped. Leave it to None to have
+# every process listen to the servers itself. Not supported on Windows.
+PGAGENT_JOB_STATUS_BROKER = None
+PGAGENT_JOB_STATUS_BROKER_QUEUE_SIZE = 10000
+
+# Number of runs of a page of the job log of the Job Monitor, and the largest
+# page a client may ask for. The NDJSON export of the job log reads it in pages
+# of PGAGENT_JOB_LOG_MAX_PAGE_SIZE runs.
+PGAGENT_JOB_LOG_PAGE_SIZE = 10
+PGAGENT_JOB_LOG_MAX_PAGE_SIZE = 1000
+
+# The retention of the job logs is set on the server, in the
+# pgagent.pga_log_retention table of pgAgent 4.11 or higher. When the logs
+# were partitioned, with pgagent.partition_logs set to on while running
+# CREATE EXTENSION pgagent or ALTER EXTENSION pgagent UPDATE TO '4.13', the
+# monthly partitions created by pga_log_maintenance() are not members of the
+# extension. pg_dump dumps them as ordinary tables, partitions of the tables
+# of the extension, and they are restored with pgagent.partition_logs set to
+# on, see the README of pgAgent.
+
+# The bulk export of the pgAgent jobs reads them in pages of
+# PGAGENT_JOB_EXPORT_PAGE_SIZE jobs.
+PGAGENT_JOB_EXPORT_PAGE_SIZE = 500
+
+# Number of runs of every schedule returned by the schedule preview and the
+# job calendar of pgAgent, and the most runs a client may ask for.
+PGAGENT_SCHEDULE_PREVIEW_RUNS = 10
+PGAGENT_SCHEDULE_PREVIEW_MAX_RUNS = 1000
+
+# Number of hours of the job load of the Job Monitor, and the most hours a
+# client may ask for. The compiled schedules of a server keep the runs
+# expanded for the job load, up to this horizon.
+PGAGENT_JOB_LOAD_HOURS = 24
+PGAGENT_JOB_LOAD_MAX_HOURS = 7 * 24
+
+# Send the email alerts of the pgAgent jobs from pgAdmin, following the
+# pga_job_notification settings of the jobs, using the mail server settings
+# above. A server whose jobs send email alerts is listened to whether or not
+# any Job Monitor is open, once a client listened to it or its jobs were saved
+# since pgAdmin started. The email alerts of pgAgent itself should be turned
+# off by leaving its MY_MAIL environment variable unset.
+# The alerts are evaluated and sent by a single process, the one running the
+# job status broker if set. In server mode, where pgAdmin may run several
+# processes, for example several gunicorn workers, they are only sent when
+# PGAGENT_JOB_STATUS_BROKER is set.
+PGAGENT_EMAIL_ALERTS = False
+
+# The alerts of a recipient received within PGAGENT_ALERT_BATCH_WINDOW
+# seconds are sent as a single email, listing up to
+# PGAGENT_ALERT_DIGEST_MAX_ALERTS alerts and counting the others by job.
+# The jobs without any email recipient alert PGAGENT_ALERT_RECIPIENTS.
+PGAGENT_ALERT_BATCH_WINDOW = 60  # In seconds
+PGAGENT_ALERT_DIGEST_MAX_ALERTS = 100
+PGAGENT_ALERT_RECIPIENTS = []
+
+# Number of job status notifications waiting for their alerts to be
+# evaluated, the next ones are dropped.
+PGAGENT_ALERT_QUEUE_SIZE = 10000
+
+# The notification settings of the jobs of a server are cached, reloaded when
+# pgAgent notifies their changes or after PGAGENT_ALERT_RULES_TTL seconds. The
+# time of the latest alert of every job is written to the pga_job_notification
+# table every PGAGENT_ALERT_WRITE_INTERVAL seconds.
+PGAGENT_ALERT_RULES_TTL = 600  # In seconds
+PGAGENT_ALERT_WRITE_INTERVAL = 30  # In seconds
+
+# The alerts are sent over up to PGAGENT_ALERT_SMTP_POOL_SIZE SMTP
+# connections, closed once idle for PGAGENT_ALERT_SMTP_IDLE_TIMEOUT seconds.
+# An email that could not be sent is retried up to PGAGENT_ALERT_SMTP_RETRIES
+# times, after PGAGENT_ALERT_RETRY_DELAY seconds doubling on every attempt.
+PGAGENT_ALERT_SMTP_POOL_SIZE = 2
+PGAGENT_ALERT_SMTP_IDLE_TIMEOUT = 60  # In seconds
+PGAGENT_ALERT_SMTP_RETRIES = 3
+PGAGENT_ALERT_RETRY_DELAY = 30  # In seconds
+
 #############################################################################
 # Patch the default config with custom config and other manipulations
 #############################################################################
@@ -8,38 +8,43 @@
 ##########################################################################
 
 """Implements the pgAgent Jobs Node"""
-import asyncio
 from functools import wraps
 import json
-from datetime import datetime, time, timedelta
-
-import threading
-import time
-import json
-from flask import current_app
 from datetime import datetime
-from pgadmin.utils.driver import get_driver
+
 import traceback
 import functools
 import logging
-import threading
 
-from flask import render_template, request, jsonify, current_app
+from flask import render_template, request, jsonify, current_app, \
+    Response, stream_with_context
 import flask
 from flask_babel import gettext as _
-from flask_login import current_user
+from flask_socketio import join_room, leave_room
 
-from config import PG_DEFAULT_DRIVER  
+from config import PG_DEFAULT_DRIVER, PGAGENT_JOB_EXPORT_PAGE_SIZE, \
+    PGAGENT_SCHEDULE_PREVIEW_RUNS, PGAGENT_SCHEDULE_PREVIEW_MAX_RUNS, \
+    PGAGENT_EMAIL_ALERTS
 
 from pgadmin.browser.collection import CollectionNodeModule
 from pgadmin.browser.utils import PGChildNodeView
 from pgadmin.browser.server_groups import servers
 from pgadmin.utils.ajax import make_json_response, internal_server_error, \
     make_response as ajax_response, gone, success_return
+from pgadmin.utils.crypto import decrypt
 from pgadmin.utils.driver import get_driver
+from pgadmin.utils.exception import CryptKeyMissing
+from pgadmin.utils.master_password import get_crypt_key
 from pgadmin.utils.preferences import Preferences
 from pgadmin.browser.server_groups.servers.pgagent.utils \
-    import format_schedule_data, format_step_data
+    import format_schedule_data, format_steps_data, validate_import_job, \
+    preview_schedule_runs, get_bulk_args
+from pgadmin.browser.server_groups.servers.pgagent.listener \
+    import JobStatusListenerRegistry, get_server_room
+from pgadmin.browser.server_groups.servers.pgagent.alerts \
+    import AlertDispatcher
+from pgadmin.browser.server_groups.servers.pgagent.fanout \
+    import get_job_status_fanout
 from pgadmin import socketio
 
 # Configure logging
@@ -48,9 +53,6 @@ logger = logging.getLogger(__name__)
 # Define the SocketIO namespace for pgAgent
 SOCKETIO_NAMESPACE = '/pgagent'
 
-# Dictionary to store server's active listeners
-active_listeners = {}
-
 
 class JobModule(CollectionNodeModule):
     _NODE_TYPE = 'pga_job'
@@ -98,7 +100,11 @@ SELECT EXISTS(
         WHERE
             table_schema='pgagent' AND table_name='pga_jobstep' AND
             column_name='jstconnstr'
-    ) has_connstr""")
+    ) has_connstr, EXISTS(
+        SELECT 1 FROM pg_catalog.pg_class cl
+        JOIN pg_catalog.pg_namespace ns ON ns.oid = cl.relnamespace
+        WHERE cl.relname = 'pga_job_state' AND ns.nspname = 'pgagent'
+    ) has_job_state""")
 
             manager.db_info['pgAgent'] = res['rows'][0]
             return True
@@ -154,6 +160,112 @@ SELECT EXISTS(
 # SocketIO event handlers for pgAgent job status updates
 #
 ##########################################################################
+def emit_job_status(sid, event, data, rooms):
+    """
+    Emit a job status notification, or a batch of them, to the rooms of the
+    clients watching it. A client in several of the rooms receives it once.
+    """
+    socketio.emit(event, data, namespace=SOCKETIO_NAMESPACE, to=rooms)
+
+
+# Shared LISTEN connections, one per server, reference counted by clients,
+# and by the processes of pgAdmin if they share a job status broker
+job_status_listeners = JobStatusListenerRegistry(
+    emit_job_status,
+    get_job_status_fanout(AlertDispatcher() if PGAGENT_EMAIL_ALERTS else None)
+)
+
+
+def get_server_id(data):
+    """
+    Returns the server id sent by the client as an integer.
+    """
+    sid = data.get('sid', None) if isinstance(data, dict) else None
+    if isinstance(sid, str) and sid.isdigit():
+        sid = int(sid)
+    return sid
+
+
+def get_job_selection(data):
+    """
+    Returns the job ids and job class ids sent by the client, None for the
+    ones not sent.
+    """
+    def get_ids(key):
+        ids = data.get(key)
+        if ids is None:
+            return None
+        if not isinstance(ids, list):
+            raise ValueError('{0} must be a list'.format(key))
+        return [int(i) for i in ids]
+
+    return get_ids('jobs'), get_ids('job_classes')
+
+
+def get_listener_conninfo(manager):
+    """
+    Returns the connection string used by the job status listener of the
+    server. The password is decrypted here as the listener runs outside
+    of the request context.
+    """
+    password = manager.password
+    if password:
+        crypt_key_present, crypt_key = get_crypt_key()
+        if not crypt_key_present:
+            raise CryptKeyMissing()
+        password = decrypt(password, crypt_key)
+        if isinstance(password, bytes):
+            password = password.decode()
+    elif manager.passexec:
+        password = manager.passexec.get()
+
+    return manager.create_connection_string(
+        manager.db, manager.user, password
+    )
+
+
+def watch_job_alerts(sid, manager, conninfo=None):
+    """
+    Keep listening to a server whose jobs send email alerts, whether or not
+    any client is subscribed to it, and stop once none of them does. This
+    is checked when a client subscribes to the server and when its jobs are
+    saved, the connection string of the server being known then.
+    """
+    if not job_status_listeners.sends_alerts():
+        return
+
+    status, res = manager.connection().execute_scalar(
+        render_template('pga_job/sql/pre3.4/email_alerts.sql')
+    )
+    if not status:
+        current_app.logger.warning(
+            'Could not check the email alerts of the pgAgent jobs of '
+            'server %s: %s', sid, res)
+        return
+
+    if not res:
+        job_status_listeners.unwatch_alerts(sid)
+        return
+
+    try:
+        job_status_listeners.watch_alerts(
+            sid, conninfo or get_listener_conninfo(manager)
+        )
+    except CryptKeyMissing as e:
+        current_app.logger.warning(
+            'Could not listen to the email alerts of the pgAgent jobs of '
+            'server %s: %s', sid, str(e))
+
+
+def emit_listener_error(error, sid, code):
+    socketio.emit('job_status_listener_error', {
+        'error': error,
+        'server_id': sid,
+        'status': 'error',
+        'code': code
+    }, namespace=SOCKETIO_NAMESPACE, to=request.sid)
+
+
 @socketio.on('connect', namespace=SOCKETIO_NAMESPACE)
 def pgagent_connect(auth=None):
     """
@@ -205,243 +317,75 @@ def echo_test(data):
 @socketio.on('start_job_status_listener', namespace=SOCKETIO_NAMESPACE)
 def start_job_status_listener(data):
     """
-    Start a listener for pgAgent job status notifications.
-    This function is called via a Socket.IO event.
+    Subscribe the client to the pgAgent job status notifications of a
+    server. All the clients of a server share a single LISTEN connection,
+    the notifications are fanned out to them through a Socket.IO room.
     """
-    import json
-    
-    # Get the server ID from the data
-    sid = data.get('sid', None)
-    client_info = data.get('client_info', {})
+    sid = get_server_id(data)
+    client_info = data.get('client_info', {}) \
+        if isinstance(data, dict) else {}
     current_app.logger.info(
-        f"Starting job status listener for server ID {sid} from client {client_info.get('client_id', 'unknown')}"
+        '[SocketIO pgAgent] Starting job status listener for server ID %s '
+        'from client %s', sid, client_info.get('client_id', request.sid)
     )
-    
+
+    if sid is None:
+        current_app.logger.error(
+            '[SocketIO pgAgent] No server ID provided for job status listener')
+        emit_listener_error('No server ID provided', None, 'NO_SERVER_ID')
+        return
+
     try:
-        # Check if we have a server ID
-        if sid is None:
-            current_app.logger.error("No server ID provided for job status listener")
-            socketio.emit('job_status_listener_error', {
-                'error': 'No server ID provided',
-                'server_id': None,
-                'status': 'error',
-                'code': 'NO_SERVER_ID'
-            }, namespace=SOCKETIO_NAMESPACE, to=request.sid)
-            return
-        
-        # Convert to integer if it's a string
-        if isinstance(sid, str) and sid.isdigit():
-            sid = int(sid)
-            
-        # Get the server's connection manager
         manager = get_driver(PG_DEFAULT_DRIVER).connection_manager(sid)
         if not manager:
-            current_app.logger.error(f"Could not find connection manager for server ID {sid}")
-            socketio.emit('job_status_listener_error', {
-                'error': 'Server connection not found',
-                'server_id': sid,
-                'status': 'error',
-                'code': 'SERVER_NOT_FOUND'
-            }, namespace=SOCKETIO_NAMESPACE, to=request.sid)
+            current_app.logger.error(
+                '[SocketIO pgAgent] Could not find connection manager for '
+                'server ID %s', sid)
+            emit_listener_error('Server connection not found', sid,
+                                'SERVER_NOT_FOUND')
             return
-        
-        # Make sure we have a connection - explicitly use synchronous connection
-        conn = manager.connection(async_=0)
-        if not conn:
-            current_app.logger.error(f"Could not get connection for server ID {sid}")
-            socketio.emit('job_status_listener_error', {
-                'error': 'Database connection not available',
-                'server_id': sid,
-                'status': 'error',
-                'code': 'CONNECTION_ERROR'
-            }, namespace=SOCKETIO_NAMESPACE, to=request.sid)
+
+        if not manager.connection().connected():
+            emit_listener_error('Database connection not available', sid,
+                                'CONNECTION_ERROR')
             return
-        
-        # Set up a LISTEN command to listen for pgAgent job status updates
-        try:
-            # Use execute_void for more reliable execution of the LISTEN command
-            current_app.logger.info(f"Setting up LISTEN for pgAgent job status updates on server {sid}")
-            status, result = conn.execute_void("LISTEN job_status_update")
-            
-            if not status:
-                current_app.logger.error(f"Failed to execute LISTEN command: {result}")
-                socketio.emit('job_status_listener_error', {
-                    'error': f'Database error: Failed to execute LISTEN command: {result}',
-                    'server_id': sid,
-                    'status': 'error',
-                    'code': 'DB_ERROR_LISTEN_FAILED'
-                }, namespace=SOCKETIO_NAMESPACE, to=request.sid)
-                return
-                
-            # Double-check that we're actually listening
-            status, channels = conn.execute_dict("SELECT pg_listening_channels() AS channel")
-            if status and 'rows' in channels:
-                has_pgagent_channel = any(row['channel'] == 'job_status_update' for row in channels['rows'])
-                current_app.logger.info(f"LISTEN command executed. Listening on job_status_update: {has_pgagent_channel}")
-                
-                if not has_pgagent_channel:
-                    current_app.logger.warning(f"LISTEN command executed but job_status_update not in listening channels. Retrying...")
-                    # Try again
-                    conn.execute_void("LISTEN job_status_update")
-            
-            current_app.logger.info(f"Listening for pgAgent job status updates on server {sid}")
-            
-            # Store the connection in the active_listeners dict for notifications
-            if sid not in active_listeners:
-                active_listeners[sid] = {}
-            
-            # Store the connection and user for this client
-            active_listeners[sid][request.sid] = {
-                'conn': conn, 
-                'user': current_user._get_current_object(),
-                'server_info': {
+
+        join_room(get_server_room(sid))
+        conninfo = get_listener_conninfo(manager)
+        listener = job_status_listeners.subscribe(sid, request.sid, conninfo)
+        watch_job_alerts(sid, manager, conninfo)
+
+        socketio.emit('job_status_listener_started', {
+            'status': 'success',
+            'server_id': sid,
+            'message': 'Job status listener started successfully',
+            'listener_info': {
                 'server_id': sid,
                 'client_id': client_info.get('client_id', request.sid),
                 'socket_id': request.sid,
-                'started_at': datetime.now().isoformat()
-                }
-            }
-            
-            # Run async function in a new thread
-            async def check_notifications(app, sid, client_sid):
-                """
-                Background thread to listen for pgAgent job status updates using raw PostgreSQL connection.
-                
-                Args:
-                    app: Flask application context
-                    sid: Server ID
-                """
-                max_retries = 3
-                retry_delay = 5  # seconds
-                retry_count = 0
-                
-                while retry_count < max_retries:
-                    try:
-                        with app.app_context():                            
-                            # Get server from model
-                            from pgadmin.model import Server
-                            server = Server.query.filter_by(id=sid).first()
-                            
-                            if not server:
-                                logger.error(f"Server with ID {sid} not found")
-                                return
-                                
-                            # Create raw connection using psycopg
-                            import psycopg
-                            from psycopg.conninfo import make_conninfo
-                            
-                            # Build connection string from server details
-                            conninfo = make_conninfo(
-                                dbname=server.maintenance_db,
-                                user=server.username,
-                                password=server.password,
-                                host=server.host,
-                                port=server.port,
-                                sslmode=server.ssl_mode if hasattr(server, 'ssl_mode') else None
-                            )
-                            
-                            # Create async connection
-                            async with await psycopg.AsyncConnection.connect(conninfo) as conn:
-                                # Set up notification listener
-                                async with conn.cursor() as cur:
-                                    await cur.execute("LISTEN job_status_update")
-                                    await conn.commit() 
-                                    logger.info(f"Listening for pgAgent job updates on server {sid}")
-                                
-                                # Reset retry count on successful connection
-                                retry_count = 0
-                                while True:
-                                    logger.info(f"Checking for pgAgent job updates on server {sid}")
-                                    # Process notifications
-                                    async for notify in conn.notifies():
-                                        logger.info(f"Received pgAgent job update notification: {notify}")
-                                        try:
-                                            # Parse notification payload
-                                            payload = json.loads(notify.payload)
-                                            payload['sid'] = sid
-                                            try:
-                                                socketio.emit('job_status_update', 
-                                                    payload,
-                                                    namespace=SOCKETIO_NAMESPACE, 
-                                                    to=client_sid)
-                                            except Exception as e:
-                                                    logger.error('[SocketIO pgAgent] Error emitting job status update: %s', str(e))
-                                        except json.JSONDecodeError as e:
-                                            logger.error(f"Error parsing notification payload: {e}")
-                                        except Exception as e:
-                                            logger.error(f"Error processing notification: {e}")
-                                        
-                    except Exception as e:
-                        retry_count += 1
-                        logger.error(f"Error in notification listener (attempt {retry_count}/{max_retries}): {e}")
-                        logger.error(traceback.format_exc())
-                        
-                        if retry_count < max_retries:
-                            logger.info(f"Retrying connection in {retry_delay} seconds...")
-                            await asyncio.sleep(retry_delay)
-                        else:
-                            logger.error("Max retries exceeded. Stopping notification listener.")
-                            break
-                            
-                logger.info(f"Notification listener stopped for server {sid}")
-
-            def start_job_status_listener(app, sid, client_sid):
-                """Start the notification listener in a new event loop"""
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    loop.run_until_complete(check_notifications(app, sid, client_sid))
-                except Exception as e:
-                    logger.error(f"Error in notification listener thread: {e}")
-                    logger.error(traceback.format_exc())
-                finally:
-                    loop.close()
-
-            client_sid = request.sid
-            thread = threading.Thread(
-                target=start_job_status_listener, 
-                args=(current_app._get_current_object(), sid, client_sid), 
-                daemon=True
-            )
-            thread.start()
+                'started_at': listener.started_at.isoformat(),
+                'client_count': job_status_listeners.client_count(sid)
+            },
+            # Latest job state received by the shared listener, so that the
+            # client does not need to query it.
+            'job_state': job_status_listeners.get_state(sid)
+        }, namespace=SOCKETIO_NAMESPACE, to=request.sid)
 
-            
-            # Send success response to client
-            socketio.emit('job_status_listener_started', {
-                'status': 'success',
-                'server_id': sid,
-                'message': 'Job status listener started successfully',
-                'listener_info': active_listeners[sid][request.sid]['server_info']
-            }, namespace=SOCKETIO_NAMESPACE, to=request.sid)
-            
-            current_app.logger.info(f"Job status listener started for server {sid}, client {request.sid}")
-            
-        except Exception as e:
-            # Handle specific database errors
-            error_msg = str(e)
-            error_code = getattr(e, 'pgcode', 'UNKNOWN_ERROR')
-            current_app.logger.error(f"Database error setting up job status listener: {error_msg}")
-            current_app.logger.error(traceback.format_exc())
-            
-            socketio.emit('job_status_listener_error', {
-                'error': f"Database error: {error_msg}",
-                'server_id': sid,
-                'status': 'error',
-                'code': f'DB_ERROR_{error_code}'
-            }, namespace=SOCKETIO_NAMESPACE, to=request.sid)
-            
+        current_app.logger.info(
+            '[SocketIO pgAgent] Job status listener started for server %s, '
+            'client %s', sid, request.sid)
+
+    except CryptKeyMissing as e:
+        current_app.logger.error(
+            '[SocketIO pgAgent] Crypto key missing error: %s', str(e))
+        emit_listener_error(str(e), sid, 'CRYPTKEY_MISSING')
     except Exception as e:
-        # Log the full exception details for debugging
-        current_app.logger.error(f"Error starting job status listener: {str(e)}")
+        current_app.logger.error(
+            '[SocketIO pgAgent] Error starting job status listener: %s',
+            str(e))
         current_app.logger.error(traceback.format_exc())
-        
-        socketio.emit('job_status_listener_error', {
-            'error': f"Server error: {str(e)}",
-            'server_id': sid if 'sid' in locals() else None,
-            'status': 'error',
-            'code': 'SERVER_ERROR'
-        }, namespace=SOCKETIO_NAMESPACE, to=request.sid)
-
+        emit_listener_error('Server error: {0}'.format(str(e)), sid,
+                            'SERVER_ERROR')
 
 
 @socketio.on('stop_job_status_listener', namespace=SOCKETIO_NAMESPACE)
@@ -451,45 +395,21 @@ def stop_job_status_listener(data):
     """
     current_app.logger.info('📢[SocketIO pgAgent] Stopping job status listener for client: %s', request.sid)
     current_app.logger.debug('📢[SocketIO pgAgent] Request data: %s', str(data))
-    
+
     try:
-        sid = data.get('sid')
+        sid = get_server_id(data)
         if not sid:
             current_app.logger.warning('📢[SocketIO pgAgent] No server ID provided for stop_job_status_listener')
             return
-            
-        current_app.logger.debug('📢[SocketIO pgAgent] Active listeners before stopping: %s', 
-                       str({k: list(v.keys()) for k, v in active_listeners.items()}))
-            
-        if sid not in active_listeners:
-            current_app.logger.debug('📢[SocketIO pgAgent] No active listeners found for server: %s', sid)
+
+        for room in job_status_listeners.unsubscribe_jobs(
+                sid, request.sid)[1]:
+            leave_room(room)
+        leave_room(get_server_room(sid))
+        if not job_status_listeners.unsubscribe(sid, request.sid):
+            current_app.logger.debug('📢[SocketIO pgAgent] No active listener found for server: %s', sid)
             return
-            
-        if request.sid in active_listeners[sid]:
-            conn = active_listeners[sid][request.sid]['conn']
-            try:
-                current_app.logger.debug('📢[SocketIO pgAgent] Issuing UNLISTEN command for server: %s', sid)
-                status, result = conn.execute_void("UNLISTEN job_status_update")
-                current_app.logger.info('📢[SocketIO pgAgent] UNLISTEN command issued for job_status_update on server: %s (Status: %s)', 
-                              sid, status)
-                if not status:
-                    current_app.logger.warning('📢[SocketIO pgAgent] Failed to execute UNLISTEN command: %s', str(result))
-            except Exception as e:
-                current_app.logger.warning('📢[SocketIO pgAgent] Error issuing UNLISTEN command: %s', str(e))
-                current_app.logger.debug('📢[SocketIO pgAgent] Exception details: %s', traceback.format_exc())
-                
-            del active_listeners[sid][request.sid]
-            current_app.logger.info('📢[SocketIO pgAgent] Removed client %s from active listeners for server %s', 
-                          request.sid, sid)
-            
-            # Clean up if no more listeners for this server
-            if not active_listeners[sid]:
-                del active_listeners[sid]
-                current_app.logger.info('📢[SocketIO pgAgent] No more active listeners for server %s, removed server entry', sid)
-                
-        current_app.logger.debug('📢[SocketIO pgAgent] Active listeners after stopping: %s', 
-                       str({k: list(v.keys()) for k, v in active_listeners.items()}))
-                
+
         socketio.emit('job_status_listener_stopped', 
                      {'sid': sid},
                      namespace=SOCKETIO_NAMESPACE, 
@@ -504,84 +424,84 @@ def stop_job_status_listener(data):
                      namespace=SOCKETIO_NAMESPACE, 
                      to=request.sid)
 
+
+def update_job_rooms(rooms):
+    join, leave = rooms
+    # Joined first, so that no notification is missed in between
+    for room in join:
+        join_room(room)
+    for room in leave:
+        leave_room(room)
+
+
+@socketio.on('subscribe_jobs', namespace=SOCKETIO_NAMESPACE)
+def subscribe_jobs(data):
+    """
+    Only send the client the notifications of some jobs and job classes of
+    a server it listens to, through their rooms. The client is sent the
+    jobs and job classes it watches.
+    """
+    sid = get_server_id(data)
+    try:
+        jobs, job_classes = get_job_selection(data)
+    except (AttributeError, TypeError, ValueError) as e:
+        return {'status': 'error', 'server_id': sid, 'error': str(e),
+                'code': 'INVALID_SELECTION'}
+
+    rooms = job_status_listeners.subscribe_jobs(sid, request.sid, jobs,
+                                                job_classes)
+    if rooms is None:
+        return {'status': 'error', 'server_id': sid,
+                'error': 'Job status listener not started',
+                'code': 'NOT_LISTENING'}
+
+    update_job_rooms(rooms)
+    return dict(
+        job_status_listeners.routes.get_selection(sid, request.sid),
+        status='success', server_id=sid
+    )
+
+
+@socketio.on('unsubscribe_jobs', namespace=SOCKETIO_NAMESPACE)
+def unsubscribe_jobs(data):
+    """
+    Stop watching some jobs and job classes of a server, all of them if
+    none is sent. The client watching nothing receives all the
+    notifications of the server again.
+    """
+    sid = get_server_id(data)
+    try:
+        jobs, job_classes = get_job_selection(data)
+    except (AttributeError, TypeError, ValueError) as e:
+        return {'status': 'error', 'server_id': sid, 'error': str(e),
+                'code': 'INVALID_SELECTION'}
+
+    update_job_rooms(job_status_listeners.unsubscribe_jobs(
+        sid, request.sid, jobs, job_classes))
+    return dict(
+        job_status_listeners.routes.get_selection(sid, request.sid),
+        status='success', server_id=sid
+    )
+
+
 @socketio.on('disconnect', namespace=SOCKETIO_NAMESPACE)
 def handle_client_disconnect(event=None):
     """
-    Handle client disconnection
+    Handle client disconnection. Socket.IO removes the client from its
+    rooms, we only need to release its listener subscriptions.
     """
-    # Import for exception handling
-    from pgadmin.utils.exception import CryptKeyMissing
-    
     client_sid = request.sid if hasattr(request, 'sid') else None
     current_app.logger.info('📢[SocketIO pgAgent] Client disconnected: %s', client_sid)
-    
-    # If no client SID, we can't clean up
+
     if not client_sid:
         current_app.logger.warning('📢[SocketIO pgAgent] No client SID available for disconnect cleanup')
         return
-    
-    client_servers = []
-    
-    # Find all servers this client was listening to
-    for sid in list(active_listeners.keys()):
-        if client_sid in active_listeners[sid]:
-            client_servers.append((sid, active_listeners[sid][client_sid]['conn']))
-    
-    if not client_servers:
-        current_app.logger.info('📢[SocketIO pgAgent] No active listeners found for client %s', client_sid)
-        return
-    
-    current_app.logger.info('📢[SocketIO pgAgent] Cleaning up %d active listeners for client %s', 
-                      len(client_servers), client_sid)
-    
-    # Clean up each connection
-    for sid, conn in client_servers:
-        try:
-            if conn and hasattr(conn, 'connected') and conn.connected():
-                current_app.logger.info('📢[SocketIO pgAgent] Closing connection for server %s, client %s', 
-                                  sid, client_sid)
-                
-                try:
-                    # Try to execute UNLISTEN
-                    conn.execute_dict("UNLISTEN job_status_update")
-                except CryptKeyMissing as e:
-                    current_app.logger.error('❌ [SocketIO pgAgent] Crypto key missing error during UNLISTEN: %s', str(e))
-                    current_app.logger.debug('This typically occurs when a background thread cannot access the master password')
-                except Exception as e:
-                    current_app.logger.warning('📢[SocketIO pgAgent] Error during UNLISTEN: %s', str(e))
-                
-                try:
-                    # Close the connection if it has a close method
-                    if hasattr(conn, 'close'):
-                        conn.close()
-                    elif hasattr(conn, 'release'):
-                        conn.release()
-                    else:
-                        current_app.logger.warning('📢[SocketIO pgAgent] Connection object has no close or release method')
-                except Exception as e:
-                    current_app.logger.warning('📢[SocketIO pgAgent] Error closing connection: %s', str(e))
-            
-            # Remove from active listeners dict
-            if sid in active_listeners and client_sid in active_listeners[sid]:
-                del active_listeners[sid][client_sid]
-                
-                # If no more clients for this server, clean up the server entry
-                if not active_listeners[sid]:
-                    del active_listeners[sid]
-                
-                current_app.logger.info('📢[SocketIO pgAgent] Removed listener for server %s, client %s', 
-                                  sid, client_sid)
-            
-        except CryptKeyMissing as e:
-            current_app.logger.error('❌ [SocketIO pgAgent] Crypto key missing error during disconnect cleanup: %s', str(e))
-            current_app.logger.debug('This typically occurs when a background thread cannot access the master password')
-        except Exception as e:
-            current_app.logger.error('📢[SocketIO pgAgent] Error cleaning up listener: %s', str(e))
-    
-    # Log the remaining active listeners for debugging
-    remaining_listeners = sum(len(clients) for clients in active_listeners.values())
-    current_app.logger.info('📢[SocketIO pgAgent] Disconnect cleanup complete. %d remaining active listeners', 
-                      remaining_listeners)
+
+    servers = job_status_listeners.unsubscribe_client(client_sid)
+    current_app.logger.info(
+        '📢[SocketIO pgAgent] Released %d job status subscriptions for '
+        'client %s', len(servers), client_sid)
+
 
 def with_app_context(func):
     """Decorator to ensure function runs in application context"""
@@ -615,56 +535,27 @@ def get_active_listeners():
     Return information about all active Socket.IO listeners for pgAgent
     This is useful for debugging Socket.IO connection issues
     """
-    from flask import current_app
-    
     # Only allow in DEBUG mode
     if not current_app.debug:
         return make_json_response(
             success=0,
             errormsg="This endpoint is only available in DEBUG mode"
         )
-    
-    listener_info = {}
+
     try:
-        # Collect information about active listeners
-        for server_id, clients in active_listeners.items():
-            listener_info[server_id] = {
-                'client_count': len(clients),
-                'clients': []
-            }
-            
-            for client_id, conn_user in clients.items():
-                connection_status = 'unknown'
-                if conn_user['conn']:
-                    try:
-                        connection_status = 'connected' if conn_user['conn'].connected() else 'disconnected'
-                    except Exception as e:
-                        connection_status = f'error: {str(e)}'
-                
-                # Get socketio client info
-                socket_connected = False
-                try:
-                    socket_connected = socketio.server.manager.is_connected(
-                        client_id, namespace=SOCKETIO_NAMESPACE
-                    )
-                except Exception as e:
-                    current_app.logger.error(
-                        f'📢[SocketIO pgAgent] Error checking client connection: {str(e)}'
-                    )
-                
-                listener_info[server_id]['clients'].append({
-                    'client_id': client_id,
-                    'db_connection_status': connection_status,
-                    'socket_connected': socket_connected,
-                    'timestamp': datetime.now().isoformat()
-                })
-        
+        listener_info = job_status_listeners.get_info()
+
+        # Add the notification hub counters
+        listener_info['_hub_stats'] = job_status_listeners.get_stats()
+
         # Add global SocketIO stats
         listener_info['_socketio_stats'] = {
-            'connected_clients': len(socketio.server.manager.get_participants(SOCKETIO_NAMESPACE)),
-            'total_server_clients': socketio.server.manager.socket_count,
+            'connected_clients': len(list(
+                socketio.server.manager.get_participants(
+                    SOCKETIO_NAMESPACE, None)
+            )),
         }
-        
+
         return make_json_response(
             data=listener_info,
             status=200
@@ -698,6 +589,10 @@ class JobView(PGChildNodeView):
         'msql': [{'get': 'msql'}, {'get': 'msql'}],
         'run_now': [{'put': 'run_now'}],
         'classes': [{}, {'get': 'job_classes'}],
+        'enable': [{}, {'put': 'enable'}],
+        'import': [{}, {'post': 'import_jobs'}],
+        'export': [{}, {'get': 'export_jobs'}],
+        'calendar': [{}, {'get': 'calendar'}],
         'children': [{'get': 'children'}],
         'stats': [{'get': 'statistics'}]
     })
@@ -729,7 +624,11 @@ SELECT EXISTS(
         WHERE
             table_schema='pgagent' AND table_name='pga_jobstep' AND
             column_name='jstconnstr'
-    ) has_connstr""")
+    ) has_connstr, EXISTS(
+        SELECT 1 FROM pg_catalog.pg_class cl
+        JOIN pg_catalog.pg_namespace ns ON ns.oid = cl.relnamespace
+        WHERE cl.relname = 'pga_job_state' AND ns.nspname = 'pgagent'
+    ) has_job_state""")
 
                 self.manager.db_info['pgAgent'] = res['rows'][0]
 
@@ -782,67 +681,54 @@ SELECT EXISTS(
             status=200
         )
 
-    @check_precondition
-    def properties(self, gid, sid, jid=None):
-        SQL = render_template(
-            "/".join([self.template_path, self._PROPERTIES_SQL]),
-            jid=jid, conn=self.conn
+    def get_job_definition(self, jid):
+        """
+        Returns the job with its steps and schedules, read with a single
+        query. The schedule exceptions are in 'jscexceptions' of every
+        schedule.
+        """
+        status, res = self.conn.execute_scalar(
+            render_template(
+                "/".join([self.template_path, 'definition.sql']),
+                jid=jid, conn=self.conn,
+                has_connstr=self.manager.db_info['pgAgent']['has_connstr']
+            )
         )
-        status, rset = self.conn.execute_dict(SQL)
+        if not status or res is None:
+            return status, res
 
-        if not status:
-            return internal_server_error(errormsg=rset)
+        return True, json.loads(res)
 
+    @check_precondition
+    def properties(self, gid, sid, jid=None):
         if jid is not None:
-            if len(rset['rows']) != 1:
+            status, res = self.get_job_definition(jid)
+            if not status:
+                return internal_server_error(errormsg=res)
+            if res is None:
                 return gone(
                     errormsg=_(
                         "Could not find the pgAgent job on the server."
                     )
                 )
-            res = rset['rows'][0]
-            status, rset = self.conn.execute_dict(
-                render_template(
-                    "/".join([self.template_path, 'steps.sql']),
-                    jid=jid, conn=self.conn,
-                    has_connstr=self.manager.db_info['pgAgent']['has_connstr']
-                )
-            )
-            if not status:
-                return internal_server_error(errormsg=rset)
-            res['jsteps'] = rset['rows']
-            status, rset = self.conn.execute_dict(
-                render_template(
-                    "/".join([self.template_path, 'schedules.sql']),
-                    jid=jid, conn=self.conn
-                )
+
+            return ajax_response(
+                response=res,
+                status=200
             )
-            if not status:
-                return internal_server_error(errormsg=rset)
-
-            # Create jscexceptions in the correct format that React control
-            # required.
-            for schedule in rset['rows']:
-                if 'jexid' in schedule and schedule['jexid'] is not None \
-                        and len(schedule['jexid']) > 0:
-                    schedule['jscexceptions'] = []
-                    index = 0
-                    for exid in schedule['jexid']:
-                        schedule['jscexceptions'].append(
-                            {'jexid': exid,
-                             'jexdate': schedule['jexdate'][index],
-                             'jextime': schedule['jextime'][index]
-                             }
-                        )
-
-                        index += 1
-
-            res['jschedules'] = rset['rows']
-        else:
-            res = rset['rows']
+
+        SQL = render_template(
+            "/".join([self.template_path, self._PROPERTIES_SQL]),
+            jid=jid, conn=self.conn,
+            has_job_state=self.manager.db_info['pgAgent']['has_job_state']
+        )
+        status, rset = self.conn.execute_dict(SQL)
+
+        if not status:
+            return internal_server_error(errormsg=rset)
 
         return ajax_response(
-            response=res,
+            response=rset['rows'],
             status=200
         )
 
@@ -895,6 +781,7 @@ SELECT EXISTS(
         if not status:
             return internal_server_error(errormsg=res)
 
+        watch_job_alerts(sid, self.manager)
         row = res['rows'][0]
 
         return jsonify(
@@ -916,7 +803,9 @@ SELECT EXISTS(
         )
 
         # Format the schedule and step data
-        self.format_schedule_step_data(data)
+        status, res = self.format_schedule_step_data(data, jid)
+        if not status:
+            return internal_server_error(errormsg=res)
 
         status, res = self.conn.execute_void(
             render_template(
@@ -940,6 +829,7 @@ SELECT EXISTS(
         if not status:
             return internal_server_error(errormsg=res)
 
+        watch_job_alerts(sid, self.manager)
         row = res['rows'][0]
 
         return jsonify(
@@ -961,21 +851,226 @@ SELECT EXISTS(
             data = request.form if request.form else json.loads(
                 request.data
             )
+            try:
+                ids = get_bulk_args(data)[0]
+            except ValueError as e:
+                return make_json_response(
+                    status=400,
+                    success=0,
+                    errormsg=str(e)
+                )
         else:
-            data = {'ids': [jid]}
+            ids = [jid]
 
-        for jid in data['ids']:
-            status, res = self.conn.execute_void(
-                render_template(
-                    "/".join([self.template_path, self._DELETE_SQL]),
-                    jid=jid, conn=self.conn
-                )
+        # All the jobs are deleted by a single statement
+        status, res = self.conn.execute_void(
+            render_template(
+                "/".join([self.template_path, self._DELETE_SQL]),
+                jids=ids, conn=self.conn
             )
-            if not status:
-                return internal_server_error(errormsg=res)
+        )
+        if not status:
+            return internal_server_error(errormsg=res)
 
+        watch_job_alerts(sid, self.manager)
         return make_json_response(success=1)
 
+    @check_precondition
+    def enable(self, gid, sid):
+        """
+        Enable or disable the pgAgent jobs given by 'ids' with a single
+        statement, according to 'jobenabled'.
+        """
+        data = request.form if request.form else json.loads(
+            request.data.decode('utf-8')
+        )
+
+        for arg in ('ids', 'jobenabled'):
+            if arg not in data:
+                return make_json_response(
+                    status=410,
+                    success=0,
+                    errormsg=_(
+                        "Could not find the required parameter ({})."
+                    ).format(arg)
+                )
+
+        try:
+            ids, enabled = get_bulk_args(data, 'jobenabled')
+        except ValueError as e:
+            return make_json_response(
+                status=400,
+                success=0,
+                errormsg=str(e)
+            )
+
+        status, res = self.conn.execute_dict(
+            render_template(
+                "/".join([self.template_path, 'enable.sql']),
+                jids=ids, enabled=enabled, conn=self.conn
+            )
+        )
+        if not status:
+            return internal_server_error(errormsg=res)
+
+        return make_json_response(
+            data=[
+                self.blueprint.generate_browser_node(
+                    row['jobid'],
+                    sid,
+                    row['jobname'],
+                    "icon-pga_job" if row['jobenabled'] else
+                    "icon-pga_job-disabled",
+                    description=row['jobdesc']
+                ) for row in res['rows']
+            ],
+            status=200
+        )
+
+    @check_precondition
+    def import_jobs(self, gid, sid):
+        """
+        Create the pgAgent jobs of a bulk import, with their steps,
+        schedules and notification settings. The request body is a JSON
+        list of jobs, a JSON object with the 'jobs' list, or newline
+        delimited JSON as returned by export_jobs.
+
+        All the jobs are validated before any of them is inserted, then
+        they are inserted by a single statement, so either all of them are
+        created or none is.
+        """
+        body = request.data.decode('utf-8')
+        try:
+            if request.mimetype == 'application/x-ndjson':
+                jobs = [json.loads(line) for line in body.splitlines()
+                        if line.strip()]
+            else:
+                jobs = json.loads(body)
+                if isinstance(jobs, dict):
+                    jobs = jobs.get('jobs')
+        except ValueError as e:
+            return make_json_response(
+                success=0,
+                errormsg=_("Invalid job import document: {0}").format(
+                    str(e)),
+                status=400
+            )
+
+        if not isinstance(jobs, list) or len(jobs) == 0:
+            return make_json_response(
+                success=0,
+                errormsg=_("The job import document has no jobs."),
+                status=400
+            )
+
+        has_connstr = self.manager.db_info['pgAgent']['has_connstr']
+        valid_jobs = []
+        for idx, job in enumerate(jobs):
+            try:
+                valid_jobs.append(validate_import_job(job, has_connstr))
+            except ValueError as e:
+                name = job.get('jobname') if isinstance(job, dict) else None
+                return make_json_response(
+                    success=0,
+                    errormsg=_("Job {0} ({1}): {2}").format(
+                        idx + 1, name, str(e)),
+                    status=400
+                )
+
+        status, res = self.conn.execute_dict(
+            render_template(
+                "/".join([self.template_path, 'import.sql']),
+                jobs=json.dumps(valid_jobs), conn=self.conn,
+                has_connstr=has_connstr
+            )
+        )
+        if not status:
+            return internal_server_error(errormsg=res)
+
+        watch_job_alerts(sid, self.manager)
+        return make_json_response(
+            data={'jobids': [row['jobid'] for row in res['rows']]},
+            status=200
+        )
+
+    @check_precondition
+    def export_jobs(self, gid, sid):
+        """
+        Stream all the pgAgent jobs, with their steps, schedules and
+        notification settings, as newline delimited JSON, one job per
+        line. The jobs are read PGAGENT_JOB_EXPORT_PAGE_SIZE at a time, so
+        that only one page is held in memory.
+        """
+        def stream_jobs():
+            after_id = None
+            while True:
+                status, res = self.conn.execute_dict(
+                    render_template(
+                        "/".join([self.template_path, 'definition.sql']),
+                        after_id=after_id, conn=self.conn,
+                        limit=PGAGENT_JOB_EXPORT_PAGE_SIZE,
+                        has_connstr=self.manager.db_info['pgAgent'][
+                            'has_connstr']
+                    )
+                )
+                if not status:
+                    yield json.dumps({'error': res}) + '\n'
+                    return
+
+                for row in res['rows']:
+                    # json_agg output spans lines
+                    yield json.dumps(json.loads(row['job'])) + '\n'
+
+                if len(res['rows']) < PGAGENT_JOB_EXPORT_PAGE_SIZE:
+                    return
+                after_id = res['rows'][-1]['jobid']
+
+        return Response(
+            stream_with_context(stream_jobs()),
+            mimetype='application/x-ndjson'
+        )
+
+    @check_precondition
+    def calendar(self, gid, sid):
+        """
+        Returns the upcoming runs of all the enabled schedules of the
+        enabled pgAgent jobs, 'count' runs per schedule, in time order. The
+        runs are computed by the Python schedule engine, in the time zone
+        of the server, which is returned with them.
+        """
+        try:
+            count = int(
+                request.args.get('count', PGAGENT_SCHEDULE_PREVIEW_RUNS))
+        except ValueError:
+            count = 0
+        if not 0 < count <= PGAGENT_SCHEDULE_PREVIEW_MAX_RUNS:
+            return make_json_response(
+                success=0,
+                errormsg=_("Invalid run count."),
+                status=400
+            )
+
+        status, res = preview_schedule_runs(self.conn, count)
+        if not status:
+            return internal_server_error(errormsg=res)
+
+        runs = [
+            {
+                'time': run,
+                'jobid': schedule['jscjobid'],
+                'jobname': schedule['jobname'],
+                'jscid': schedule['jscid'],
+                'jscname': schedule['jscname']
+            }
+            for schedule in res['schedules'] for run in schedule['runs']
+        ]
+        runs.sort(key=lambda run: (run['time'], run['jobid'], run['jscid']))
+
+        return make_json_response(
+            data={'timezone': res['timezone'], 'runs': runs},
+            status=200
+        )
+
     @check_precondition
     def msql(self, gid, sid, jid=None):
         """
@@ -991,7 +1086,9 @@ SELECT EXISTS(
                 data[k] = v
 
         # Format the schedule and step data
-        self.format_schedule_step_data(data)
+        status, res = self.format_schedule_step_data(data, jid)
+        if not status:
+            return internal_server_error(errormsg=res)
 
         return make_json_response(
             data=render_template(
@@ -1012,7 +1109,21 @@ SELECT EXISTS(
         Returns the statistics for a particular database if jid is specified,
         otherwise it will return statistics for all the databases in that
         server.
+
+        The runs are returned newest first, pgagent_row_threshold at a time.
+        The next page starts before the 'before_id' request argument, the
+        last run id of the previous page.
         """
+        try:
+            before_id = int(request.args['before_id']) \
+                if request.args.get('before_id') else None
+        except ValueError:
+            return make_json_response(
+                success=0,
+                errormsg=_("Invalid run id."),
+                status=400
+            )
+
         pref = Preferences.module('browser')
         rows_threshold = pref.preference(
             'pgagent_row_threshold'
@@ -1022,7 +1133,8 @@ SELECT EXISTS(
             render_template(
                 "/".join([self.template_path, 'stats.sql']),
                 jid=jid, conn=self.conn,
-                rows_threshold=rows_threshold.get()
+                rows_threshold=rows_threshold.get(),
+                before_id=before_id
             )
         )
 
@@ -1039,62 +1151,15 @@ SELECT EXISTS(
         """
         This function will generate sql for sql panel
         """
-        SQL = render_template(
-            "/".join([self.template_path, self._PROPERTIES_SQL]),
-            jid=jid, conn=self.conn, last_system_oid=0
-        )
-        status, res = self.conn.execute_dict(SQL)
+        status, row = self.get_job_definition(jid)
         if not status:
-            return internal_server_error(errormsg=res)
+            return internal_server_error(errormsg=row)
 
-        if len(res['rows']) == 0:
+        if row is None:
             return gone(
                 _("Could not find the object on the server.")
             )
 
-        row = res['rows'][0]
-
-        status, res = self.conn.execute_dict(
-            render_template(
-                "/".join([self.template_path, 'steps.sql']),
-                jid=jid, conn=self.conn,
-                has_connstr=self.manager.db_info['pgAgent']['has_connstr']
-            )
-        )
-        if not status:
-            return internal_server_error(errormsg=res)
-
-        row['jsteps'] = res['rows']
-
-        status, res = self.conn.execute_dict(
-            render_template(
-                "/".join([self.template_path, 'schedules.sql']),
-                jid=jid, conn=self.conn
-            )
-        )
-        if not status:
-            return internal_server_error(errormsg=res)
-
-        row['jschedules'] = res['rows']
-        for schedule in row['jschedules']:
-            schedule['jscexceptions'] = []
-            if schedule['jexid']:
-                idx = 0
-                for exc in schedule['jexid']:
-                    # Convert datetime.time object to string
-                    if isinstance(schedule['jextime'][idx], time):
-                        schedule['jextime'][idx] = \
-                            schedule['jextime'][idx].strftime("%H:%M:%S")
-                    schedule['jscexceptions'].append({
-                        'jexid': exc,
-                        'jexdate': schedule['jexdate'][idx],
-                        'jextime': schedule['jextime'][idx]
-                    })
-                    idx += 1
-            del schedule['jexid']
-            del schedule['jexdate']
-            del schedule['jextime']
-
         return ajax_response(
             response=render_template(
                 "/".join([self.template_path, self._CREATE_SQL]),
@@ -1139,11 +1204,12 @@ SELECT EXISTS(
             status=200
         )
 
-    def format_schedule_step_data(self, data):
+    def format_schedule_step_data(self, data, jid):
         """
         This function is used to format the schedule and step data.
         :param data:
-        :return:
+        :param jid: Job ID
+        :return: (status, error message)
         """
         # Format the schedule data. Convert the boolean array
         jschedules = data.get('jschedules', {})
@@ -1153,14 +1219,13 @@ SELECT EXISTS(
             for schedule in jschedules.get('changed', []):
                 format_schedule_data(schedule)
 
-        has_connection_str = self.manager.db_info['pgAgent']['has_connstr']
         jssteps = data.get('jsteps', {})
-        if isinstance(jssteps, dict):
-            for changed_step in jssteps.get('changed', []):
-                status, res = format_step_data(
-                    data['jobid'], changed_step, has_connection_str,
-                    self.conn, self.template_path)
-                if not status:
-                    internal_server_error(errormsg=res)
+        if isinstance(jssteps, dict) and jssteps.get('changed'):
+            return format_steps_data(
+                jid, jssteps['changed'],
+                self.manager.db_info['pgAgent']['has_connstr'],
+                self.conn, self.template_path)
+
+        return True, None
 
 JobView.register_node_view(blueprint)
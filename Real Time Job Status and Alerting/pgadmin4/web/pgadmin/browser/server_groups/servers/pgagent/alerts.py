@@ -0,0 +1,732 @@
+##########################################################################
+#
+# pgAdmin 4 - PostgreSQL Tools
+#
+# Copyright (C) 2013 - 2025, The pgAdmin Development Team
+# This software is released under the PostgreSQL Licence
+#
+##########################################################################
+
+"""Batched email alerts for the pgAgent job status notifications"""
+
+import heapq
+import itertools
+import logging
+import queue
+import re
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.message import EmailMessage
+
+import psycopg
+from psycopg.rows import dict_row
+
+import config
+
+# Job statuses alerted for every value of jnwhen, None for all of them
+ALERT_STATUSES = {
+    'a': None,
+    'b': ('s', 'f'),
+    's': ('s',),
+    'f': ('f',),
+}
+
+STATUS_LABELS = {
+    's': 'Succeeded',
+    'f': 'Failed',
+}
+
+# Timeout of the SMTP connections
+SMTP_TIMEOUT = 30  # In seconds
+
+logger = logging.getLogger(__name__)
+
+
+class AlertRule:
+    """
+    Notification settings of a job, as stored in pga_job_notification. A
+    job without any row gets the defaults of the table, which never sends
+    an email.
+    """
+
+    def __init__(self, jobid, enabled=True, email=False, when='f',
+                 mininterval=0, recipients='', customtext='',
+                 lastnotification=None):
+        self.jobid = jobid
+        self.enabled = enabled
+        self.email = email
+        self.when = when
+        self.mininterval = mininterval
+        self.recipients = recipients
+        self.customtext = customtext
+        self.lastnotification = lastnotification
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row['jnjobid'], row['jnenabled'], row['jnemail'],
+                   row['jnwhen'], row['jnmininterval'],
+                   row['jnemailrecipients'], row['jncustomtext'],
+                   row['jnlastnotification'])
+
+    def matches(self, status):
+        """Returns True if an email is sent for the status of the job"""
+        if not self.enabled or not self.email:
+            return False
+        statuses = ALERT_STATUSES.get(self.when, ())
+        return statuses is None or status in statuses
+
+    def throttled(self, now):
+        """
+        Returns True if the latest alert of the job is more recent than the
+        minimum interval between two alerts.
+        """
+        if not self.mininterval or self.lastnotification is None:
+            return False
+        return (now - self.lastnotification).total_seconds() < \
+            self.mininterval
+
+    def recipient_list(self):
+        """
+        Returns the recipients of the job, or the default ones of pgAdmin
+        if the job has none.
+        """
+        recipients = [r for r in re.split(r'[,;\s]+', self.recipients or '')
+                      if r]
+        return recipients or list(config.PGAGENT_ALERT_RECIPIENTS)
+
+
+class JobAlert:
+    """A job status notification for which an email is sent"""
+
+    def __init__(self, sid, payload, customtext=''):
+        job = payload.get('job') or {}
+        self.sid = sid
+        self.jobid = payload.get('job_id')
+        self.jobname = job.get('jobname') or str(self.jobid)
+        self.status = payload.get('status')
+        self.description = payload.get('description') or ''
+        self.timestamp = payload.get('timestamp') or ''
+        self.customtext = customtext
+
+    def format(self):
+        lines = ['[{0}] Server {1}, job "{2}" ({3}): {4}'.format(
+            self.timestamp, self.sid, self.jobname, self.jobid,
+            STATUS_LABELS.get(self.status, self.status)
+        )]
+        if self.description:
+            lines.append('    ' + self.description)
+        if self.customtext:
+            lines.append('    ' + self.customtext)
+        return '\n'.join(lines)
+
+
+class AlertDigest:
+    """
+    Alerts of a recipient received within the batch window, sent as a
+    single email. Past PGAGENT_ALERT_DIGEST_MAX_ALERTS alerts, only the
+    number of alerts of every job is kept.
+    """
+
+    def __init__(self, recipient, deadline):
+        self.recipient = recipient
+        self.deadline = deadline
+        self.alerts = []
+        self.overflow = {}
+        self.count = 0
+        self.failures = 0
+
+    def add(self, alert):
+        self.count += 1
+        if alert.status == 'f':
+            self.failures += 1
+        if len(self.alerts) < config.PGAGENT_ALERT_DIGEST_MAX_ALERTS:
+            self.alerts.append(alert)
+        else:
+            self.overflow[alert.jobname] = \
+                self.overflow.get(alert.jobname, 0) + 1
+
+    def message(self):
+        msg = EmailMessage()
+        msg['From'] = config.SECURITY_EMAIL_SENDER
+        msg['To'] = self.recipient
+        if self.count == 1:
+            alert = self.alerts[0]
+            msg['Subject'] = 'pgAgent job "{0}": {1}'.format(
+                alert.jobname, STATUS_LABELS.get(alert.status, alert.status))
+        else:
+            msg['Subject'] = 'pgAgent: {0} job alerts, {1} failed'.format(
+                self.count, self.failures)
+
+        body = [alert.format() for alert in self.alerts]
+        if self.overflow:
+            body.append('')
+            body.append('And {0} more alerts:'.format(
+                self.count - len(self.alerts)))
+            body.extend('    {0}: {1}'.format(jobname, count)
+                        for jobname, count in sorted(self.overflow.items()))
+        msg.set_content('\n'.join(body) + '\n')
+        return msg
+
+
+def smtp_connect():
+    """
+    Returns a new SMTP connection to the mail server of pgAdmin.
+    """
+    smtp_class = smtplib.SMTP_SSL if config.MAIL_USE_SSL else smtplib.SMTP
+    conn = smtp_class(config.MAIL_SERVER, config.MAIL_PORT,
+                      timeout=SMTP_TIMEOUT)
+    try:
+        if config.MAIL_USE_TLS:
+            conn.starttls()
+        if config.MAIL_USERNAME:
+            conn.login(config.MAIL_USERNAME, config.MAIL_PASSWORD)
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+
+class SMTPConnectionPool:
+    """
+    Up to size SMTP connections, reused by the sends and closed once idle
+    for PGAGENT_ALERT_SMTP_IDLE_TIMEOUT seconds.
+    """
+
+    def __init__(self, size, connect=smtp_connect):
+        self.size = size
+        self.connect = connect
+        self.opened = 0
+        self._cond = threading.Condition()
+        self._idle = []
+        self._count = 0
+
+    def _acquire(self):
+        """Returns an idle connection, or a new one, and whether it is new"""
+        with self._cond:
+            while True:
+                while self._idle:
+                    conn, last_used = self._idle.pop()
+                    if time.monotonic() - last_used < \
+                            config.PGAGENT_ALERT_SMTP_IDLE_TIMEOUT:
+                        return conn, False
+                    self._count -= 1
+                    conn.close()
+                if self._count < self.size:
+                    self._count += 1
+                    break
+                self._cond.wait()
+
+        try:
+            conn = self.connect()
+        except Exception:
+            self._release(None)
+            raise
+        with self._cond:
+            self.opened += 1
+        return conn, True
+
+    def _release(self, conn):
+        """Returns a connection to the pool, or frees its slot if None"""
+        with self._cond:
+            if conn is None:
+                self._count -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def send(self, message):
+        """
+        Send a message. A reused connection closed by the mail server is
+        replaced once by a new one.
+        """
+        while True:
+            conn, new = self._acquire()
+            try:
+                conn.send_message(message)
+            except Exception as e:
+                conn.close()
+                self._release(None)
+                if new or not isinstance(
+                        e, (smtplib.SMTPServerDisconnected, OSError)):
+                    raise
+                continue
+            self._release(conn)
+            return
+
+    def close(self):
+        with self._cond:
+            for conn, _ in self._idle:
+                self._count -= 1
+                try:
+                    conn.quit()
+                except Exception:
+                    conn.close()
+            self._idle = []
+
+
+class AlertRuleCache:
+    """
+    Notification settings of the jobs of every server, all loaded with the
+    first alert of the server and reloaded every PGAGENT_ALERT_RULES_TTL
+    seconds. The settings of a job are reloaded with its next alert once
+    invalidated, which the JobStatusHub does when they are changed.
+
+    The time of the latest alert of every job is kept here, and written
+    to jnlastnotification later by the dispatcher.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rules = {}
+        self._loaded = {}
+        self._stale = {}
+        self._dirty = {}
+        self.loads = 0
+        self.hits = 0
+
+    def get(self, sid, jobid, load):
+        """
+        Returns the notification settings of a job, or None if they could
+        not be loaded.
+
+        :param sid: Server ID
+        :param jobid: Job ID
+        :param load: function returning the settings of all the jobs of a
+            server, or of one of them, by job id
+        """
+        with self._lock:
+            rules = self._rules.get(sid)
+            expired = rules is None or time.monotonic() - \
+                self._loaded[sid] >= config.PGAGENT_ALERT_RULES_TTL
+            if not expired and jobid not in self._stale.get(sid, ()):
+                self.hits += 1
+                return rules.get(jobid) or AlertRule(jobid)
+
+        loaded = load(sid, None if expired else jobid)
+        if loaded is None:
+            return None
+
+        with self._lock:
+            self.loads += 1
+            # The latest alerts not written yet are more recent
+            dirty = self._dirty.get(sid, {})
+            for rule in loaded.values():
+                last = dirty.get(rule.jobid)
+                if last is not None and (rule.lastnotification is None or
+                                         rule.lastnotification < last):
+                    rule.lastnotification = last
+
+            if expired:
+                self._rules[sid] = loaded
+                self._loaded[sid] = time.monotonic()
+                self._stale.pop(sid, None)
+            elif sid in self._rules:
+                self._rules[sid].pop(jobid, None)
+                self._rules[sid].update(loaded)
+                self._stale.get(sid, set()).discard(jobid)
+            return loaded.get(jobid) or AlertRule(jobid)
+
+    def invalidate(self, sid, jobid=None):
+        """
+        Reload the notification settings of a job with its next alert, or
+        of all the jobs of the server.
+        """
+        with self._lock:
+            if jobid is None:
+                self._rules.pop(sid, None)
+                self._stale.pop(sid, None)
+            elif sid in self._rules:
+                self._stale.setdefault(sid, set()).add(jobid)
+
+    def alerted(self, sid, rule, now):
+        """Keep the time of the latest alert of a job"""
+        with self._lock:
+            rule.lastnotification = now
+            self._dirty.setdefault(sid, {})[rule.jobid] = now
+
+    def has_dirty(self):
+        with self._lock:
+            return bool(self._dirty)
+
+    def take_dirty(self, sid=None):
+        """
+        Returns the times of the latest alerts not written yet, by job id
+        for every server, forgetting them.
+        """
+        with self._lock:
+            if sid is None:
+                dirty, self._dirty = self._dirty, {}
+                return dirty
+            return {sid: self._dirty.pop(sid)} if sid in self._dirty else {}
+
+    def restore_dirty(self, sid, updates):
+        """Keep the times of the latest alerts that could not be written"""
+        with self._lock:
+            dirty = self._dirty.setdefault(sid, {})
+            for jobid, last in updates.items():
+                if jobid not in dirty or dirty[jobid] < last:
+                    dirty[jobid] = last
+
+    def clear(self, sid):
+        with self._lock:
+            for cache in (self._rules, self._loaded, self._stale,
+                          self._dirty):
+                cache.pop(sid, None)
+
+
+class AlertDispatcherStats:
+    """Counters of the alert dispatcher"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.events = 0
+        self.dropped = 0
+        self.alerts = 0
+        self.throttled = 0
+        self.emails = 0
+        self.retries = 0
+        self.failures = 0
+        self.writes = 0
+
+    def incr(self, counter, count=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + count)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'events': self.events,
+                'dropped': self.dropped,
+                'alerts': self.alerts,
+                'throttled': self.throttled,
+                'emails': self.emails,
+                'retries': self.retries,
+                'failures': self.failures,
+                'writes': self.writes
+            }
+
+
+class AlertDispatcher:
+    """
+    Sends the email alerts of the pgAgent jobs from the job status
+    notifications received by the JobStatusHub.
+
+    The notifications are queued by submit() and evaluated by a worker
+    thread against the pga_job_notification settings of their job, cached
+    by an AlertRuleCache. The times of the latest alerts are written to
+    the table every PGAGENT_ALERT_WRITE_INTERVAL seconds.
+
+    The alerts of a recipient are grouped in a digest sent once
+    PGAGENT_ALERT_BATCH_WINDOW seconds have passed since its first alert,
+    over a pool of PGAGENT_ALERT_SMTP_POOL_SIZE SMTP connections. A digest
+    that could not be sent is retried up to PGAGENT_ALERT_SMTP_RETRIES
+    times, the delay doubling from PGAGENT_ALERT_RETRY_DELAY seconds.
+    """
+
+    def __init__(self, load_rules=None, pool=None, write_rules=None):
+        self.stats = AlertDispatcherStats()
+        self.rules = AlertRuleCache()
+        self.load_rules = load_rules or self._load_rules
+        self.write_rules = write_rules or self._write_rules
+        self.pool = pool or SMTPConnectionPool(
+            config.PGAGENT_ALERT_SMTP_POOL_SIZE)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(config.PGAGENT_ALERT_QUEUE_SIZE)
+        self._thread = None
+        self._executor = None
+        self._servers = {}
+        self._conns = {}
+        self._digests = {}
+        self._retries = []
+        self._seq = itertools.count()
+        self._next_write = 0
+
+    def add_server(self, listener):
+        with self._lock:
+            self._servers[listener.sid] = listener
+
+    def remove_server(self, listener):
+        # The latest alerts of the server are written, and its connection
+        # closed, by the worker thread.
+        self._put('remove', listener.sid, listener)
+
+    def invalidate(self, sid, jobid=None):
+        """
+        Reload the notification settings of a job of a server, or of all
+        its jobs, sent as text by the job_notification_update channel.
+
+        :param sid: Server ID
+        :param jobid: Job ID
+        """
+        try:
+            jobid = None if jobid is None else int(jobid)
+        except ValueError:
+            jobid = None
+        self.rules.invalidate(sid, jobid)
+
+    def submit(self, sid, payload):
+        """
+        Queue a job status notification, unless the job does not send any
+        email. Never blocks, the notification is dropped if the queue is
+        full.
+
+        :param sid: Server ID
+        :param payload: parsed notification payload
+        """
+        notification = payload.get('notification')
+        if not isinstance(notification, dict) or \
+                not notification.get('email'):
+            return False
+
+        self.stats.incr('events')
+        return self._put('event', sid, payload)
+
+    def _put(self, kind, sid, data):
+        self._start()
+        try:
+            self._queue.put_nowait((kind, sid, data))
+        except queue.Full:
+            self.stats.incr('dropped')
+            logger.warning('Job alert queue full, dropping the alert of '
+                           'server %s', sid)
+            return False
+        return True
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='pga_job_alerts', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            deadline = self._next_deadline()
+            timeout = None if deadline is None else \
+                max(deadline - time.monotonic(), 0)
+            try:
+                kind, sid, data = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                pass
+            else:
+                try:
+                    if kind == 'event':
+                        self.process(sid, data)
+                    elif kind == 'remove':
+                        self._remove_server(sid, data)
+                except Exception as e:
+                    logger.error('Error processing the job alert of server '
+                                 '%s: %s', sid, str(e))
+            self.flush()
+            if time.monotonic() >= self._next_write:
+                self.write_behind()
+
+    def _next_deadline(self):
+        with self._lock:
+            deadlines = [d.deadline for d in self._digests.values()]
+            if self._retries:
+                deadlines.append(self._retries[0][0])
+        if self.rules.has_dirty():
+            deadlines.append(self._next_write)
+        return min(deadlines) if deadlines else None
+
+    def process(self, sid, payload, now=None):
+        """
+        Evaluate the notification settings of the job of a notification,
+        adding an alert to the digests of its recipients if an email is
+        sent.
+
+        :param sid: Server ID
+        :param payload: parsed notification payload
+        :param now: current time, for the minimum interval of the job
+        """
+        jobid = payload.get('job_id')
+        rule = self.rules.get(sid, jobid, self.load_rules)
+        if rule is None or not rule.matches(payload.get('status')):
+            return False
+
+        now = now or datetime.now(timezone.utc)
+        if rule.throttled(now):
+            self.stats.incr('throttled')
+            return False
+        self.rules.alerted(sid, rule, now)
+
+        recipients = rule.recipient_list()
+        if not recipients:
+            logger.warning('No recipient for the alerts of job %s on '
+                           'server %s', jobid, sid)
+            return False
+
+        alert = JobAlert(sid, payload, rule.customtext)
+        self.stats.incr('alerts')
+        deadline = time.monotonic() + config.PGAGENT_ALERT_BATCH_WINDOW
+        with self._lock:
+            for recipient in recipients:
+                digest = self._digests.get(recipient.lower())
+                if digest is None:
+                    digest = self._digests[recipient.lower()] = \
+                        AlertDigest(recipient, deadline)
+                digest.add(alert)
+        return True
+
+    def write_behind(self, sid=None):
+        """
+        Write the times of the latest alerts of the jobs of all the servers,
+        or of one of them, to jnlastnotification.
+        """
+        self._next_write = time.monotonic() + \
+            config.PGAGENT_ALERT_WRITE_INTERVAL
+        for server, updates in self.rules.take_dirty(sid).items():
+            if self.write_rules(server, updates):
+                self.stats.incr('writes')
+            else:
+                self.rules.restore_dirty(server, updates)
+
+    def _remove_server(self, sid, listener):
+        self.write_behind(sid)
+        with self._lock:
+            # The server may have been added again since
+            if self._servers.get(sid) is not listener:
+                return
+            del self._servers[sid]
+        self._close_connection(sid)
+        self.rules.clear(sid)
+
+    def _get_connection(self, sid):
+        conn = self._conns.get(sid)
+        if conn is not None and not conn.closed:
+            return conn
+
+        with self._lock:
+            listener = self._servers.get(sid)
+        if listener is None:
+            return None
+        conn = self._conns[sid] = psycopg.connect(listener.conninfo,
+                                                  autocommit=True)
+        return conn
+
+    def _close_connection(self, sid):
+        conn = self._conns.pop(sid, None)
+        if conn is not None:
+            conn.close()
+
+    def _load_rules(self, sid, jobid=None):
+        """
+        Returns the notification settings of all the jobs of a server, or of
+        one of them, by job id, read with the alert connection of the server.
+        """
+        try:
+            conn = self._get_connection(sid)
+            if conn is None:
+                return None
+            cur = conn.cursor(row_factory=dict_row)
+            cur.execute(
+                'SELECT jnjobid, jnenabled, jnemail, jnwhen, jnmininterval, '
+                'jnemailrecipients, jncustomtext, jnlastnotification '
+                'FROM pgagent.pga_job_notification '
+                'WHERE %(jobid)s::int4 IS NULL OR jnjobid = %(jobid)s',
+                {'jobid': jobid}
+            )
+            return {row['jnjobid']: AlertRule.from_row(row)
+                    for row in cur.fetchall()}
+        except Exception as e:
+            logger.error('Error loading the notification settings of the '
+                         'jobs of server %s: %s', sid, str(e))
+            self._close_connection(sid)
+            return None
+
+    def _write_rules(self, sid, updates):
+        """
+        Write the times of the latest alerts of jobs of a server, in a
+        single statement.
+        """
+        try:
+            conn = self._get_connection(sid)
+            if conn is None:
+                # The server is gone, and so are its alerts
+                return True
+            conn.execute(
+                'UPDATE pgagent.pga_job_notification jn '
+                'SET jnlastnotification = u.last '
+                'FROM unnest(%s::int4[], %s::timestamptz[]) AS u(jobid, last) '
+                'WHERE jn.jnjobid = u.jobid '
+                'AND (jn.jnlastnotification IS NULL '
+                'OR jn.jnlastnotification < u.last)',
+                (list(updates), list(updates.values()))
+            )
+            return True
+        except Exception as e:
+            logger.error('Error writing the latest alerts of the jobs of '
+                         'server %s: %s', sid, str(e))
+            self._close_connection(sid)
+            return False
+
+    def flush(self, force=False):
+        """
+        Send the digests past their batch window and the retries due, or
+        all of them if forced.
+
+        :return: futures of the sends
+        """
+        now = time.monotonic()
+        with self._lock:
+            due = []
+            for key, digest in list(self._digests.items()):
+                if force or digest.deadline <= now:
+                    due.append((self._digests.pop(key), 0))
+            while self._retries and (force or self._retries[0][0] <= now):
+                _, _, digest, attempt = heapq.heappop(self._retries)
+                due.append((digest, attempt))
+
+        if not due:
+            return []
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.pool.size,
+                    thread_name_prefix='pga_job_alerts_smtp'
+                )
+        return [self._executor.submit(self._send, digest, attempt)
+                for digest, attempt in due]
+
+    def _send(self, digest, attempt):
+        try:
+            self.pool.send(digest.message())
+        except Exception as e:
+            if attempt >= config.PGAGENT_ALERT_SMTP_RETRIES:
+                self.stats.incr('failures')
+                logger.error('Could not send %s job alerts to %s: %s',
+                             digest.count, digest.recipient, str(e))
+                return False
+
+            delay = config.PGAGENT_ALERT_RETRY_DELAY * 2 ** attempt
+            self.stats.incr('retries')
+            logger.warning('Error sending the job alerts to %s, retrying '
+                           'in %s seconds: %s', digest.recipient, delay,
+                           str(e))
+            with self._lock:
+                heapq.heappush(self._retries, (
+                    time.monotonic() + delay, next(self._seq), digest,
+                    attempt + 1
+                ))
+            # Wake up the worker thread for the new deadline
+            self._put('wake', None, None)
+            return False
+
+        self.stats.incr('emails')
+        return True
+
+    def get_stats(self):
+        stats = self.stats.as_dict()
+        stats['smtp_connections'] = self.pool.opened
+        stats['rule_loads'] = self.rules.loads
+        stats['rule_hits'] = self.rules.hits
+        with self._lock:
+            stats['pending_digests'] = len(self._digests)
+            stats['pending_retries'] = len(self._retries)
+        return stats
@@ -0,0 +1,495 @@
+##########################################################################
+#
+# pgAdmin 4 - PostgreSQL Tools
+#
+# Copyright (C) 2013 - 2025, The pgAdmin Development Team
+# This software is released under the PostgreSQL Licence
+#
+##########################################################################
+
+"""Fan-out of the pgAgent job status events across the pgAdmin processes"""
+
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+import config
+
+from pgadmin.browser.server_groups.servers.pgagent.listener import \
+    JOB_STATUS_BATCH_EVENT, JobStatusCache, JobStatusHub, \
+    JobStatusListener, LocalJobStatusFanout
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where the broker is not supported
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def shutdown_connection(conn):
+    """
+    Shut down a broker connection, waking up the thread reading it, which
+    closing the connection would not do.
+    """
+    try:
+        with socket.fromfd(conn.fileno(), socket.AF_UNIX,
+                           socket.SOCK_STREAM) as sock:
+            sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+class JobStatusBrokerClient:
+    """
+    Connection between a process and the broker. The messages are sent by
+    a thread of its own, so that a slow process does not hold up the hub,
+    up to PGAGENT_JOB_STATUS_BROKER_QUEUE_SIZE of them waiting.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.dropped = 0
+        self._queue = queue.Queue(config.PGAGENT_JOB_STATUS_BROKER_QUEUE_SIZE)
+        threading.Thread(
+            target=self._run, name='pga_job_status_broker_send', daemon=True
+        ).start()
+
+    def send(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self.dropped += 1
+
+    def recv(self):
+        return self.conn.recv()
+
+    def _run(self):
+        while True:
+            message = self._queue.get()
+            if message is None:
+                break
+            try:
+                self.conn.send(message)
+            except (OSError, ValueError):
+                break
+        self.conn.close()
+
+    def close(self):
+        shutdown_connection(self.conn)
+        self._queue.put(None)
+
+
+class JobStatusLocalLink:
+    """
+    Link between the broker and the process running it, which hand their
+    messages over directly.
+    """
+
+    def __init__(self, receive):
+        self.receive = receive
+        self.dropped = 0
+
+    def send(self, message):
+        self.receive(message)
+
+    def close(self):
+        pass
+
+
+class JobStatusBroker:
+    """
+    Runs in the process elected to listen to the servers. Its hub holds the
+    LISTEN connection of every server subscribed to by any process, and
+    sends the events of a server to the processes subscribed to it.
+
+    The processes send ('subscribe', sid, conninfo) and ('unsubscribe', sid)
+    messages, and are sent ('state', sid, state) once subscribed to a
+    server, then ('event', sid, event, data) for its events.
+    """
+
+    def __init__(self, address, authkey, alerts=None):
+        self.address = address
+        self.authkey = authkey
+        self.hub = JobStatusHub(self._publish, alerts)
+        self._lock = threading.Lock()
+        self._listeners = {}
+        self._clients = {}
+        self._peers = set()
+        self._closed = False
+
+        if os.path.exists(address):
+            # Left by a previous broker that did not exit cleanly
+            os.unlink(address)
+        # The socket carries the connection strings of the servers, it is
+        # created without any access for the other users rather than
+        # restricted once created.
+        umask = os.umask(0o077)
+        try:
+            self._listener = Listener(address, family='AF_UNIX',
+                                      authkey=authkey)
+        finally:
+            os.umask(umask)
+        threading.Thread(
+            target=self._accept, name='pga_job_status_broker', daemon=True
+        ).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn = self._listener.accept()
+            except AuthenticationError as e:
+                logger.warning('Rejected job status broker connection: %s',
+                               str(e))
+                continue
+            except OSError:
+                return
+
+            if self._closed:
+                conn.close()
+                return
+
+            client = JobStatusBrokerClient(conn)
+            with self._lock:
+                self._peers.add(client)
+            threading.Thread(
+                target=self._serve, args=(client,),
+                name='pga_job_status_broker_recv', daemon=True
+            ).start()
+
+    def _serve(self, client):
+        try:
+            while True:
+                self.handle(client, client.recv())
+        except (EOFError, OSError):
+            pass
+        finally:
+            self.detach(client)
+
+    def handle(self, client, message):
+        """
+        Handle a message sent by a process.
+
+        :param client: JobStatusBrokerClient of the process
+        :param message: tuple starting with the message kind
+        """
+        kind, sid = message[0], message[1]
+        if kind == 'subscribe':
+            self.subscribe(client, sid, message[2])
+        elif kind == 'unsubscribe':
+            self.unsubscribe(client, sid)
+        else:
+            logger.warning('Unknown job status broker message: %s', kind)
+
+    def subscribe(self, client, sid, conninfo):
+        with self._lock:
+            self._clients.setdefault(sid, set()).add(client)
+
+            listener = self._listeners.get(sid)
+            if listener is None:
+                listener = JobStatusListener(sid, conninfo)
+                self._listeners[sid] = listener
+                self.hub.add_server(listener)
+
+        client.send(('state', sid, self.hub.cache.get_state(sid)))
+
+    def unsubscribe(self, client, sid):
+        with self._lock:
+            clients = self._clients.get(sid)
+            if not clients or client not in clients:
+                return
+
+            clients.discard(client)
+            if clients:
+                return
+
+            del self._clients[sid]
+            listener = self._listeners.pop(sid)
+
+        self.hub.remove_server(listener)
+
+    def detach(self, client):
+        """Unsubscribe a process from all the servers once it went away"""
+        with self._lock:
+            self._peers.discard(client)
+            servers = [sid for sid, clients in self._clients.items()
+                       if client in clients]
+
+        for sid in servers:
+            self.unsubscribe(client, sid)
+        client.close()
+
+    def get_listener(self, sid):
+        with self._lock:
+            return self._listeners.get(sid)
+
+    def get_stats(self):
+        stats = self.hub.get_stats()
+        with self._lock:
+            stats['processes'] = len(self._peers) + 1
+            stats['dropped'] = sum(peer.dropped for peer in self._peers)
+        return stats
+
+    def _publish(self, sid, event, data):
+        with self._lock:
+            clients = list(self._clients.get(sid, ()))
+
+        for client in clients:
+            client.send(('event', sid, event, data))
+
+    def close(self):
+        self._closed = True
+        try:
+            # Wake up the accepting thread
+            Client(self.address, family='AF_UNIX',
+                   authkey=self.authkey).close()
+        except OSError:
+            pass
+        self._listener.close()
+
+        with self._lock:
+            peers = list(self._peers)
+            listeners = list(self._listeners.values())
+            self._peers.clear()
+            self._clients.clear()
+            self._listeners.clear()
+
+        for peer in peers:
+            peer.close()
+        for listener in listeners:
+            self.hub.remove_server(listener)
+
+
+class BrokerJobStatusFanout:
+    """
+    Fan-out of the job status events across the processes of pgAdmin, so
+    that a server has a single LISTEN connection whatever the number of
+    processes.
+
+    The process holding the lock file of the broker address runs the
+    broker, the others connect to it. When the broker goes away, one of
+    them takes over and they subscribe to their servers again.
+    """
+
+    def __init__(self, address, alerts=None, authkey=None):
+        self.address = address
+        self.alerts = alerts
+        self.cache = JobStatusCache()
+        self.broker = None
+        self._authkey = authkey
+        self._deliver = None
+        self._lock = threading.Lock()
+        self._connected = threading.Event()
+        self._listeners = {}
+        self._client = None
+        self._lock_file = None
+        self._thread = None
+        self._closed = False
+
+    def open(self, deliver):
+        self._deliver = deliver
+
+    def _get_authkey(self):
+        return self._authkey or config.SECRET_KEY.encode()
+
+    def add_server(self, listener):
+        with self._lock:
+            self._listeners[listener.sid] = listener
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='pga_job_status_fanout',
+                    daemon=True
+                )
+                self._thread.start()
+            self._send(('subscribe', listener.sid, listener.conninfo))
+
+    def remove_server(self, listener):
+        with self._lock:
+            if self._listeners.get(listener.sid) is not listener:
+                return
+            del self._listeners[listener.sid]
+            self._send(('unsubscribe', listener.sid))
+        self.cache.clear(listener.sid)
+
+    def _send(self, message):
+        # Called with the lock held, dropped until connected to the broker
+        # as the servers are all subscribed to once connected.
+        if self._client is not None:
+            self._client.send(message)
+
+    def _resubscribe(self, client):
+        with self._lock:
+            self._client = client
+            for listener in self._listeners.values():
+                self._send(('subscribe', listener.sid, listener.conninfo))
+        self._connected.set()
+
+    def wait_connected(self, timeout=None):
+        """Wait until running the broker or connected to it"""
+        return self._connected.wait(timeout)
+
+    def _run(self):
+        while not self._closed:
+            if self._elect():
+                return
+
+            try:
+                conn = Client(self.address, family='AF_UNIX',
+                              authkey=self._get_authkey())
+            except (OSError, AuthenticationError) as e:
+                logger.warning(
+                    'Could not connect to the job status broker %s, '
+                    'retrying in %s seconds: %s', self.address,
+                    config.PGAGENT_LISTENER_RETRY_DELAY, str(e)
+                )
+                time.sleep(config.PGAGENT_LISTENER_RETRY_DELAY)
+                continue
+
+            client = JobStatusBrokerClient(conn)
+            self._resubscribe(client)
+            logger.info('Connected to the job status broker %s',
+                        self.address)
+            try:
+                while True:
+                    self._receive(client.recv())
+            except (EOFError, OSError):
+                if not self._closed:
+                    logger.warning('Lost the job status broker %s',
+                                   self.address)
+
+            self._connected.clear()
+            with self._lock:
+                self._client = None
+                for listener in self._listeners.values():
+                    listener.connected = False
+            client.close()
+
+    def _elect(self):
+        """Run the broker if no other process holds its lock file"""
+        try:
+            lock_file = open(self.address + '.lock', 'a')
+        except OSError as e:
+            logger.error('Could not open the job status broker lock %s: %s',
+                         self.address, str(e))
+            time.sleep(config.PGAGENT_LISTENER_RETRY_DELAY)
+            return False
+
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        # Kept open, the lock is released when the process exits
+        self._lock_file = lock_file
+        try:
+            self.broker = JobStatusBroker(self.address, self._get_authkey(),
+                                          self.alerts)
+        except OSError as e:
+            logger.error('Could not start the job status broker %s: %s',
+                         self.address, str(e))
+            self.broker = None
+            self._lock_file = None
+            lock_file.close()
+            time.sleep(config.PGAGENT_LISTENER_RETRY_DELAY)
+            return False
+
+        logger.info('Running the job status broker %s', self.address)
+        broker, process = self.broker, JobStatusLocalLink(self._receive)
+        self._resubscribe(JobStatusLocalLink(
+            lambda message: broker.handle(process, message)))
+        return True
+
+    def _receive(self, message):
+        """Handle a message sent by the broker"""
+        kind, sid = message[0], message[1]
+        listener = self._listeners.get(sid)
+        if listener is None:
+            return
+
+        if kind == 'state':
+            self.cache.load(sid, message[2])
+            listener.connected = True
+            return
+
+        event, data = message[2], message[3]
+        if self.broker is None:
+            updates = data['updates'] if event == JOB_STATUS_BATCH_EVENT \
+                else [data]
+            for update in updates:
+                self.cache.apply(sid, update)
+
+        try:
+            self._deliver(sid, event, data)
+        except Exception as e:
+            logger.error('Error delivering job status event: %s', str(e))
+
+    def get_listener(self, listener):
+        if self.broker is not None:
+            return self.broker.get_listener(listener.sid) or listener
+        return listener
+
+    def get_state(self, sid):
+        if self.broker is not None:
+            return self.broker.hub.cache.get_state(sid)
+        return self.cache.get_state(sid)
+
+    def get_stats(self):
+        if self.broker is not None:
+            return dict(self.broker.get_stats(), role='broker')
+        client = self._client
+        return {
+            'role': 'client',
+            'connected': self._connected.is_set(),
+            'servers': len(self._listeners),
+            'dropped': client.dropped if client is not None else 0
+        }
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            client = self._client
+            self._client = None
+        if client is not None:
+            client.close()
+        if self.broker is not None:
+            self.broker.close()
+            self.broker = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        self._connected.clear()
+
+
+def get_job_status_fanout(alerts=None):
+    """
+    Returns the fan-out of the job status events, across the processes
+    sharing the PGAGENT_JOB_STATUS_BROKER socket if set.
+
+    The email alerts are only sent by the process running the broker. In
+    server mode, where pgAdmin may run several processes that would each
+    send them, they are not sent without the broker.
+
+    :param alerts: AlertDispatcher of the process listening to the servers
+    """
+    address = config.PGAGENT_JOB_STATUS_BROKER
+    if address and fcntl is None:
+        logger.warning('The pgAgent job status broker is not supported on '
+                       'this platform, each process listens to the servers')
+        address = None
+
+    if address:
+        return BrokerJobStatusFanout(address, alerts)
+
+    if alerts is not None and config.SERVER_MODE:
+        logger.error('The pgAgent email alerts need the job status broker '
+                     'in server mode, set PGAGENT_JOB_STATUS_BROKER to send '
+                     'them')
+        alerts = None
+    return LocalJobStatusFanout(alerts)
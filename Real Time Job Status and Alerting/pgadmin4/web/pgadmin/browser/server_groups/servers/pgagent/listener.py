@@ -0,0 +1,870 @@
+##########################################################################
+#
+# pgAdmin 4 - PostgreSQL Tools
+#
+# Copyright (C) 2013 - 2025, The pgAdmin Development Team
+# This software is released under the PostgreSQL Licence
+#
+##########################################################################
+
+"""Shared LISTEN connections for the pgAgent job status notifications"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+import psycopg
+
+import config
+
+# Channel on which pgAgent publishes the job status changes
+JOB_STATUS_CHANNEL = 'job_status_update'
+
+# Channel on which the changes of the notification settings of the jobs are
+# published, for the alert dispatcher
+JOB_NOTIFICATION_CHANNEL = 'job_notification_update'
+
+# Socket.IO events used to send a single notification, or the coalesced
+# notifications of a batch window
+JOB_STATUS_EVENT = 'job_status_update'
+JOB_STATUS_BATCH_EVENT = 'job_status_batch'
+
+# Final job statuses, kept in a batch over the later ones of the same job so
+# that a failure is not hidden by the 'completed' notification that follows
+FINAL_STATUSES = ('s', 'f')
+
+# Fields describing the notification itself rather than the job state
+EVENT_FIELDS = ('status', 'description', 'custom_text', 'notification',
+                'timestamp', 'step_id')
+
+logger = logging.getLogger(__name__)
+
+
+def get_server_room(sid):
+    """
+    Returns the name of the Socket.IO room used to fan out the job status
+    notifications of a server.
+
+    :param sid: Server ID
+    """
+    return 'pga_job_status_{0}'.format(sid)
+
+
+def get_job_room(sid, jobid):
+    """
+    Returns the name of the Socket.IO room of the clients watching a job.
+
+    :param sid: Server ID
+    :param jobid: Job ID
+    """
+    return 'pga_job_status_{0}_job_{1}'.format(sid, jobid)
+
+
+def get_job_class_room(sid, jclid):
+    """
+    Returns the name of the Socket.IO room of the clients watching the jobs
+    of a job class.
+
+    :param sid: Server ID
+    :param jclid: Job class ID
+    """
+    return 'pga_job_status_{0}_class_{1}'.format(sid, jclid)
+
+
+def get_payload_job_id(payload):
+    """
+    Returns the id of the job of a notification payload. Step notifications
+    are sent with a '<jobid>:<stepid>' job id.
+    """
+    jobid = (payload.get('job') or {}).get('jobid')
+    if jobid is not None:
+        return jobid
+    try:
+        return int(str(payload.get('job_id')).split(':')[0])
+    except ValueError:
+        return None
+
+
+class JobStatusListener:
+    """
+    State of the LISTEN connection of a server. The connection itself is
+    owned by the JobStatusHub.
+    """
+
+    def __init__(self, sid, conninfo):
+        self.sid = sid
+        self.conninfo = conninfo
+        self.started_at = datetime.now()
+        self.connected = False
+        self.reconnects = 0
+        self.future = None
+
+
+class JobStatusCache:
+    """
+    Latest state of the jobs of every server, built from the job and summary
+    rows carried by the notification payloads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._summary = {}
+
+    def apply(self, sid, payload):
+        """
+        Apply a notification payload to the cached state of a server.
+
+        :param sid: Server ID
+        :param payload: parsed notification payload
+        """
+        job = payload.get('job')
+        summary = payload.get('summary')
+
+        with self._lock:
+            if job and job.get('jobid') is not None:
+                jobs = self._jobs.setdefault(sid, {})
+                jobs[job['jobid']] = dict(jobs.get(job['jobid'], {}), **job)
+            if summary:
+                self._summary[sid] = summary
+
+    def get_state(self, sid):
+        """Returns the cached jobs and summary of a server"""
+        with self._lock:
+            return {
+                'summary': self._summary.get(sid),
+                'jobs': list(self._jobs.get(sid, {}).values())
+            }
+
+    def load(self, sid, state):
+        """
+        Replace the cached state of a server with one returned by get_state.
+
+        :param sid: Server ID
+        :param state: jobs and summary of the server
+        """
+        with self._lock:
+            self._jobs[sid] = {job['jobid']: job for job in state['jobs']}
+            if state['summary']:
+                self._summary[sid] = state['summary']
+            else:
+                self._summary.pop(sid, None)
+
+    def clear(self, sid):
+        with self._lock:
+            self._jobs.pop(sid, None)
+            self._summary.pop(sid, None)
+
+
+class JobStatusBatch:
+    """
+    Notifications of a server received within a batch window, coalesced by
+    job id keeping the latest state of every job.
+    """
+
+    def __init__(self):
+        self.payloads = {}
+        self.received = 0
+
+    def add(self, payload):
+        self.received += 1
+        key = payload.get('job_id')
+        prev = self.payloads.pop(key, None)
+
+        if prev is not None and prev.get('status') in FINAL_STATUSES and \
+                payload.get('status') not in FINAL_STATUSES:
+            payload = dict(payload)
+            for field in EVENT_FIELDS:
+                if field in prev:
+                    payload[field] = prev[field]
+
+        # Re-inserted so that the updates are sent in the order of their
+        # latest notification
+        self.payloads[key] = payload
+
+    def updates(self):
+        return list(self.payloads.values())
+
+
+class JobStatusRoutes:
+    """
+    Jobs and job classes watched by the clients of every server. A client
+    without a selection stays in the room of the server and receives all
+    its notifications, a client with one is moved to the rooms of the jobs
+    and job classes it watches.
+
+    The rooms having clients are counted per server, so that the rooms of
+    a notification are found with a dict lookup.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._selections = {}
+        self._counts = {}
+
+    @staticmethod
+    def _get_keys(jobs, job_classes):
+        return {('job', int(jobid)) for jobid in jobs or ()} | \
+            {('class', int(jclid)) for jclid in job_classes or ()}
+
+    @staticmethod
+    def _get_room(sid, key):
+        kind, key_id = key
+        return get_job_room(sid, key_id) if kind == 'job' \
+            else get_job_class_room(sid, key_id)
+
+    def watch(self, sid, client_sid, jobs=(), job_classes=()):
+        """
+        Add jobs and job classes to the selection of a client.
+
+        :param sid: Server ID
+        :param client_sid: Socket.IO session id of the client
+        :param jobs: ids of the jobs to watch
+        :param job_classes: ids of the job classes to watch
+        :return: tuple of the rooms the client joins and leaves
+        """
+        keys = self._get_keys(jobs, job_classes)
+
+        with self._lock:
+            selection = self._selections.get(sid, {}).get(client_sid, set())
+            added = keys - selection
+            if not added:
+                return [], []
+
+            self._selections.setdefault(sid, {})[client_sid] = \
+                selection | added
+            counts = self._counts.setdefault(sid, {})
+            for key in added:
+                counts[key] = counts.get(key, 0) + 1
+
+        return [self._get_room(sid, key) for key in added], \
+            [] if selection else [get_server_room(sid)]
+
+    def unwatch(self, sid, client_sid, jobs=None, job_classes=None):
+        """
+        Remove jobs and job classes from the selection of a client, all of
+        them if none is given.
+
+        :param sid: Server ID
+        :param client_sid: Socket.IO session id of the client
+        :param jobs: ids of the jobs not to watch anymore
+        :param job_classes: ids of the job classes not to watch anymore
+        :return: tuple of the rooms the client joins and leaves
+        """
+        with self._lock:
+            selections = self._selections.get(sid, {})
+            selection = selections.get(client_sid, set())
+            removed = selection if jobs is None and job_classes is None \
+                else self._get_keys(jobs, job_classes) & selection
+            if not removed:
+                return [], []
+
+            selection = selection - removed
+            counts = self._counts[sid]
+            for key in removed:
+                counts[key] -= 1
+                if not counts[key]:
+                    del counts[key]
+
+            if selection:
+                selections[client_sid] = selection
+            else:
+                del selections[client_sid]
+                if not selections:
+                    del self._selections[sid]
+                    del self._counts[sid]
+
+        return [] if selection else [get_server_room(sid)], \
+            [self._get_room(sid, key) for key in removed]
+
+    def get_selection(self, sid, client_sid):
+        """Returns the ids of the jobs and job classes watched by a client"""
+        with self._lock:
+            selection = self._selections.get(sid, {}).get(client_sid, ())
+        return {
+            'jobs': sorted(i for kind, i in selection if kind == 'job'),
+            'job_classes':
+                sorted(i for kind, i in selection if kind == 'class')
+        }
+
+    def get_rooms(self, sid, payload):
+        """
+        Returns the rooms a notification is sent to, the room of the server
+        and the rooms of its job and job class having clients.
+
+        :param sid: Server ID
+        :param payload: parsed notification payload
+        """
+        rooms = [get_server_room(sid)]
+        with self._lock:
+            counts = self._counts.get(sid)
+            if not counts:
+                return rooms
+
+            jobid = get_payload_job_id(payload)
+            if ('job', jobid) in counts:
+                rooms.append(get_job_room(sid, jobid))
+            jclid = (payload.get('job') or {}).get('jobjclid')
+            if ('class', jclid) in counts:
+                rooms.append(get_job_class_room(sid, jclid))
+        return rooms
+
+    def route(self, sid, event, data):
+        """
+        Returns the rooms an event of a server is sent to, with the data
+        sent to them. A batch is split by the rooms of its updates.
+
+        :param sid: Server ID
+        :param event: JOB_STATUS_EVENT or JOB_STATUS_BATCH_EVENT
+        :param data: notification payload, or batch of them
+        :return: list of (rooms, data) tuples
+        """
+        if event != JOB_STATUS_BATCH_EVENT:
+            return [(self.get_rooms(sid, data), data)]
+
+        groups = {}
+        for update in data['updates']:
+            rooms = tuple(self.get_rooms(sid, update))
+            groups.setdefault(rooms, []).append(update)
+
+        return [(list(rooms), dict(data, updates=updates))
+                for rooms, updates in groups.items()]
+
+    def room_count(self, sid):
+        with self._lock:
+            return len(self._counts.get(sid, {}))
+
+
+class JobStatusHubStats:
+    """
+    Counters of the notification hub. The notification rate is computed
+    over the last RATE_WINDOW seconds using one bucket per second.
+    """
+    RATE_WINDOW = 10  # seconds
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.notifications = 0
+        self.errors = 0
+        self.reconnects = 0
+        self.coalesced = 0
+        self.emit_count = 0
+        self.emit_time = 0.0
+        self.emit_max = 0.0
+        self._buckets = {}
+
+    def notification_received(self):
+        now = int(time.monotonic())
+        with self._lock:
+            self.notifications += 1
+            self._buckets[now] = self._buckets.get(now, 0) + 1
+            if len(self._buckets) > self.RATE_WINDOW + 1:
+                for second in [s for s in self._buckets
+                               if s < now - self.RATE_WINDOW]:
+                    del self._buckets[second]
+
+    def notification_emitted(self, elapsed):
+        with self._lock:
+            self.emit_count += 1
+            self.emit_time += elapsed
+            self.emit_max = max(self.emit_max, elapsed)
+
+    def notifications_coalesced(self, count):
+        with self._lock:
+            self.coalesced += count
+
+    def error(self):
+        with self._lock:
+            self.errors += 1
+
+    def reconnected(self):
+        with self._lock:
+            self.reconnects += 1
+
+    def notifications_per_second(self):
+        # Ignore the current (incomplete) second.
+        now = int(time.monotonic())
+        with self._lock:
+            count = sum(n for s, n in self._buckets.items()
+                        if now - self.RATE_WINDOW <= s < now)
+        return count / self.RATE_WINDOW
+
+    def as_dict(self):
+        rate = self.notifications_per_second()
+        with self._lock:
+            return {
+                'notifications': self.notifications,
+                'notifications_per_second': rate,
+                'coalesced': self.coalesced,
+                'emits': self.emit_count,
+                'errors': self.errors,
+                'reconnects': self.reconnects,
+                'emit_latency_avg_ms':
+                    (self.emit_time / self.emit_count * 1000)
+                    if self.emit_count else 0,
+                'emit_latency_max_ms': self.emit_max * 1000
+            }
+
+
+class JobStatusHub:
+    """
+    Process wide notification hub. One background event loop owns the
+    LISTEN connections of all the servers, each one read by its own task,
+    and reconnects them with an exponential backoff.
+
+    The notifications are emitted with emit(sid, event, data), coalesced
+    per server over PGAGENT_JOB_STATUS_BATCH_WINDOW seconds, and submitted
+    to the alert dispatcher if any.
+    """
+
+    def __init__(self, emit, alerts=None):
+        self.emit = emit
+        self.alerts = alerts
+        self.stats = JobStatusHubStats()
+        self.cache = JobStatusCache()
+        self._lock = threading.Lock()
+        self._loop = None
+        self._listeners = set()
+        self._batches = {}
+
+    def _get_loop(self):
+        with self._lock:
+            if self._loop is None:
+                # psycopg async connections do not support the proactor
+                # event loop, which is the default one on Windows.
+                self._loop = asyncio.SelectorEventLoop() \
+                    if os.name == 'nt' else asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever,
+                    name='pga_job_status_hub',
+                    daemon=True
+                ).start()
+            return self._loop
+
+    def add_server(self, listener):
+        """
+        Start listening on a server by submitting its task to the loop.
+
+        :param listener: JobStatusListener of the server
+        """
+        self._listeners.add(listener)
+        if self.alerts is not None:
+            self.alerts.add_server(listener)
+        listener.future = asyncio.run_coroutine_threadsafe(
+            self._listen(listener), self._get_loop()
+        )
+
+    def remove_server(self, listener):
+        """
+        Stop listening on a server, its connection is closed by the task.
+
+        :param listener: JobStatusListener of the server
+        """
+        self._listeners.discard(listener)
+        if listener.future is not None:
+            listener.future.cancel()
+        if self.alerts is not None:
+            self.alerts.remove_server(listener)
+        self.cache.clear(listener.sid)
+
+    def connection_count(self):
+        return sum(1 for listener in list(self._listeners)
+                   if listener.connected)
+
+    def get_stats(self):
+        stats = self.stats.as_dict()
+        stats['servers'] = len(self._listeners)
+        stats['connections'] = self.connection_count()
+        if self.alerts is not None:
+            stats['alerts'] = self.alerts.get_stats()
+        return stats
+
+    async def _listen(self, listener):
+        delay = config.PGAGENT_LISTENER_RETRY_DELAY
+
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                        listener.conninfo, autocommit=True) as conn:
+                    await conn.execute(
+                        'LISTEN {0}'.format(JOB_STATUS_CHANNEL)
+                    )
+                    if self.alerts is not None:
+                        await conn.execute(
+                            'LISTEN {0}'.format(JOB_NOTIFICATION_CHANNEL)
+                        )
+                        # Changes may have been missed while disconnected
+                        self.alerts.invalidate(listener.sid)
+                    listener.connected = True
+                    delay = config.PGAGENT_LISTENER_RETRY_DELAY
+                    logger.info(
+                        'Listening for pgAgent job updates on server %s',
+                        listener.sid
+                    )
+
+                    async for notify in conn.notifies():
+                        if notify.channel == JOB_NOTIFICATION_CHANNEL:
+                            self.alerts.invalidate(listener.sid,
+                                                   notify.payload)
+                            continue
+                        self.dispatch(
+                            listener.sid,
+                            await self._load_event(listener, notify.payload)
+                        )
+            except asyncio.CancelledError:
+                logger.info(
+                    'Job status listener stopped for server %s',
+                    listener.sid
+                )
+                raise
+            except Exception as e:
+                logger.error(
+                    'Error in job status listener for server %s, '
+                    'reconnecting in %s seconds: %s',
+                    listener.sid, delay, str(e)
+                )
+            finally:
+                listener.connected = False
+
+            listener.reconnects += 1
+            self.stats.reconnected()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, config.PGAGENT_LISTENER_MAX_RETRY_DELAY)
+
+    async def _load_event(self, listener, payload):
+        """
+        Returns the payload stored in pga_job_event for the notifications
+        too large to be sent with NOTIFY, which only carry the event id.
+        The event is read with a separate connection, as the LISTEN one is
+        busy waiting for the notifications.
+
+        :param listener: JobStatusListener of the server
+        :param payload: JSON payload sent by pgAgent
+        """
+        if '"event_id"' not in payload:
+            return payload
+
+        try:
+            event_id = json.loads(payload)['event_id']
+            async with await psycopg.AsyncConnection.connect(
+                    listener.conninfo, autocommit=True) as conn:
+                cur = await conn.execute(
+                    'SELECT jevpayload::text FROM pgagent.pga_job_event '
+                    'WHERE jevid = %s', (event_id,)
+                )
+                row = await cur.fetchone()
+        except Exception as e:
+            logger.error('Error loading job status event: %s', str(e))
+            return payload
+
+        return row[0] if row else payload
+
+    def dispatch(self, sid, payload):
+        """
+        Parse the notification payload, apply it to the cached job state and
+        emit it for the server.
+
+        :param sid: Server ID
+        :param payload: JSON payload sent by pgAgent
+        """
+        self.stats.notification_received()
+        try:
+            payload = json.loads(payload)
+        except (TypeError, ValueError) as e:
+            self.stats.error()
+            logger.error('Error parsing notification payload: %s', str(e))
+            return
+
+        payload['sid'] = sid
+        self.cache.apply(sid, payload)
+        if self.alerts is not None:
+            self.alerts.submit(sid, payload)
+
+        window = config.PGAGENT_JOB_STATUS_BATCH_WINDOW
+        if not window:
+            self._emit(sid, JOB_STATUS_EVENT, payload)
+            return
+
+        with self._lock:
+            batch = self._batches.get(sid)
+            new_batch = batch is None
+            if new_batch:
+                batch = self._batches[sid] = JobStatusBatch()
+            batch.add(payload)
+
+        if new_batch:
+            self._schedule_flush(sid, window)
+
+    def _schedule_flush(self, sid, window):
+        loop = self._get_loop()
+        loop.call_soon_threadsafe(loop.call_later, window, self.flush, sid)
+
+    def flush(self, sid):
+        """
+        Emit the notifications of a server coalesced in its batch window.
+
+        :param sid: Server ID
+        """
+        with self._lock:
+            batch = self._batches.pop(sid, None)
+        if batch is None:
+            return
+
+        updates = batch.updates()
+        self.stats.notifications_coalesced(batch.received - len(updates))
+        self._emit(sid, JOB_STATUS_BATCH_EVENT, {
+            'sid': sid,
+            'updates': updates
+        })
+
+    def _emit(self, sid, event, data):
+        start = time.perf_counter()
+        try:
+            self.emit(sid, event, data)
+        except Exception as e:
+            self.stats.error()
+            logger.error('Error emitting job status update: %s', str(e))
+            return
+        self.stats.notification_emitted(time.perf_counter() - start)
+
+
+class LocalJobStatusFanout:
+    """
+    Fan-out of the job status events within a single process, whose hub
+    listens to the servers subscribed to by its clients.
+
+    A fan-out adds and removes the servers subscribed to in the process
+    and delivers their events with the deliver(sid, event, data) callback
+    given to open().
+    """
+
+    def __init__(self, alerts=None):
+        self.alerts = alerts
+        self.hub = JobStatusHub(self._publish, alerts)
+        self._deliver = None
+
+    def open(self, deliver):
+        self._deliver = deliver
+
+    def add_server(self, listener):
+        self.hub.add_server(listener)
+
+    def remove_server(self, listener):
+        self.hub.remove_server(listener)
+
+    def get_listener(self, listener):
+        """Returns the listener holding the LISTEN connection of a server"""
+        return listener
+
+    def get_state(self, sid):
+        return self.hub.cache.get_state(sid)
+
+    def get_stats(self):
+        return self.hub.get_stats()
+
+    def _publish(self, sid, event, data):
+        self._deliver(sid, event, data)
+
+
+class JobStatusListenerRegistry:
+    """
+    Keeps one JobStatusListener per server, reference counted by the
+    Socket.IO clients of the process subscribed to that server. The server
+    is added to the fan-out with the first subscriber and removed when the
+    last one leaves, unless its jobs send email alerts, which keeps it
+    whether or not any client is subscribed.
+
+    The events of the servers are emitted with emit(sid, event, data, rooms)
+    to the rooms of the clients watching them.
+    """
+
+    def __init__(self, emit, fanout=None):
+        self.emit = emit
+        self.routes = JobStatusRoutes()
+        self.fanout = fanout if fanout is not None else LocalJobStatusFanout()
+        self.fanout.open(self.deliver)
+        self._lock = threading.Lock()
+        self._listeners = {}
+        self._clients = {}
+        self._alerts = set()
+
+    def _add_server(self, sid, conninfo):
+        # Called with the lock held
+        listener = self._listeners.get(sid)
+        if listener is None:
+            listener = JobStatusListener(sid, conninfo)
+            self._listeners[sid] = listener
+            self.fanout.add_server(listener)
+        return listener
+
+    def _release_server(self, sid):
+        # Called with the lock held, returns the listener to remove from
+        # the fan-out once neither a client nor the alerts need it.
+        if self._clients.get(sid) or sid in self._alerts:
+            return None
+        self._clients.pop(sid, None)
+        return self._listeners.pop(sid, None)
+
+    def subscribe(self, sid, client_sid, conninfo):
+        """
+        Subscribe a client to the job status notifications of a server.
+
+        :param sid: Server ID
+        :param client_sid: Socket.IO session id of the client
+        :param conninfo: connection string used if a listener is started
+        :return: the shared listener of the server
+        """
+        with self._lock:
+            self._clients.setdefault(sid, {})[client_sid] = datetime.now()
+            return self._add_server(sid, conninfo)
+
+    def unsubscribe(self, sid, client_sid):
+        """
+        Unsubscribe a client from a server, stopping the listener of the
+        server if it was the last subscriber and the server sends no email
+        alerts.
+
+        :param sid: Server ID
+        :param client_sid: Socket.IO session id of the client
+        :return: True if the client was subscribed to the server
+        """
+        with self._lock:
+            clients = self._clients.get(sid)
+            if not clients or client_sid not in clients:
+                return False
+
+            del clients[client_sid]
+            self.routes.unwatch(sid, client_sid)
+            listener = self._release_server(sid)
+
+        if listener is not None:
+            self.fanout.remove_server(listener)
+        return True
+
+    def sends_alerts(self):
+        """Returns True if the email alerts are sent by this process"""
+        return getattr(self.fanout, 'alerts', None) is not None
+
+    def watch_alerts(self, sid, conninfo):
+        """
+        Keep listening to a server whose jobs send email alerts, so that
+        they are sent whether or not a client is subscribed to the server.
+
+        :param sid: Server ID
+        :param conninfo: connection string used if a listener is started
+        :return: False if the email alerts are not sent by pgAdmin
+        """
+        if not self.sends_alerts():
+            return False
+
+        with self._lock:
+            self._alerts.add(sid)
+            self._add_server(sid, conninfo)
+        return True
+
+    def unwatch_alerts(self, sid):
+        """
+        Stop listening to a server whose jobs no longer send email alerts,
+        unless a client is subscribed to it.
+
+        :param sid: Server ID
+        :return: True if the server was listened to for its alerts
+        """
+        with self._lock:
+            if sid not in self._alerts:
+                return False
+
+            self._alerts.discard(sid)
+            listener = self._release_server(sid)
+
+        if listener is not None:
+            self.fanout.remove_server(listener)
+        return True
+
+    def unsubscribe_client(self, client_sid):
+        """
+        Unsubscribe a client from all the servers.
+
+        :param client_sid: Socket.IO session id of the client
+        :return: list of the server ids the client was subscribed to
+        """
+        with self._lock:
+            servers = [sid for sid, clients in self._clients.items()
+                       if client_sid in clients]
+
+        return [sid for sid in servers if self.unsubscribe(sid, client_sid)]
+
+    def subscribe_jobs(self, sid, client_sid, jobs=(), job_classes=()):
+        """
+        Only send a client subscribed to a server the notifications of some
+        of its jobs and job classes.
+
+        :param sid: Server ID
+        :param client_sid: Socket.IO session id of the client
+        :param jobs: ids of the jobs to watch
+        :param job_classes: ids of the job classes to watch
+        :return: tuple of the rooms the client joins and leaves, None if
+            the client is not subscribed to the server
+        """
+        with self._lock:
+            if client_sid not in self._clients.get(sid, {}):
+                return None
+            return self.routes.watch(sid, client_sid, jobs, job_classes)
+
+    def unsubscribe_jobs(self, sid, client_sid, jobs=None, job_classes=None):
+        """
+        Stop watching some jobs and job classes, all of them if none is
+        given. A client watching nothing receives all the notifications of
+        the server again.
+
+        :return: tuple of the rooms the client joins and leaves
+        """
+        return self.routes.unwatch(sid, client_sid, jobs, job_classes)
+
+    def deliver(self, sid, event, data):
+        """
+        Emit an event of a server to the rooms of the clients watching it.
+
+        :param sid: Server ID
+        :param event: JOB_STATUS_EVENT or JOB_STATUS_BATCH_EVENT
+        :param data: notification payload, or batch of them
+        """
+        for rooms, part in self.routes.route(sid, event, data):
+            self.emit(sid, event, part, rooms)
+
+    def get_state(self, sid):
+        """Returns the latest state of the jobs of a server"""
+        return self.fanout.get_state(sid)
+
+    def get_stats(self):
+        return self.fanout.get_stats()
+
+    def client_count(self, sid):
+        with self._lock:
+            return len(self._clients.get(sid, {}))
+
+    def get_info(self):
+        """Returns the listeners and their subscribers, for diagnostics"""
+        with self._lock:
+            servers = {sid: (list(self._clients.get(sid, ())),
+                             sid in self._alerts,
+                             self.fanout.get_listener(listener))
+                       for sid, listener in self._listeners.items()}
+
+        return {
+            sid: {
+                'client_count': len(clients),
+                'clients': clients,
+                'email_alerts': alerts,
+                'db_connection_status':
+                    'connected' if listener.connected else 'disconnected',
+                'reconnects': listener.reconnects,
+                'watched_rooms': self.routes.room_count(sid),
+                'started_at': listener.started_at.isoformat()
+            }
+            for sid, (clients, alerts, listener) in servers.items()
+        }
@@ -20,9 +20,10 @@ from pgadmin.utils.ajax import make_json_response, gone, \
     make_response as ajax_response, internal_server_error
 from pgadmin.utils.driver import get_driver
 from pgadmin.browser.server_groups.servers.pgagent.utils \
-    import format_schedule_data
+    import format_schedule_data, preview_schedule_runs, get_bulk_args
 
-from config import PG_DEFAULT_DRIVER
+from config import PG_DEFAULT_DRIVER, PGAGENT_SCHEDULE_PREVIEW_RUNS, \
+    PGAGENT_SCHEDULE_PREVIEW_MAX_RUNS
 
 
 class JobScheduleModule(CollectionNodeModule):
@@ -143,6 +144,9 @@ class JobScheduleView(PGChildNodeView):
 
     * delete(gid, sid, jid, jscid)
       - Drops job schedule
+
+    * preview(gid, sid, jid, jscid)
+      - Returns the next runs of the selected schedule
     """
 
     node_type = blueprint.node_type
@@ -163,6 +167,8 @@ class JobScheduleView(PGChildNodeView):
         ],
         'nodes': [{'get': 'nodes'}, {'get': 'nodes'}],
         'msql': [{'get': 'msql'}, {'get': 'msql'}],
+        'enable': [{}, {'put': 'enable'}],
+        'preview': [{'get': 'preview'}],
         'sql': [{'get': 'sql'}]
     })
 
@@ -470,21 +476,132 @@ class JobScheduleView(PGChildNodeView):
             data = request.form if request.form else json.loads(
                 request.data
             )
+            try:
+                ids = get_bulk_args(data)[0]
+            except ValueError as e:
+                return make_json_response(
+                    status=400,
+                    success=0,
+                    errormsg=str(e)
+                )
         else:
-            data = {'ids': [jscid]}
+            ids = [jscid]
 
-        for jscid in data['ids']:
-            status, res = self.conn.execute_void(
-                render_template(
-                    "/".join([self.template_path, self._DELETE_SQL]),
-                    jid=jid, jscid=jscid, conn=self.conn
-                )
+        # All the schedules are deleted by a single statement
+        status, res = self.conn.execute_void(
+            render_template(
+                "/".join([self.template_path, self._DELETE_SQL]),
+                jid=jid, jscids=ids, conn=self.conn
             )
-            if not status:
-                return internal_server_error(errormsg=res)
+        )
+        if not status:
+            return internal_server_error(errormsg=res)
 
         return make_json_response(success=1)
 
+    @check_precondition
+    def enable(self, gid, sid, jid):
+        """
+        Enable or disable the schedules given by 'ids' with a single
+        statement, according to 'jscenabled'.
+
+        Args:
+            gid: Server Group ID
+            sid: Server ID
+            jid: Job ID
+        """
+        data = request.form if request.form else json.loads(
+            request.data.decode('utf-8')
+        )
+
+        for arg in ('ids', 'jscenabled'):
+            if arg not in data:
+                return make_json_response(
+                    status=410,
+                    success=0,
+                    errormsg=gettext(
+                        "Could not find the required parameter ({})."
+                    ).format(arg)
+                )
+
+        try:
+            ids, enabled = get_bulk_args(data, 'jscenabled')
+        except ValueError as e:
+            return make_json_response(
+                status=400,
+                success=0,
+                errormsg=str(e)
+            )
+
+        status, res = self.conn.execute_dict(
+            render_template(
+                "/".join([self.template_path, 'enable.sql']),
+                jid=jid, jscids=ids, enabled=enabled,
+                conn=self.conn
+            )
+        )
+        if not status:
+            return internal_server_error(errormsg=res)
+
+        return make_json_response(
+            data=[
+                self.blueprint.generate_browser_node(
+                    row['jscid'],
+                    row['jscjobid'],
+                    row['jscname'],
+                    icon="icon-pga_schedule" if row['jscenabled'] else
+                    "icon-pga_schedule-disabled",
+                    enabled=row['jscenabled'],
+                    description=row['jscdesc']
+                ) for row in res['rows']
+            ],
+            status=200
+        )
+
+    @check_precondition
+    def preview(self, gid, sid, jid, jscid):
+        """
+        Returns the next runs of the selected schedule, 'count' of them, as
+        pgAgent will schedule them. The runs are in the time zone of the
+        server, which is returned with them.
+
+        Args:
+            gid: Server Group ID
+            sid: Server ID
+            jid: Job ID
+            jscid: Job Schedule ID
+        """
+        try:
+            count = int(
+                request.args.get('count', PGAGENT_SCHEDULE_PREVIEW_RUNS))
+        except ValueError:
+            count = 0
+        if not 0 < count <= PGAGENT_SCHEDULE_PREVIEW_MAX_RUNS:
+            return make_json_response(
+                success=0,
+                errormsg=gettext("Invalid run count."),
+                status=400
+            )
+
+        status, res = preview_schedule_runs(
+            self.conn, count, jid=jid, jscid=jscid)
+        if not status:
+            return internal_server_error(errormsg=res)
+
+        if len(res['schedules']) == 0:
+            return gone(
+                errormsg=gettext("Could not find the specified schedule.")
+            )
+
+        return make_json_response(
+            data={
+                'jscid': jscid,
+                'timezone': res['timezone'],
+                'runs': res['schedules'][0]['runs']
+            },
+            status=200
+        )
+
     @check_precondition
     def msql(self, gid, sid, jid, jscid=None):
         """
@@ -46,19 +46,26 @@ class PgAgentDeleteScheduleTestCase(BaseTestGenerator):
 
     def runTest(self):
         """This function will deletes pgAgent job schedule"""
-        if self.is_positive_test:
-            if self.is_list:
-                self.data['ids'] = [self.schedule_id, self.schedule_id_2]
-                response = schedules_utils.api_delete(self, '')
-            else:
-                response = schedules_utils.api_delete(self)
+        if self.is_list:
+            self.data.setdefault('ids', [self.schedule_id, self.schedule_id_2])
+            response = schedules_utils.api_delete(self, '')
+        else:
+            response = schedules_utils.api_delete(self)
 
-            # Assert response
-            utils.assert_status_code(self, response)
+        # Assert response
+        utils.assert_status_code(self, response)
+        if not self.is_positive_test:
+            utils.assert_error_message(self, response)
 
-        is_present = pgagent_utils.verify_pgagent_schedule(self)
-        self.assertFalse(
-            is_present, "pgAgent schedule was not deleted successfully")
+        # All the schedules are deleted, or none of them
+        schedule_ids = [self.schedule_id, self.schedule_id_2] if self.is_list \
+            else [self.schedule_id]
+        for schedule_id in schedule_ids:
+            is_present = pgagent_utils.verify_pgagent_schedule(
+                self, schedule_id)
+            self.assertEqual(
+                is_present, not self.is_positive_test,
+                "pgAgent schedule was not deleted as expected")
 
     def tearDown(self):
         """Clean up code"""
@@ -0,0 +1,79 @@
+##########################################################################
+#
+# pgAdmin 4 - PostgreSQL Tools
+#
+# Copyright (C) 2013 - 2025, The pgAdmin Development Team
+# This software is released under the PostgreSQL Licence
+#
+##########################################################################
+
+import json
+import uuid
+from unittest.mock import patch
+
+from pgadmin.utils.route import BaseTestGenerator
+from regression.python_test_utils import test_utils as utils
+from pgadmin.browser.server_groups.servers.pgagent.tests import utils as\
+    pgagent_utils
+from . import utils as schedules_utils
+
+
+class PgAgentPreviewScheduleTestCase(BaseTestGenerator):
+    """
+    This class will test the schedule preview API, and that its runs are
+    the ones computed by pgagent.pga_next_schedule
+    """
+    scenarios = utils.generate_scenarios("pgagent_preview_schedule",
+                                         schedules_utils.test_cases)
+
+    def setUp(self):
+        super().setUp()
+        flag, msg = pgagent_utils.is_valid_server_to_run_pgagent(self)
+        if not flag:
+            self.skipTest(msg)
+        flag, msg = pgagent_utils.is_pgagent_installed_on_server(self)
+        if not flag:
+            self.skipTest(msg)
+
+        # Load test data
+        self.data = self.test_data
+
+        name = "test_job_preview%s" % str(uuid.uuid4())[1:8]
+        self.job_id = pgagent_utils.create_pgagent_job(self, name)
+
+        sch_name = "test_schedule_preview%s" % str(uuid.uuid4())[1:8]
+        self.schedule_id = pgagent_utils.create_pgagent_schedule(
+            self, sch_name, self.job_id)
+        schedules_utils.set_schedule_masks(
+            self, self.inventory_data['schedule'])
+
+    def runTest(self):
+        """This function will preview the runs of a pgAgent job schedule"""
+        if self.is_positive_test:
+            response = schedules_utils.api_preview(self)
+
+            # Assert response
+            utils.assert_status_code(self, response)
+
+            data = json.loads(response.data.decode('utf-8'))['data']
+            self.assertEqual(
+                data['runs'],
+                schedules_utils.get_sql_next_runs(
+                    self, data['timezone'], self.data['count'])
+            )
+        else:
+            if self.mocking_required:
+                with patch(self.mock_data["function_name"],
+                           side_effect=[eval(self.mock_data["return_value"])]):
+                    response = schedules_utils.api_preview(self)
+            else:
+                response = schedules_utils.api_preview(
+                    self, self.data.get('schedule_id'))
+
+            # Assert response
+            utils.assert_status_code(self, response)
+            utils.assert_error_message(self, response)
+
+    def tearDown(self):
+        """Clean up code"""
+        pgagent_utils.delete_pgagent_job(self)
@@ -8,7 +8,10 @@
 ##########################################################################
 
 import os
+import sys
 import json
+import traceback
+from datetime import datetime, timedelta
 from urllib.parse import urlencode
 
 from regression.python_test_utils import test_utils as utils
@@ -67,3 +70,99 @@ def api_get_msql(self, url_encode_data, schedule_id=None):
                                   urlencode(url_encode_data)),
                            data=json.dumps(self.data),
                            follow_redirects=True)
+
+
+def api_preview(self, schedule_id=None):
+    if schedule_id is None:
+        schedule_id = self.schedule_id
+    return self.tester.get("{0}{1}/{2}/{3}/{4}?{5}".
+                           format(self.url, utils.SERVER_GROUP,
+                                  self.server_id, self.job_id,
+                                  schedule_id,
+                                  urlencode({'count': self.data['count']})),
+                           content_type='html/json')
+
+
+def _selected_array(selected, size):
+    return [idx in selected for idx in range(size)]
+
+
+def set_schedule_masks(self, schedule):
+    """
+    Sets the start, end, bool arrays and exceptions of the schedule. The
+    bool arrays are given as the list of the selected elements.
+    """
+    sizes = {
+        'jscminutes': 60, 'jschours': 24, 'jscweekdays': 7,
+        'jscmonthdays': 32, 'jscmonths': 12, 'jscoccurrence': 5
+    }
+    try:
+        connection = utils.get_db_connection(
+            self.server['db'],
+            self.server['username'],
+            self.server['db_password'],
+            self.server['host'],
+            self.server['port'],
+            self.server['sslmode']
+        )
+        pg_cursor = connection.cursor()
+        pg_cursor.execute(
+            "UPDATE pgagent.pga_schedule SET jscstart = %s, jscend = %s, " +
+            ", ".join("{0} = %s".format(key) for key in sizes) +
+            " WHERE jscid = %s",
+            [schedule['jscstart'], schedule['jscend']] + [
+                _selected_array(schedule.get(key, []), size)
+                for key, size in sizes.items()
+            ] + [self.schedule_id]
+        )
+        for exception in schedule.get('jscexceptions', []):
+            pg_cursor.execute(
+                "INSERT INTO pgagent.pga_exception(jexscid, jexdate, jextime)"
+                " VALUES (%s, %s::date, %s::time without time zone)",
+                (self.schedule_id, exception['jexdate'],
+                 exception['jextime'])
+            )
+        connection.commit()
+        connection.close()
+    except Exception:
+        traceback.print_exc(file=sys.stderr)
+
+
+def get_sql_next_runs(self, timezone, count):
+    """
+    Returns the next runs of the schedule computed by
+    pgagent.pga_next_schedule, in the given time zone. Every run is the
+    next one after the previous run, as the schedule starts in the future.
+    """
+    connection = utils.get_db_connection(
+        self.server['db'],
+        self.server['username'],
+        self.server['db_password'],
+        self.server['host'],
+        self.server['port'],
+        self.server['sslmode']
+    )
+    pg_cursor = connection.cursor()
+    pg_cursor.execute("SELECT set_config('TimeZone', %s, false)",
+                      (timezone,))
+    runs = []
+    start = None
+    for _ in range(count):
+        pg_cursor.execute(
+            """
+            SELECT to_char(pgagent.pga_next_schedule(
+                jscid, COALESCE(%s::timestamp with time zone, jscstart),
+                jscend, jscminutes, jschours, jscweekdays, jscmonthdays,
+                jscmonths, jscoccurrence
+            ), 'YYYY-MM-DD HH24:MI:SS')
+            FROM pgagent.pga_schedule WHERE jscid = %s
+            """,
+            (start, self.schedule_id)
+        )
+        run = pg_cursor.fetchone()[0]
+        if run is None:
+            break
+        runs.append(run)
+        start = str(datetime.fromisoformat(run) + timedelta(minutes=1))
+    connection.close()
+    return runs
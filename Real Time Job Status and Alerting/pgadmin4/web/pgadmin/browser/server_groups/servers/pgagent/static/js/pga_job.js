@@ -445,7 +445,7 @@ define('pgadmin.node.pga_job', [
               
             });
             
-            self.socket.on('job_status_update', function(data) {
+            let onJobStatusUpdate = function(data) {
               console.log('📢[pgAdmin pgAgent] Job status update received:', data);
               
               try {
@@ -516,6 +516,13 @@ define('pgadmin.node.pga_job', [
                 console.error('📢[pgAdmin pgAgent] Error processing job status update:', e);
                 console.error('📢[pgAdmin pgAgent] Update data:', data);
               }
+            };
+
+            self.socket.on('job_status_update', onJobStatusUpdate);
+
+            // Notifications coalesced by the server, the latest one per job
+            self.socket.on('job_status_batch', function(data) {
+              ((data && data.updates) || []).forEach(onJobStatusUpdate);
             });
             
             self.socket.on('reconnect', function(attemptNumber) {
@@ -704,6 +711,7 @@ define('pgadmin.node.pga_job', [
             self.socket.off('job_status_listener_started');
             self.socket.off('job_status_listener_error');
             self.socket.off('job_status_update');
+            self.socket.off('job_status_batch');
             self.socket.off('reconnect');
             
             // Disconnect the socket
@@ -19,6 +19,8 @@ from pgadmin.browser.utils import PGChildNodeView
 from pgadmin.utils.ajax import make_json_response, gone, \
     make_response as ajax_response, internal_server_error
 from pgadmin.utils.driver import get_driver
+from pgadmin.browser.server_groups.servers.pgagent.utils \
+    import get_bulk_args
 from pgadmin.utils.preferences import Preferences
 
 from config import PG_DEFAULT_DRIVER
@@ -164,6 +166,7 @@ class JobStepView(PGChildNodeView):
         ],
         'nodes': [{'get': 'nodes'}, {'get': 'nodes'}],
         'msql': [{'get': 'msql'}, {'get': 'msql'}],
+        'enable': [{}, {'put': 'enable'}],
         'sql': [{'get': 'sql'}],
         'stats': [{'get': 'statistics'}]
     })
@@ -207,7 +210,11 @@ SELECT EXISTS(
         WHERE
             table_schema='pgagent' AND table_name='pga_jobstep' AND
             column_name='jstconnstr'
-    ) has_connstr""")
+    ) has_connstr, EXISTS(
+        SELECT 1 FROM pg_catalog.pg_class cl
+        JOIN pg_catalog.pg_namespace ns ON ns.oid = cl.relnamespace
+        WHERE cl.relname = 'pga_job_state' AND ns.nspname = 'pgagent'
+    ) has_job_state""")
 
                 self.manager.db_info['pgAgent'] = res['rows'][0]
 
@@ -493,21 +500,89 @@ SELECT EXISTS(
             data = request.form if request.form else json.loads(
                 request.data
             )
+            try:
+                ids = get_bulk_args(data)[0]
+            except ValueError as e:
+                return make_json_response(
+                    status=400,
+                    success=0,
+                    errormsg=str(e)
+                )
         else:
-            data = {'ids': [jstid]}
+            ids = [jstid]
 
-        for jstid in data['ids']:
-            status, res = self.conn.execute_void(
-                render_template(
-                    "/".join([self.template_path, self._DELETE_SQL]),
-                    jid=jid, jstid=jstid, conn=self.conn
-                )
+        # All the steps are deleted by a single statement
+        status, res = self.conn.execute_void(
+            render_template(
+                "/".join([self.template_path, self._DELETE_SQL]),
+                jid=jid, jstids=ids, conn=self.conn
             )
-            if not status:
-                return internal_server_error(errormsg=res)
+        )
+        if not status:
+            return internal_server_error(errormsg=res)
 
         return make_json_response(success=1)
 
+    @check_precondition
+    def enable(self, gid, sid, jid):
+        """
+        Enable or disable the steps given by 'ids' with a single
+        statement, according to 'jstenabled'.
+
+        Args:
+            gid: Server Group ID
+            sid: Server ID
+            jid: Job ID
+        """
+        data = request.form if request.form else json.loads(
+            request.data.decode('utf-8')
+        )
+
+        for arg in ('ids', 'jstenabled'):
+            if arg not in data:
+                return make_json_response(
+                    status=410,
+                    success=0,
+                    errormsg=gettext(
+                        "Could not find the required parameter ({})."
+                    ).format(arg)
+                )
+
+        try:
+            ids, enabled = get_bulk_args(data, 'jstenabled')
+        except ValueError as e:
+            return make_json_response(
+                status=400,
+                success=0,
+                errormsg=str(e)
+            )
+
+        status, res = self.conn.execute_dict(
+            render_template(
+                "/".join([self.template_path, 'enable.sql']),
+                jid=jid, jstids=ids, enabled=enabled,
+                conn=self.conn
+            )
+        )
+        if not status:
+            return internal_server_error(errormsg=res)
+
+        return make_json_response(
+            data=[
+                self.blueprint.generate_browser_node(
+                    row['jstid'],
+                    row['jstjobid'],
+                    row['jstname'],
+                    icon="icon-pga_jobstep" if row['jstenabled'] else
+                    "icon-pga_jobstep-disabled",
+                    enabled=row['jstenabled'],
+                    kind=row['jstkind'],
+                    description=row['jstdesc']
+                ) for row in res['rows']
+            ],
+            status=200
+        )
+
     @check_precondition
     def msql(self, gid, sid, jid, jstid=None):
         """
@@ -592,7 +667,21 @@ SELECT EXISTS(
         Returns the statistics for a particular database if jid is specified,
         otherwise it will return statistics for all the databases in that
         server.
+
+        The runs are returned newest first, pgagent_row_threshold at a time.
+        The next page starts before the 'before_id' request argument, the
+        last run id of the previous page.
         """
+        try:
+            before_id = int(request.args['before_id']) \
+                if request.args.get('before_id') else None
+        except ValueError:
+            return make_json_response(
+                success=0,
+                errormsg=gettext("Invalid run id."),
+                status=400
+            )
+
         pref = Preferences.module('browser')
         rows_threshold = pref.preference(
             'pgagent_row_threshold'
@@ -602,7 +691,8 @@ SELECT EXISTS(
             render_template(
                 "/".join([self.template_path, 'stats.sql']),
                 jid=jid, jstid=jstid, conn=self.conn,
-                rows_threshold=rows_threshold.get()
+                rows_threshold=rows_threshold.get(),
+                before_id=before_id
             )
         )
 
@@ -45,19 +45,25 @@ class PgAgentDeleteStepTestCase(BaseTestGenerator):
 
     def runTest(self):
         """This function will deletes pgAgent job step"""
-        if self.is_positive_test:
-            if self.is_list:
-                self.data['ids'] = [self.step_id, self.step_id_2]
-                response = steps_utils.api_delete(self, '')
-            else:
-                response = steps_utils.api_delete(self)
+        if self.is_list:
+            self.data.setdefault('ids', [self.step_id, self.step_id_2])
+            response = steps_utils.api_delete(self, '')
+        else:
+            response = steps_utils.api_delete(self)
 
-            # Assert response
-            utils.assert_status_code(self, response)
+        # Assert response
+        utils.assert_status_code(self, response)
+        if not self.is_positive_test:
+            utils.assert_error_message(self, response)
 
-        is_present = pgagent_utils.verify_pgagent_step(self)
-        self.assertFalse(
-            is_present, "pgAgent step was not deleted successfully")
+        # All the steps are deleted, or none of them
+        step_ids = [self.step_id, self.step_id_2] if self.is_list \
+            else [self.step_id]
+        for step_id in step_ids:
+            is_present = pgagent_utils.verify_pgagent_step(self, step_id)
+            self.assertEqual(
+                is_present, not self.is_positive_test,
+                "pgAgent step was not deleted as expected")
 
     def tearDown(self):
         """Clean up code"""
@@ -0,0 +1,79 @@
+##########################################################################
+#
+# pgAdmin 4 - PostgreSQL Tools
+#
+# Copyright (C) 2013 - 2025, The pgAdmin Development Team
+# This software is released under the PostgreSQL Licence
+#
+##########################################################################
+
+import json
+import uuid
+from unittest.mock import patch
+
+from pgadmin.utils.route import BaseTestGenerator
+from regression.python_test_utils import test_utils as utils
+from pgadmin.browser.server_groups.servers.pgagent.tests import utils as \
+    pgagent_utils
+from . import utils as steps_utils
+
+
+class PgAgentEnableStepTestCase(BaseTestGenerator):
+    """This class will test the bulk enable/disable pgAgent job steps API"""
+    scenarios = utils.generate_scenarios("pgagent_enable_step",
+                                         steps_utils.test_cases)
+
+    def setUp(self):
+        flag, msg = pgagent_utils.is_valid_server_to_run_pgagent(self)
+        if not flag:
+            self.skipTest(msg)
+        flag, msg = pgagent_utils.is_pgagent_installed_on_server(self)
+        if not flag:
+            self.skipTest(msg)
+
+        # Load test data
+        self.data = self.test_data
+
+        name = "test_job_enable%s" % str(uuid.uuid4())[1:8]
+        self.job_id = pgagent_utils.create_pgagent_job(self, name)
+
+        step_name = "test_step_enable%s" % str(uuid.uuid4())[1:8]
+        self.step_id = pgagent_utils.create_pgagent_step(
+            self, step_name, self.job_id)
+        step_name_2 = "test_step_enable%s" % str(uuid.uuid4())[1:8]
+        self.step_id_2 = pgagent_utils.create_pgagent_step(
+            self, step_name_2, self.job_id)
+
+    def runTest(self):
+        """This function will enable or disable pgAgent job steps"""
+        self.data.setdefault('ids', [self.step_id, self.step_id_2])
+
+        if self.is_positive_test:
+            response = steps_utils.api_enable(self)
+
+            # Assert response
+            utils.assert_status_code(self, response)
+
+            nodes = json.loads(response.data.decode('utf-8'))['data']
+            self.assertEqual(
+                sorted(node['_id'] for node in nodes),
+                sorted([self.step_id, self.step_id_2])
+            )
+            enabled = self.data['jstenabled'] in (True, 'true')
+            for node in nodes:
+                self.assertEqual(node['enabled'], enabled)
+        else:
+            if self.mocking_required:
+                with patch(self.mock_data["function_name"],
+                           side_effect=[eval(self.mock_data["return_value"])]):
+                    response = steps_utils.api_enable(self)
+            else:
+                response = steps_utils.api_enable(self)
+
+            # Assert response
+            utils.assert_status_code(self, response)
+            utils.assert_error_message(self, response)
+
+    def tearDown(self):
+        """Clean up code"""
+        pgagent_utils.delete_pgagent_job(self)
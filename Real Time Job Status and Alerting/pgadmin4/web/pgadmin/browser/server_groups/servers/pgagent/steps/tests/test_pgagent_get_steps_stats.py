@@ -44,7 +44,10 @@ class PgAgentGetStepTestCase(BaseTestGenerator):
     def runTest(self):
         """This function will get pgAgent job step stats"""
         if self.is_positive_test:
-            response = steps_utils.api_get(self)
+            if self.data:
+                response = steps_utils.api_get_msql(self, self.data)
+            else:
+                response = steps_utils.api_get(self)
 
             # Assert response
             utils.assert_status_code(self, response)
@@ -53,6 +56,8 @@ class PgAgentGetStepTestCase(BaseTestGenerator):
                 with patch(self.mock_data["function_name"],
                            side_effect=[eval(self.mock_data["return_value"])]):
                     response = steps_utils.api_get(self)
+            else:
+                response = steps_utils.api_get_msql(self, self.data)
 
             # Assert response
             utils.assert_status_code(self, response)
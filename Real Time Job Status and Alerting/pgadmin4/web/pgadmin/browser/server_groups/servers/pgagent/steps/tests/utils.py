@@ -29,6 +29,15 @@ def api_delete(self, step_id=None):
                               content_type='html/json')
 
 
+def api_enable(self):
+    return self.tester.put('{0}{1}/{2}/{3}/'.
+                           format(self.url, utils.SERVER_GROUP,
+                                  self.server_id, self.job_id),
+                           data=json.dumps(self.data),
+                           follow_redirects=True,
+                           content_type='html/json')
+
+
 def api_put(self):
     return self.tester.put('{0}{1}/{2}/{3}/{4}'.
                            format(self.url, utils.SERVER_GROUP, self.server_id,
@@ -0,0 +1,73 @@
+{### The job with its steps, schedules and schedule exceptions as one JSON
+document. The timestamps are sent as text, as the driver loads them.
+Without jid, the limit jobs after the after_id one are returned. ###}
+SELECT row_to_json(job) AS job, job.jobid
+FROM (
+    SELECT
+        j.jobid AS jobid, j.jobname as jobname, j.jobenabled as jobenabled,
+        j.jobdesc AS jobdesc, j.jobhostagent AS jobhostagent,
+        j.jobcreated::text AS jobcreated, j.jobchanged::text AS jobchanged,
+        ag.jagstation AS jagagent, sub.jlgstatus AS jlgstatus,
+        j.jobagentid AS jobagentid, j.jobnextrun::text AS jobnextrun,
+        j.joblastrun::text AS joblastrun, j.jobjclid AS jobjclid,
+        jc.jclname AS jobclass,
+        n.jnenabled, n.jnbrowser, n.jnemail, n.jnwhen,
+        n.jnmininterval, n.jnemailrecipients, n.jncustomtext,
+        n.jnlastnotification::text AS jnlastnotification,
+        COALESCE((
+            SELECT json_agg(st ORDER BY st.jstname)
+            FROM (
+                SELECT
+                    jstid, jstjobid, jstname, jstdesc, jstenabled,
+                    jstkind = 's'::bpchar AS jstkind, jstcode,
+                    CASE WHEN (jstdbname != '' OR jstkind = 'b'::bpchar) THEN true ELSE false END AS jstconntype,
+                    {% if has_connstr %}jstconnstr, {% endif %}jstdbname, jstonerror,
+                    jscnextrun::text AS jscnextrun
+                FROM pgagent.pga_jobstep
+                WHERE jstjobid = j.jobid
+            ) st
+        ), '[]') AS jsteps,
+        COALESCE((
+            SELECT json_agg(sc ORDER BY sc.jscname)
+            FROM (
+                SELECT
+                    s.jscid, s.jscjobid, s.jscname, s.jscdesc, s.jscenabled,
+                    s.jscstart::text AS jscstart, s.jscend::text AS jscend,
+                    s.jscminutes, s.jschours, s.jscweekdays, s.jscmonthdays,
+                    s.jscmonths, s.jscoccurrence,
+                    COALESCE((
+                        SELECT json_agg(json_build_object(
+                            'jexid', e.jexid,
+                            'jexdate', to_char(e.jexdate, 'YYYY-MM-DD'),
+                            'jextime', e.jextime::text
+                        ) ORDER BY e.jexid)
+                        FROM pgagent.pga_exception e
+                        WHERE e.jexscid = s.jscid
+                    ), '[]') AS jscexceptions
+                FROM pgagent.pga_schedule s
+                WHERE s.jscjobid = j.jobid
+            ) sc
+        ), '[]') AS jschedules
+    FROM
+        pgagent.pga_job j
+        LEFT OUTER JOIN pgagent.pga_jobagent ag ON ag.jagpid=jobagentid
+        LEFT OUTER JOIN LATERAL (
+            SELECT jlgstatus
+            FROM pgagent.pga_joblog
+            WHERE jlgjobid = j.jobid
+            ORDER BY jlgid DESC
+            LIMIT 1
+        ) sub ON true
+        LEFT JOIN pgagent.pga_jobclass jc ON (j.jobjclid = jc.jclid)
+        LEFT JOIN pgagent.pga_job_notification n ON (j.jobid = n.jnjobid)
+{% if jid %}
+    WHERE j.jobid = {{ jid|qtLiteral(conn) }}::integer
+{% else %}
+{% if after_id %}
+    WHERE j.jobid > {{ after_id|qtLiteral(conn) }}::integer
+{% endif %}
+    ORDER BY j.jobid
+    LIMIT {{ limit }}
+{% endif %}
+) job
+ORDER BY job.jobid;
@@ -1 +1 @@
-DELETE FROM pgagent.pga_job WHERE jobid = {{ jid|qtLiteral(conn) }}::integer;
+DELETE FROM pgagent.pga_job WHERE jobid = ANY({{ jids|qtLiteral(conn) }}::integer[]);
@@ -0,0 +1,4 @@
+SELECT EXISTS(
+    SELECT 1 FROM pgagent.pga_job_notification
+    WHERE jnenabled AND jnemail
+) AS has_email_alerts
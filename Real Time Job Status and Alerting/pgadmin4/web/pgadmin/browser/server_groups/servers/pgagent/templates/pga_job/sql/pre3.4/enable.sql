@@ -0,0 +1,5 @@
+UPDATE pgagent.pga_job
+SET jobenabled={% if enabled %}true{% else %}false{% endif %}
+
+WHERE jobid = ANY({{ jids|qtLiteral(conn) }}::integer[])
+RETURNING jobid, jobname, jobenabled, jobdesc;
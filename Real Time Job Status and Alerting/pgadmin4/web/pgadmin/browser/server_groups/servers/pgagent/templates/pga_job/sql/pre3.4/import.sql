@@ -0,0 +1,81 @@
+{### Insert the validated jobs of a bulk import, with their steps,
+schedules, exceptions and notification settings, with a single statement.
+The job and schedule ids are taken from their sequences up front, so that
+the rows of every table can be inserted set based. ###}
+WITH src_jobs AS (
+    SELECT
+        nextval('pgagent.pga_job_jobid_seq'::regclass)::integer AS jobid,
+        src.job, src.idx
+    FROM json_array_elements({{ jobs|qtLiteral(conn) }}::json) WITH ORDINALITY AS src(job, idx)
+), src_schedules AS (
+    SELECT
+        nextval('pgagent.pga_schedule_jscid_seq'::regclass)::integer AS jscid,
+        j.jobid, src.schedule
+    FROM
+        src_jobs j,
+        json_array_elements(j.job->'jschedules') AS src(schedule)
+), new_jobs AS (
+    INSERT INTO pgagent.pga_job(
+        jobid, jobjclid, jobname, jobdesc, jobhostagent, jobenabled
+    )
+    SELECT
+        jobid, (job->>'jobjclid')::integer, job->>'jobname', job->>'jobdesc',
+        job->>'jobhostagent', (job->>'jobenabled')::boolean
+    FROM src_jobs
+    ORDER BY idx
+    RETURNING jobid
+), new_notifications AS (
+    INSERT INTO pgagent.pga_job_notification(
+        jnjobid, jnenabled, jnbrowser, jnemail, jnwhen, jnmininterval,
+        jnemailrecipients, jncustomtext
+    )
+    SELECT
+        jobid, (job->>'jnenabled')::boolean, (job->>'jnbrowser')::boolean,
+        (job->>'jnemail')::boolean, job->>'jnwhen',
+        (job->>'jnmininterval')::integer, job->>'jnemailrecipients',
+        job->>'jncustomtext'
+    FROM src_jobs
+), new_steps AS (
+    INSERT INTO pgagent.pga_jobstep(
+        jstjobid, jstname, jstenabled, jstkind,
+        {% if has_connstr %}jstconnstr, {% endif %}jstdbname, jstonerror,
+        jstcode, jstdesc
+    )
+    SELECT
+        j.jobid, src.step->>'jstname', (src.step->>'jstenabled')::boolean,
+        (src.step->>'jstkind')::character(1),
+        {% if has_connstr %}src.step->>'jstconnstr', {% endif %}(src.step->>'jstdbname')::name,
+        (src.step->>'jstonerror')::character(1),
+        src.step->>'jstcode', src.step->>'jstdesc'
+    FROM
+        src_jobs j,
+        json_array_elements(j.job->'jsteps') WITH ORDINALITY AS src(step, idx)
+    ORDER BY j.idx, src.idx
+), new_schedules AS (
+    INSERT INTO pgagent.pga_schedule(
+        jscid, jscjobid, jscname, jscdesc, jscenabled, jscstart, jscend,
+        jscminutes, jschours, jscweekdays, jscmonthdays, jscmonths,
+        jscoccurrence
+    )
+    SELECT
+        jscid, jobid, schedule->>'jscname', schedule->>'jscdesc',
+        (schedule->>'jscenabled')::boolean,
+        (schedule->>'jscstart')::timestamp with time zone,
+        (schedule->>'jscend')::timestamp with time zone,
+        ARRAY(SELECT json_array_elements_text(schedule->'jscminutes'))::boolean[],
+        ARRAY(SELECT json_array_elements_text(schedule->'jschours'))::boolean[],
+        ARRAY(SELECT json_array_elements_text(schedule->'jscweekdays'))::boolean[],
+        ARRAY(SELECT json_array_elements_text(schedule->'jscmonthdays'))::boolean[],
+        ARRAY(SELECT json_array_elements_text(schedule->'jscmonths'))::boolean[],
+        ARRAY(SELECT json_array_elements_text(schedule->'jscoccurrence'))::boolean[]
+    FROM src_schedules
+), new_exceptions AS (
+    INSERT INTO pgagent.pga_exception(jexscid, jexdate, jextime)
+    SELECT
+        s.jscid, to_date(src.exception->>'jexdate', 'YYYY-MM-DD')::date,
+        (src.exception->>'jextime')::time without time zone
+    FROM
+        src_schedules s,
+        json_array_elements(s.schedule->'jscexceptions') AS src(exception)
+)
+SELECT jobid FROM new_jobs;
@@ -13,11 +13,21 @@ SELECT
 FROM
     pgagent.pga_job j
     LEFT OUTER JOIN pgagent.pga_jobagent ag ON ag.jagpid=jobagentid
+{% if has_job_state and not jid %}
+    -- The latest run of every job is kept by the pga_joblog triggers
     LEFT OUTER JOIN (
-        SELECT DISTINCT ON (jlgjobid) jlgstatus, jlgjobid
-        FROM pgagent.pga_joblog
-        ORDER BY jlgjobid, jlgid DESC
+        SELECT jssjobid AS jlgjobid, jssstatus AS jlgstatus
+        FROM pgagent.pga_job_state
     ) sub ON sub.jlgjobid = j.jobid
+{% else %}
+    LEFT OUTER JOIN LATERAL (
+        SELECT jlgstatus
+        FROM pgagent.pga_joblog
+        WHERE jlgjobid = j.jobid
+        ORDER BY jlgid DESC
+        LIMIT 1
+    ) sub ON true
+{% endif %}
     LEFT JOIN pgagent.pga_jobclass jc ON (j.jobjclid = jc.jclid)
     LEFT JOIN pgagent.pga_job_notification n ON (j.jobid = n.jnjobid)
 {% if jid %}
@@ -8,5 +8,8 @@ FROM
     pgagent.pga_joblog
 WHERE
     jlgjobid = {{ jid|qtLiteral(conn) }}::integer
+{% if before_id %}
+    AND jlgid < {{ before_id }}
+{% endif %}
 ORDER BY jlgid DESC
 LIMIT {{ rows_threshold }};
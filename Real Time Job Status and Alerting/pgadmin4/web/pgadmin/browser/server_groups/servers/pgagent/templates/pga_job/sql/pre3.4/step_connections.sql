@@ -0,0 +1,8 @@
+SELECT
+    jstid, CASE WHEN (jstdbname != '' OR jstkind = 'b'::bpchar) THEN true ELSE false END AS jstconntype,
+    jstdbname, jstconnstr
+FROM
+    pgagent.pga_jobstep
+WHERE
+    jstid = ANY({{ jstids|qtLiteral(conn) }}::integer[]) AND
+    jstjobid = {{ jid|qtLiteral(conn) }}::integer;
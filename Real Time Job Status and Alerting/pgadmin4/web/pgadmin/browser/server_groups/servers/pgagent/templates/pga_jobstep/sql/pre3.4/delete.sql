@@ -1,2 +1,2 @@
-{% import 'macros/pga_jobstep.macros' as STEP %}
-{{ STEP.DELETE(jid, jstid, conn) }}
+-- Deleting the steps (jobid: {{ jid|qtLiteral(conn) }})
+DELETE FROM pgagent.pga_jobstep WHERE jstid = ANY({{ jstids|qtLiteral(conn) }}::integer[]) AND jstjobid={{ jid|qtLiteral(conn) }}::integer;
@@ -0,0 +1,5 @@
+UPDATE pgagent.pga_jobstep
+SET jstenabled={% if enabled %}true{% else %}false{% endif %}
+
+WHERE jstid = ANY({{ jstids|qtLiteral(conn) }}::integer[]) AND jstjobid={{ jid|qtLiteral(conn) }}::integer
+RETURNING jstid, jstjobid, jstname, jstenabled, jstkind = 's'::bpchar AS jstkind, jstdesc;
@@ -10,5 +10,8 @@ FROM
     pgagent.pga_jobsteplog
 WHERE
     jsljstid = {{ jstid|qtLiteral(conn) }}::integer
+{% if before_id %}
+    AND jslid < {{ before_id }}
+{% endif %}
 ORDER BY jslid DESC
 LIMIT {{ rows_threshold }};
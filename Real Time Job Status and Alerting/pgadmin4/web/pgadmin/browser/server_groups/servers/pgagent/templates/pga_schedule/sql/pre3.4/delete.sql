@@ -1,2 +1,2 @@
-{% import 'macros/pga_schedule.macros' as SCHEDULE %}
-{{ SCHEDULE.DELETE(jid, jscid, conn) }}
+-- Removing the existing schedules (jobid: {{ jid|qtLiteral(conn) }})
+DELETE FROM pgagent.pga_schedule WHERE jscid = ANY({{ jscids|qtLiteral(conn) }}::integer[]) AND jscjobid={{ jid|qtLiteral(conn) }}::integer;
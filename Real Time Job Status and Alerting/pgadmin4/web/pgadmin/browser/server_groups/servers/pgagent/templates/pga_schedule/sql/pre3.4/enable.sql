@@ -0,0 +1,5 @@
+UPDATE pgagent.pga_schedule
+SET jscenabled={% if enabled %}true{% else %}false{% endif %}
+
+WHERE jscid = ANY({{ jscids|qtLiteral(conn) }}::integer[]) AND jscjobid={{ jid|qtLiteral(conn) }}::integer
+RETURNING jscid, jscjobid, jscname, jscenabled, jscdesc;
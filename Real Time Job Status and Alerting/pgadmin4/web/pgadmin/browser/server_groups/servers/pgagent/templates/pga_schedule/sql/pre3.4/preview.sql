@@ -0,0 +1,37 @@
+{### The schedules to preview the runs of, with their exceptions, as a
+single row. The timestamps are in the time zone of the session, as
+pga_next_schedule builds them, and the runs are searched from now() + 1 minute
+like it does. Without jscid, the enabled schedules of the enabled jobs are
+returned. ###}
+SELECT
+    to_char(now()::timestamp + '1 minute'::interval, 'YYYY-MM-DD HH24:MI:SS') AS runafter,
+    current_setting('TimeZone') AS timezone,
+    COALESCE(json_agg(sc ORDER BY sc.jscjobid, sc.jscname), '[]') AS schedules
+FROM (
+    SELECT
+        s.jscid, s.jscjobid, s.jscname, j.jobname,
+        to_char(s.jscstart::timestamp, 'YYYY-MM-DD HH24:MI:SS') AS jscstart,
+        to_char(s.jscend::timestamp, 'YYYY-MM-DD HH24:MI:SS') AS jscend,
+        s.jscminutes, s.jschours, s.jscweekdays, s.jscmonthdays,
+        s.jscmonths, s.jscoccurrence,
+        COALESCE((
+            SELECT json_agg(json_build_object(
+                'jexdate', to_char(e.jexdate, 'YYYY-MM-DD'),
+                'jextime', to_char(e.jextime, 'HH24:MI:SS')
+            ))
+            FROM pgagent.pga_exception e
+            WHERE e.jexscid = s.jscid
+        ), '[]') AS jscexceptions
+    FROM
+        pgagent.pga_schedule s
+        JOIN pgagent.pga_job j ON (j.jobid = s.jscjobid)
+{% if jscid %}
+    WHERE s.jscid = {{ jscid|qtLiteral(conn) }}::integer
+        AND s.jscjobid = {{ jid|qtLiteral(conn) }}::integer
+{% else %}
+    WHERE s.jscenabled AND j.jobenabled
+{% if jid %}
+        AND s.jscjobid = {{ jid|qtLiteral(conn) }}::integer
+{% endif %}
+{% endif %}
+) sc;
@@ -0,0 +1,356 @@
+##########################################################################
+#
+# pgAdmin 4 - PostgreSQL Tools
+#
+# Copyright (C) 2013 - 2025, The pgAdmin Development Team
+# This software is released under the PostgreSQL Licence
+#
+##########################################################################
+
+import smtplib
+import socketserver
+import threading
+from concurrent.futures import wait
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from pgadmin.utils.route import BaseTestGenerator
+from pgadmin.browser.server_groups.servers.pgagent.alerts import \
+    AlertDispatcher, AlertRule, SMTPConnectionPool
+from regression.python_test_utils import test_utils as utils
+from . import utils as pgagent_utils
+
+
+class LocalSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough of SMTP for smtplib to send messages"""
+
+    def reply(self, line):
+        self.wfile.write((line + '\r\n').encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 localhost ESMTP')
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line[:4].upper()
+            if not line or command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            if command == 'EHLO':
+                self.reply('250 localhost')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while True:
+                    data_line = self.rfile.readline().decode()
+                    if data_line in ('.\r\n', ''):
+                        break
+                    data.append(data_line)
+                self.server.messages.append(''.join(data))
+                self.reply('250 OK')
+            else:
+                self.reply('250 OK')
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), LocalSMTPHandler)
+        self.connections = 0
+        self.messages = []
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def connect(self):
+        return smtplib.SMTP(*self.server_address, timeout=5)
+
+
+def failure(jobid, status='f'):
+    return {
+        'job_id': jobid,
+        'status': status,
+        'description': 'Step failed',
+        'timestamp': '2025-01-01 00:00:00',
+        'notification': {'browser': True, 'email': True},
+        'job': {'jobid': jobid, 'jobname': 'job{0}'.format(jobid)}
+    }
+
+
+class PgAgentJobAlertRuleTestCase(BaseTestGenerator):
+    """This class will test the evaluation of the job notification rules"""
+    now = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+    scenarios = [
+        ('Failure only rule alerts a failure',
+         dict(rule=dict(when='f'), status='f', expected=True)),
+        ('Failure only rule ignores a success',
+         dict(rule=dict(when='f'), status='s', expected=False)),
+        ('Success and failure rule ignores a running job',
+         dict(rule=dict(when='b'), status='running', expected=False)),
+        ('All states rule alerts a running job',
+         dict(rule=dict(when='a'), status='running', expected=True)),
+        ('Disabled rule never alerts',
+         dict(rule=dict(when='a', enabled=False), status='f',
+              expected=False)),
+        ('Alert within the minimum interval is throttled',
+         dict(rule=dict(when='f', mininterval=600,
+                        lastnotification=now - timedelta(seconds=60)),
+              status='f', expected=False)),
+        ('Alert past the minimum interval is sent',
+         dict(rule=dict(when='f', mininterval=600,
+                        lastnotification=now - timedelta(seconds=601)),
+              status='f', expected=True)),
+    ]
+
+    def runTest(self):
+        rule = AlertRule(1, email=True, recipients='dba@example.com',
+                         **self.rule)
+        dispatcher = AlertDispatcher(lambda sid, jobid=None: {1: rule},
+                                     SMTPConnectionPool(1, connect=None))
+
+        sent = dispatcher.process(
+            1, dict(failure(1), status=self.status), now=self.now)
+
+        self.assertEqual(sent, self.expected)
+        self.assertEqual(dispatcher.get_stats()['pending_digests'],
+                         1 if self.expected else 0)
+
+
+class PgAgentJobAlertDigestTestCase(BaseTestGenerator):
+    """This class will test the batched sending of the job alerts"""
+    scenarios = [
+        ('A storm of failures is sent as one email per recipient',
+         dict(jobs=5, failures=500, recipients='dba@example.com, '
+                                               'ops@example.com',
+              expected_emails=2)),
+        ('Recipients of all the jobs share their digest',
+         dict(jobs=50, failures=100, recipients='dba@example.com',
+              expected_emails=1)),
+    ]
+
+    @patch('config.PGAGENT_ALERT_DIGEST_MAX_ALERTS', 10)
+    def runTest(self):
+        server = LocalSMTPServer()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        rules = {jobid: AlertRule(jobid, email=True,
+                                  recipients=self.recipients)
+                 for jobid in range(1, self.jobs + 1)}
+        dispatcher = AlertDispatcher(
+            lambda sid, jobid=None: rules,
+            SMTPConnectionPool(1, connect=server.connect)
+        )
+
+        for idx in range(self.failures):
+            dispatcher.process(1, failure(idx % self.jobs + 1))
+
+        wait(dispatcher.flush(force=True))
+        dispatcher.pool.close()
+
+        stats = dispatcher.get_stats()
+        self.assertEqual(stats['alerts'], self.failures)
+        self.assertEqual(stats['emails'], self.expected_emails)
+        self.assertEqual(len(server.messages), self.expected_emails)
+        # The emails are sent over a single SMTP session
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(stats['smtp_connections'], 1)
+        for message in server.messages:
+            self.assertIn('{0} job alerts, {0} failed'.format(self.failures),
+                          message)
+            self.assertIn('And {0} more alerts'.format(self.failures - 10),
+                          message)
+
+
+class PgAgentJobAlertRetryTestCase(BaseTestGenerator):
+    """This class will test the retries of the job alerts"""
+    scenarios = [
+        ('Alert is sent once the mail server is back',
+         dict(connect_failures=1, retries=3, expected_emails=1,
+              expected_failures=0)),
+        ('Alert is given up after the last retry',
+         dict(connect_failures=3, retries=2, expected_emails=0,
+              expected_failures=1)),
+    ]
+
+    @patch('config.PGAGENT_ALERT_RETRY_DELAY', 0)
+    def runTest(self):
+        server = LocalSMTPServer()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        attempts = []
+
+        def connect():
+            attempts.append(1)
+            if len(attempts) <= self.connect_failures:
+                raise ConnectionRefusedError('Mail server down')
+            return server.connect()
+
+        rule = AlertRule(1, email=True, recipients='dba@example.com')
+        dispatcher = AlertDispatcher(lambda sid, jobid=None: {1: rule},
+                                     SMTPConnectionPool(1, connect=connect))
+
+        with patch('config.PGAGENT_ALERT_SMTP_RETRIES', self.retries), \
+                patch.object(AlertDispatcher, '_put'):
+            dispatcher.process(1, failure(1))
+            futures = dispatcher.flush(force=True)
+            while futures:
+                wait(futures)
+                futures = dispatcher.flush(force=True)
+        dispatcher.pool.close()
+
+        stats = dispatcher.get_stats()
+        self.assertEqual(stats['emails'], self.expected_emails)
+        self.assertEqual(stats['failures'], self.expected_failures)
+        self.assertEqual(len(server.messages), self.expected_emails)
+        self.assertEqual(stats['pending_retries'], 0)
+
+
+class PgAgentJobAlertRuleCacheTestCase(BaseTestGenerator):
+    """This class will test the cached notification settings of the jobs"""
+    scenarios = [
+        ('Settings of a server are loaded once',
+         dict(events=[1, 2, 3, 1, 2, 3], invalidations=[],
+              expected_loads=[None])),
+        ('Invalidated job is reloaded alone',
+         dict(events=[1, 2, 3, 1, 2, 3], invalidations=[(3, '2')],
+              expected_loads=[None, 2])),
+        ('Invalidated server is reloaded',
+         dict(events=[1, 2, 3, 1, 2, 3], invalidations=[(3, None)],
+              expected_loads=[None, None])),
+        ('Malformed job id reloads the server',
+         dict(events=[1, 2, 1], invalidations=[(2, 'x')],
+              expected_loads=[None, None])),
+    ]
+
+    def runTest(self):
+        loads = []
+
+        def load_rules(sid, jobid=None):
+            loads.append(jobid)
+            return {j: AlertRule(j, email=True, when='a', mininterval=600,
+                                 recipients='dba@example.com')
+                    for j in (1, 2, 3) if jobid is None or j == jobid}
+
+        dispatcher = AlertDispatcher(load_rules,
+                                     SMTPConnectionPool(1, connect=None))
+        invalidations = dict(self.invalidations)
+
+        alerted = set()
+        for idx, jobid in enumerate(self.events):
+            if idx in invalidations:
+                dispatcher.invalidate(1, invalidations[idx])
+            if dispatcher.process(1, failure(jobid)):
+                alerted.add(jobid)
+
+        self.assertEqual(loads, self.expected_loads)
+        # The minimum interval is kept over the reloads
+        self.assertEqual(dispatcher.get_stats()['alerts'], len(alerted))
+        self.assertEqual(dispatcher.get_stats()['throttled'],
+                         len(self.events) - len(alerted))
+
+
+class PgAgentJobAlertWriteBehindTestCase(BaseTestGenerator):
+    """This class will test the writing of the latest alerts of the jobs"""
+    scenarios = [
+        ('Latest alerts are written once per server',
+         dict(write_ok=True, expected_writes=1, expected_pending=False)),
+        ('Latest alerts are kept if they could not be written',
+         dict(write_ok=False, expected_writes=0, expected_pending=True)),
+    ]
+
+    def runTest(self):
+        writes = []
+
+        def write_rules(sid, updates):
+            writes.append((sid, dict(updates)))
+            return self.write_ok
+
+        dispatcher = AlertDispatcher(
+            lambda sid, jobid=None: {
+                j: AlertRule(j, email=True, recipients='dba@example.com')
+                for j in (1, 2)},
+            SMTPConnectionPool(1, connect=None), write_rules)
+
+        now = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+        for jobid in (1, 2, 1):
+            dispatcher.process(1, failure(jobid), now=now)
+        # Nothing is written by the alerts themselves
+        self.assertEqual(writes, [])
+
+        dispatcher.write_behind()
+        self.assertEqual(writes, [(1, {1: now, 2: now})])
+        self.assertEqual(dispatcher.get_stats()['writes'],
+                         self.expected_writes)
+        self.assertEqual(dispatcher.rules.has_dirty(),
+                         self.expected_pending)
+
+
+class PgAgentJobAlertWriteRulesTestCase(BaseTestGenerator):
+    """This class will test the writing of the latest alerts of the jobs to
+    pga_job_notification"""
+    now = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+    scenarios = [
+        ('Latest alert is written for a job never alerted',
+         dict(mininterval=600, lastnotification=None, expected=now)),
+        ('Latest alert is written over an older one',
+         dict(mininterval=600, lastnotification=now - timedelta(days=1),
+              expected=now)),
+        ('Newer alert written by another process is kept',
+         dict(mininterval=0, lastnotification=now + timedelta(days=1),
+              expected=now + timedelta(days=1))),
+    ]
+
+    def setUp(self):
+        flag, msg = pgagent_utils.is_valid_server_to_run_pgagent(self)
+        if not flag:
+            self.skipTest(msg)
+        flag, msg = pgagent_utils.is_pgagent_installed_on_server(self)
+        if not flag:
+            self.skipTest(msg)
+
+        self.connection = utils.get_db_connection(
+            self.server['db'],
+            self.server['username'],
+            self.server['db_password'],
+            self.server['host'],
+            self.server['port'],
+            self.server['sslmode']
+        )
+        self.connection.autocommit = True
+        if self.connection.execute(
+            "SELECT pg_catalog.to_regclass('pgagent.pga_job_notification')"
+        ).fetchone()[0] is None:
+            self.connection.close()
+            self.skipTest('Make sure pgAgent 4.3 or later is installed.')
+
+        self.job_id = pgagent_utils.create_pgagent_job(
+            self, 'test_job_alert_write')
+        self.connection.execute(
+            'DELETE FROM pgagent.pga_job_notification WHERE jnjobid = %s',
+            (self.job_id,))
+        self.connection.execute(
+            'INSERT INTO pgagent.pga_job_notification (jnjobid, jnemail, '
+            'jnwhen, jnmininterval, jnemailrecipients, jnlastnotification) '
+            "VALUES (%s, true, 'f', %s, 'dba@example.com', %s)",
+            (self.job_id, self.mininterval, self.lastnotification))
+
+    def runTest(self):
+        """This function will write the latest alert of a job"""
+        dispatcher = AlertDispatcher(pool=SMTPConnectionPool(1, connect=None))
+
+        with patch.object(dispatcher, '_get_connection',
+                          return_value=self.connection):
+            dispatcher.process(1, failure(self.job_id), now=self.now)
+            dispatcher.write_behind()
+
+        self.assertEqual(dispatcher.get_stats()['writes'], 1)
+        self.assertEqual(self.connection.execute(
+            'SELECT jnlastnotification FROM pgagent.pga_job_notification '
+            'WHERE jnjobid = %s', (self.job_id,)
+        ).fetchone()[0], self.expected)
+
+    def tearDown(self):
+        """Clean up code"""
+        self.connection.close()
+        pgagent_utils.delete_pgagent_job(self)
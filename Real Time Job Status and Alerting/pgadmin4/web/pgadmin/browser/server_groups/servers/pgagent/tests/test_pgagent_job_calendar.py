@@ -0,0 +1,74 @@
+##########################################################################
+#
+# pgAdmin 4 - PostgreSQL Tools
+#
+# Copyright (C) 2013 - 2025, The pgAdmin Development Team
+# This software is released under the PostgreSQL Licence
+#
+##########################################################################
+
+import json
+import uuid
+from unittest.mock import patch
+
+from pgadmin.utils.route import BaseTestGenerator
+from regression.python_test_utils import test_utils as utils
+from . import utils as pgagent_utils
+
+
+class PgAgentJobCalendarTestCase(BaseTestGenerator):
+    """This class will test the calendar of the pgAgent job runs API"""
+    # Generates scenarios
+    scenarios = utils.generate_scenarios("pgagent_job_calendar",
+                                         pgagent_utils.test_cases)
+
+    def setUp(self):
+        flag, msg = pgagent_utils.is_valid_server_to_run_pgagent(self)
+        if not flag:
+            self.skipTest(msg)
+        flag, msg = pgagent_utils.is_pgagent_installed_on_server(self)
+        if not flag:
+            self.skipTest(msg)
+
+        # Load test data
+        self.data = self.test_data
+
+        name = "test_job_calendar%s" % str(uuid.uuid4())[1:8]
+        self.job_id = pgagent_utils.create_pgagent_job(self, name)
+
+        sch_name = "test_schedule_calendar%s" % str(uuid.uuid4())[1:8]
+        self.schedule_id = pgagent_utils.create_pgagent_schedule(
+            self, sch_name, self.job_id)
+
+    def runTest(self):
+        """This function will get the calendar of the pgAgent job runs"""
+        if self.is_positive_test:
+            response = pgagent_utils.api_calendar(self)
+
+            # Assert response
+            utils.assert_status_code(self, response)
+
+            runs = json.loads(response.data.decode('utf-8'))['data']['runs']
+            self.assertEqual(runs, sorted(
+                runs, key=lambda run: (run['time'], run['jobid'],
+                                       run['jscid'])))
+            self.assertEqual(
+                len([run for run in runs
+                     if run['jscid'] == self.schedule_id]),
+                self.data['count']
+            )
+        else:
+            if self.mocking_required:
+                with patch(self.mock_data["function_name"],
+                           side_effect=[eval(self.mock_data["return_value"])]):
+                    response = pgagent_utils.api_calendar(self)
+            else:
+                response = pgagent_utils.api_calendar(self)
+
+            # Assert response
+            utils.assert_status_code(self, response)
+            utils.assert_error_message(self, response)
+
+    def tearDown(self):
+        """Clean up code"""
+        pgagent_utils.delete_pgagent_job(self)
@@ -0,0 +1,76 @@
+##########################################################################
+#
+# pgAdmin 4 - PostgreSQL Tools
+#
+# Copyright (C) 2013 - 2025, The pgAdmin Development Team
+# This software is released under the PostgreSQL Licence
+#
+##########################################################################
+
+import json
+import uuid
+from unittest.mock import patch
+
+from pgadmin.utils.route import BaseTestGenerator
+from regression.python_test_utils import test_utils as utils
+from . import utils as pgagent_utils
+
+
+class PgAgentEnableTestCase(BaseTestGenerator):
+    """This class will test the bulk enable/disable pgAgent jobs API"""
+    # Generates scenarios
+    scenarios = utils.generate_scenarios("pgagent_job_enable",
+                                         pgagent_utils.test_cases)
+
+    def setUp(self):
+        flag, msg = pgagent_utils.is_valid_server_to_run_pgagent(self)
+        if not flag:
+            self.skipTest(msg)
+        flag, msg = pgagent_utils.is_pgagent_installed_on_server(self)
+        if not flag:
+            self.skipTest(msg)
+
+        # Load test data
+        self.data = self.test_data
+
+        name = "test_job_enable%s" % str(uuid.uuid4())[1:8]
+        self.job_id = pgagent_utils.create_pgagent_job(self, name)
+        name2 = "test_job2_enable%s" % str(uuid.uuid4())[1:8]
+        self.job_id2 = pgagent_utils.create_pgagent_job(self, name2)
+
+    def runTest(self):
+        """This function will enable or disable pgAgent jobs"""
+        self.data.setdefault('ids', [self.job_id, self.job_id2])
+
+        if self.is_positive_test:
+            response = pgagent_utils.api_enable(self)
+
+            # Assert response
+            utils.assert_status_code(self, response)
+
+            nodes = json.loads(response.data.decode('utf-8'))['data']
+            self.assertEqual(
+                sorted(node['_id'] for node in nodes),
+                sorted([self.job_id, self.job_id2])
+            )
+            icon = 'icon-pga_job' \
+                if self.data['jobenabled'] in (True, 'true') \
+                else 'icon-pga_job-disabled'
+            for node in nodes:
+                self.assertEqual(node['icon'], icon)
+        else:
+            if self.mocking_required:
+                with patch(self.mock_data["function_name"],
+                           side_effect=[eval(self.mock_data["return_value"])]):
+                    response = pgagent_utils.api_enable(self)
+            else:
+                response = pgagent_utils.api_enable(self)
+
+            # Assert response
+            utils.assert_status_code(self, response)
+            utils.assert_error_message(self, response)
+
+    def tearDown(self):
+        """Clean up code"""
+        pgagent_utils.delete_pgagent_job(self)
+        pgagent_utils.delete_pgagent_job(self, self.job_id2)
@@ -0,0 +1,59 @@
+##########################################################################
+#
+# pgAdmin 4 - PostgreSQL Tools
+#
+# Copyright (C) 2013 - 2025, The pgAdmin Development Team
+# This software is released under the PostgreSQL Licence
+#
+##########################################################################
+
+import json
+import uuid
+
+from pgadmin.utils.route import BaseTestGenerator
+from regression.python_test_utils import test_utils as utils
+from . import utils as pgagent_utils
+
+
+class PgAgentExportTestCase(BaseTestGenerator):
+    """This class will test the export pgAgent jobs API"""
+    # Generates scenarios
+    scenarios = utils.generate_scenarios("pgagent_job_export",
+                                         pgagent_utils.test_cases)
+
+    def setUp(self):
+        flag, msg = pgagent_utils.is_valid_server_to_run_pgagent(self)
+        if not flag:
+            self.skipTest(msg)
+        flag, msg = pgagent_utils.is_pgagent_installed_on_server(self)
+        if not flag:
+            self.skipTest(msg)
+
+        # Load test data
+        self.data = self.test_data
+
+        name = "test_job_export%s" % str(uuid.uuid4())[1:8]
+        self.job_id = pgagent_utils.create_pgagent_job(self, name)
+
+        sch_name = "test_schedule_export%s" % str(uuid.uuid4())[1:8]
+        self.schedule_id = pgagent_utils.create_pgagent_schedule(
+            self, sch_name, self.job_id)
+
+    def runTest(self):
+        """This function will export pgAgent jobs"""
+        response = pgagent_utils.api_export(self)
+
+        # Assert response
+        utils.assert_status_code(self, response)
+
+        jobs = [json.loads(line) for line in
+                response.data.decode('utf-8').splitlines()]
+        job = [job for job in jobs if job['jobid'] == self.job_id][0]
+        self.assertEqual(
+            [schedule['jscid'] for schedule in job['jschedules']],
+            [self.schedule_id]
+        )
+
+    def tearDown(self):
+        """Clean up code"""
+        pgagent_utils.delete_pgagent_job(self)
@@ -39,7 +39,10 @@ class PgAgentGetStatsTestCase(BaseTestGenerator):
         """This function will get pgAgent job stats"""
 
         if self.is_positive_test:
-            response = pgagent_utils.api_get(self)
+            if self.data:
+                response = pgagent_utils.api_get_msql(self, self.data)
+            else:
+                response = pgagent_utils.api_get(self)
 
             # Assert response
             utils.assert_status_code(self, response)
@@ -48,6 +51,8 @@ class PgAgentGetStatsTestCase(BaseTestGenerator):
                 with patch(self.mock_data["function_name"],
                            side_effect=[eval(self.mock_data["return_value"])]):
                     response = pgagent_utils.api_get(self)
+            else:
+                response = pgagent_utils.api_get_msql(self, self.data)
 
                 # Assert response
             utils.assert_status_code(self, response)
@@ -0,0 +1,65 @@
+##########################################################################
+#
+# pgAdmin 4 - PostgreSQL Tools
+#
+# Copyright (C) 2013 - 2025, The pgAdmin Development Team
+# This software is released under the PostgreSQL Licence
+#
+##########################################################################
+
+import json
+from unittest.mock import patch
+
+from pgadmin.utils.route import BaseTestGenerator
+from regression.python_test_utils import test_utils as utils
+from . import utils as pgagent_utils
+
+
+class PgAgentImportTestCase(BaseTestGenerator):
+    """This class will test the bulk import pgAgent jobs API"""
+    # Generates scenarios
+    scenarios = utils.generate_scenarios("pgagent_job_import",
+                                         pgagent_utils.test_cases)
+
+    def setUp(self):
+        flag, msg = pgagent_utils.is_valid_server_to_run_pgagent(self)
+        if not flag:
+            self.skipTest(msg)
+        flag, msg = pgagent_utils.is_pgagent_installed_on_server(self)
+        if not flag:
+            self.skipTest(msg)
+
+        # Load test data
+        self.data = self.test_data
+        self.job_ids = []
+
+    def runTest(self):
+        """This function will import pgAgent jobs"""
+        if self.is_positive_test:
+            response = pgagent_utils.api_import(self)
+
+            # Assert response
+            utils.assert_status_code(self, response)
+
+            self.job_ids = json.loads(
+                response.data.decode('utf-8'))['data']['jobids']
+            self.assertEqual(len(self.job_ids), len(self.data['jobs']))
+            for job_id in self.job_ids:
+                self.job_id = job_id
+                self.assertTrue(pgagent_utils.verify_pgagent_job(self))
+        else:
+            if self.mocking_required:
+                with patch(self.mock_data["function_name"],
+                           side_effect=[eval(self.mock_data["return_value"])]):
+                    response = pgagent_utils.api_import(self)
+            else:
+                response = pgagent_utils.api_import(self)
+
+            # Assert response
+            utils.assert_status_code(self, response)
+            utils.assert_error_message(self, response)
+
+    def tearDown(self):
+        """Clean up code"""
+        for job_id in self.job_ids:
+            pgagent_utils.delete_pgagent_job(self, job_id)
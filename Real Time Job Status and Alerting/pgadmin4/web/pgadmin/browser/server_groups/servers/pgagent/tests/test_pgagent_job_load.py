@@ -0,0 +1,82 @@
+##########################################################################
+#
+# pgAdmin 4 - PostgreSQL Tools
+#
+# Copyright (C) 2013 - 2025, The pgAdmin Development Team
+# This software is released under the PostgreSQL Licence
+#
+##########################################################################
+
+import json
+import uuid
+from unittest.mock import patch
+
+from pgadmin.utils.route import BaseTestGenerator
+from regression.python_test_utils import test_utils as utils
+from pgadmin.browser.server_groups.servers.pgagent.schedules.tests import \
+    utils as schedules_utils
+from . import utils as pgagent_utils
+
+
+class PgAgentJobLoadTestCase(BaseTestGenerator):
+    """This class will test the job load API of the Job Monitor"""
+    # Generates scenarios
+    scenarios = utils.generate_scenarios("pgagent_job_load",
+                                         pgagent_utils.test_cases)
+
+    def setUp(self):
+        flag, msg = pgagent_utils.is_valid_server_to_run_pgagent(self)
+        if not flag:
+            self.skipTest(msg)
+        flag, msg = pgagent_utils.is_pgagent_installed_on_server(self)
+        if not flag:
+            self.skipTest(msg)
+
+        # Load test data
+        self.data = self.test_data
+
+        name = "test_job_load%s" % str(uuid.uuid4())[1:8]
+        self.job_id = pgagent_utils.create_pgagent_job(self, name)
+
+        sch_name = "test_schedule_load%s" % str(uuid.uuid4())[1:8]
+        self.schedule_id = pgagent_utils.create_pgagent_schedule(
+            self, sch_name, self.job_id)
+        if self.inventory_data:
+            schedules_utils.set_schedule_masks(
+                self, self.inventory_data['schedule'])
+
+    def runTest(self):
+        """This function will get the job load of the pgAgent jobs"""
+        if self.is_positive_test:
+            response = pgagent_utils.api_job_load(self)
+
+            # Assert response
+            utils.assert_status_code(self, response)
+
+            data = json.loads(response.data.decode('utf-8'))
+            self.assertEqual(data['bucket'], self.data['bucket'])
+            # The other jobs of the server may run too
+            self.assertGreaterEqual(
+                sum(data['counts']),
+                self.expected_data['test_result_data']['runs']
+            )
+            self.assertEqual(
+                [peak['runs'] for peak in data['peaks']],
+                sorted([peak['runs'] for peak in data['peaks']],
+                       reverse=True)
+            )
+        else:
+            if self.mocking_required:
+                with patch(self.mock_data["function_name"],
+                           side_effect=[eval(self.mock_data["return_value"])]):
+                    response = pgagent_utils.api_job_load(self)
+            else:
+                response = pgagent_utils.api_job_load(self)
+
+            # Assert response
+            utils.assert_status_code(self, response)
+            utils.assert_error_message(self, response)
+
+    def tearDown(self):
+        """Clean up code"""
+        pgagent_utils.delete_pgagent_job(self)
@@ -0,0 +1,102 @@
+##########################################################################
+#
+# pgAdmin 4 - PostgreSQL Tools
+#
+# Copyright (C) 2013 - 2025, The pgAdmin Development Team
+# This software is released under the PostgreSQL Licence
+#
+##########################################################################
+
+import json
+import uuid
+
+from config import PG_DEFAULT_DRIVER
+from pgadmin.utils.driver import get_driver
+from pgadmin.utils.route import BaseTestGenerator
+from . import utils as pgagent_utils
+
+
+class PgAgentJobMonitorTestCase(BaseTestGenerator):
+    """This class will test the job monitor dashboard endpoints"""
+    scenarios = [
+        ('Job monitor returns the job',
+         dict(url='/dashboard/job_monitor/{0}', args='')),
+        ('Job monitor delta returns the requested job',
+         dict(url='/dashboard/job_monitor_delta/{0}', args='?jobid={1}')),
+    ]
+
+    def setUp(self):
+        flag, msg = pgagent_utils.is_valid_server_to_run_pgagent(self)
+        if not flag:
+            self.skipTest(msg)
+        flag, msg = pgagent_utils.is_pgagent_installed_on_server(self)
+        if not flag:
+            self.skipTest(msg)
+        name = "test_job_monitor%s" % str(uuid.uuid4())[1:8]
+        self.job_id = pgagent_utils.create_pgagent_job(self, name)
+
+    def runTest(self):
+        """This function will get the job monitor data"""
+        response = self.tester.get(
+            (self.url + self.args).format(self.server_id, self.job_id)
+        )
+        self.assertEqual(response.status_code, 200)
+
+        data = json.loads(response.data.decode('utf-8'))
+        self.assertIn('summary', data)
+        self.assertIn('cursor', data)
+        self.assertIn(self.job_id, [job['jobid'] for job in data['jobs']])
+
+        # The pgAgent schema is detected once per connection manager
+        manager = get_driver(PG_DEFAULT_DRIVER).connection_manager(
+            self.server_id)
+        if 'job_monitor/' in self.url:
+            self.assertTrue(manager.db_info['pgAgentMonitor']['installed'])
+            self.assertIn('has_job_state', manager.db_info['pgAgentMonitor'])
+
+    def tearDown(self):
+        """Clean up code"""
+        pgagent_utils.delete_pgagent_job(self)
+
+
+class PgAgentJobLogTestCase(BaseTestGenerator):
+    """This class will test the paginated job log endpoint"""
+    scenarios = [
+        ('Job log returns a page',
+         dict(args='?limit=5&steps=1', status_code=200)),
+        ('Job log streams NDJSON',
+         dict(args='?format=ndjson', status_code=200)),
+        ('Job log rejects a malformed cursor',
+         dict(args='?cursor=abc', status_code=400)),
+    ]
+
+    def setUp(self):
+        flag, msg = pgagent_utils.is_valid_server_to_run_pgagent(self)
+        if not flag:
+            self.skipTest(msg)
+        flag, msg = pgagent_utils.is_pgagent_installed_on_server(self)
+        if not flag:
+            self.skipTest(msg)
+        name = "test_job_log%s" % str(uuid.uuid4())[1:8]
+        self.job_id = pgagent_utils.create_pgagent_job(self, name)
+
+    def runTest(self):
+        """This function will get the job log"""
+        response = self.tester.get(
+            '/dashboard/job_log/{0}/{1}{2}'.format(
+                self.server_id, self.job_id, self.args)
+        )
+        self.assertEqual(response.status_code, self.status_code)
+
+        if 'format=ndjson' in self.args:
+            self.assertEqual(response.mimetype, 'application/x-ndjson')
+            # The job has never run
+            self.assertEqual(response.data.decode('utf-8'), '')
+        elif self.status_code == 200:
+            data = json.loads(response.data.decode('utf-8'))['data']
+            self.assertEqual(data['rows'], [])
+            self.assertIsNone(data['next_cursor'])
+
+    def tearDown(self):
+        """Clean up code"""
+        pgagent_utils.delete_pgagent_job(self)
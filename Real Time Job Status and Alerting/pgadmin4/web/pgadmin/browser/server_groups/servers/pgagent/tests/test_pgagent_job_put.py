@@ -45,6 +45,11 @@ class PgAgentPutTestCase(BaseTestGenerator):
         if 'jsteps' in self.data and 'added' in self.data['jsteps']:
             self.data['jsteps']['added'][0]['jstjobid'] = self.job_id
 
+        if 'jsteps' in self.data and 'changed' in self.data['jsteps']:
+            for step in self.data['jsteps']['changed']:
+                step['jstid'] = pgagent_utils.create_pgagent_step(
+                    self, step['jstname'], self.job_id)
+
         if self.is_positive_test:
             response = pgagent_utils.api_put(self)
 
@@ -0,0 +1,129 @@
+##########################################################################
+#
+# pgAdmin 4 - PostgreSQL Tools
+#
+# Copyright (C) 2013 - 2025, The pgAdmin Development Team
+# This software is released under the PostgreSQL Licence
+#
+##########################################################################
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from pgadmin.utils.route import BaseTestGenerator
+from pgadmin.browser.server_groups.servers.pgagent.listener import \
+    JobStatusListenerRegistry, LocalJobStatusFanout
+from pgadmin.browser.server_groups.servers.pgagent.fanout import \
+    BrokerJobStatusFanout, fcntl, get_job_status_fanout
+
+
+def wait_until(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@unittest.skipIf(fcntl is None, 'The job status broker needs a Unix system')
+class PgAgentJobStatusFanoutAlertsTestCase(BaseTestGenerator):
+    """This class will test that the email alerts are sent by a single
+    process"""
+    scenarios = [
+        ('Alerts are sent by the broker',
+         dict(server_mode=True, broker='pgagent.sock',
+              expected_fanout=BrokerJobStatusFanout, expected_alerts=True)),
+        ('Alerts are not sent by every process in server mode',
+         dict(server_mode=True, broker=None,
+              expected_fanout=LocalJobStatusFanout, expected_alerts=False)),
+        ('Alerts are sent by the single process of the desktop mode',
+         dict(server_mode=False, broker=None,
+              expected_fanout=LocalJobStatusFanout, expected_alerts=True)),
+    ]
+
+    def runTest(self):
+        alerts = object()
+        with patch('config.SERVER_MODE', self.server_mode), \
+                patch('config.PGAGENT_JOB_STATUS_BROKER', self.broker):
+            fanout = get_job_status_fanout(alerts)
+
+        self.assertIsInstance(fanout, self.expected_fanout)
+        self.assertEqual(fanout.alerts is alerts, self.expected_alerts)
+        registry = JobStatusListenerRegistry(
+            lambda sid, event, data, rooms: None, fanout)
+        self.assertEqual(registry.sends_alerts(), self.expected_alerts)
+
+
+@unittest.skipIf(fcntl is None, 'The job status broker needs a Unix system')
+class PgAgentJobStatusBrokerTestCase(BaseTestGenerator):
+    """This class will test the fan-out of the job status events across the
+    pgAdmin processes"""
+    scenarios = [
+        ('Processes share the listener of a server',
+         dict(processes=3,
+              payload='{"job_id": 1, "status": "s", '
+                      '"job": {"jobid": 1, "status": "Success"}}')),
+    ]
+
+    def make_registry(self, address, emitted):
+        fanout = BrokerJobStatusFanout(address, authkey=b'pgagent')
+        self.addCleanup(fanout.close)
+        return JobStatusListenerRegistry(
+            lambda sid, event, data, rooms: emitted.append((sid, data)),
+            fanout)
+
+    @patch('config.PGAGENT_LISTENER_RETRY_DELAY', 0.05)
+    @patch('config.PGAGENT_JOB_STATUS_BATCH_WINDOW', 0)
+    @patch('pgadmin.browser.server_groups.servers.pgagent.listener.'
+           'JobStatusHub.remove_server')
+    @patch('pgadmin.browser.server_groups.servers.pgagent.listener.'
+           'JobStatusHub.add_server')
+    def runTest(self, start_mock, stop_mock):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir, True)
+        address = os.path.join(tmpdir, 'pgagent.sock')
+
+        emitted = [[] for _ in range(self.processes)]
+        registries = []
+        for idx in range(self.processes):
+            registry = self.make_registry(address, emitted[idx])
+            registry.subscribe(1, 'client{0}'.format(idx), 'dbname=postgres')
+            self.assertTrue(registry.fanout.wait_connected(10))
+            registries.append(registry)
+
+        # The first process runs the broker, which listens once
+        leader = registries[0].fanout
+        self.assertIsNotNone(leader.broker)
+        # Only the user running pgAdmin can reach the broker
+        self.assertEqual(os.stat(address).st_mode & 0o077, 0)
+        # The other processes are sent the state of the server once
+        # subscribed to it
+        self.assertTrue(wait_until(lambda: all(
+            r.get_info()[1]['db_connection_status'] == 'connected'
+            for r in registries[1:])))
+        self.assertEqual(leader.get_stats()['processes'], self.processes)
+        self.assertEqual(start_mock.call_count, 1)
+
+        leader.broker.hub.dispatch(1, self.payload)
+        self.assertTrue(wait_until(lambda: all(emitted)))
+        for process_emitted in emitted:
+            self.assertEqual(process_emitted[0][1]['job_id'], 1)
+        # The job state is kept by every process
+        self.assertEqual(registries[-1].get_state(1)['jobs'],
+                         [{'jobid': 1, 'status': 'Success'}])
+
+        # Another process takes over when the broker goes away, and listens
+        # again to the servers of the remaining processes
+        leader.close()
+        self.assertTrue(wait_until(
+            lambda: any(r.fanout.broker is not None for r in registries[1:])))
+        self.assertTrue(wait_until(lambda: start_mock.call_count == 2))
+
+        for idx, registry in enumerate(registries[1:], 1):
+            registry.unsubscribe(1, 'client{0}'.format(idx))
+        self.assertTrue(wait_until(lambda: stop_mock.call_count >= 2))
@@ -0,0 +1,358 @@
+##########################################################################
+#
+# pgAdmin 4 - PostgreSQL Tools
+#
+# Copyright (C) 2013 - 2025, The pgAdmin Development Team
+# This software is released under the PostgreSQL Licence
+#
+##########################################################################
+
+from unittest.mock import MagicMock, patch
+
+from pgadmin.utils.route import BaseTestGenerator
+from pgadmin.browser.server_groups.servers.pgagent.listener import \
+    JobStatusHub, JobStatusListener, JobStatusListenerRegistry, \
+    LocalJobStatusFanout
+
+
+class PgAgentJobStatusListenerTestCase(BaseTestGenerator):
+    """This class will test the shared pgAgent job status listeners"""
+    scenarios = [
+        ('Clients of a server share one listener',
+         dict(subscriptions=[(1, 'client1'), (1, 'client2'), (1, 'client3')],
+              unsubscriptions=[(1, 'client1')],
+              expected_started=1, expected_stopped=0,
+              expected_clients={1: 2})),
+        ('Listener is torn down with its last client',
+         dict(subscriptions=[(1, 'client1'), (1, 'client2')],
+              unsubscriptions=[(1, 'client1'), (1, 'client2')],
+              expected_started=1, expected_stopped=1,
+              expected_clients={1: 0})),
+        ('One listener per server',
+         dict(subscriptions=[(1, 'client1'), (2, 'client1'),
+                             (2, 'client2')],
+              unsubscriptions=[(2, 'client2')],
+              expected_started=2, expected_stopped=0,
+              expected_clients={1: 1, 2: 1})),
+        ('Unknown client does not stop the listener',
+         dict(subscriptions=[(1, 'client1')],
+              unsubscriptions=[(1, 'client2'), (2, 'client1')],
+              expected_started=1, expected_stopped=0,
+              expected_clients={1: 1})),
+    ]
+
+    @patch('pgadmin.browser.server_groups.servers.pgagent.listener.'
+           'JobStatusHub.remove_server')
+    @patch('pgadmin.browser.server_groups.servers.pgagent.listener.'
+           'JobStatusHub.add_server')
+    def runTest(self, start_mock, stop_mock):
+        registry = JobStatusListenerRegistry(
+            lambda sid, event, data, rooms: None)
+
+        for sid, client_sid in self.subscriptions:
+            registry.subscribe(sid, client_sid, 'dbname=postgres')
+        for sid, client_sid in self.unsubscriptions:
+            registry.unsubscribe(sid, client_sid)
+
+        self.assertEqual(start_mock.call_count, self.expected_started)
+        self.assertEqual(stop_mock.call_count, self.expected_stopped)
+        for sid, count in self.expected_clients.items():
+            self.assertEqual(registry.client_count(sid), count)
+
+        # Disconnecting a client releases all its subscriptions
+        for sid, client_sid in self.subscriptions:
+            registry.unsubscribe_client(client_sid)
+        self.assertEqual(registry.get_info(), {})
+
+
+class PgAgentJobStatusAlertListenerTestCase(BaseTestGenerator):
+    """This class will test the listeners kept for the email alerts"""
+    scenarios = [
+        ('Server sending alerts is listened to without clients',
+         dict(sends_alerts=True, expected_started=1,
+              expected_info={1: {'client_count': 0, 'email_alerts': True}},
+              expected_submitted=1)),
+        ('Server is not kept when pgAdmin sends no alerts',
+         dict(sends_alerts=False, expected_started=1, expected_info={},
+              expected_submitted=0)),
+    ]
+
+    @patch('config.PGAGENT_JOB_STATUS_BATCH_WINDOW', 0)
+    @patch('pgadmin.browser.server_groups.servers.pgagent.listener.'
+           'JobStatusHub.remove_server')
+    @patch('pgadmin.browser.server_groups.servers.pgagent.listener.'
+           'JobStatusHub.add_server')
+    def runTest(self, start_mock, stop_mock):
+        alerts = MagicMock() if self.sends_alerts else None
+        registry = JobStatusListenerRegistry(
+            lambda sid, event, data, rooms: None,
+            LocalJobStatusFanout(alerts))
+
+        registry.subscribe(1, 'client1', 'dbname=postgres')
+        self.assertEqual(registry.watch_alerts(1, 'dbname=postgres'),
+                         self.sends_alerts)
+        registry.unsubscribe(1, 'client1')
+
+        self.assertEqual(start_mock.call_count, self.expected_started)
+        self.assertEqual(stop_mock.call_count, 1 - len(self.expected_info))
+        info = registry.get_info()
+        self.assertEqual(
+            {sid: {'client_count': server['client_count'],
+                   'email_alerts': server['email_alerts']}
+             for sid, server in info.items()},
+            self.expected_info)
+
+        # The notifications of the server are still evaluated for alerts
+        if info:
+            registry.fanout.hub.dispatch(1, '{"job_id": 1, "status": "f"}')
+            self.assertEqual(alerts.submit.call_count,
+                             self.expected_submitted)
+
+        # A client subscribing again shares the listener, which is stopped
+        # once the server no longer sends alerts and its clients left
+        registry.subscribe(1, 'client2', 'dbname=postgres')
+        registry.unwatch_alerts(1)
+        registry.unsubscribe(1, 'client2')
+        self.assertEqual(registry.get_info(), {})
+        self.assertEqual(start_mock.call_count,
+                         self.expected_started + 1 - len(self.expected_info))
+
+
+class PgAgentJobStatusHubDispatchTestCase(BaseTestGenerator):
+    """This class will test the dispatching of the notification hub"""
+    scenarios = [
+        ('Valid payload is emitted with the server id',
+         dict(payload='{"job_id": "1", "status": "s"}',
+              expected_emits=[(1, 'job_status_update',
+                               {'job_id': '1', 'status': 's', 'sid': 1})],
+              expected_errors=0)),
+        ('Invalid payload is counted as an error',
+         dict(payload='not a json payload',
+              expected_emits=[],
+              expected_errors=1)),
+    ]
+
+    @patch('config.PGAGENT_JOB_STATUS_BATCH_WINDOW', 0)
+    def runTest(self):
+        emitted = []
+        hub = JobStatusHub(lambda sid, event, data: emitted.append(
+            (sid, event, data)))
+
+        hub.dispatch(1, self.payload)
+
+        self.assertEqual(emitted, self.expected_emits)
+        stats = hub.get_stats()
+        self.assertEqual(stats['notifications'], 1)
+        self.assertEqual(stats['errors'], self.expected_errors)
+        self.assertEqual(stats['connections'], 0)
+
+
+class PgAgentJobStatusCacheTestCase(BaseTestGenerator):
+    """This class will test the job state cached from the notifications"""
+    scenarios = [
+        ('Job rows and summary are cached per server',
+         dict(payloads=[
+             (1, '{"job_id": 1, "status": "running", '
+                 '"job": {"jobid": 1, "status": "Running"}, '
+                 '"summary": {"running_jobs": 1}}'),
+             (1, '{"job_id": 2, "status": "s", '
+                 '"job": {"jobid": 2, "status": "Success"}, '
+                 '"summary": {"running_jobs": 1, "successful_jobs": 1}}'),
+             (2, '{"job_id": 1, "status": "f", '
+                 '"job": {"jobid": 1, "status": "Failed"}}'),
+         ],
+             expected_jobs={1: {1: 'Running', 2: 'Success'},
+                            2: {1: 'Failed'}},
+             expected_summary={1: {'running_jobs': 1, 'successful_jobs': 1},
+                               2: None})),
+        ('Latest state of a job replaces the previous one',
+         dict(payloads=[
+             (1, '{"job_id": 1, "job": {"jobid": 1, "status": "Running", '
+                 '"current_step": "step1"}}'),
+             (1, '{"job_id": 1, "job": {"jobid": 1, "status": "Success"}}'),
+             (1, '{"job_id": 1, "status": "f"}'),
+         ],
+             expected_jobs={1: {1: 'Success'}},
+             expected_summary={1: None})),
+    ]
+
+    @patch('config.PGAGENT_JOB_STATUS_BATCH_WINDOW', 0)
+    def runTest(self):
+        hub = JobStatusHub(lambda sid, event, data: None)
+
+        for sid, payload in self.payloads:
+            hub.dispatch(sid, payload)
+
+        for sid, jobs in self.expected_jobs.items():
+            state = hub.cache.get_state(sid)
+            self.assertEqual(
+                {job['jobid']: job['status'] for job in state['jobs']}, jobs)
+            self.assertEqual(state['summary'], self.expected_summary[sid])
+
+        # The state of a server is dropped with its listener
+        hub.remove_server(JobStatusListener(1, 'dbname=postgres'))
+        self.assertEqual(hub.cache.get_state(1),
+                         {'summary': None, 'jobs': []})
+
+
+class PgAgentJobStatusBatchTestCase(BaseTestGenerator):
+    """This class will test the coalescing of the job status notifications"""
+    scenarios = [
+        ('Notifications are deduplicated by job keeping the latest',
+         dict(payloads=[
+             (1, '{"job_id": 1, "status": "starting"}'),
+             (1, '{"job_id": 1, "status": "running"}'),
+             (1, '{"job_id": 2, "status": "running"}'),
+             (1, '{"job_id": 1, "status": "s"}'),
+         ],
+             expected_batches={1: [(2, 'running'), (1, 's')]},
+             expected_coalesced=2)),
+        ('Final status is kept over the following notifications',
+         dict(payloads=[
+             (1, '{"job_id": 1, "status": "f", "description": "error", '
+                 '"job": {"jobid": 1, "status": "Running"}}'),
+             (1, '{"job_id": 1, "status": "completed", "description": "", '
+                 '"job": {"jobid": 1, "status": "Failed"}}'),
+         ],
+             expected_batches={1: [(1, 'f')]},
+             expected_coalesced=1)),
+        ('One batch per server',
+         dict(payloads=[
+             (1, '{"job_id": 1, "status": "running"}'),
+             (2, '{"job_id": 1, "status": "running"}'),
+             (2, '{"job_id": 1, "status": "s"}'),
+         ],
+             expected_batches={1: [(1, 'running')], 2: [(1, 's')]},
+             expected_coalesced=1)),
+    ]
+
+    @patch('config.PGAGENT_JOB_STATUS_BATCH_WINDOW', 0.25)
+    @patch('pgadmin.browser.server_groups.servers.pgagent.listener.'
+           'JobStatusHub._schedule_flush')
+    def runTest(self, schedule_mock):
+        emitted = []
+        hub = JobStatusHub(lambda sid, event, data: emitted.append(
+            (sid, event, data)))
+
+        for sid, payload in self.payloads:
+            hub.dispatch(sid, payload)
+
+        # Nothing is sent before the end of the window
+        self.assertEqual(emitted, [])
+        self.assertEqual(schedule_mock.call_count,
+                         len(self.expected_batches))
+
+        for sid in self.expected_batches:
+            hub.flush(sid)
+
+        self.assertEqual(len(emitted), len(self.expected_batches))
+        for sid, event, data in emitted:
+            self.assertEqual(event, 'job_status_batch')
+            self.assertEqual(
+                [(u['job_id'], u['status']) for u in data['updates']],
+                self.expected_batches[sid])
+            # The latest job state is sent with the kept final status
+            for update in data['updates']:
+                if 'job' in update:
+                    self.assertEqual(update['job']['status'], 'Failed')
+        self.assertEqual(hub.get_stats()['coalesced'],
+                         self.expected_coalesced)
+
+
+class PgAgentJobStatusRoutesTestCase(BaseTestGenerator):
+    """This class will test the routing of the notifications to the rooms
+    of the watched jobs and job classes"""
+    scenarios = [
+        ('Clients watching nothing get all the notifications',
+         dict(subscriptions=[], unsubscriptions=[],
+              payloads=['{"job_id": 1, "status": "s"}'],
+              expected_rooms=[['pga_job_status_1']])),
+        ('Notification is sent to the room of its job',
+         dict(subscriptions=[('client1', [1], [])], unsubscriptions=[],
+              payloads=['{"job_id": 1, "status": "s"}',
+                        '{"job_id": "2:5", "status": "running"}',
+                        '{"job_id": "1:3", "status": "running"}'],
+              expected_rooms=[['pga_job_status_1', 'pga_job_status_1_job_1'],
+                              ['pga_job_status_1'],
+                              ['pga_job_status_1',
+                               'pga_job_status_1_job_1']])),
+        ('Notification is sent to the room of its job class',
+         dict(subscriptions=[('client1', [], [4]), ('client2', [2], [])],
+              unsubscriptions=[],
+              payloads=['{"job_id": 2, "status": "f", '
+                        '"job": {"jobid": 2, "jobjclid": 4}}',
+                        '{"job_id": 3, "status": "f", '
+                        '"job": {"jobid": 3, "jobjclid": 5}}'],
+              expected_rooms=[['pga_job_status_1', 'pga_job_status_1_job_2',
+                               'pga_job_status_1_class_4'],
+                              ['pga_job_status_1']])),
+        ('Rooms without clients are not used',
+         dict(subscriptions=[('client1', [1, 2], []), ('client2', [1], [])],
+              unsubscriptions=[('client1', None, None)],
+              payloads=['{"job_id": 1, "status": "s"}',
+                        '{"job_id": 2, "status": "s"}'],
+              expected_rooms=[['pga_job_status_1', 'pga_job_status_1_job_1'],
+                              ['pga_job_status_1']])),
+    ]
+
+    @patch('config.PGAGENT_JOB_STATUS_BATCH_WINDOW', 0)
+    @patch('pgadmin.browser.server_groups.servers.pgagent.listener.'
+           'JobStatusHub.add_server')
+    def runTest(self, start_mock):
+        emitted = []
+        registry = JobStatusListenerRegistry(
+            lambda sid, event, data, rooms: emitted.append(rooms))
+
+        for client_sid, jobs, job_classes in self.subscriptions:
+            registry.subscribe(1, client_sid, 'dbname=postgres')
+            join, leave = registry.subscribe_jobs(1, client_sid, jobs,
+                                                  job_classes)
+            # Watching clients leave the room of the server
+            self.assertEqual(leave, ['pga_job_status_1'])
+        for client_sid, jobs, job_classes in self.unsubscriptions:
+            join, leave = registry.unsubscribe_jobs(1, client_sid, jobs,
+                                                    job_classes)
+            self.assertEqual(join, ['pga_job_status_1'])
+
+        for payload in self.payloads:
+            registry.fanout.hub.dispatch(1, payload)
+
+        self.assertEqual(emitted, self.expected_rooms)
+
+        # Disconnecting the clients drops their selections
+        for client_sid, jobs, job_classes in self.subscriptions:
+            registry.unsubscribe_client(client_sid)
+        self.assertEqual(registry.routes.room_count(1), 0)
+
+
+class PgAgentJobStatusRoutesBatchTestCase(BaseTestGenerator):
+    """This class will test the batches of the watched jobs"""
+    scenarios = [
+        ('Batch is split by the rooms of its notifications',
+         dict(payloads=['{"job_id": 1, "status": "running"}',
+                        '{"job_id": 2, "status": "running"}',
+                        '{"job_id": 3, "status": "running"}',
+                        '{"job_id": 1, "status": "s"}'],
+              expected_batches=[
+                  (['pga_job_status_1'], [2, 3]),
+                  (['pga_job_status_1', 'pga_job_status_1_job_1'], [1])])),
+    ]
+
+    @patch('config.PGAGENT_JOB_STATUS_BATCH_WINDOW', 0.25)
+    @patch('pgadmin.browser.server_groups.servers.pgagent.listener.'
+           'JobStatusHub._schedule_flush')
+    @patch('pgadmin.browser.server_groups.servers.pgagent.listener.'
+           'JobStatusHub.add_server')
+    def runTest(self, start_mock, schedule_mock):
+        emitted = []
+        registry = JobStatusListenerRegistry(
+            lambda sid, event, data, rooms: emitted.append(
+                (rooms, [u['job_id'] for u in data['updates']])))
+        registry.subscribe(1, 'client1', 'dbname=postgres')
+        registry.subscribe_jobs(1, 'client1', [1])
+
+        for payload in self.payloads:
+            registry.fanout.hub.dispatch(1, payload)
+        registry.fanout.hub.flush(1)
+
+        self.assertEqual(sorted(emitted), sorted(self.expected_batches))
@@ -0,0 +1,83 @@
+##########################################################################
+#
+# pgAdmin 4 - PostgreSQL Tools
+#
+# Copyright (C) 2013 - 2025, The pgAdmin Development Team
+# This software is released under the PostgreSQL Licence
+#
+##########################################################################
+
+from unittest.mock import patch
+
+from pgadmin import socketio
+from pgadmin.utils.route import BaseSocketTestGenerator
+from pgadmin.browser.server_groups.servers.pgagent import \
+    SOCKETIO_NAMESPACE, job_status_listeners
+from . import utils as pgagent_utils
+
+
+class PgAgentJobStatusSocketTestCase(BaseSocketTestGenerator):
+    """This class will test that the Job Monitor, which never narrows its
+    selection, receives the notifications of all the jobs of its server"""
+    SOCKET_NAMESPACE = SOCKETIO_NAMESPACE
+    scenarios = [
+        ('Job Monitor receives the jobs another client does not watch',
+         dict(watched_jobs=[1], notified_jobs=[1, 2, 3],
+              expected_monitor=[1, 2, 3], expected_watcher=[1])),
+    ]
+
+    def setUp(self):
+        super().setUp()
+        flag, msg = pgagent_utils.is_valid_server_to_run_pgagent(self)
+        if not flag:
+            self.skipTest(msg)
+
+        self.watcher = socketio.test_client(
+            self.app, namespace=SOCKETIO_NAMESPACE,
+            flask_test_client=self.tester)
+
+    def get_received_jobs(self, client):
+        return [event['args'][0]['job_id']
+                for event in client.get_received(SOCKETIO_NAMESPACE)
+                if event['name'] == 'job_status_update']
+
+    @patch('pgadmin.browser.server_groups.servers.pgagent.listener.'
+           'JobStatusHub.remove_server')
+    @patch('pgadmin.browser.server_groups.servers.pgagent.listener.'
+           'JobStatusHub.add_server')
+    def runTest(self, start_mock, stop_mock):
+        """This function will send job status notifications to the Job
+        Monitor and to a client watching some jobs"""
+        for client in (self.socket_client, self.watcher):
+            client.emit('start_job_status_listener',
+                        {'sid': self.server_id},
+                        namespace=SOCKETIO_NAMESPACE)
+
+        res = self.watcher.emit(
+            'subscribe_jobs',
+            {'sid': self.server_id, 'jobs': self.watched_jobs},
+            namespace=SOCKETIO_NAMESPACE, callback=True)
+        self.assertEqual(res['status'], 'success')
+        self.assertEqual(res['jobs'], self.watched_jobs)
+
+        # Both clients share the listener of the server
+        self.assertEqual(start_mock.call_count, 1)
+        self.assertEqual(job_status_listeners.client_count(self.server_id),
+                         2)
+
+        for client in (self.socket_client, self.watcher):
+            client.get_received(SOCKETIO_NAMESPACE)
+        for jobid in self.notified_jobs:
+            job_status_listeners.deliver(
+                self.server_id, 'job_status_update',
+                {'sid': self.server_id, 'job_id': jobid, 'status': 's'})
+
+        self.assertEqual(self.get_received_jobs(self.socket_client),
+                         self.expected_monitor)
+        self.assertEqual(self.get_received_jobs(self.watcher),
+                         self.expected_watcher)
+
+    def tearDown(self):
+        """Clean up code"""
+        self.watcher.disconnect(namespace=SOCKETIO_NAMESPACE)
+        super().tearDown()
@@ -0,0 +1,115 @@
+##########################################################################
+#
+# pgAdmin 4 - PostgreSQL Tools
+#
+# Copyright (C) 2013 - 2025, The pgAdmin Development Team
+# This software is released under the PostgreSQL Licence
+#
+##########################################################################
+
+import json
+from unittest.mock import patch
+
+from config import PG_DEFAULT_DRIVER
+from pgadmin.utils.driver import get_driver
+from pgadmin.utils.route import BaseTestGenerator
+from regression.python_test_utils import test_utils as utils
+from . import utils as pgagent_utils
+
+
+class PgAgentLogRetentionTestCase(BaseTestGenerator):
+    """This class will test the log retention API of the Job Monitor"""
+    # Generates scenarios
+    scenarios = utils.generate_scenarios("pgagent_log_retention",
+                                         pgagent_utils.test_cases)
+
+    def setUp(self):
+        flag, msg = pgagent_utils.is_valid_server_to_run_pgagent(self)
+        if not flag:
+            self.skipTest(msg)
+        flag, msg = pgagent_utils.is_pgagent_installed_on_server(self)
+        if not flag:
+            self.skipTest(msg)
+        flag, msg = pgagent_utils.is_log_retention_installed(self)
+        if not flag:
+            self.skipTest(msg)
+
+        # Load test data
+        self.data = self.test_data
+
+        # Keep the policies of the server, to restore them afterwards
+        response = pgagent_utils.api_log_retention(self)
+        self.policies = \
+            json.loads(response.data.decode('utf-8'))['policies']
+
+    def runTest(self):
+        """This function will get or update the log retention"""
+        if self.is_positive_test:
+            response = pgagent_utils.api_log_retention(
+                self, self.data or None)
+
+            # Assert response
+            utils.assert_status_code(self, response)
+
+            response = pgagent_utils.api_log_retention(self)
+            data = json.loads(response.data.decode('utf-8'))
+            self.assertIn('partitioned', data)
+            self.assertIsInstance(data['partitions'], list)
+            if self.data:
+                self.assertEqual(
+                    [p['keep_days'] for p in data['policies']],
+                    self.expected_data['test_result_data']['keep_days']
+                )
+        else:
+            if self.mocking_required:
+                with patch(self.mock_data["function_name"],
+                           side_effect=[eval(self.mock_data["return_value"])]):
+                    response = pgagent_utils.api_log_retention(
+                        self, self.data or None)
+            else:
+                response = pgagent_utils.api_log_retention(
+                    self, self.data or None)
+
+            # Assert response
+            utils.assert_status_code(self, response)
+            utils.assert_error_message(self, response)
+
+    def tearDown(self):
+        """Clean up code"""
+        pgagent_utils.api_log_retention(self, {'policies': self.policies})
+
+
+class PgAgentLogRetentionUpdateTestCase(BaseTestGenerator):
+    """This class will test the log retention once the pgagent extension
+    is updated after the schema was detected"""
+    scenarios = [
+        ('Log retention is found after the extension update',
+         dict(url='/dashboard/log_retention/')),
+    ]
+
+    def setUp(self):
+        flag, msg = pgagent_utils.is_valid_server_to_run_pgagent(self)
+        if not flag:
+            self.skipTest(msg)
+        flag, msg = pgagent_utils.is_pgagent_installed_on_server(self)
+        if not flag:
+            self.skipTest(msg)
+        flag, msg = pgagent_utils.is_log_retention_installed(self)
+        if not flag:
+            self.skipTest(msg)
+
+    def runTest(self):
+        """This function will get the log retention with the schema of a
+        previous extension version cached"""
+        response = pgagent_utils.api_log_retention(self)
+        self.assertEqual(response.status_code, 200)
+
+        manager = get_driver(PG_DEFAULT_DRIVER).connection_manager(
+            self.server_id)
+        info = manager.db_info['pgAgentMonitor']
+        manager.db_info['pgAgentMonitor'] = dict(
+            info, has_log_retention=False, extversion='4.10')
+
+        response = pgagent_utils.api_log_retention(self)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(manager.db_info['pgAgentMonitor'], info)
@@ -68,6 +68,51 @@ def api_delete(self, job_id=None):
                               content_type='html/json')
 
 
+def api_enable(self):
+    return self.tester.put('{0}{1}/{2}/'.
+                           format(self.url, utils.SERVER_GROUP,
+                                  self.server_id),
+                           data=json.dumps(self.data),
+                           follow_redirects=True,
+                           content_type='html/json')
+
+
+def api_import(self, content_type='html/json'):
+    data = self.data if isinstance(self.data, str) else json.dumps(self.data)
+    return self.tester.post('{0}{1}/{2}/'.
+                            format(self.url, utils.SERVER_GROUP,
+                                   self.server_id),
+                            data=data,
+                            content_type=content_type)
+
+
+def api_export(self):
+    return self.tester.get('{0}{1}/{2}/'.
+                           format(self.url, utils.SERVER_GROUP,
+                                  self.server_id))
+
+
+def api_calendar(self):
+    return self.tester.get('{0}{1}/{2}/?{3}'.
+                           format(self.url, utils.SERVER_GROUP,
+                                  self.server_id,
+                                  urlencode({'count': self.data['count']})))
+
+
+def api_job_load(self):
+    return self.tester.get('{0}{1}?{2}'.
+                           format(self.url, self.server_id,
+                                  urlencode(self.data)))
+
+
+def api_log_retention(self, data=None):
+    if data is None:
+        return self.tester.get('{0}{1}'.format(self.url, self.server_id))
+    return self.tester.put('{0}{1}'.format(self.url, self.server_id),
+                           data=json.dumps(data),
+                           follow_redirects=True)
+
+
 def is_valid_server_to_run_pgagent(self):
     """
     This function checks if server is valid for the pgAgent job.
@@ -136,6 +181,34 @@ def is_pgagent_installed_on_server(self):
         traceback.print_exc(file=sys.stderr)
 
 
+def is_log_retention_installed(self):
+    """
+    This function checks if the pgAgent log retention table exists, it comes
+    with the pgagent extension 4.11.
+    """
+    try:
+        connection = utils.get_db_connection(
+            self.server['db'],
+            self.server['username'],
+            self.server['db_password'],
+            self.server['host'],
+            self.server['port'],
+            self.server['sslmode']
+        )
+        pg_cursor = connection.cursor()
+        pg_cursor.execute(
+            "SELECT pg_catalog.to_regclass('pgagent.pga_log_retention')"
+        )
+        result = pg_cursor.fetchone()
+        connection.close()
+        if result is None or result[0] is None:
+            return False, "Make sure pgAgent 4.11 or later is installed."
+        return True, None
+    except Exception:
+        traceback.print_exc(file=sys.stderr)
+        return False, "Make sure pgAgent 4.11 or later is installed."
+
+
 def create_pgagent_job(self, name):
     """
     This function create the pgAgent job.
@@ -287,10 +360,12 @@ def delete_pgagent_schedule(self):
         traceback.print_exc(file=sys.stderr)
 
 
-def verify_pgagent_schedule(self):
+def verify_pgagent_schedule(self, schedule_id=None):
     """
     This function verifies the pgAgent schedule.
     """
+    if schedule_id is None:
+        schedule_id = self.schedule_id
     try:
         connection = utils.get_db_connection(
             self.server['db'],
@@ -303,7 +378,7 @@ def verify_pgagent_schedule(self):
         pg_cursor = connection.cursor()
         pg_cursor.execute(
             "SELECT COUNT(*) FROM pgagent.pga_schedule "
-            "WHERE jscid = '%s'::integer;" % self.schedule_id
+            "WHERE jscid = '%s'::integer;" % schedule_id
         )
         result = pg_cursor.fetchone()
         count = result[0]
@@ -432,10 +507,12 @@ def delete_pgagent_step(self):
         traceback.print_exc(file=sys.stderr)
 
 
-def verify_pgagent_step(self):
+def verify_pgagent_step(self, step_id=None):
     """
     This function verifies the pgAgent step .
     """
+    if step_id is None:
+        step_id = self.step_id
     try:
         connection = utils.get_db_connection(
             self.server['db'],
@@ -448,7 +525,7 @@ def verify_pgagent_step(self):
         pg_cursor = connection.cursor()
         pg_cursor.execute(
             "SELECT COUNT(*) FROM pgagent.pga_jobstep "
-            "WHERE jstid = '%s'::integer;" % self.step_id
+            "WHERE jstid = '%s'::integer;" % step_id
         )
         result = pg_cursor.fetchone()
         count = result[0]
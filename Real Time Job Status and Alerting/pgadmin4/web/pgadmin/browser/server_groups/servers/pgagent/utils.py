@@ -8,7 +8,38 @@
 ##########################################################################
 
 """pgagent helper utilities"""
+import calendar
+import heapq
+import json
+import threading
+from bisect import bisect_left
+from datetime import date, datetime, time, timedelta
+
 from flask import render_template
+from flask_babel import gettext
+
+# Size of the boolean arrays of a schedule
+SCHEDULE_ARRAY_SIZES = {
+    'jscminutes': 60,
+    'jschours': 24,
+    'jscweekdays': 7,
+    'jscmonthdays': 32,
+    'jscmonths': 12,
+    'jscoccurrence': 5
+}
+
+# pga_next_schedule tries candidate runs until one is valid, which never
+# ends for a schedule that can not run. The Python schedule engine gives up
+# after this many candidates.
+SCHEDULE_MAX_CANDIDATES = 100000
+
+# Width in minutes of the buckets of the job load histogram, and the number
+# of its busiest buckets returned with their jobs.
+JOB_LOAD_BUCKETS = {
+    'minute': 1,
+    'hour': 60
+}
+JOB_LOAD_PEAKS = 10
 
 
 def format_boolean_array(value):
@@ -49,38 +80,669 @@ def format_schedule_data(data):
     return data
 
 
-def format_step_data(job_id, data, has_connection_str, conn, template_path):
+def format_steps_data(job_id, steps, has_connection_str, conn,
+                      template_path):
     """
-    This function is used to format the step data. If data is not an
-    instance of list then format
+    This function is used to format the data of the changed steps of a
+    job. The connection type of a step is needed to know whether a changed
+    jstdbname or jstconnstr applies. It is read with a single query for
+    all the steps that do not send it.
     :param job_id: Job ID
-    :param data: a step data
+    :param steps: the changed steps data
     :param has_connection_str: has pgagent connection str
     :param conn: Connection obj
-    :param conn: SQL template path
-    """
-    if 'jstconntype' not in data and \
-        ('jstdbname' in data or
-         'jstconnstr' in data) and has_connection_str:
-        status, rset = conn.execute_dict(
-            render_template(
-                "/".join([template_path, 'steps.sql']),
-                jid=job_id,
-                jstid=data['jstid'],
-                conn=conn,
-                has_connstr=has_connection_str
-            )
+    :param template_path: SQL template path
+    :return: (status, error message)
+    """
+    if not has_connection_str:
+        return True, None
+
+    steps = [
+        step for step in steps
+        if 'jstconntype' not in step and
+        ('jstdbname' in step or 'jstconnstr' in step)
+    ]
+    if not steps:
+        return True, None
+
+    status, rset = conn.execute_dict(
+        render_template(
+            "/".join([template_path, 'step_connections.sql']),
+            jid=job_id,
+            jstids=[step['jstid'] for step in steps],
+            conn=conn
         )
-        if not status:
-            return False, rset
+    )
+    if not status:
+        return False, rset
 
-        row = rset['rows'][0]
-        data['jstconntype'] = row['jstconntype']
+    rows = {row['jstid']: row for row in rset['rows']}
+    for step in steps:
+        row = rows.get(int(step['jstid']))
+        if row is None:
+            return False, gettext(
+                "Could not find the job step (id: {0})."
+            ).format(step['jstid'])
+
+        step['jstconntype'] = row['jstconntype']
         if row['jstconntype']:
-            data['jstdbname'] = data.get(
+            step['jstdbname'] = step.get(
                 'jstdbname', row['jstdbname'])
         else:
-            data['jstconnstr'] = data.get(
+            step['jstconnstr'] = step.get(
                 'jstconnstr', row['jstconnstr'])
 
     return True, None
+
+
+def get_bulk_args(data, flag=None):
+    """
+    Returns the ids of the objects of a bulk delete or enable, and the
+    value of its enabled flag if one is given. A form post sends the flag as
+    'true' or 'false', and the ids as a JSON list.
+
+    Args:
+        data: request arguments
+        flag: name of the enabled flag
+
+    Returns:
+        tuple of the list of ids and the flag, None if not given
+
+    Raises ValueError if the ids are not a list of integers, or the flag is
+    not a boolean.
+    """
+    ids = data.get('ids')
+    if isinstance(ids, str):
+        try:
+            ids = json.loads(ids)
+        except ValueError:
+            ids = None
+    if not isinstance(ids, list) or \
+            any(isinstance(i, bool) or not isinstance(i, int) for i in ids):
+        raise ValueError(gettext("'ids' must be a list of integers."))
+
+    if flag is None:
+        return ids, None
+
+    enabled = data.get(flag)
+    if isinstance(enabled, str) and enabled in ('true', 'false'):
+        enabled = enabled == 'true'
+    if not isinstance(enabled, bool):
+        raise ValueError(gettext("'{0}' must be a boolean.").format(flag))
+    return ids, enabled
+
+
+def _import_text(data, key, default='', required=False):
+    value = data.get(key, default)
+    if value is None:
+        value = default
+    if not isinstance(value, str) or (required and not value.strip()):
+        raise ValueError(
+            gettext("'{0}' must be a non-empty string.").format(key)
+            if required else
+            gettext("'{0}' must be a string.").format(key)
+        )
+    return value
+
+
+def _import_bool(data, key, default):
+    value = data.get(key, default)
+    if not isinstance(value, bool):
+        raise ValueError(gettext("'{0}' must be a boolean.").format(key))
+    return value
+
+
+def _import_int(data, key, default):
+    value = data.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(gettext("'{0}' must be an integer.").format(key))
+    return value
+
+
+def _import_list(data, key):
+    value = data.get(key) or []
+    if not isinstance(value, list) or \
+            not all(isinstance(item, dict) for item in value):
+        raise ValueError(
+            gettext("'{0}' must be a list of objects.").format(key))
+    return value
+
+
+def _check_parsed(value, key, parse):
+    try:
+        parse(value)
+    except (TypeError, ValueError):
+        raise ValueError(gettext("Invalid value of '{0}'.").format(key))
+    return value
+
+
+def _validate_import_step(step, has_connection_str):
+    kind = step.get('jstkind', True)
+    # The export has a boolean, true for SQL, like the job properties
+    if kind in ('s', 'b'):
+        kind = kind == 's'
+    if not isinstance(kind, bool):
+        raise ValueError(gettext("'jstkind' must be a boolean."))
+    onerror = step.get('jstonerror', 'f')
+    if onerror not in ('f', 's', 'i'):
+        raise ValueError(gettext("'jstonerror' must be one of f, s or i."))
+
+    # Same connection columns as the INSERT macro of pga_jobstep
+    local = _import_bool(step, 'jstconntype', True)
+    dbname = _import_text(step, 'jstdbname')
+    connstr = _import_text(step, 'jstconnstr')
+    if kind and local and not dbname:
+        raise ValueError(gettext(
+            "'jstdbname' is required for an SQL step on a local database."))
+    if kind and not local and has_connection_str and not connstr:
+        raise ValueError(gettext(
+            "'jstconnstr' is required for an SQL step on a remote database."))
+
+    return {
+        'jstname': _import_text(step, 'jstname', required=True),
+        'jstdesc': _import_text(step, 'jstdesc'),
+        'jstenabled': _import_bool(step, 'jstenabled', True),
+        'jstkind': 's' if kind else 'b',
+        'jstonerror': onerror,
+        'jstcode': _import_text(step, 'jstcode', required=True),
+        'jstdbname': dbname if kind and (local or not has_connection_str)
+        else '',
+        'jstconnstr': connstr if has_connection_str and not local else ''
+    }
+
+
+def _validate_import_schedule(schedule):
+    res = {
+        'jscname': _import_text(schedule, 'jscname', required=True),
+        'jscdesc': _import_text(schedule, 'jscdesc'),
+        'jscenabled': _import_bool(schedule, 'jscenabled', True),
+        # The timestamps are parsed by PostgreSQL, with their time zone
+        'jscstart': _import_text(schedule, 'jscstart', required=True),
+        'jscend': _import_text(schedule, 'jscend') or None,
+        'jscexceptions': []
+    }
+
+    for key, size in SCHEDULE_ARRAY_SIZES.items():
+        value = schedule.get(key)
+        if value is None:
+            value = [False] * size
+        if not isinstance(value, list) or len(value) != size or \
+                not all(isinstance(item, bool) for item in value):
+            raise ValueError(gettext(
+                "'{0}' must be a list of {1} booleans."
+            ).format(key, size))
+        res[key] = value
+
+    for exception in _import_list(schedule, 'jscexceptions'):
+        jexdate = exception.get('jexdate') or None
+        jextime = exception.get('jextime') or None
+        if jexdate is None and jextime is None:
+            raise ValueError(gettext(
+                "A schedule exception needs a date or a time."))
+        res['jscexceptions'].append({
+            'jexdate': jexdate and _check_parsed(
+                _import_text(exception, 'jexdate'), 'jexdate',
+                date.fromisoformat
+            ),
+            'jextime': jextime and _check_parsed(
+                _import_text(exception, 'jextime'), 'jextime',
+                time.fromisoformat
+            )
+        })
+
+    return res
+
+
+def validate_import_job(job, has_connection_str):
+    """
+    Validates a job of a bulk import, with its steps, schedules and
+    notification settings, and returns it with the defaults filled in and
+    the step connection columns set like the pga_jobstep INSERT macro does.
+    Raises ValueError with the reason if the job is invalid.
+    :param job: a job as returned by the job export
+    :param has_connection_str: has pgagent connection str
+    """
+    if not isinstance(job, dict):
+        raise ValueError(gettext("A job must be an object."))
+
+    jnwhen = job.get('jnwhen', 'f')
+    if jnwhen not in ('a', 's', 'f', 'b'):
+        raise ValueError(gettext("'jnwhen' must be one of a, s, f or b."))
+
+    res = {
+        'jobname': _import_text(job, 'jobname', required=True),
+        'jobdesc': _import_text(job, 'jobdesc'),
+        'jobhostagent': _import_text(job, 'jobhostagent'),
+        'jobenabled': _import_bool(job, 'jobenabled', True),
+        'jobjclid': _import_int(job, 'jobjclid', 1),
+        'jnenabled': _import_bool(job, 'jnenabled', True),
+        'jnbrowser': _import_bool(job, 'jnbrowser', True),
+        'jnemail': _import_bool(job, 'jnemail', False),
+        'jnwhen': jnwhen,
+        'jnmininterval': _import_int(job, 'jnmininterval', 0),
+        'jnemailrecipients': _import_text(job, 'jnemailrecipients'),
+        'jncustomtext': _import_text(job, 'jncustomtext'),
+        'jsteps': [],
+        'jschedules': []
+    }
+
+    for idx, step in enumerate(_import_list(job, 'jsteps')):
+        try:
+            res['jsteps'].append(
+                _validate_import_step(step, has_connection_str))
+        except ValueError as e:
+            raise ValueError(
+                gettext("Step {0}: {1}").format(idx + 1, str(e)))
+
+    for idx, schedule in enumerate(_import_list(job, 'jschedules')):
+        try:
+            res['jschedules'].append(_validate_import_schedule(schedule))
+        except ValueError as e:
+            raise ValueError(
+                gettext("Schedule {0}: {1}").format(idx + 1, str(e)))
+
+    return res
+
+
+def _schedule_mask(value):
+    """
+    Returns a schedule bool array as an int, bit i being set for the
+    element i + 1 of the PostgreSQL array.
+    """
+    if isinstance(value, str):
+        value = [item.strip() in ('t', 'true')
+                 for item in value.strip('{}[]').split(',')]
+    mask = 0
+    for idx, item in enumerate(value or []):
+        if item:
+            mask |= 1 << idx
+    return mask
+
+
+def _next_bit(mask, start=0):
+    """Returns the lowest bit set in the mask at or above start, or None"""
+    mask >>= start
+    if not mask:
+        return None
+    return start + (mask & -mask).bit_length() - 1
+
+
+def _has_bit(mask, bit):
+    """All false schedule arrays match anything"""
+    return not mask or bool(mask >> bit & 1)
+
+
+def _month_days(year, month):
+    return calendar.monthrange(year, month)[1]
+
+
+class CompiledSchedule:
+    """
+    A pgAgent schedule with its bool arrays compiled to bitmasks, to
+    compute its runs without the database. It follows the search of
+    pgagent.pga_next_schedule step by step, finding the next selected
+    month, day, hour and minute with a bit scan instead of a loop over the
+    array, so that the runs are the ones pgAgent will use.
+
+    The times are naive timestamps in the time zone of the database server,
+    as pga_next_schedule builds them.
+    """
+
+    def __init__(self, schedule):
+        self.jscid = schedule.get('jscid')
+        self.start = self._parse_timestamp(schedule.get('jscstart'))
+        self.end = self._parse_timestamp(schedule.get('jscend'))
+        self.minutes = _schedule_mask(schedule.get('jscminutes'))
+        self.hours = _schedule_mask(schedule.get('jschours'))
+        self.weekdays = _schedule_mask(schedule.get('jscweekdays'))
+        self.monthdays = _schedule_mask(schedule.get('jscmonthdays'))
+        self.months = _schedule_mask(schedule.get('jscmonths'))
+        self.occurrence = _schedule_mask(schedule.get('jscoccurrence'))
+
+        self.exceptions = set()
+        for exception in schedule.get('jscexceptions') or []:
+            self.exceptions.add((
+                exception.get('jexdate') and
+                date.fromisoformat(exception['jexdate']),
+                exception.get('jextime') and
+                time.fromisoformat(exception['jextime'])
+            ))
+
+        # The runs expanded by runs_between, and the next one after them
+        self._runs = None
+        self._runs_after = None
+        self._pending = None
+
+    @staticmethod
+    def _parse_timestamp(value):
+        if not value or isinstance(value, datetime):
+            return value or None
+        return datetime.fromisoformat(value)
+
+    def _is_exception(self, run):
+        run_date, run_time = run.date(), run.time()
+        return (run_date, run_time) in self.exceptions or \
+            (run_date, None) in self.exceptions or \
+            (None, run_time) in self.exceptions
+
+    def _is_valid(self, run):
+        """
+        The check of pga_next_schedule that a candidate run carried by the
+        wrapped values is still on a selected minute, hour, day and month.
+        The last day flag only counts when it is the only day selected.
+        """
+        if not _has_bit(self.minutes, run.minute) or \
+                not _has_bit(self.hours, run.hour) or \
+                not _has_bit(self.months, run.month - 1):
+            return False
+        if _has_bit(self.monthdays, run.day - 1):
+            return True
+        if self.monthdays != 1 << 31:
+            return False
+        if run.month == 2:
+            return run.day == 28 or \
+                (run.day == 29 and calendar.isleap(run.year))
+        return run.day == _month_days(run.year, run.month)
+
+    def _candidate(self, runafter, daytweak, minutetweak):
+        """
+        Returns the next candidate run at or after runafter, and whether a
+        selected value was found, or raises ValueError where
+        pga_next_schedule fails to build an out of range date.
+        """
+        year, month, day = runafter.year, runafter.month, runafter.day
+        found = False
+
+        bit = _next_bit(self.months, month - 1)
+        if bit is None and self.months:
+            bit = _next_bit(self.months)
+            year += 1
+        if bit is not None:
+            month, found = bit + 1, True
+
+        if year > runafter.year or month > runafter.month:
+            bit = _next_bit(self.monthdays)
+            day = 1
+        else:
+            bit = _next_bit(self.monthdays, day - 1)
+            if bit is None and self.monthdays:
+                bit = _next_bit(self.monthdays)
+                year, month = (year + 1, 1) if month == 12 \
+                    else (year, month + 1)
+        if bit is not None:
+            day, found = bit + 1, True
+
+        # The last day flag
+        if day == 32:
+            day = _month_days(year, month)
+
+        def next_day():
+            if day == _month_days(year, month):
+                return (year + 1, 1, 1) if month == 12 \
+                    else (year, month + 1, 1)
+            return year, month, day + 1
+
+        if year > runafter.year or month > runafter.month or \
+                day > runafter.day or daytweak:
+            bit = _next_bit(self.hours)
+            hour = 0
+        else:
+            hour = runafter.hour
+            bit = _next_bit(self.hours, hour)
+            if bit is None and self.hours:
+                bit = _next_bit(self.hours)
+                year, month, day = next_day()
+        if bit is not None:
+            hour, found = bit, True
+
+        if year > runafter.year or month > runafter.month or \
+                day > runafter.day or hour > runafter.hour or daytweak:
+            # pga_next_schedule searches from the minute of runafter here
+            bit = _next_bit(
+                self.minutes, 0 if minutetweak else max(runafter.minute - 1, 0)
+            )
+            minute = 0
+        else:
+            minute = runafter.minute
+            bit = _next_bit(self.minutes, minute)
+            if bit is None and self.minutes:
+                bit = _next_bit(self.minutes)
+                if hour == 23:
+                    hour = 0
+                    year, month, day = next_day()
+                else:
+                    hour += 1
+        if bit is not None:
+            minute, found = bit, True
+
+        return datetime(year, month, day, hour, minute), found
+
+    def next_run(self, after):
+        """
+        Returns the run pga_next_schedule finds at or after the given naive
+        timestamp, which is now() + 1 minute for the next run of the
+        schedule, or None if the schedule has no run left.
+        """
+        if self.start is None:
+            return None
+
+        runafter = max(after, self.start).replace(second=0, microsecond=0)
+        daytweak = minutetweak = found = False
+        for _ in range(SCHEDULE_MAX_CANDIDATES):
+            try:
+                nextrun, found_value = self._candidate(
+                    runafter, daytweak, minutetweak)
+            except ValueError:
+                return None
+            found = found or found_value
+
+            # All the arrays are false
+            if nextrun == runafter and not found:
+                nextrun += timedelta(minutes=1)
+
+            if self.end is not None and nextrun > self.end:
+                return None
+
+            if not self._is_valid(nextrun):
+                runafter = nextrun + timedelta(minutes=1)
+                daytweak, minutetweak = False, True
+            elif not _has_bit(self.weekdays, nextrun.isoweekday() % 7) or \
+                    not _has_bit(self.occurrence, (nextrun.day - 1) // 7):
+                # The wrong week day, or its wrong occurrence in the month
+                runafter = nextrun + timedelta(days=1)
+                daytweak, minutetweak = True, False
+            elif self._is_exception(nextrun):
+                runafter = nextrun + timedelta(minutes=1)
+                daytweak, minutetweak = False, True
+            else:
+                return nextrun
+
+        return None
+
+    def next_runs(self, after, count):
+        """
+        Returns up to count runs of the schedule at or after the given
+        naive timestamp.
+        """
+        runs = []
+        run = self.next_run(after)
+        while run is not None and len(runs) < count:
+            runs.append(run)
+            run = self.next_run(run + timedelta(minutes=1))
+        return runs
+
+    def runs_between(self, after, until):
+        """
+        Returns the runs of the schedule at or after the given naive
+        timestamp and before until. The runs are chained from the first
+        call, and kept so that a later period overlapping them only expands
+        the runs it adds.
+        """
+        if self._runs is None or after < self._runs_after:
+            self._runs = []
+            self._pending = self.next_run(after)
+
+        while self._pending is not None and self._pending < until:
+            self._runs.append(self._pending)
+            self._pending = self.next_run(
+                self._pending + timedelta(minutes=1))
+
+        del self._runs[:bisect_left(self._runs, after)]
+        self._runs_after = after
+        return self._runs[:bisect_left(self._runs, until)]
+
+
+class CompiledScheduleCache:
+    """
+    The compiled schedules of every server, with the runs they expanded.
+    A schedule is compiled again only when its row changes, so that
+    refreshing the job load of a server only expands the new runs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._schedules = {}
+
+    def runs_between(self, sid, schedules, after, until):
+        """
+        Returns the runs of the schedules of a server from after to until,
+        by jscid. The schedules not given are dropped from the cache.
+        """
+        with self._lock:
+            cached = self._schedules.get(sid, {})
+            compiled = {}
+            for schedule in schedules:
+                key = json.dumps(schedule, sort_keys=True)
+                entry = cached.get(schedule['jscid'])
+                if entry is None or entry[0] != key:
+                    entry = (key, CompiledSchedule(schedule))
+                compiled[schedule['jscid']] = entry
+            self._schedules[sid] = compiled
+
+            return {
+                jscid: entry[1].runs_between(after, until)
+                for jscid, entry in compiled.items()
+            }
+
+
+compiled_schedules = CompiledScheduleCache()
+
+
+def next_schedule_runs(schedules, after, count):
+    """
+    Computes the next runs of many schedules, compiling each of them once.
+    :param schedules: the schedules with their bool arrays, as
+        pga_schedule/sql/pre3.4/preview.sql returns them
+    :param after: naive timestamp, in the time zone of the database server,
+        to find the runs at or after
+    :param count: the number of runs per schedule
+    :return: dict of the list of the runs of every schedule by its jscid
+    """
+    return {
+        schedule['jscid']: CompiledSchedule(schedule).next_runs(after, count)
+        for schedule in schedules
+    }
+
+
+def preview_schedule_runs(conn, count, jid=None, jscid=None):
+    """
+    Computes the next runs of a schedule, or of all the enabled schedules
+    of the enabled jobs, with the Python schedule engine.
+    :param conn: Connection obj
+    :param count: the number of runs per schedule
+    :param jid: Job ID, to only preview its schedules
+    :param jscid: Schedule ID, to preview it even if it is disabled
+    :return: (status, the server time zone and the schedules with their
+        runs, or the error message)
+    """
+    status, res = conn.execute_dict(
+        render_template(
+            'pga_schedule/sql/pre3.4/preview.sql',
+            jid=jid, jscid=jscid, conn=conn
+        )
+    )
+    if not status:
+        return False, res
+
+    row = res['rows'][0]
+    runafter = datetime.fromisoformat(row['runafter'])
+    schedules = json.loads(row['schedules'])
+    runs = next_schedule_runs(schedules, runafter, count)
+    for schedule in schedules:
+        schedule['runs'] = [
+            run.strftime('%Y-%m-%d %H:%M:%S')
+            for run in runs[schedule['jscid']]
+        ]
+        for key in SCHEDULE_ARRAY_SIZES:
+            del schedule[key]
+        del schedule['jscexceptions']
+
+    return True, {'timezone': row['timezone'], 'schedules': schedules}
+
+
+def schedule_load(conn, sid, hours, bucket):
+    """
+    Counts the runs of the enabled jobs in every minute or hour of the next
+    hours, expanding their enabled schedules with the Python schedule
+    engine. A job run by several of its schedules in the same minute counts
+    once, as pgAgent runs it once.
+    :param conn: Connection obj
+    :param sid: Server ID, to cache the compiled schedules of the server
+    :param hours: the number of hours from the next minute on
+    :param bucket: 'minute' or 'hour', see JOB_LOAD_BUCKETS
+    :return: (status, the histogram or the error message). The buckets
+        start on the hour, or on the day for hourly buckets, so that they
+        line up in a calendar, the ones before the next minute being empty.
+    """
+    status, res = conn.execute_dict(
+        render_template(
+            'pga_schedule/sql/pre3.4/preview.sql',
+            jid=None, jscid=None, conn=conn
+        )
+    )
+    if not status:
+        return False, res
+
+    row = res['rows'][0]
+    runafter = datetime.fromisoformat(row['runafter'])
+    until = runafter + timedelta(hours=hours)
+    width = timedelta(minutes=JOB_LOAD_BUCKETS[bucket])
+    if bucket == 'hour':
+        start = runafter.replace(hour=0, minute=0, second=0)
+    else:
+        start = runafter.replace(minute=0, second=0)
+
+    schedules = json.loads(row['schedules'])
+    runs = compiled_schedules.runs_between(sid, schedules, runafter, until)
+    jobs = {}
+    job_runs = set()
+    for schedule in schedules:
+        jobs[schedule['jscjobid']] = schedule['jobname']
+        for run in runs[schedule['jscid']]:
+            job_runs.add((run, schedule['jscjobid']))
+
+    counts = [0] * -((start - until) // width)
+    bucket_jobs = {}
+    for run, jobid in job_runs:
+        idx = (run - start) // width
+        counts[idx] += 1
+        bucket_jobs.setdefault(idx, set()).add(jobid)
+
+    peaks = heapq.nsmallest(
+        JOB_LOAD_PEAKS, bucket_jobs, key=lambda idx: (-counts[idx], idx))
+
+    return True, {
+        'timezone': row['timezone'],
+        'start': start.strftime('%Y-%m-%d %H:%M:%S'),
+        'runafter': runafter.strftime('%Y-%m-%d %H:%M:%S'),
+        'bucket': bucket,
+        'counts': counts,
+        'peaks': [{
+            'time': (start + idx * width).strftime('%Y-%m-%d %H:%M:%S'),
+            'runs': counts[idx],
+            'jobs': [
+                {'jobid': jobid, 'jobname': jobs[jobid]}
+                for jobid in sorted(bucket_jobs[idx])
+            ]
+        } for idx in peaks]
+    }
@@ -11,13 +11,15 @@
 import math
 import re
 
-from flask import render_template, Response, g, request
+from flask import render_template, Response, g, request, \
+    stream_with_context
 from flask_babel import gettext
 from pgadmin.user_login_check import pga_login_required
 import json
 from pgadmin.utils import PgAdminModule
 from pgadmin.utils.ajax import make_response as ajax_response,\
-    internal_server_error, make_json_response, precondition_required
+    internal_server_error, make_json_response, precondition_required, \
+    DataTypeJSONEncoder
 from pgadmin.utils.driver import get_driver
 from pgadmin.utils.preferences import Preferences
 from pgadmin.utils.constants import PREF_LABEL_DISPLAY, MIMETYPE_APP_JS, \
@@ -25,7 +27,11 @@ from pgadmin.utils.constants import PREF_LABEL_DISPLAY, MIMETYPE_APP_JS, \
 
 from .precondition import check_precondition
 from .pgd_replication import blueprint as pgd_replication
-from config import PG_DEFAULT_DRIVER, ON_DEMAND_LOG_COUNT
+from pgadmin.browser.server_groups.servers.pgagent.utils import \
+    JOB_LOAD_BUCKETS, schedule_load
+from config import PG_DEFAULT_DRIVER, ON_DEMAND_LOG_COUNT, \
+    PGAGENT_JOB_LOG_PAGE_SIZE, PGAGENT_JOB_LOG_MAX_PAGE_SIZE, \
+    PGAGENT_JOB_LOAD_HOURS, PGAGENT_JOB_LOAD_MAX_HOURS
 
 MODULE_NAME = 'dashboard'
 
@@ -253,8 +259,13 @@ class DashboardModule(PgAdminModule):
             'dashboard.replication_slots',
             'dashboard.replication_stats',
             'dashboard.job_monitor',
+            'dashboard.job_monitor_delta',
             'dashboard.run_job',
-            'dashboard.job_log'
+            'dashboard.job_log',
+            'dashboard.job_load',
+            'dashboard.log_retention',
+            'dashboard.update_log_retention',
+            'dashboard.log_maintenance'
         ] + pgd_replication.get_exposed_url_endpoints()
 
 
@@ -804,6 +815,30 @@ def replication_slots(sid=None):
     )
 
 
+def get_pgagent_info(refresh=False):
+    """
+    Returns the pgAgent schema information of the server, detected once per
+    connection manager and cached in its db_info. The cache is dropped by
+    job_monitor when the extension version changes, or detected again if
+    refresh is set.
+    """
+    info = None if refresh else g.manager.db_info.get('pgAgentMonitor')
+    if info is not None:
+        return True, info
+
+    status, res = g.conn.execute_dict(
+        render_template("/".join([g.template_path, 'pgagent_info.sql']))
+    )
+    if not status:
+        return False, res
+
+    info = res['rows'][0]
+    # Not cached until installed, so that the installation is detected
+    if info['installed']:
+        g.manager.db_info['pgAgentMonitor'] = info
+    return True, info
+
+
 @blueprint.route('/job_monitor/<int:sid>', endpoint='job_monitor')
 @pga_login_required
 @check_precondition
@@ -813,144 +848,106 @@ def job_monitor(sid=None):
     :param sid: server id
     :return: Response
     """
-    try:
-        # Check if pgAgent extension is available
-        status, res = g.conn.execute_scalar(
-            "SELECT COUNT(*) FROM pg_catalog.pg_namespace WHERE nspname = 'pgagent'"
-        )
-        
-        if not status or int(res) == 0:
-            return make_json_response(
-                success=0,
-                errormsg=gettext("pgAgent extension not found. Please make sure it is installed."),
-                status=404
-            )
-            
-        # Debug: Let's check if the tables exist
-        status, tables = g.conn.execute_dict(
-            "SELECT table_name FROM information_schema.tables WHERE table_schema = 'pgagent'"
+    status, info = get_pgagent_info()
+    if not status:
+        return internal_server_error(errormsg=info)
+
+    if not info['installed']:
+        return make_json_response(
+            success=0,
+            errormsg=gettext("pgAgent extension not found. Please make sure "
+                             "it is installed."),
+            status=404
         )
-        
-        if not status or len(tables['rows']) == 0:
-            return make_json_response(
-                success=0,
-                errormsg=gettext("pgAgent tables not found. Please make sure pgAgent is properly installed."),
-                status=404
-            )
-        
-        # Get table structure for debugging
-        table_info = {}
-        for table in tables['rows']:
-            table_name = table['table_name']
-            status, columns = g.conn.execute_dict(
-                "SELECT column_name, data_type FROM information_schema.columns "
-                "WHERE table_schema = 'pgagent' AND table_name = %s",
-                (table_name,)
-            )
-            if status:
-                table_info[table_name] = columns['rows']
-        
-        # Try a simpler query first to test
-        status, job_count = g.conn.execute_scalar(
-            "SELECT COUNT(*) FROM pgagent.pga_job"
+
+    status, res = g.conn.execute_scalar(
+        render_template(
+            "/".join([g.template_path, 'job_monitor.sql']),
+            pgagent=info
         )
-        
-        if not status:
-            return make_json_response(
-                success=0,
-                errormsg=gettext("Error accessing pgAgent job table: {}".format(job_count)),
-                status=500
-            )
-            
-        # If we got here, we can try the full query
-        status, res = g.conn.execute_dict(
-            render_template(
-                "/".join([g.template_path, 'job_monitor.sql'])
-            )
+    )
+
+    if not status:
+        # The schema may have been dropped or changed, detect it again.
+        g.manager.db_info.pop('pgAgentMonitor', None)
+        return internal_server_error(errormsg=res)
+
+    res = json.loads(res) if isinstance(res, str) else res
+    if res.get('extversion') != info['extversion']:
+        g.manager.db_info.pop('pgAgentMonitor', None)
+
+    return ajax_response(
+        response=res,
+        status=200
+    )
+
+
+def get_int_args(name):
+    """
+    Returns the comma separated integers of a request argument.
+    Raises ValueError if any of them is not an integer.
+    """
+    value = request.args.get(name, '')
+    return [int(v) for v in value.split(',') if v.strip() != '']
+
+
+@blueprint.route('/job_monitor_delta/<int:sid>',
+                 endpoint='job_monitor_delta')
+@pga_login_required
+@check_precondition
+def job_monitor_delta(sid=None):
+    """
+    This function returns only the job monitor rows changed by a job status
+    notification, with the updated summary counters.
+
+    The changed jobs are selected by the 'jobid' (comma separated) and
+    'jlgid' arguments, or by a 'since' cursor returned by a previous call,
+    in which case the jobs with a run logged after the cursor and the
+    running jobs are returned.
+    :param sid: server id
+    :return: Response
+    """
+    try:
+        job_ids = get_int_args('jobid')
+        jlgid = get_int_args('jlgid')
+        since = get_int_args('since')
+    except ValueError:
+        return make_json_response(
+            success=0,
+            errormsg=gettext("Invalid job id, log id or cursor."),
+            status=400
         )
 
-        if not status:
-            return make_json_response(
-                success=0,
-                errormsg=gettext("Error executing job monitor query: {}".format(res)),
-                status=500
-            )
-            
-        # Log the structure of the result for debugging
-        if 'rows' in res and len(res['rows']) > 0:
-            first_row = res['rows'][0]
-            # Check if the result column exists
-            if 'result' in first_row:
-                # Extract the result JSON
-                result_json = first_row['result']
-                
-                # Check if result_json is a string and try to parse it
-                if isinstance(result_json, str):
-                    try:
-                        import json
-                        result_json = json.loads(result_json)
-                    except Exception as e:
-                        return make_json_response(
-                            success=0,
-                            errormsg=gettext("Error parsing JSON result: {}".format(str(e))),
-                            status=500
-                        )
-                
-                # Return the result directly
-                return ajax_response(
-                    response={
-                        'debug_info': {
-                            'tables': tables['rows'],
-                            'table_info': table_info,
-                            'job_count': job_count,
-                            'raw_result': first_row
-                        },
-                        'data': result_json
-                    },
-                    status=200
-                )
-            else:
-                # Log the available columns
-                available_columns = list(first_row.keys())
-                return make_json_response(
-                    success=0,
-                    errormsg=gettext("Expected 'result' column not found in query result. Available columns: {}".format(available_columns)),
-                    status=500
-                )
-        else:
-            # No rows returned
-            return ajax_response(
-                response={
-                    'debug_info': {
-                        'tables': tables['rows'],
-                        'table_info': table_info,
-                        'job_count': job_count,
-                        'message': 'No rows returned from query'
-                    },
-                    'data': {
-                        'summary': {
-                            'total_jobs': 0,
-                            'enabled_jobs': 0,
-                            'disabled_jobs': 0,
-                            'running_jobs': 0,
-                            'successful_jobs': 0,
-                            'failed_jobs': 0
-                        },
-                        'jobs': []
-                    }
-                },
-                status=200
-            )
-    except Exception as e:
-        import traceback
-        error_traceback = traceback.format_exc()
+    if not job_ids and not jlgid and not since:
         return make_json_response(
             success=0,
-            errormsg=str(e),
-            info=error_traceback,
-            status=500
+            errormsg=gettext("Job ID, log ID or cursor not specified"),
+            status=400
         )
 
+    status, info = get_pgagent_info()
+    if not status:
+        return internal_server_error(errormsg=info)
+
+    status, res = g.conn.execute_scalar(
+        render_template(
+            "/".join([g.template_path, 'job_monitor_delta.sql']),
+            pgagent=info,
+            job_ids=job_ids,
+            jlgid=jlgid[0] if jlgid else None,
+            since=since[0] if since else None
+        )
+    )
+
+    if not status:
+        g.manager.db_info.pop('pgAgentMonitor', None)
+        return internal_server_error(errormsg=res)
+
+    return ajax_response(
+        response=json.loads(res) if isinstance(res, str) else res,
+        status=200
+    )
+
 
 @blueprint.route('/run_job/<int:sid>/<int:jobid>', methods=['POST'], endpoint='run_job')
 @pga_login_required
@@ -1025,121 +1022,366 @@ def run_job(sid=None, jobid=None):
         )
 
 
+def get_job_log_cursor():
+    """
+    Returns the (jlgstart, jlgid) of the 'cursor' request argument, as
+    returned in the next_cursor of a job log page, or (None, None).
+    Raises ValueError if the cursor is malformed.
+    """
+    cursor = request.args.get('cursor', '')
+    if not cursor:
+        return None, None
+    start, jlgid = cursor.rsplit(',', 1)
+    if not start:
+        raise ValueError(cursor)
+    return start, int(jlgid)
+
+
+def render_job_log_sql(jobid, limit, cursor_start, cursor_id):
+    """
+    Returns the query of a page of the job log, with the steps of the runs
+    if the 'steps' request argument is set and their output if the 'output'
+    one is set too.
+    """
+    return render_template(
+        "/".join([g.template_path, 'job_log.sql']),
+        conn=g.conn,
+        jobid=jobid,
+        limit=limit,
+        cursor_start=cursor_start,
+        cursor_id=cursor_id,
+        steps=request.args.get('steps', '0') == '1',
+        output=request.args.get('output', '0') == '1'
+    )
+
+
+def load_job_log_steps(rows):
+    """
+    Parses the steps of the job log rows returned as JSON text.
+    """
+    for row in rows:
+        if isinstance(row.get('steps'), str):
+            row['steps'] = json.loads(row['steps'])
+    return rows
+
+
+def stream_job_log(jobid, cursor_start, cursor_id):
+    """
+    Yields the runs of a job as newline delimited JSON, newest first. The
+    log is read page by page, so that only one page is held in memory.
+    """
+    limit = PGAGENT_JOB_LOG_MAX_PAGE_SIZE
+    while True:
+        status, res = g.conn.execute_dict(
+            render_job_log_sql(jobid, limit, cursor_start, cursor_id)
+        )
+        if not status:
+            yield json.dumps({'error': res}) + '\n'
+            return
+
+        for row in load_job_log_steps(res['rows']):
+            yield json.dumps(row, cls=DataTypeJSONEncoder) + '\n'
+
+        if len(res['rows']) < limit:
+            return
+        cursor_start, cursor_id = \
+            res['rows'][-1]['cursor'].rsplit(',', 1)
+        cursor_id = int(cursor_id)
+
+
 @blueprint.route('/job_log/<int:sid>/<int:jobid>', methods=['GET'], endpoint='job_log')
 @pga_login_required
 @check_precondition
 def job_log(sid=None, jobid=None):
     """
-    This function returns the log for a specific pgAgent job
+    This function returns a page of the log of a pgAgent job, newest run
+    first.
+
+    The request arguments are:
+    - limit: number of runs of the page, PGAGENT_JOB_LOG_PAGE_SIZE by
+      default and PGAGENT_JOB_LOG_MAX_PAGE_SIZE at most.
+    - cursor: the next_cursor of the previous page.
+    - steps: 1 to include the steps of every run.
+    - output: 1 to include the output of the steps.
+    - format: ndjson to stream every run from the cursor on as newline
+      delimited JSON, for exports.
     :param sid: server id
     :param jobid: job id
     :return: Response
     """
     try:
-        if jobid is None:
-            return make_json_response(
-                success=0,
-                errormsg=gettext("Job ID not specified"),
-                status=400
-            )
+        limit = int(request.args.get('limit', PGAGENT_JOB_LOG_PAGE_SIZE))
+        cursor_start, cursor_id = get_job_log_cursor()
+    except ValueError:
+        return make_json_response(
+            success=0,
+            errormsg=gettext("Invalid limit or cursor."),
+            status=400
+        )
+    limit = max(1, min(limit, PGAGENT_JOB_LOG_MAX_PAGE_SIZE))
 
-        # Check if pgAgent extension is available
-        status, res = g.conn.execute_scalar(
-            "SELECT COUNT(*) FROM pg_catalog.pg_namespace WHERE nspname = 'pgagent'"
+    status, info = get_pgagent_info()
+    if not status:
+        return internal_server_error(errormsg=info)
+
+    if not info['installed']:
+        return make_json_response(
+            success=0,
+            errormsg=gettext("pgAgent extension not found. Please make sure "
+                             "it is installed."),
+            status=404
         )
-        
-        if not status or int(res) == 0:
-            return make_json_response(
-                success=0,
-                errormsg=gettext("pgAgent extension not found. Please make sure it is installed."),
-                status=404
-            )
-        
-        # Check if the job exists
-        status, job_exists = g.conn.execute_scalar(
-            "SELECT COUNT(*) FROM pgagent.pga_job WHERE jobid = %s",
-            (jobid,)
+
+    # Check if the job exists
+    status, job_exists = g.conn.execute_scalar(
+        "SELECT COUNT(*) FROM pgagent.pga_job WHERE jobid = %s",
+        (jobid,)
+    )
+    if not status:
+        return internal_server_error(errormsg=job_exists)
+
+    if int(job_exists) == 0:
+        return make_json_response(
+            success=0,
+            errormsg=gettext("Job with ID {} not found").format(jobid),
+            status=404
         )
-        
-        if not status or int(job_exists) == 0:
-            return make_json_response(
-                success=0,
-                errormsg=gettext("Job with ID {} not found".format(jobid)),
-                status=404
-            )
-            
-        # Get job log details
-        status, job_log = g.conn.execute_dict(
-            """
-            SELECT 
-                j.jobname, 
-                jl.jlgid, 
-                jl.jlgjobid,
-                CASE 
-                    WHEN jl.jlgstatus = 'r' THEN 'Running'
-                    WHEN jl.jlgstatus = 's' THEN 'Success'
-                    WHEN jl.jlgstatus = 'f' THEN 'Failed'
-                    WHEN jl.jlgstatus = 'i' THEN 'Internal Error'
-                    WHEN jl.jlgstatus = 'd' THEN 'Aborted'
-                    ELSE jl.jlgstatus
-                END AS status,
-                jl.jlgstart,
-                jl.jlgduration,
-                array_agg(
-                    json_build_object(
-                        'step_id', js.jstid,
-                        'step_name', js.jstname,
-                        'step_desc', js.jstdesc,
-                        'status', CASE 
-                                    WHEN jsl.jslstatus = 'r' THEN 'Running'
-                                    WHEN jsl.jslstatus = 's' THEN 'Success'
-                                    WHEN jsl.jslstatus = 'f' THEN 'Failed'
-                                    WHEN jsl.jslstatus = 'i' THEN 'Internal Error'
-                                    WHEN jsl.jslstatus = 'd' THEN 'Aborted'
-                                    ELSE jsl.jslstatus
-                                 END,
-                        'start_time', jsl.jslstart,
-                        'duration', jsl.jslduration,
-                        'output', jsl.jslresult
-                    )
-                ) AS steps
-            FROM 
-                pgagent.pga_job j
-            JOIN 
-                pgagent.pga_joblog jl ON j.jobid = jl.jlgjobid
-            LEFT JOIN 
-                pgagent.pga_jobsteplog jsl ON jl.jlgid = jsl.jsljlgid
-            LEFT JOIN 
-                pgagent.pga_jobstep js ON jsl.jsljstid = js.jstid
-            WHERE 
-                j.jobid = %s
-            GROUP BY 
-                j.jobname, jl.jlgid, jl.jlgjobid, jl.jlgstatus, jl.jlgstart, jl.jlgduration
-            ORDER BY 
-                jl.jlgstart DESC
-            LIMIT 10
-            """,
-            (jobid,)
+
+    if request.args.get('format') == 'ndjson':
+        return Response(
+            stream_with_context(
+                stream_job_log(jobid, cursor_start, cursor_id)
+            ),
+            mimetype='application/x-ndjson'
         )
-        
-        if not status:
-            return make_json_response(
-                success=0,
-                errormsg=gettext("Error retrieving job log: {}".format(job_log)),
-                status=500
-            )
-            
+
+    status, job_log = g.conn.execute_dict(
+        render_job_log_sql(jobid, limit, cursor_start, cursor_id)
+    )
+    if not status:
+        return internal_server_error(
+            errormsg=gettext("Error retrieving job log: {}").format(job_log)
+        )
+
+    load_job_log_steps(job_log['rows'])
+    # There may be more runs when the page is full
+    job_log['next_cursor'] = job_log['rows'][-1]['cursor'] \
+        if len(job_log['rows']) == limit else None
+
+    return make_json_response(
+        success=1,
+        data=job_log
+    )
+
+
+@blueprint.route('/job_load/<int:sid>', methods=['GET'], endpoint='job_load')
+@pga_login_required
+@check_precondition
+def job_load(sid=None):
+    """
+    This function returns the number of pgAgent job runs in every minute or
+    hour of the next hours, with the busiest ones and their jobs, to spot
+    the jobs that start at the same time.
+
+    The request arguments are:
+    - hours: the horizon, PGAGENT_JOB_LOAD_HOURS by default and
+      PGAGENT_JOB_LOAD_MAX_HOURS at most.
+    - bucket: minute or hour, the default.
+    :param sid: server id
+    :return: Response
+    """
+    bucket = request.args.get('bucket', 'hour')
+    try:
+        hours = int(request.args.get('hours', PGAGENT_JOB_LOAD_HOURS))
+    except ValueError:
+        hours = 0
+
+    if bucket not in JOB_LOAD_BUCKETS or \
+            not 0 < hours <= PGAGENT_JOB_LOAD_MAX_HOURS:
         return make_json_response(
-            success=1,
-            data=job_log
+            success=0,
+            errormsg=gettext("Invalid hours or bucket."),
+            status=400
         )
-        
-    except Exception as e:
-        import traceback
-        error_traceback = traceback.format_exc()
+
+    status, info = get_pgagent_info()
+    if not status:
+        return internal_server_error(errormsg=info)
+
+    if not info['installed']:
+        return make_json_response(
+            success=0,
+            errormsg=gettext("pgAgent extension not found. Please make sure "
+                             "it is installed."),
+            status=404
+        )
+
+    status, res = schedule_load(g.conn, sid, hours, bucket)
+    if not status:
+        return internal_server_error(errormsg=res)
+
+    return ajax_response(
+        response=res,
+        status=200
+    )
+
+
+def check_log_retention():
+    """
+    Returns an error response unless the pgAgent schema of the server has
+    the log retention, or None.
+    """
+    status, info = get_pgagent_info()
+    if status and info['installed'] and not info['has_log_retention']:
+        # The extension may have been updated since it was detected
+        status, info = get_pgagent_info(refresh=True)
+    if not status:
+        return internal_server_error(errormsg=info)
+
+    if not info['installed'] or not info['has_log_retention']:
+        return make_json_response(
+            success=0,
+            errormsg=gettext("pgAgent log retention not found. Please make "
+                             "sure the pgagent extension is updated to 4.11 "
+                             "or later."),
+            status=404
+        )
+    return None
+
+
+def validate_log_retention(policies):
+    """
+    Returns the retention policies of the job logs sent by the client, the
+    global one having no job class.
+    Raises ValueError if they are malformed.
+    """
+    if not isinstance(policies, list):
+        raise ValueError(gettext("The policies must be a list."))
+
+    res = []
+    for policy in policies:
+        if not isinstance(policy, dict):
+            raise ValueError(gettext("Every policy must be an object."))
+
+        jclid = policy.get('jclid')
+        keep_days = policy.get('keep_days')
+        detach = policy.get('detach', False)
+        if jclid is not None and \
+                (not isinstance(jclid, int) or isinstance(jclid, bool)):
+            raise ValueError(gettext("Invalid job class id."))
+        if not isinstance(keep_days, int) or isinstance(keep_days, bool) or \
+                keep_days < 1:
+            raise ValueError(gettext(
+                "The number of days to keep must be a positive integer."))
+        if not isinstance(detach, bool):
+            raise ValueError(gettext("Detach must be a boolean."))
+        if any(p['jclid'] == jclid for p in res):
+            raise ValueError(gettext("Duplicate policy for a job class."))
+
+        res.append({'jclid': jclid, 'keep_days': keep_days, 'detach': detach})
+    return res
+
+
+@blueprint.route('/log_retention/<int:sid>', methods=['GET'],
+                 endpoint='log_retention')
+@pga_login_required
+@check_precondition
+def log_retention(sid=None):
+    """
+    This function returns the retention of the pgAgent job logs, globally
+    and per job class, with the size of every partition of the logs.
+    :param sid: server id
+    :return: Response
+    """
+    error = check_log_retention()
+    if error is not None:
+        return error
+
+    status, res = g.conn.execute_dict(
+        render_template("/".join([g.template_path, 'log_retention.sql']))
+    )
+    if not status:
+        return internal_server_error(errormsg=res)
+
+    row = res['rows'][0]
+    for key in ('policies', 'classes', 'partitions'):
+        if isinstance(row[key], str):
+            row[key] = json.loads(row[key])
+
+    return ajax_response(
+        response=row,
+        status=200
+    )
+
+
+@blueprint.route('/log_retention/<int:sid>', methods=['PUT'],
+                 endpoint='update_log_retention')
+@pga_login_required
+@check_precondition
+def update_log_retention(sid=None):
+    """
+    This function replaces the retention of the pgAgent job logs with the
+    'policies' of the request, every policy having a 'jclid' (null for the
+    global one), the 'keep_days' and whether to 'detach' the expired
+    partitions instead of dropping them.
+    :param sid: server id
+    :return: Response
+    """
+    try:
+        data = json.loads(request.data or '{}')
+        policies = validate_log_retention(
+            data.get('policies') if isinstance(data, dict) else None)
+    except ValueError as e:
         return make_json_response(
             success=0,
             errormsg=str(e),
-            info=error_traceback,
-            status=500
+            status=400
+        )
+
+    error = check_log_retention()
+    if error is not None:
+        return error
+
+    status, res = g.conn.execute_void(
+        render_template(
+            "/".join([g.template_path, 'update_log_retention.sql']),
+            policies=json.dumps(policies),
+            conn=g.conn
         )
+    )
+    if not status:
+        return internal_server_error(errormsg=res)
+
+    return make_json_response(
+        success=1,
+        info=gettext("Log retention updated"),
+        data={'policies': policies}
+    )
+
+
+@blueprint.route('/log_maintenance/<int:sid>', methods=['POST'],
+                 endpoint='log_maintenance')
+@pga_login_required
+@check_precondition
+def log_maintenance(sid=None):
+    """
+    This function applies the retention of the pgAgent job logs now,
+    returning the partitions created, dropped or detached and the runs
+    deleted.
+    :param sid: server id
+    :return: Response
+    """
+    error = check_log_retention()
+    if error is not None:
+        return error
+
+    status, res = g.conn.execute_dict(
+        render_template("/".join([g.template_path, 'log_maintenance.sql']))
+    )
+    if not status:
+        return internal_server_error(errormsg=res)
+
+    return make_json_response(
+        success=1,
+        data=res['rows']
+    )
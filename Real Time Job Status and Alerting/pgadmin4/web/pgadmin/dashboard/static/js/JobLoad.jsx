@@ -0,0 +1,201 @@
+/////////////////////////////////////////////////////////////
+//
+// pgAdmin 4 - PostgreSQL Tools
+//
+// Copyright (C) 2013 - 2025, The pgAdmin Development Team
+// This software is released under the PostgreSQL Licence
+//
+//////////////////////////////////////////////////////////////
+import React, { useState, useEffect, useMemo } from 'react';
+import PropTypes from 'prop-types';
+import {
+  Box,
+  Chip,
+  LinearProgress,
+  Paper,
+  ToggleButton,
+  ToggleButtonGroup,
+  Tooltip,
+  Typography,
+  useTheme
+} from '@mui/material';
+import { alpha } from '@mui/material/styles';
+import moment from 'moment';
+import getApiInstance from 'sources/api_instance';
+import url_for from 'sources/url_for';
+import gettext from 'sources/gettext';
+import EmptyPanelMessage from '../../../static/js/components/EmptyPanelMessage';
+
+const HORIZONS = [
+  { value: 24, label: gettext('Day') },
+  { value: 168, label: gettext('Week') }
+];
+
+const BUCKETS = [
+  { value: 'hour', label: gettext('Hour'), minutes: 60, perRow: 24 },
+  { value: 'minute', label: gettext('Minute'), minutes: 1, perRow: 60 }
+];
+
+// The job load histogram as a heatmap, a row per day of hourly buckets or
+// per hour of minute buckets, the darker cells having more job runs.
+const LoadHeatmap = ({ load }) => {
+  const theme = useTheme();
+  const bucket = BUCKETS.find((b) => b.value === load.bucket);
+  const max = Math.max(1, ...load.counts);
+  const start = moment(load.start);
+
+  const rows = [];
+  for (let idx = 0; idx < load.counts.length; idx += bucket.perRow) {
+    rows.push(idx);
+  }
+
+  return (
+    <Box sx={{ overflowX: 'auto' }}>
+      <Box sx={{ display: 'flex', ml: '110px', mb: 0.5 }}>
+        {Array.from({ length: bucket.perRow }, (_, col) => (
+          <Typography
+            key={col}
+            variant="caption"
+            color="text.secondary"
+            sx={{ width: bucket.perRow === 24 ? 28 : 12, flexShrink: 0, textAlign: 'center' }}
+          >
+            {col % (bucket.perRow === 24 ? 1 : 5) === 0 ? col : ''}
+          </Typography>
+        ))}
+      </Box>
+      {rows.map((rowStart) => (
+        <Box key={rowStart} sx={{ display: 'flex', alignItems: 'center' }}>
+          <Typography variant="caption" color="text.secondary" sx={{ width: 110, flexShrink: 0 }}>
+            {start.clone().add(rowStart * bucket.minutes, 'minutes')
+              .format(bucket.value === 'hour' ? 'ddd MMM D' : 'ddd HH:00')}
+          </Typography>
+          {load.counts.slice(rowStart, rowStart + bucket.perRow).map((count, col) => {
+            const time = start.clone().add((rowStart + col) * bucket.minutes, 'minutes');
+            return (
+              <Tooltip
+                key={col}
+                title={`${time.format('YYYY-MM-DD HH:mm')}: ${count} ${gettext('runs')}`}
+              >
+                <Box
+                  sx={{
+                    width: bucket.perRow === 24 ? 26 : 10,
+                    height: bucket.perRow === 24 ? 20 : 10,
+                    m: '1px',
+                    flexShrink: 0,
+                    borderRadius: '2px',
+                    backgroundColor: count ?
+                      alpha(theme.palette.primary.main, 0.15 + 0.85 * count / max) :
+                      theme.palette.action.hover
+                  }}
+                />
+              </Tooltip>
+            );
+          })}
+        </Box>
+      ))}
+    </Box>
+  );
+};
+
+LoadHeatmap.propTypes = {
+  load: PropTypes.object.isRequired
+};
+
+export default function JobLoad({ sid, pageVisible = true }) {
+  const [hours, setHours] = useState(24);
+  const [bucket, setBucket] = useState('hour');
+  const [load, setLoad] = useState(null);
+  const [loading, setLoading] = useState(false);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    if (!sid || !pageVisible) return;
+
+    setLoading(true);
+    getApiInstance().get(url_for('dashboard.job_load', {'sid': sid}), {
+      params: {hours: hours, bucket: bucket}
+    })
+      .then((res) => {
+        setLoad(res.data);
+        setError(null);
+      })
+      .catch((err) => {
+        setError(err.response?.data?.errormsg || gettext('Error fetching the job load'));
+      })
+      .finally(() => setLoading(false));
+  }, [sid, pageVisible, hours, bucket]);
+
+  const total = useMemo(() => (
+    load ? load.counts.reduce((sum, count) => sum + count, 0) : 0
+  ), [load]);
+
+  return (
+    <Box>
+      <Box sx={{ display: 'flex', alignItems: 'center', gap: 2, mb: 2 }}>
+        <ToggleButtonGroup
+          size="small"
+          exclusive
+          value={hours}
+          onChange={(e, value) => value && setHours(value)}
+        >
+          {HORIZONS.map((h) => (
+            <ToggleButton key={h.value} value={h.value}>{h.label}</ToggleButton>
+          ))}
+        </ToggleButtonGroup>
+        <ToggleButtonGroup
+          size="small"
+          exclusive
+          value={bucket}
+          onChange={(e, value) => value && setBucket(value)}
+        >
+          {BUCKETS.map((b) => (
+            <ToggleButton key={b.value} value={b.value}>{b.label}</ToggleButton>
+          ))}
+        </ToggleButtonGroup>
+        {load && (
+          <Typography variant="body2" color="text.secondary">
+            {gettext('%s runs, times in %s', total, load.timezone)}
+          </Typography>
+        )}
+      </Box>
+
+      {loading && <LinearProgress sx={{ mb: 1 }} />}
+      {error ? (
+        <Typography color="error">{error}</Typography>
+      ) : load && total === 0 ? (
+        <Box sx={{ textAlign: 'center', padding: 4 }}>
+          <EmptyPanelMessage text={gettext('No job runs scheduled in this period')} />
+        </Box>
+      ) : load && (
+        <>
+          <Paper variant="outlined" sx={{ p: 2, mb: 2 }}>
+            <LoadHeatmap load={load} />
+          </Paper>
+          <Paper variant="outlined" sx={{ p: 2 }}>
+            <Typography variant="subtitle2" sx={{ mb: 1 }}>
+              {gettext('Busiest times')}
+            </Typography>
+            {load.peaks.map((peak) => (
+              <Box key={peak.time} sx={{ display: 'flex', alignItems: 'center', flexWrap: 'wrap', gap: 1, mb: 1 }}>
+                <Typography variant="body2" sx={{ width: 160 }}>
+                  {moment(peak.time).format(bucket === 'hour' ? 'ddd YYYY-MM-DD HH:00' : 'ddd YYYY-MM-DD HH:mm')}
+                </Typography>
+                <Typography variant="body2" sx={{ width: 80 }}>
+                  {gettext('%s runs', peak.runs)}
+                </Typography>
+                {peak.jobs.map((job) => (
+                  <Chip key={job.jobid} size="small" label={job.jobname} />
+                ))}
+              </Box>
+            ))}
+          </Paper>
+        </>
+      )}
+    </Box>
+  );
+}
+
+JobLoad.propTypes = {
+  sid: PropTypes.oneOfType([PropTypes.string, PropTypes.number]),
+  pageVisible: PropTypes.bool
+};
@@ -0,0 +1,233 @@
+/////////////////////////////////////////////////////////////
+//
+// pgAdmin 4 - PostgreSQL Tools
+//
+// Copyright (C) 2013 - 2025, The pgAdmin Development Team
+// This software is released under the PostgreSQL Licence
+//
+//////////////////////////////////////////////////////////////
+import React, { useState, useEffect, useCallback } from 'react';
+import PropTypes from 'prop-types';
+import {
+  Box,
+  Button,
+  Checkbox,
+  Chip,
+  FormControlLabel,
+  LinearProgress,
+  Paper,
+  Table,
+  TableBody,
+  TableCell,
+  TableHead,
+  TableRow,
+  TextField,
+  Typography
+} from '@mui/material';
+import getApiInstance from 'sources/api_instance';
+import url_for from 'sources/url_for';
+import gettext from 'sources/gettext';
+import pgAdmin from 'sources/pgadmin';
+import { toPrettySize } from '../../../static/js/utils';
+
+// The policies as edited, a number of days per job class, the global one
+// having no job class, and an empty number of days for no policy.
+const toForm = (data) => {
+  const days = {};
+  let detach = false;
+  data.policies.forEach((policy) => {
+    days[policy.jclid ?? 'global'] = String(policy.keep_days);
+    if (policy.jclid === null) {
+      detach = policy.detach;
+    }
+  });
+  return { days, detach };
+};
+
+const toPolicies = (form) => (
+  Object.entries(form.days)
+    .filter(([, days]) => days !== '')
+    .map(([jclid, days]) => ({
+      jclid: jclid === 'global' ? null : parseInt(jclid),
+      keep_days: parseInt(days),
+      detach: jclid === 'global' ? form.detach : false
+    }))
+);
+
+export default function JobLogRetention({ sid, pageVisible = true }) {
+  const [retention, setRetention] = useState(null);
+  const [form, setForm] = useState({ days: {}, detach: false });
+  const [loading, setLoading] = useState(false);
+  const [error, setError] = useState(null);
+  const [results, setResults] = useState(null);
+
+  const api = getApiInstance();
+
+  const fetchRetention = useCallback(() => {
+    if (!sid || !pageVisible) return;
+
+    setLoading(true);
+    api.get(url_for('dashboard.log_retention', {'sid': sid}))
+      .then((res) => {
+        setRetention(res.data);
+        setForm(toForm(res.data));
+        setError(null);
+      })
+      .catch((err) => {
+        setError(err.response?.data?.errormsg || gettext('Error fetching the log retention'));
+      })
+      .finally(() => setLoading(false));
+  }, [sid, pageVisible]);
+
+  useEffect(() => {
+    fetchRetention();
+  }, [fetchRetention]);
+
+  const handleDaysChange = (key, value) => {
+    if (value === '' || /^[0-9]+$/.test(value)) {
+      setForm((prev) => ({ ...prev, days: { ...prev.days, [key]: value } }));
+    }
+  };
+
+  const handleSave = () => {
+    api.put(url_for('dashboard.update_log_retention', {'sid': sid}), {
+      policies: toPolicies(form)
+    })
+      .then(() => {
+        pgAdmin.Browser.notifier.success(gettext('Log retention updated'));
+        fetchRetention();
+      })
+      .catch((err) => {
+        pgAdmin.Browser.notifier.error(
+          err.response?.data?.errormsg || gettext('Error updating the log retention')
+        );
+      });
+  };
+
+  const handleApply = () => {
+    api.post(url_for('dashboard.log_maintenance', {'sid': sid}))
+      .then((res) => {
+        setResults(res.data.data);
+        fetchRetention();
+      })
+      .catch((err) => {
+        pgAdmin.Browser.notifier.error(
+          err.response?.data?.errormsg || gettext('Error applying the log retention')
+        );
+      });
+  };
+
+  if (error) {
+    return <Typography color="error">{error}</Typography>;
+  }
+
+  if (!retention) {
+    return loading ? <LinearProgress /> : null;
+  }
+
+  const classNames = Object.fromEntries(
+    retention.classes.map((jobClass) => [jobClass.jclid, jobClass.jclname])
+  );
+
+  return (
+    <Box>
+      {loading && <LinearProgress sx={{ mb: 1 }} />}
+      <Paper variant="outlined" sx={{ p: 2, mb: 2 }}>
+        <Box sx={{ display: 'flex', alignItems: 'center', gap: 1, mb: 2 }}>
+          <Typography variant="subtitle2">{gettext('Retention')}</Typography>
+          <Chip
+            size="small"
+            color={retention.partitioned ? 'primary' : 'default'}
+            label={retention.partitioned ? gettext('Partitioned by month') : gettext('Not partitioned')}
+          />
+        </Box>
+        <Box sx={{ display: 'flex', alignItems: 'center', gap: 2, mb: 2 }}>
+          <TextField
+            size="small"
+            label={gettext('Days to keep, all jobs')}
+            value={form.days.global ?? ''}
+            onChange={(e) => handleDaysChange('global', e.target.value)}
+          />
+          <FormControlLabel
+            control={
+              <Checkbox
+                checked={form.detach}
+                disabled={!retention.partitioned}
+                onChange={(e) => setForm((prev) => ({ ...prev, detach: e.target.checked }))}
+              />
+            }
+            label={gettext('Detach the expired partitions instead of dropping them')}
+          />
+        </Box>
+        <Box sx={{ display: 'flex', flexWrap: 'wrap', gap: 2, mb: 2 }}>
+          {retention.classes.map((jobClass) => (
+            <TextField
+              key={jobClass.jclid}
+              size="small"
+              label={gettext('Days to keep, %s', jobClass.jclname)}
+              placeholder={gettext('All jobs')}
+              value={form.days[jobClass.jclid] ?? ''}
+              onChange={(e) => handleDaysChange(jobClass.jclid, e.target.value)}
+            />
+          ))}
+        </Box>
+        <Box sx={{ display: 'flex', gap: 1 }}>
+          <Button variant="contained" size="small" onClick={handleSave}>
+            {gettext('Save')}
+          </Button>
+          <Button variant="outlined" size="small" onClick={handleApply}>
+            {gettext('Apply now')}
+          </Button>
+        </Box>
+        {results && (
+          <Box sx={{ mt: 2 }}>
+            {results.length === 0 ? (
+              <Typography variant="body2" color="text.secondary">
+                {gettext('Nothing to purge')}
+              </Typography>
+            ) : results.map((result) => (
+              <Typography key={`${result.action}-${result.relation}-${result.jclid}`} variant="body2">
+                {result.action === 'delete' ?
+                  gettext('Deleted %s runs of %s', result.rows, classNames[result.jclid]) :
+                  `${result.action} ${result.relation}`}
+              </Typography>
+            ))}
+          </Box>
+        )}
+      </Paper>
+
+      <Paper variant="outlined" sx={{ p: 2 }}>
+        <Typography variant="subtitle2" sx={{ mb: 1 }}>
+          {retention.partitioned ? gettext('Partitions') : gettext('Tables')}
+        </Typography>
+        <Table size="small">
+          <TableHead>
+            <TableRow>
+              <TableCell>{gettext('Table')}</TableCell>
+              <TableCell>{gettext('Partition')}</TableCell>
+              <TableCell>{gettext('Month')}</TableCell>
+              <TableCell align="right">{gettext('Rows (estimated)')}</TableCell>
+              <TableCell align="right">{gettext('Size')}</TableCell>
+            </TableRow>
+          </TableHead>
+          <TableBody>
+            {retention.partitions.map((partition) => (
+              <TableRow key={partition.partition}>
+                <TableCell>{partition.table}</TableCell>
+                <TableCell>{partition.partition}</TableCell>
+                <TableCell>{partition.month ?? ''}</TableCell>
+                <TableCell align="right">{partition.rows}</TableCell>
+                <TableCell align="right">{toPrettySize(partition.size)}</TableCell>
+              </TableRow>
+            ))}
+          </TableBody>
+        </Table>
+      </Paper>
+    </Box>
+  );
+}
+
+JobLogRetention.propTypes = {
+  sid: PropTypes.oneOfType([PropTypes.string, PropTypes.number]),
+  pageVisible: PropTypes.bool
+};
@@ -70,6 +70,8 @@ import CalendarTodayIcon from '@mui/icons-material/CalendarToday';
 import ArticleIcon from '@mui/icons-material/Article';
 import CloseIcon from '@mui/icons-material/Close';
 import SectionContainer from './components/SectionContainer';
+import JobLoad from './JobLoad';
+import JobLogRetention from './JobLogRetention';
 import getApiInstance from 'sources/api_instance';
 import url_for from 'sources/url_for';
 import { useInterval } from 'sources/custom_hooks';
@@ -718,6 +720,7 @@ export default function JobMonitor({sid, node, preferences, treeNodeInfo, nodeDa
   const [selectedJob, setSelectedJob] = useState(null);
   const [jobLog, setJobLog] = useState(null);
   const [loadingLog, setLoadingLog] = useState(false);
+  const [loadingMoreLog, setLoadingMoreLog] = useState(false);
   const [dateRange, setDateRange] = useState({
     startDate: moment().subtract(30, 'days').toDate(),
     endDate: moment().toDate(),
@@ -725,6 +728,9 @@ export default function JobMonitor({sid, node, preferences, treeNodeInfo, nodeDa
   const [dateRangeDialogOpen, setDateRangeDialogOpen] = useState(false);
   const [timeFilterAnchorEl, setTimeFilterAnchorEl] = useState(null);
   const timeFilterOpen = Boolean(timeFilterAnchorEl);
+  // Only filters the analytics charts. The monitor keeps receiving the
+  // notifications of all the jobs of the server, the shared socket also
+  // updates the Jobs table, the summary and the browser tree.
   const [selectedJobFilter, setSelectedJobFilter] = useState('all');
   const [jobFilterAnchorEl, setJobFilterAnchorEl] = useState(null);
   const jobFilterOpen = Boolean(jobFilterAnchorEl);
@@ -732,7 +738,15 @@ export default function JobMonitor({sid, node, preferences, treeNodeInfo, nodeDa
   const theme = useTheme();
   const [socket, setSocket] = useState(null);
   const [socketConnected, setSocketConnected] = useState(false);
-  
+  // Latest job log id seen, used to fetch only the jobs changed since then
+  const jobCursorRef = useRef(null);
+
+  useEffect(() => {
+    if (jobData?.cursor !== undefined) {
+      jobCursorRef.current = jobData.cursor;
+    }
+  }, [jobData]);
+
   // Initialize Chart.js
   useEffect(() => {
     ChartJS.register(
@@ -865,6 +879,7 @@ export default function JobMonitor({sid, node, preferences, treeNodeInfo, nodeDa
         
         // Convert duration from seconds to minutes for better visualization
         const averageDuration = entry.avg_duration ? parseFloat(entry.avg_duration) / 60 : 0;
+        const p95Duration = entry.p95_duration ? parseFloat(entry.p95_duration) / 60 : 0;
         
         return {
           ...entry,
@@ -872,6 +887,7 @@ export default function JobMonitor({sid, node, preferences, treeNodeInfo, nodeDa
           successRate,
           failureRate,
           averageDuration,
+          p95Duration,
           total_runs: totalRuns,
           successful_runs: successfulRuns,
           failed_runs: failedRuns
@@ -1289,6 +1305,16 @@ export default function JobMonitor({sid, node, preferences, treeNodeInfo, nodeDa
                       borderWidth: 2,
                       pointRadius: 4,
                       pointHoverRadius: 6
+                  },
+                  {
+                    label: gettext('95th Percentile Duration (minutes)'),
+                      data: processedHistoryData.map(entry => entry.p95Duration.toFixed(2)),
+                      borderColor: theme.palette.warning.main,
+                      backgroundColor: alpha(theme.palette.warning.main, 0.1),
+                      tension: 0.4,
+                      borderWidth: 2,
+                      pointRadius: 4,
+                      pointHoverRadius: 6
                   }
                 ]
               }}
@@ -1386,7 +1412,7 @@ export default function JobMonitor({sid, node, preferences, treeNodeInfo, nodeDa
     if (sid && job.jobid) {
       const url = url_for('dashboard.job_log', {'sid': sid, 'jobid': job.jobid});
       
-      api.get(url)
+      api.get(url, {params: {steps: 1, output: 1}})
         .then(res => {
           if (res.data && res.data.success) {
             const logData = res.data.data;
@@ -1423,12 +1449,88 @@ export default function JobMonitor({sid, node, preferences, treeNodeInfo, nodeDa
     }
   };
 
+  // Append the next page of the job log
+  const handleLoadMoreLog = () => {
+    if (!selectedJob || !jobLog?.next_cursor) return;
+    setLoadingMoreLog(true);
+
+    const url = url_for('dashboard.job_log', {'sid': sid, 'jobid': selectedJob.jobid});
+    api.get(url, {params: {steps: 1, output: 1, cursor: jobLog.next_cursor}})
+      .then(res => {
+        if (res.data && res.data.success) {
+          setJobLog(prev => ({
+            ...prev,
+            rows: [...(prev?.rows || []), ...res.data.data.rows],
+            next_cursor: res.data.data.next_cursor
+          }));
+        }
+      })
+      .catch(error => {
+        pgAdmin.Browser.notifier.error(
+          error.response?.data?.errormsg || gettext('Error retrieving job log')
+        );
+      })
+      .finally(() => setLoadingMoreLog(false));
+  };
+
   const handleCloseJobLog = () => {
     setJobLogDialogOpen(false);
     setSelectedJob(null);
     setJobLog(null);
   };
 
+  // Merge the changed jobs and the summary into the current job data
+  const mergeJobMonitorDelta = (delta, requestedIds) => {
+    setJobData(prev => {
+      if (!prev) return prev;
+
+      const changed = new Map(delta.jobs.map(job => [job.jobid, job]));
+      const jobs = [];
+      (prev.jobs || []).forEach(job => {
+        if (changed.has(job.jobid)) {
+          jobs.push({...job, ...changed.get(job.jobid)});
+          changed.delete(job.jobid);
+        } else if (!requestedIds.includes(job.jobid)) {
+          // Requested jobs missing from the delta have been dropped
+          jobs.push(job);
+        }
+      });
+
+      return {
+        ...prev,
+        summary: delta.summary || prev.summary,
+        jobs: [...changed.values(), ...jobs],
+        cursor: Math.max(prev.cursor ?? 0, delta.cursor ?? 0)
+      };
+    });
+  };
+
+  // Fetch only the jobs changed by a job status update
+  const fetchJobMonitorDelta = async (job_id) => {
+    const params = {};
+    const jobId = parseInt(String(job_id ?? '').split(':')[0]);
+    if (!isNaN(jobId)) {
+      params.jobid = jobId;
+    }
+    if (jobCursorRef.current !== null) {
+      params.since = jobCursorRef.current;
+    }
+    if (Object.keys(params).length === 0) {
+      fetchJobMonitorData();
+      return null;
+    }
+
+    const url = url_for('dashboard.job_monitor_delta', {'sid': sid});
+    const res = await getApiInstance().get(url, {params: params});
+    const delta = res.data?.result ?? res.data;
+
+    if (!delta || !Array.isArray(delta.jobs)) {
+      return null;
+    }
+    mergeJobMonitorDelta(delta, params.jobid !== undefined ? [params.jobid] : []);
+    return delta;
+  };
+
   // Update the socket connection setup
   useEffect(() => {
     if (!sid || !pageVisible) return;
@@ -1468,7 +1570,7 @@ export default function JobMonitor({sid, node, preferences, treeNodeInfo, nodeDa
         setSocketConnected(existingSocket.connected);
 
         // Improved job status update handler
-        const onJobStatusUpdate = async (data) => {
+        const onJobStatusUpdate = async (data, merged = false) => {
           console.log('[JobMonitor] Job status update received:', data);
           
           if (!data) return;
@@ -1480,6 +1582,25 @@ export default function JobMonitor({sid, node, preferences, treeNodeInfo, nodeDa
             custom_text,
             timestamp
           } = data;
+          // Step notifications are sent as '<jobid>:<stepid>'
+          const jobId = parseInt(String(job_id).split(':')[0]);
+
+          // Recent pgAgent versions send the job row and the summary with
+          // the notification, apply them without querying the server.
+          const applyJobStatus = async () => {
+            if (data.job) {
+              if (!merged) {
+                mergeJobMonitorDelta({
+                  jobs: [data.job],
+                  summary: data.summary,
+                  cursor: data.jlgid
+                }, []);
+              }
+              return {...data.job};
+            }
+            const delta = await fetchJobMonitorDelta(job_id);
+            return delta?.jobs.find(job => job.jobid === jobId);
+          };
 
           // Handle failed jobs
           if (status === 'f') {
@@ -1498,42 +1619,51 @@ export default function JobMonitor({sid, node, preferences, treeNodeInfo, nodeDa
             );
 
             try {
-              // Immediately fetch fresh job data
-              const url = url_for('dashboard.job_monitor', {'sid': sid});
-              const response = await getApiInstance().get(url);
-              
-              if (response.data && response.data.jobs) {
-                // Update job data with new information
-                const updatedJobData = response.data;
-                const failedJob = updatedJobData.jobs.find(job => job.jobid === job_id);
-                
-                if (failedJob) {
-                  // Enhance the job object with error details
-                  failedJob.error_details = {
-                    description: description,
-                    custom_text: custom_text,
-                    timestamp: timestamp || new Date().toISOString(),
-                    formatted_message: notificationMessage
-                  };
-                  
-                  // Update the job data state
-                  setJobData(updatedJobData);
-                  
-                  // Automatically open log dialog for the failed job
-                  handleViewLog(failedJob);
-                }
+              const failedJob = await applyJobStatus();
+
+              if (failedJob) {
+                // Enhance the job object with error details
+                failedJob.error_details = {
+                  description: description,
+                  custom_text: custom_text,
+                  timestamp: timestamp || new Date().toISOString(),
+                  formatted_message: notificationMessage
+                };
+
+                // Automatically open log dialog for the failed job
+                handleViewLog(failedJob);
               }
             } catch (error) {
               console.error('[JobMonitor] Error refreshing job data:', error);
             }
+            return;
           }
 
-          // Always refresh data for any status update
-          fetchJobMonitorData();
+          // Only refresh the jobs changed by this update
+          applyJobStatus().catch(error => {
+            console.error('[JobMonitor] Error refreshing job data:', error);
+          });
+        };
+
+        // Notifications coalesced by the server, the latest one per job.
+        // The job rows they carry are merged at once.
+        const onJobStatusBatch = (data) => {
+          const updates = data?.updates || [];
+          const rows = updates.filter(update => update.job);
+
+          if (rows.length > 0) {
+            mergeJobMonitorDelta({
+              jobs: rows.map(update => update.job),
+              summary: rows[rows.length - 1].summary,
+              cursor: Math.max(...rows.map(update => update.jlgid ?? 0))
+            }, []);
+          }
+          updates.forEach(update => onJobStatusUpdate(update, true));
         };
 
         // Set up event listeners
         existingSocket.on('job_status_update', onJobStatusUpdate);
+        existingSocket.on('job_status_batch', onJobStatusBatch);
         existingSocket.on('connect', () => {
           console.log('[JobMonitor] Socket connected');
           setSocketConnected(true);
@@ -1550,6 +1680,7 @@ export default function JobMonitor({sid, node, preferences, treeNodeInfo, nodeDa
         // Clean up
         return () => {
           existingSocket.off('job_status_update', onJobStatusUpdate);
+          existingSocket.off('job_status_batch', onJobStatusBatch);
           existingSocket.off('connect');
           existingSocket.off('disconnect');
           existingSocket.off('connect_error');
@@ -1582,53 +1713,11 @@ export default function JobMonitor({sid, node, preferences, treeNodeInfo, nodeDa
     
     api.get(url)
       .then(res => {
-        if (res.data) {
-          // Extract job data from response based on format
-          if (res.data.debug_info) {
-            if (res.data.data) {
-              if (typeof res.data.data === 'object' && !Array.isArray(res.data.data) && 
-                  (res.data.data.summary || res.data.data.jobs)) {
-                setJobData(res.data.data);
-              } else if (typeof res.data.data === 'object') {
-                const keys = Object.keys(res.data.data);
-                const isArrayLike = keys.length > 0 && keys.every(key => !isNaN(parseInt(key)));
-                
-                if (isArrayLike) {
-                  const rawResult = res.data.debug_info?.raw_result?.result;
-                  if (rawResult && typeof rawResult === 'object') {
-                    setJobData(rawResult);
-                  } else {
-                    setError(gettext('Invalid data format received from server'));
-                  }
-                } else {
-                  setJobData({
-                    summary: {
-                      total_jobs: res.data.debug_info?.job_count || 0,
-                      enabled_jobs: 0,
-                      disabled_jobs: 0,
-                      running_jobs: 0,
-                      successful_jobs: 0,
-                      failed_jobs: 0
-                    },
-                    jobs: []
-                  });
-                }
-              } else {
-                setError(gettext('Invalid response format from server'));
-              }
-            } else {
-              setError(gettext('Invalid response format from server'));
-            }
-          } else {
-            if (res.data.result) {
-              setJobData(res.data.result);
-            } else if (typeof res.data === 'object' && (res.data.summary || res.data.jobs)) {
-              setJobData(res.data);
-            } else {
-              setError(gettext('Invalid data format received from server'));
-            }
-          }
+        if (res.data && (res.data.summary || res.data.jobs)) {
+          setJobData(res.data);
           setError(null);
+        } else if (res.data) {
+          setError(gettext('Invalid data format received from server'));
         } else {
           setError(gettext('No data returned from server'));
         }
@@ -1713,10 +1802,15 @@ export default function JobMonitor({sid, node, preferences, treeNodeInfo, nodeDa
             >
               <Tab label={gettext('Jobs')} />
               <Tab label={gettext('Analytics')} />
+              <Tab label={gettext('Load')} />
+              <Tab label={gettext('Retention')} />
             </Tabs>
             
             <Box sx={{ mt: 2 }}>
-              {tabValue === 0 ? renderJobTabs() : renderCharts()}
+              {tabValue === 0 && renderJobTabs()}
+              {tabValue === 1 && renderCharts()}
+              {tabValue === 2 && <JobLoad sid={sid} pageVisible={pageVisible} />}
+              {tabValue === 3 && <JobLogRetention sid={sid} pageVisible={pageVisible} />}
             </Box>
           </Box>
         </ScrollableContainer>
@@ -1963,6 +2057,11 @@ export default function JobMonitor({sid, node, preferences, treeNodeInfo, nodeDa
           )}
         </DialogContent>
         <DialogActions sx={{ borderTop: `1px solid ${theme.palette.divider}`, p: 1.5 }}>
+          {jobLog?.next_cursor && (
+            <Button onClick={handleLoadMoreLog} variant="outlined" disabled={loadingMoreLog}>
+              {gettext('Load more')}
+            </Button>
+          )}
           <Button onClick={handleCloseJobLog} variant="outlined">{gettext('Close')}</Button>
         </DialogActions>
       </Dialog>
@@ -0,0 +1,66 @@
+/*pga4dash*/
+-- Get a page of the runs of a job, newest first. The cursor is the
+-- (jlgstart, jlgid) of the last run of the previous page, read with the
+-- pga_joblog(jlgjobid, jlgstart DESC, jlgid DESC) index.
+SELECT
+    j.jobname,
+    jl.jlgid,
+    jl.jlgjobid,
+    CASE
+        WHEN jl.jlgstatus = 'r' THEN 'Running'
+        WHEN jl.jlgstatus = 's' THEN 'Success'
+        WHEN jl.jlgstatus = 'f' THEN 'Failed'
+        WHEN jl.jlgstatus = 'i' THEN 'Internal Error'
+        WHEN jl.jlgstatus = 'd' THEN 'Aborted'
+        ELSE jl.jlgstatus
+    END AS status,
+    jl.jlgstart,
+    jl.jlgduration,
+{% if steps %}
+    COALESCE(st.steps, '[]'::json) AS steps,
+{% endif %}
+    jl.jlgstart::text || ',' || jl.jlgid AS cursor
+FROM
+    pgagent.pga_joblog jl
+JOIN
+    pgagent.pga_job j ON j.jobid = jl.jlgjobid
+{% if steps %}
+LEFT JOIN LATERAL (
+    SELECT
+        json_agg(
+            json_build_object(
+                'step_id', js.jstid,
+                'step_name', js.jstname,
+                'step_desc', js.jstdesc,
+                'status', CASE
+                            WHEN jsl.jslstatus = 'r' THEN 'Running'
+                            WHEN jsl.jslstatus = 's' THEN 'Success'
+                            WHEN jsl.jslstatus = 'f' THEN 'Failed'
+                            WHEN jsl.jslstatus = 'i' THEN 'Internal Error'
+                            WHEN jsl.jslstatus = 'd' THEN 'Aborted'
+                            ELSE jsl.jslstatus
+                          END,
+                'start_time', jsl.jslstart,
+                'duration', jsl.jslduration,
+                'result', jsl.jslresult{% if output %},
+                'output', jsl.jsloutput{% endif %}
+
+            ) ORDER BY jsl.jslstart
+        ) AS steps
+    FROM
+        pgagent.pga_jobsteplog jsl
+    JOIN
+        pgagent.pga_jobstep js ON js.jstid = jsl.jsljstid
+    WHERE
+        jsl.jsljlgid = jl.jlgid
+) st ON true
+{% endif %}
+WHERE
+    jl.jlgjobid = {{ jobid }}
+{% if cursor_start is not none %}
+    AND (jl.jlgstart, jl.jlgid) <
+        ({{ cursor_start|qtLiteral(conn) }}::timestamptz, {{ cursor_id }})
+{% endif %}
+ORDER BY
+    jl.jlgstart DESC, jl.jlgid DESC
+LIMIT {{ limit }};
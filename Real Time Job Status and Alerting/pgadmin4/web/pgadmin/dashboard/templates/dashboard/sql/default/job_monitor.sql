@@ -1,154 +1,126 @@
 /*pga4dash*/
--- Get job summary statistics
-WITH job_stats AS (
+-- Get the latest run of every job, with its current step and the number of
+-- finished steps. pga_job_state is kept current by the pga_joblog and
+-- pga_jobsteplog triggers. Older schemas use bounded index scans on
+-- pga_joblog(jlgjobid, jlgid DESC) and pga_jobsteplog(jsljlgid, jslstart DESC).
+WITH latest_runs AS (
     SELECT
-        COUNT(*) AS total_jobs,
-        SUM(CASE WHEN jobenabled THEN 1 ELSE 0 END) AS enabled_jobs,
-        SUM(CASE WHEN NOT jobenabled THEN 1 ELSE 0 END) AS disabled_jobs
-    FROM 
-        pgagent.pga_job
-),
--- Get job status counts
-job_status_stats AS (
-    SELECT
-        SUM(CASE WHEN jlgstatus = 'r' THEN 1 ELSE 0 END) AS running_jobs,
-        SUM(CASE WHEN jlgstatus = 's' THEN 1 ELSE 0 END) AS successful_jobs,
-        SUM(CASE WHEN jlgstatus = 'f' THEN 1 ELSE 0 END) AS failed_jobs
-    FROM 
-        pgagent.pga_joblog
-    WHERE 
-        jlgid IN (
-            SELECT MAX(jlgid) 
-            FROM pgagent.pga_joblog 
-            GROUP BY jlgjobid
-        )
-),
--- Get job steps for each job
-job_steps AS (
-    SELECT 
-        jstjobid,
-        COUNT(*) AS total_steps
-    FROM 
-        pgagent.pga_jobstep
-    GROUP BY 
-        jstjobid
-),
--- Get latest step log for each job
-latest_step_logs AS (
-    SELECT DISTINCT ON (jl.jlgjobid)
-        jl.jlgjobid AS job_id,
-        js.jstname AS step_name,
-        sl.jslstatus,
-        sl.jslresult,
-        sl.jslstart,
-        sl.jslduration,
-        js.jscnextrun
+        j.jobid, j.jobname, j.jobdesc, j.jobenabled, j.jobnextrun,
+{% if pgagent.has_job_state %}
+        js.jssjlgid AS jlgid, js.jssstatus AS jlgstatus,
+        js.jssstart AS jlgstart, js.jssduration AS jlgduration,
+        st.jstname, js.jssstepstatus AS jslstatus,
+        js.jssdonesteps AS done_steps,
+        js.jsssuccesses AS success_count, js.jssfailures AS failure_count
     FROM
-        pgagent.pga_jobsteplog sl
-    JOIN
-        pgagent.pga_joblog jl ON sl.jsljlgid = jl.jlgid
-    JOIN
-        pgagent.pga_jobstep js ON sl.jsljstid = js.jstid
-    ORDER BY
-        jl.jlgjobid, sl.jslstart DESC
+        pgagent.pga_job j
+    LEFT JOIN pgagent.pga_job_state js ON js.jssjobid = j.jobid
+    LEFT JOIN pgagent.pga_jobstep st ON st.jstid = js.jssjstid
+{% else %}
+        jl.jlgid, jl.jlgstatus, jl.jlgstart, jl.jlgduration,
+        sl.jstname, sl.jslstatus, pr.done_steps,
+        NULL::int8 AS success_count, NULL::int8 AS failure_count
+    FROM
+        pgagent.pga_job j
+    LEFT JOIN LATERAL (
+        SELECT jlgid, jlgstatus, jlgstart, jlgduration
+        FROM pgagent.pga_joblog
+        WHERE jlgjobid = j.jobid
+        ORDER BY jlgid DESC
+        LIMIT 1
+    ) jl ON true
+    -- Get the current step of the latest run
+    LEFT JOIN LATERAL (
+        SELECT js.jstname, sl.jslstatus
+        FROM pgagent.pga_jobsteplog sl
+        JOIN pgagent.pga_jobstep js ON sl.jsljstid = js.jstid
+        WHERE sl.jsljlgid = jl.jlgid
+        ORDER BY sl.jslstart DESC
+        LIMIT 1
+    ) sl ON true
+    LEFT JOIN LATERAL (
+        SELECT COUNT(DISTINCT jsljstid) FILTER (
+            WHERE jslstatus IN ('s', 'f', 'd', 'i')) AS done_steps
+        FROM pgagent.pga_jobsteplog
+        WHERE jsljlgid = jl.jlgid
+    ) pr ON jl.jlgstatus = 'r'
+{% endif %}
 ),
 -- Get active jobs with basic information
 active_jobs AS (
-    SELECT 
+    SELECT
         j.jobid,
         j.jobname,
         j.jobdesc,
         j.jobenabled,
         j.jobnextrun,
-        CASE 
-            WHEN jl.jlgstatus = 'r' THEN 'Running'
-            WHEN jl.jlgstatus = 's' THEN 'Success'
-            WHEN jl.jlgstatus = 'f' THEN 'Failed'
-            WHEN jl.jlgstatus = 'i' THEN 'Internal Error'
-            WHEN jl.jlgstatus = 'd' THEN 'Aborted'
+        CASE
+            WHEN j.jlgstatus = 'r' THEN 'Running'
+            WHEN j.jlgstatus = 's' THEN 'Success'
+            WHEN j.jlgstatus = 'f' THEN 'Failed'
+            WHEN j.jlgstatus = 'i' THEN 'Internal Error'
+            WHEN j.jlgstatus = 'd' THEN 'Aborted'
             WHEN j.jobenabled THEN 'Enabled'
             ELSE 'Disabled'
         END AS status,
-        jl.jlgstart AS start_time,
-        jl.jlgduration AS duration,
-        -- Get the last run time for the job
-        (SELECT MAX(jlgstart) 
-         FROM pgagent.pga_joblog 
-         WHERE jlgjobid = j.jobid) AS joblastrun,
-        -- Get current step information for this specific job
-        (SELECT 
-            js.jstname
-         FROM 
-            pgagent.pga_jobsteplog sl
-         JOIN 
-            pgagent.pga_joblog jl ON sl.jsljlgid = jl.jlgid
-         JOIN 
-            pgagent.pga_jobstep js ON sl.jsljstid = js.jstid
-         WHERE 
-            jl.jlgjobid = j.jobid
-         ORDER BY 
-            sl.jslstart DESC
-         LIMIT 1
-        ) AS current_step,
-        -- Get current step status for this specific job
-        (SELECT 
-            CASE 
-                WHEN sl.jslstatus = 'r' THEN 'Running'
-                WHEN sl.jslstatus = 's' THEN 'Success'
-                WHEN sl.jslstatus = 'f' THEN 'Failed'
-                WHEN sl.jslstatus = 'i' THEN 'Internal Error'
-                WHEN sl.jslstatus = 'd' THEN 'Aborted'
-                ELSE 'Unknown'
-            END
-         FROM 
-            pgagent.pga_jobsteplog sl
-         JOIN 
-            pgagent.pga_joblog jl ON sl.jsljlgid = jl.jlgid
-         WHERE 
-            jl.jlgjobid = j.jobid
-         ORDER BY 
-            sl.jslstart DESC
-         LIMIT 1
-        ) AS current_step_status,
+        j.jlgstart AS start_time,
+        j.jlgduration AS duration,
+        j.jlgstart AS joblastrun,
+        j.jstname AS current_step,
+        CASE
+            WHEN j.jslstatus IS NULL THEN NULL
+            WHEN j.jslstatus = 'r' THEN 'Running'
+            WHEN j.jslstatus = 's' THEN 'Success'
+            WHEN j.jslstatus = 'f' THEN 'Failed'
+            WHEN j.jslstatus = 'i' THEN 'Internal Error'
+            WHEN j.jslstatus = 'd' THEN 'Aborted'
+            ELSE 'Unknown'
+        END AS current_step_status,
         -- Calculate progress for running jobs
         CASE
-            WHEN jl.jlgstatus = 'r' THEN
-                COALESCE(
-                    (SELECT 
-                        (COUNT(DISTINCT jsl.jsljstid) FILTER (WHERE jslstatus IN ('s', 'f', 'd', 'i')))::float * 100 / 
-                        NULLIF((SELECT COUNT(*) FROM pgagent.pga_jobstep WHERE jstjobid = j.jobid), 0)
-                     FROM 
-                        pgagent.pga_jobsteplog jsl
-                     JOIN
-                        pgagent.pga_joblog jlg ON jsl.jsljlgid = jlg.jlgid
-                     WHERE 
-                        jlg.jlgjobid = j.jobid AND 
-                        jsl.jslstart >= jl.jlgstart
-                    ), 0)
-            ELSE
-                CASE 
-                    WHEN jl.jlgstatus IN ('s', 'f', 'd', 'i') THEN 100
-                    ELSE 0
-                END
+            WHEN j.jlgstatus = 'r' THEN
+                COALESCE(j.done_steps::float * 100 /
+                         NULLIF(st.total_steps, 0), 0)
+            WHEN j.jlgstatus IN ('s', 'f', 'd', 'i') THEN 100
+            ELSE 0
         END AS progress,
-        -- Include total steps for this job
-        (SELECT total_steps FROM job_steps WHERE jstjobid = j.jobid) AS total_steps
-    FROM 
-        pgagent.pga_job j
-    LEFT JOIN 
-        pgagent.pga_joblog jl ON j.jobid = jl.jlgjobid AND 
-        jl.jlgid = (
-            SELECT MAX(jlgid) 
-            FROM pgagent.pga_joblog 
-            WHERE jlgjobid = j.jobid
-        )
-    ORDER BY 
-        CASE WHEN jl.jlgstatus = 'r' THEN 0 ELSE 1 END,
-        jl.jlgstart DESC NULLS LAST
+        st.total_steps,
+        j.success_count,
+        j.failure_count
+    FROM
+        latest_runs j
+    LEFT JOIN LATERAL (
+        SELECT COUNT(*) AS total_steps
+        FROM pgagent.pga_jobstep
+        WHERE jstjobid = j.jobid
+    ) st ON true
+    ORDER BY
+        CASE WHEN j.jlgstatus = 'r' THEN 0 ELSE 1 END,
+        j.jlgstart DESC NULLS LAST
 ),
 -- Get historical job data for charts (last 30 days)
 job_history AS (
-    SELECT 
+{% if pgagent.has_job_daily %}
+    -- The closed days come from the daily rollups, only today's runs are
+    -- read from pga_joblog.
+    SELECT
+        jdyday::timestamptz AS date,
+        jdyjobid AS jlgjobid,
+        jdyruns AS total_runs,
+        jdysuccesses AS successful_runs,
+        jdyfailures AS failed_runs,
+        0 AS running_runs,
+        jdyerrors AS error_runs,
+        jdyaborted AS aborted_runs,
+        EXTRACT(EPOCH FROM jdyavgduration) AS avg_duration,
+        EXTRACT(EPOCH FROM jdyp95duration) AS p95_duration
+    FROM
+        pgagent.pga_job_daily
+    WHERE
+        jdyday >= CURRENT_DATE - 30 AND jdyday < CURRENT_DATE
+    UNION ALL
+{% endif %}
+    SELECT
         DATE_TRUNC('day', jlgstart) AS date,
         jlgjobid,
         COUNT(*) AS total_runs,
@@ -157,34 +129,41 @@ job_history AS (
         SUM(CASE WHEN jlgstatus = 'r' THEN 1 ELSE 0 END) AS running_runs,
         SUM(CASE WHEN jlgstatus = 'i' THEN 1 ELSE 0 END) AS error_runs,
         SUM(CASE WHEN jlgstatus = 'd' THEN 1 ELSE 0 END) AS aborted_runs,
-        AVG(EXTRACT(EPOCH FROM jlgduration)) AS avg_duration
-    FROM 
+        AVG(EXTRACT(EPOCH FROM jlgduration)) AS avg_duration,
+        percentile_cont(0.95) WITHIN GROUP (
+            ORDER BY EXTRACT(EPOCH FROM jlgduration)) AS p95_duration
+    FROM
         pgagent.pga_joblog
-    WHERE 
+    WHERE
+{% if pgagent.has_job_daily %}
+        jlgstart >= CURRENT_DATE
+{% else %}
         jlgstart >= CURRENT_DATE - INTERVAL '30 days'
-    GROUP BY 
+{% endif %}
+    GROUP BY
         DATE_TRUNC('day', jlgstart), jlgjobid
-    ORDER BY 
-        DATE_TRUNC('day', jlgstart)
+    ORDER BY
+        1
 )
 SELECT 
     json_build_object(
         'summary', (
-            SELECT row_to_json(combined_stats) 
+            SELECT row_to_json(summary)
             FROM (
-                SELECT 
-                    js.total_jobs,
-                    js.enabled_jobs,
-                    js.disabled_jobs,
-                    COALESCE(jss.running_jobs, 0) AS running_jobs,
-                    COALESCE(jss.successful_jobs, 0) AS successful_jobs,
-                    COALESCE(jss.failed_jobs, 0) AS failed_jobs
-                FROM 
-                    job_stats js
-                LEFT JOIN 
-                    job_status_stats jss ON true
-            ) combined_stats
+                SELECT
+                    COUNT(*) AS total_jobs,
+                    COUNT(*) FILTER (WHERE jobenabled) AS enabled_jobs,
+                    COUNT(*) FILTER (WHERE NOT jobenabled) AS disabled_jobs,
+                    COUNT(*) FILTER (WHERE jlgstatus = 'r') AS running_jobs,
+                    COUNT(*) FILTER (WHERE jlgstatus = 's') AS successful_jobs,
+                    COUNT(*) FILTER (WHERE jlgstatus = 'f') AS failed_jobs
+                FROM
+                    latest_runs
+            ) summary
         ),
         'jobs', COALESCE((SELECT json_agg(active_jobs) FROM active_jobs), '[]'::json),
-        'history', COALESCE((SELECT json_agg(job_history) FROM job_history), '[]'::json)
+        'history', COALESCE((SELECT json_agg(job_history) FROM job_history), '[]'::json),
+        'cursor', (SELECT COALESCE(MAX(jlgid), 0) FROM pgagent.pga_joblog),
+        'extversion', (SELECT extversion FROM pg_catalog.pg_extension
+                       WHERE extname = 'pgagent')
     ) AS result;
\ No newline at end of file
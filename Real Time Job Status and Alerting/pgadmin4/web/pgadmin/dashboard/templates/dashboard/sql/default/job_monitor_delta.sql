@@ -0,0 +1,147 @@
+/*pga4dash*/
+-- Get the jobs changed by a job status notification
+WITH changed_jobs AS (
+    SELECT
+        j.jobid, j.jobname, j.jobdesc, j.jobenabled, j.jobnextrun
+    FROM
+        pgagent.pga_job j
+    WHERE
+        FALSE
+{% if job_ids %}
+        OR j.jobid IN ({{ job_ids|join(', ') }})
+{% endif %}
+{% if jlgid is not none %}
+        OR j.jobid = (
+            SELECT jlgjobid FROM pgagent.pga_joblog WHERE jlgid = {{ jlgid }}
+        )
+{% endif %}
+{% if since is not none %}
+        -- Jobs with a run logged after the cursor, or still running
+        OR j.jobagentid IS NOT NULL
+        OR j.jobid IN (
+            SELECT jlgjobid FROM pgagent.pga_joblog WHERE jlgid > {{ since }}
+        )
+{% endif %}
+),
+-- Get the changed jobs with their latest run
+latest_runs AS (
+    SELECT
+        j.jobid, j.jobname, j.jobdesc, j.jobenabled, j.jobnextrun,
+{% if pgagent.has_job_state %}
+        js.jssjlgid AS jlgid, js.jssstatus AS jlgstatus,
+        js.jssstart AS jlgstart, js.jssduration AS jlgduration,
+        st.jstname, js.jssstepstatus AS jslstatus,
+        js.jssdonesteps AS done_steps,
+        js.jsssuccesses AS success_count, js.jssfailures AS failure_count
+    FROM
+        changed_jobs j
+    LEFT JOIN pgagent.pga_job_state js ON js.jssjobid = j.jobid
+    LEFT JOIN pgagent.pga_jobstep st ON st.jstid = js.jssjstid
+{% else %}
+        jl.jlgid, jl.jlgstatus, jl.jlgstart, jl.jlgduration,
+        sl.jstname, sl.jslstatus, pr.done_steps,
+        NULL::int8 AS success_count, NULL::int8 AS failure_count
+    FROM
+        changed_jobs j
+    LEFT JOIN LATERAL (
+        SELECT jlgid, jlgstatus, jlgstart, jlgduration
+        FROM pgagent.pga_joblog
+        WHERE jlgjobid = j.jobid
+        ORDER BY jlgid DESC
+        LIMIT 1
+    ) jl ON true
+    LEFT JOIN LATERAL (
+        SELECT js.jstname, sl.jslstatus
+        FROM pgagent.pga_jobsteplog sl
+        JOIN pgagent.pga_jobstep js ON sl.jsljstid = js.jstid
+        WHERE sl.jsljlgid = jl.jlgid
+        ORDER BY sl.jslstart DESC
+        LIMIT 1
+    ) sl ON true
+    LEFT JOIN LATERAL (
+        SELECT COUNT(DISTINCT jsljstid) FILTER (
+            WHERE jslstatus IN ('s', 'f', 'd', 'i')) AS done_steps
+        FROM pgagent.pga_jobsteplog
+        WHERE jsljlgid = jl.jlgid
+    ) pr ON jl.jlgstatus = 'r'
+{% endif %}
+),
+jobs AS (
+    SELECT
+        j.jobid,
+        j.jobname,
+        j.jobdesc,
+        j.jobenabled,
+        j.jobnextrun,
+        CASE
+            WHEN j.jlgstatus = 'r' THEN 'Running'
+            WHEN j.jlgstatus = 's' THEN 'Success'
+            WHEN j.jlgstatus = 'f' THEN 'Failed'
+            WHEN j.jlgstatus = 'i' THEN 'Internal Error'
+            WHEN j.jlgstatus = 'd' THEN 'Aborted'
+            WHEN j.jobenabled THEN 'Enabled'
+            ELSE 'Disabled'
+        END AS status,
+        j.jlgstart AS start_time,
+        j.jlgduration AS duration,
+        j.jlgstart AS joblastrun,
+        j.jstname AS current_step,
+        CASE
+            WHEN j.jslstatus IS NULL THEN NULL
+            WHEN j.jslstatus = 'r' THEN 'Running'
+            WHEN j.jslstatus = 's' THEN 'Success'
+            WHEN j.jslstatus = 'f' THEN 'Failed'
+            WHEN j.jslstatus = 'i' THEN 'Internal Error'
+            WHEN j.jslstatus = 'd' THEN 'Aborted'
+            ELSE 'Unknown'
+        END AS current_step_status,
+        CASE
+            WHEN j.jlgstatus = 'r' THEN
+                COALESCE(j.done_steps::float * 100 /
+                         NULLIF(st.total_steps, 0), 0)
+            WHEN j.jlgstatus IN ('s', 'f', 'd', 'i') THEN 100
+            ELSE 0
+        END AS progress,
+        st.total_steps,
+        j.success_count,
+        j.failure_count
+    FROM
+        latest_runs j
+    LEFT JOIN LATERAL (
+        SELECT COUNT(*) AS total_steps
+        FROM pgagent.pga_jobstep
+        WHERE jstjobid = j.jobid
+    ) st ON true
+),
+-- Get the summary counters from the latest run of every job
+summary AS (
+    SELECT
+        COUNT(*) AS total_jobs,
+        COUNT(*) FILTER (WHERE j.jobenabled) AS enabled_jobs,
+        COUNT(*) FILTER (WHERE NOT j.jobenabled) AS disabled_jobs,
+        COUNT(*) FILTER (WHERE jl.jlgstatus = 'r') AS running_jobs,
+        COUNT(*) FILTER (WHERE jl.jlgstatus = 's') AS successful_jobs,
+        COUNT(*) FILTER (WHERE jl.jlgstatus = 'f') AS failed_jobs
+    FROM
+        pgagent.pga_job j
+{% if pgagent.has_job_state %}
+    LEFT JOIN (
+        SELECT jssjobid, jssstatus AS jlgstatus
+        FROM pgagent.pga_job_state
+    ) jl ON jl.jssjobid = j.jobid
+{% else %}
+    LEFT JOIN LATERAL (
+        SELECT jlgstatus
+        FROM pgagent.pga_joblog
+        WHERE jlgjobid = j.jobid
+        ORDER BY jlgid DESC
+        LIMIT 1
+    ) jl ON true
+{% endif %}
+)
+SELECT
+    json_build_object(
+        'summary', (SELECT row_to_json(summary) FROM summary),
+        'jobs', COALESCE((SELECT json_agg(jobs) FROM jobs), '[]'::json),
+        'cursor', (SELECT COALESCE(MAX(jlgid), 0) FROM pgagent.pga_joblog)
+    ) AS result;
@@ -0,0 +1,9 @@
+/*pga4dash*/
+-- Create the upcoming partitions of the pgAgent job logs, and drop, detach or
+-- delete the runs older than their retention.
+SELECT
+    mntaction AS action,
+    mntrelation AS relation,
+    mntjclid AS jclid,
+    mntrows AS rows
+FROM pgagent.pga_log_maintenance()
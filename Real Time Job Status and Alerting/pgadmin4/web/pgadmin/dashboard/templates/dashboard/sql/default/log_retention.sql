@@ -0,0 +1,44 @@
+/*pga4dash*/
+-- The retention of the pgAgent job logs with the job classes, and the size of
+-- every partition of the logs, or of the log tables before they are
+-- partitioned. The row counts are the planner estimates.
+SELECT
+    cl.relkind = 'p' AS partitioned,
+    COALESCE((
+        SELECT json_agg(json_build_object(
+            'jclid', lrtjclid,
+            'keep_days', round(EXTRACT(EPOCH FROM lrtkeep) / 86400)::int4,
+            'detach', lrtdetach
+        ) ORDER BY lrtjclid NULLS FIRST)
+        FROM pgagent.pga_log_retention
+    ), '[]') AS policies,
+    COALESCE((
+        SELECT json_agg(json_build_object(
+            'jclid', jclid,
+            'jclname', jclname
+        ) ORDER BY jclname)
+        FROM pgagent.pga_jobclass
+    ), '[]') AS classes,
+    COALESCE((
+        SELECT json_agg(json_build_object(
+            'table', t.parent,
+            'partition', t.relname,
+            'month', to_char(to_date(substring(t.relname from '_p([0-9]{6})$'), 'YYYYMM'), 'YYYY-MM'),
+            'rows', GREATEST(t.reltuples, 0)::int8,
+            'size', pg_catalog.pg_total_relation_size(t.oid)
+        ) ORDER BY t.parent, t.relname)
+        FROM (
+            SELECT p.relname AS parent, c.relname, c.reltuples, c.oid
+            FROM pg_catalog.pg_inherits i
+            JOIN pg_catalog.pg_class c ON c.oid = i.inhrelid
+            JOIN pg_catalog.pg_class p ON p.oid = i.inhparent
+            WHERE i.inhparent IN ('pgagent.pga_joblog'::regclass, 'pgagent.pga_jobsteplog'::regclass)
+            UNION ALL
+            SELECT c.relname, c.relname, c.reltuples, c.oid
+            FROM pg_catalog.pg_class c
+            WHERE c.oid IN ('pgagent.pga_joblog'::regclass, 'pgagent.pga_jobsteplog'::regclass)
+                AND c.relkind = 'r'
+        ) t
+    ), '[]') AS partitions
+FROM pg_catalog.pg_class cl
+WHERE cl.oid = 'pgagent.pga_joblog'::regclass
@@ -0,0 +1,25 @@
+/*pga4dash*/
+-- Detect the pgAgent schema used by the job monitor
+SELECT
+    EXISTS(
+        SELECT 1 FROM pg_catalog.pg_class cl
+        JOIN pg_catalog.pg_namespace ns ON ns.oid = cl.relnamespace
+        WHERE cl.relname = 'pga_job' AND ns.nspname = 'pgagent'
+    ) AS installed,
+    EXISTS(
+        SELECT 1 FROM pg_catalog.pg_class cl
+        JOIN pg_catalog.pg_namespace ns ON ns.oid = cl.relnamespace
+        WHERE cl.relname = 'pga_job_state' AND ns.nspname = 'pgagent'
+    ) AS has_job_state,
+    EXISTS(
+        SELECT 1 FROM pg_catalog.pg_class cl
+        JOIN pg_catalog.pg_namespace ns ON ns.oid = cl.relnamespace
+        WHERE cl.relname = 'pga_job_daily' AND ns.nspname = 'pgagent'
+    ) AS has_job_daily,
+    EXISTS(
+        SELECT 1 FROM pg_catalog.pg_class cl
+        JOIN pg_catalog.pg_namespace ns ON ns.oid = cl.relnamespace
+        WHERE cl.relname = 'pga_log_retention' AND ns.nspname = 'pgagent'
+    ) AS has_log_retention,
+    (SELECT extversion FROM pg_catalog.pg_extension
+     WHERE extname = 'pgagent') AS extversion
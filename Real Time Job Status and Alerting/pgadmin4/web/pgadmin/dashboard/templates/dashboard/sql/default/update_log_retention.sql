@@ -0,0 +1,16 @@
+/*pga4dash*/
+-- Replace the retention of the pgAgent job logs with the given policies, the
+-- global one having no job class.
+DELETE FROM pgagent.pga_log_retention
+WHERE COALESCE(lrtjclid, 0) NOT IN (
+    SELECT COALESCE(p.jclid, 0)
+    FROM json_to_recordset({{ policies|qtLiteral(conn) }}::json) AS p(jclid int4)
+);
+
+INSERT INTO pgagent.pga_log_retention (lrtjclid, lrtkeep, lrtdetach)
+SELECT p.jclid, make_interval(days => p.keep_days), p.detach
+FROM json_to_recordset({{ policies|qtLiteral(conn) }}::json)
+    AS p(jclid int4, keep_days int4, detach bool)
+ON CONFLICT ((COALESCE(lrtjclid, 0))) DO UPDATE SET
+    lrtkeep = EXCLUDED.lrtkeep,
+    lrtdetach = EXCLUDED.lrtdetach;
@@ -0,0 +1,456 @@
+##########################################################################
+#
+# pgAdmin 4 - PostgreSQL Tools
+#
+# Copyright (C) 2013 - 2025, The pgAdmin Development Team
+# This software is released under the PostgreSQL Licence
+#
+##########################################################################
+
+""" End-to-end latency benchmark of the pgAgent job status notifications.
+
+Job status notifications are sent on the job_status_update channel of a
+PostgreSQL server at increasing rates, and received by headless Socket.IO
+clients of the /pgagent namespace. For every rate, the latency from
+pg_notify() until the clients receive the notification is reported with
+the dropped notifications, and the threads, memory and backend connections
+used meanwhile. """
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+
+import psutil
+import psycopg
+
+CURRENT_PATH = os.path.dirname(os.path.realpath(__file__))
+
+# Set sys path to the web directory so that we can import pgadmin package
+root = os.path.dirname(os.path.dirname(CURRENT_PATH))
+if sys.path[0] != root:
+    sys.path.insert(0, root)
+
+NAMESPACE = '/pgagent'
+CHANNEL = 'job_status_update'
+
+# Ids of the jobs of the notifications, far from the ones of real jobs
+JOB_ID_BASE = 1000000000
+
+# The notifications due are sent every TICK seconds, in a single statement
+TICK = 0.01
+
+# Interval of the sampling of the threads and memory of the server process
+SAMPLE_INTERVAL = 0.25
+
+REPORT_COLUMNS = [
+    ('rate', 'rate/s', '{0}'),
+    ('sent', 'sent', '{0}'),
+    ('delivered', 'delivered', '{0}'),
+    ('coalesced', 'coalesced', '{0}'),
+    ('dropped', 'dropped', '{0}'),
+    ('p50_ms', 'p50 ms', '{0:.1f}'),
+    ('p95_ms', 'p95 ms', '{0:.1f}'),
+    ('p99_ms', 'p99 ms', '{0:.1f}'),
+    ('max_ms', 'max ms', '{0:.1f}'),
+    ('threads', 'threads', '{0}'),
+    ('rss_mb', 'rss MB', '{0:.1f}'),
+    ('listen_connections', 'LISTEN', '{0}'),
+    ('backend_connections', 'backends', '{0}'),
+]
+
+
+def get_job_id(seq, jobs):
+    """ Returns the job id of the notification seq, one job per
+    notification unless the notifications are spread over jobs ids. """
+    return JOB_ID_BASE + (seq % jobs if jobs else seq)
+
+
+def get_watched_jobs(client, jobs, watch):
+    """ Returns the job ids watched by a client, None for all of them. """
+    if not watch:
+        return None
+    return {JOB_ID_BASE + (client * watch + idx) % jobs
+            for idx in range(watch)}
+
+
+def percentile(values, pct):
+    """ Nearest-rank percentile of sorted values. """
+    if not values:
+        return float('nan')
+    return values[max(int(math.ceil(pct / 100.0 * len(values))), 1) - 1]
+
+
+def run_clients(url, options, conn):
+    """ Run the Socket.IO clients in a process of their own, so that their
+    threads and memory are not counted as the ones of the server, and send
+    their received notifications when asked to. """
+    import socketio
+
+    lock = threading.Lock()
+    received = [[] for _ in range(options['clients'])]
+    started = threading.Semaphore(0)
+    errors = []
+
+    def record(client, payload):
+        seq = payload.get('bench_seq')
+        if seq is not None:
+            now = time.time()
+            with lock:
+                received[client].append((seq, now))
+
+    def record_batch(client, data):
+        for payload in data.get('updates', []):
+            record(client, payload)
+
+    def add_handlers(sio, client):
+        sio.on('job_status_update', lambda data: record(client, data),
+               namespace=NAMESPACE)
+        sio.on('job_status_batch', lambda data: record_batch(client, data),
+               namespace=NAMESPACE)
+        sio.on('job_status_listener_started', lambda data: started.release(),
+               namespace=NAMESPACE)
+        sio.on('job_status_listener_error', lambda data: errors.append(data),
+               namespace=NAMESPACE)
+
+    headers = {'Cookie': options['cookie']} if options['cookie'] else {}
+    clients = []
+    try:
+        for client in range(options['clients']):
+            sio = socketio.Client(reconnection=False)
+            add_handlers(sio, client)
+            sio.connect(url, headers=headers, namespaces=[NAMESPACE],
+                        transports=['websocket'],
+                        socketio_path=options['socketio_path'])
+            sio.emit('start_job_status_listener', {'sid': options['sid']},
+                     namespace=NAMESPACE)
+            clients.append(sio)
+
+        for client, sio in enumerate(clients):
+            if not started.acquire(timeout=30):
+                raise RuntimeError('Job status listener not started')
+            jobs = get_watched_jobs(client, options['jobs'], options['watch'])
+            if jobs is not None:
+                res = sio.call('subscribe_jobs', {
+                    'sid': options['sid'], 'jobs': sorted(jobs)
+                }, namespace=NAMESPACE, timeout=30)
+                if res.get('status') != 'success':
+                    raise RuntimeError(res.get('error'))
+    except Exception as e:
+        errors.append(str(e))
+
+    conn.send(errors)
+    while not errors:
+        if conn.recv() == 'stop':
+            break
+        with lock:
+            records = received
+            received = [[] for _ in range(options['clients'])]
+        conn.send(records)
+
+    for sio in clients:
+        sio.disconnect()
+
+
+class ProcessSampler(threading.Thread):
+    """ Samples the threads and the resident memory of a process, keeping
+    the highest ones since the last reset. """
+
+    def __init__(self, pid):
+        super().__init__(name='pga_benchmark_sampler', daemon=True)
+        self.process = psutil.Process(pid)
+        self._lock = threading.Lock()
+        self._peak = (0, 0)
+
+    def run(self):
+        while True:
+            threads = self.process.num_threads()
+            rss = self.process.memory_info().rss
+            with self._lock:
+                self._peak = (max(self._peak[0], threads),
+                              max(self._peak[1], rss))
+            time.sleep(SAMPLE_INTERVAL)
+
+    def reset(self):
+        with self._lock:
+            peak, self._peak = self._peak, (0, 0)
+        return peak
+
+
+def start_embedded_server(dsn, port):
+    """ Serve the /pgagent namespace from this process, with the job status
+    listeners of pgAdmin listening to the server of dsn. The authentication
+    and the server connections of pgAdmin are left out. """
+    from flask import Flask, request
+    from flask_socketio import SocketIO, join_room, leave_room
+    from pgadmin.browser.server_groups.servers.pgagent.listener import \
+        JobStatusListenerRegistry, get_server_room
+
+    app = Flask(__name__)
+    socketio = SocketIO(app, async_mode='threading')
+    registry = JobStatusListenerRegistry(
+        lambda sid, event, data, rooms: socketio.emit(
+            event, data, namespace=NAMESPACE, to=rooms)
+    )
+
+    @socketio.on('start_job_status_listener', namespace=NAMESPACE)
+    def start_job_status_listener(data):
+        join_room(get_server_room(data['sid']))
+        registry.subscribe(data['sid'], request.sid, dsn)
+        socketio.emit('job_status_listener_started', {
+            'status': 'success', 'server_id': data['sid']
+        }, namespace=NAMESPACE, to=request.sid)
+
+    @socketio.on('subscribe_jobs', namespace=NAMESPACE)
+    def subscribe_jobs(data):
+        join, leave = registry.subscribe_jobs(
+            data['sid'], request.sid, data.get('jobs'),
+            data.get('job_classes'))
+        for room in join:
+            join_room(room)
+        for room in leave:
+            leave_room(room)
+        return {'status': 'success'}
+
+    @socketio.on('disconnect', namespace=NAMESPACE)
+    def disconnect(*args):
+        registry.unsubscribe_client(request.sid)
+
+    threading.Thread(target=socketio.run, args=(app,), kwargs={
+        'host': '127.0.0.1', 'port': port, 'allow_unsafe_werkzeug': True,
+        'log_output': False
+    }, daemon=True).start()
+
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port), 1).close()
+            break
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+    return 'http://127.0.0.1:{0}'.format(port)
+
+
+def count_connections(conn):
+    """ Returns the LISTEN connections, and all the other client backends
+    of the PostgreSQL server. """
+    return conn.execute(
+        "SELECT count(*) FILTER (WHERE query ILIKE 'LISTEN %%'), count(*) "
+        "FROM pg_catalog.pg_stat_activity "
+        "WHERE backend_type = 'client backend' "
+        "AND pid <> pg_catalog.pg_backend_pid()"
+    ).fetchone()
+
+
+def wait_listening(conn, timeout=30):
+    """ Wait until a job status listener is connected, the notifications
+    sent before would be missed. """
+    deadline = time.monotonic() + timeout
+    while count_connections(conn)[0] == 0:
+        if time.monotonic() > deadline:
+            raise RuntimeError('No job status listener connected to the '
+                               'PostgreSQL server')
+        time.sleep(0.1)
+
+
+def generate(conn, rate, duration, first_seq, jobs):
+    """ Send rate notifications per second for duration seconds.
+
+    :return: dict of the sending time of the notifications by sequence
+        number, and the sequence number of the next notification
+    """
+    sent = {}
+    total = int(rate * duration)
+    seq = first_seq
+    start = time.monotonic()
+
+    while seq - first_seq < total:
+        due = min(int((time.monotonic() - start) * rate) + 1, total) - \
+            (seq - first_seq)
+        if due > 0:
+            payloads = [json.dumps({
+                'job_id': get_job_id(seq + idx, jobs),
+                'status': 'r',
+                'bench_seq': seq + idx
+            }) for idx in range(due)]
+            now = time.time()
+            conn.execute(
+                'SELECT pg_catalog.pg_notify(%s, payload) '
+                'FROM unnest(%s::text[]) payload', (CHANNEL, payloads)
+            )
+            for idx in range(due):
+                sent[seq + idx] = now
+            seq += due
+        time.sleep(TICK)
+
+    return sent, seq
+
+
+def summarize(rate, sent, received, args):
+    """ Returns the latencies of the notifications received by the clients
+    and the notifications they missed. A notification superseded by a later
+    one of the same job received by the client was coalesced, otherwise it
+    was dropped. """
+    latencies = []
+    dropped = 0
+    expected = 0
+
+    for client, records in enumerate(received):
+        latest = {}
+        for seq, received_at in records:
+            if seq not in sent:
+                continue
+            latencies.append((received_at - sent[seq]) * 1000)
+            job = get_job_id(seq, args.jobs)
+            latest[job] = max(latest.get(job, -1), seq)
+
+        watched = get_watched_jobs(client, args.jobs, args.watch)
+        for seq in sent:
+            job = get_job_id(seq, args.jobs)
+            if watched is None or job in watched:
+                expected += 1
+                if latest.get(job, -1) < seq:
+                    dropped += 1
+
+    latencies.sort()
+    return {
+        'rate': rate,
+        'sent': len(sent),
+        'delivered': len(latencies),
+        'coalesced': expected - dropped - len(latencies),
+        'dropped': dropped,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': latencies[-1] if latencies else float('nan'),
+    }
+
+
+def print_header():
+    print(' '.join('{0:>10}'.format(title) for _, title, _ in REPORT_COLUMNS))
+
+
+def print_result(result):
+    print(' '.join('{0:>10}'.format(fmt.format(result[key]))
+                   for key, _, fmt in REPORT_COLUMNS))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--dsn', required=True,
+                        help='connection string of the PostgreSQL server '
+                             'the notifications are sent to')
+    parser.add_argument('--rates', default='1,10,100,1000,10000',
+                        help='comma separated notifications per second')
+    parser.add_argument('--duration', type=float, default=10,
+                        help='seconds of notifications sent at every rate')
+    parser.add_argument('--drain', type=float, default=2,
+                        help='seconds waited for the last notifications')
+    parser.add_argument('--clients', type=int, default=10,
+                        help='number of Socket.IO clients')
+    parser.add_argument('--jobs', type=int, default=0,
+                        help='number of jobs the notifications are spread '
+                             'over, one job per notification if 0')
+    parser.add_argument('--watch', type=int, default=0,
+                        help='number of jobs watched by every client with '
+                             'subscribe_jobs, all of them if 0')
+    parser.add_argument('--port', type=int, default=5055,
+                        help='port of the embedded Socket.IO server')
+    parser.add_argument('--pgadmin-url',
+                        help='URL of a running pgAdmin to benchmark instead '
+                             'of the embedded Socket.IO server')
+    parser.add_argument('--pgadmin-pid', type=int,
+                        help='process id of the running pgAdmin, to sample '
+                             'its threads and memory')
+    parser.add_argument('--cookie',
+                        help='session cookie of the running pgAdmin, for a '
+                             'session connected to the server')
+    parser.add_argument('--sid', type=int, default=1,
+                        help='id of the server in the running pgAdmin')
+    parser.add_argument('--socketio-path', default='socket.io',
+                        help='Socket.IO path of the running pgAdmin')
+    parser.add_argument('--json', help='file the results are written to')
+
+    args = parser.parse_args()
+    args.rates = [float(rate) for rate in args.rates.split(',')]
+    if args.watch and not args.jobs:
+        parser.error('--watch needs --jobs')
+    return args
+
+
+def main():
+    args = parse_args()
+
+    if args.pgadmin_url:
+        url, server_pid = args.pgadmin_url, args.pgadmin_pid
+    else:
+        url, server_pid = start_embedded_server(args.dsn, args.port), \
+            os.getpid()
+    sampler = ProcessSampler(server_pid) if server_pid else None
+
+    parent_conn, child_conn = multiprocessing.Pipe()
+    clients = multiprocessing.get_context('spawn').Process(
+        target=run_clients, args=(url, {
+            'clients': args.clients,
+            'sid': args.sid,
+            'jobs': args.jobs,
+            'watch': args.watch,
+            'cookie': args.cookie,
+            'socketio_path': args.socketio_path
+        }, child_conn), daemon=True
+    )
+    clients.start()
+
+    errors = parent_conn.recv()
+    if errors:
+        print('Error starting the clients: {0}'.format(errors))
+        return 1
+
+    results = []
+    with psycopg.connect(args.dsn, autocommit=True) as conn:
+        wait_listening(conn)
+        if sampler is not None:
+            sampler.start()
+
+        print_header()
+        seq = 0
+        for rate in args.rates:
+            if sampler is not None:
+                sampler.reset()
+
+            sent, seq = generate(conn, rate, args.duration, seq, args.jobs)
+            time.sleep(args.drain)
+
+            parent_conn.send('collect')
+            result = summarize(rate, sent, parent_conn.recv(), args)
+            threads, rss = sampler.reset() if sampler is not None \
+                else (0, 0)
+            result['threads'] = threads
+            result['rss_mb'] = rss / 1024 / 1024
+            result['listen_connections'], result['backend_connections'] = \
+                count_connections(conn)
+
+            print_result(result)
+            results.append(result)
+
+    parent_conn.send('stop')
+    clients.join(10)
+
+    if args.json:
+        with open(args.json, 'w') as fp:
+            json.dump({'options': vars(args), 'results': results}, fp,
+                      indent=2)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
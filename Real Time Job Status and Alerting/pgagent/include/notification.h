@@ -16,6 +16,8 @@
 #include <vector>
 #include <chrono>
 
+class DBconn;
+
 // Constants for notification timing
 #define TIME_LIMIT_SEC 60  // Maximum time to wait before sending notifications
 #define MAX_EMAIL_RETRIES 3
@@ -49,8 +51,11 @@ struct EmailData {
 };
 
 // Main notification functions
-void NotifyJobStatus(const std::string& jobId, const std::string& status, const std::string& description);
+void NotifyJobStatus(const std::string& jobId, const std::string& status, const std::string& description, const std::string& stepId = "");
 void CheckPendingEmailNotifications();
+void CheckJobStatusNotify(DBconn* conn);
+std::string JobStatusNotifyQuery(const std::string& jobId, const std::string& stepId,
+                                 const std::string& status, const std::string& description);
 
 // Job notification settings functions
 bool GetJobNotificationSettings(const std::string& jobId, JobNotificationSettings& settings);
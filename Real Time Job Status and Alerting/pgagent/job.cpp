@@ -109,7 +109,6 @@ int Job::Execute()
 		DBconn      *stepConn = nullptr;
 		std::string  jslid, stepid, jpecode, output;
 		std::string failureMessage;
-        NotifyJobStatus(m_jobid + ":" + stepid, "running","");
 		stepid = steps->GetString("jstid");
 
 		DBresultPtr id = m_threadConn->Execute(
@@ -123,7 +122,7 @@ int Job::Execute()
 				"INSERT INTO pgagent.pga_jobsteplog(jslid, jsljlgid, jsljstid, jslstatus) "
 				"SELECT " + jslid + ", " + m_logid + ", " + stepid + ", 'r'" +
 				"  FROM pgagent.pga_jobstep WHERE jstid=" + stepid);
-			NotifyJobStatus(m_jobid,"started","JobStep " + stepid + " started for Job ");
+			NotifyJobStatus(m_jobid,"started","JobStep " + stepid + " started for Job ", stepid);
 
 			if (res)
 			{
@@ -427,7 +426,7 @@ int Job::Execute()
 			std::replace(failureMessage.begin(), failureMessage.end(), '"', ' '); // Replace " with '
 			std::replace(failureMessage.begin(), failureMessage.end(), '\n', ' '); // Replace " with '
 			LogMessage("🔍DEBUG: Failure message: " + failureMessage, LOG_DEBUG);
-			NotifyJobStatus(m_jobid, "f", failureMessage);
+			NotifyJobStatus(m_jobid, "f", failureMessage, stepid);
 			return -1;
 		}
 		steps->MoveNext();
@@ -16,6 +16,7 @@
 #include <sstream>
 #include <iostream>
 #include <iomanip>
+#include <atomic>
 
 #if !BOOST_OS_WINDOWS
 #include <errno.h>
@@ -28,6 +29,10 @@ std::vector<FailureInfo> failureBuffer;
 std::chrono::steady_clock::time_point firstFailureTime;
 bool timerStarted = false;
 
+// Whether the schema has pga_job_status_notify(), checked at startup. The
+// schemas not updated to 4.13 yet are sent the plain payload instead.
+static std::atomic<bool> hasJobStatusNotify(true);
+
 // Track last check time to avoid too frequent checks
 static std::chrono::steady_clock::time_point lastCheckTime = std::chrono::steady_clock::now();
 static const int MIN_CHECK_INTERVAL_SEC = 5; // Minimum time between checks
@@ -705,82 +710,81 @@ void UpdateLastNotificationTime(const std::string& jobId) {
     conn->Return();
 }
 
-std::string escapeJsonString(const std::string& input, bool escapeUnicode = false) {
-    std::ostringstream ss;
-    for (unsigned char c : input) {
-        switch (c) {
-            case '\"': ss << "\\\""; break;
-            case '\\': ss << "\\\\"; break;
-            case '\b': ss << "\\b";  break;
-            case '\f': ss << "\\f";  break;
-            case '\n': ss << "\\n";  break;
-            case '\r': ss << "\\r";  break;
-            case '\t': ss << "\\t";  break;
-            case '/':  ss << "\\/";  break;
-            case '\0': ss << "\\0";  break;
-            case '\'': ss << "\'\'"; break;
-            default:
-                // Control characters or special Unicode characters
-                if (c < 0x20 || c == 0x2028 || c == 0x2029 || escapeUnicode) {
-                    ss << "\\u"
-                       << std::hex << std::setw(4) << std::setfill('0')
-                       << static_cast<int>(c);
-                } else {
-                    ss << c;
-                }
-        }
+// Check whether the schema builds the job status payloads
+void CheckJobStatusNotify(DBconn* conn) {
+    std::string count = conn->ExecuteScalar(
+        "SELECT COUNT(*) FROM pg_proc "
+        "WHERE proname = 'pga_job_status_notify' AND "
+        "      pronamespace = (SELECT oid FROM pg_namespace "
+        "                      WHERE nspname = 'pgagent')"
+    );
+
+    hasJobStatusNotify = count != "0";
+    if (!hasJobStatusNotify) {
+        LogMessage(
+            "Couldn't find the function 'pga_job_status_notify', the job status "
+            "notifications are sent without the job state - please run "
+            "ALTER EXTENSION \"pgagent\" UPDATE TO '4.13';.",
+            LOG_WARNING
+        );
     }
-    return ss.str();
+}
+
+// Returns the query sending the status of the jobs selected by jobId, an
+// SQL expression
+std::string JobStatusNotifyQuery(const std::string& jobId, const std::string& stepId,
+                                 const std::string& status, const std::string& description) {
+    // The payload is built by the server, so that it carries the state of
+    // the latest run and the job summary, and the Job Monitor does not need
+    // to query them again. Payloads over the NOTIFY limit are stored in
+    // pga_job_event, and only their id is sent.
+    if (hasJobStatusNotify) {
+        return "SELECT pgagent.pga_job_status_notify(" + jobId + ", " +
+               stepId + ", " + status + ", " + description + ")";
+    }
+
+    return "SELECT pg_notify('job_status_update', json_build_object("
+           "'job_id', " + jobId + ", 'step_id', " + stepId + ", "
+           "'status', " + status + ", 'description', " + description + ", "
+           "'timestamp', now())::text)";
 }
 
 // Notify job status and buffer failures
-void NotifyJobStatus(const std::string& jobId, const std::string& status, const std::string& description) {
+void NotifyJobStatus(const std::string& jobId, const std::string& status, const std::string& description, const std::string& stepId) {
     std::string timestamp = GetCurrentTimestamp();
     
+    // The email alerts are sent by pgAdmin instead when MY_MAIL is not set,
+    // which then caches the notification settings and keeps the last
+    // notification time of the job itself.
+    bool sendsEmails = std::getenv("MY_MAIL") != NULL;
+
     // Get notification settings for this job
     JobNotificationSettings settings;
     settings.jobId = jobId;
     
-    if (!GetJobNotificationSettings(jobId, settings)) {
+    if (sendsEmails && !GetJobNotificationSettings(jobId, settings)) {
         LogMessage("🔍Could not get notification settings for job " + jobId + ", using default behavior", LOG_DEBUG);
     }
 
-    std::string escapedDescription = escapeJsonString(description);
-
-    // Create JSON payload
-    std::string payload = "{\"job_id\": \"" + jobId + "\", \"status\": \"" + status + 
-                          "\", \"description\": \"" + escapedDescription + 
-                          "\", \"timestamp\": \"" + timestamp + "\"";
-    
-    // Add custom text if available
-    if (!settings.customText.empty()) {
-        std::string escapedCustomText = escapeJsonString(settings.customText);
-        payload += ", \"custom_text\": \"" + escapedCustomText + "\"";
-    }
-    
-    // Add notification settings to payload
-    payload += ", \"notification\": {\"browser\": " + std::string(settings.browser?"true":"false") +
-               ", \"email\": " + std::string(settings.email?"true":"false") + "}";
-    
-    payload += "}";
-    
-    // This ensures the pgAdmin UI can still show real-time updates for jobs
-    LogMessage("🔍DEBUG: Sending notification for job " + jobId + " with payload: " + payload, LOG_DEBUG);
-    std::string query = "NOTIFY job_status_update, '" + payload + "'";
     DBconn* notifyConn = DBconn::Get();
     if (!notifyConn) {
         LogMessage("NotifyJobStatus: Connection is NULL or not connected!", LOG_ERROR);
         return;
     }
+
+    std::string query = JobStatusNotifyQuery(
+        jobId, stepId.empty() ? std::string("NULL") : stepId,
+        notifyConn->qtDbString(status), notifyConn->qtDbString(description));
+    LogMessage("🔍DEBUG: Sending notification for job " + jobId + " with status " + status, LOG_DEBUG);
     
     notifyConn->ExecuteVoid(query);
     LogMessage("🔍DEBUG: Job " + jobId + " status updated to " + status, LOG_DEBUG);
     
     // Check if we should process this notification based on settings
-    if (ShouldSendNotification(settings, status)) {
+    if (sendsEmails && ShouldSendNotification(settings, status)) {
         // Update the last notification time
         UpdateLastNotificationTime(jobId);
-        
+
         // If job failed and email notifications are enabled, collect logs and add to buffer
         if (status == "f" && settings.email) {
             LogMessage("🔍DEBUG: Job " + jobId + " failed, collecting detailed logs...", LOG_DEBUG);
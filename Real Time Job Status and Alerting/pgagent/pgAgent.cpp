@@ -75,15 +75,9 @@ int MainRestartLoop(DBconn *serviceConn)
 			"FROM pga_tmp_zombies z, pgagent.pga_job j, pgagent.pga_joblog l "
 			"WHERE z.jagpid=j.jobagentid AND j.jobid = l.jlgjobid AND l.jlgstatus='r');\n"
 			//************************** Send NOTIFY when job is aborted *****************************
-			"WITH job_data AS ("
-			"  SELECT jlgjobid AS job_id, "
-			"         'f' AS status, "
-			"         now() AS timestamp "
-			"  FROM pgagent.pga_joblog "
-			"  WHERE jlgstatus = 'd' "
-			"  LIMIT 1"
-			") "
-			"SELECT pg_notify('job_status_update', row_to_json(job_data)::text) FROM job_data;\n"
+			+ JobStatusNotifyQuery("j.jobid", "NULL::int4", "'f'", "'Job aborted'") +
+			" FROM pga_tmp_zombies z, pgagent.pga_job j "
+			"WHERE z.jagpid=j.jobagentid;\n"
 
 
 			"UPDATE pgagent.pga_jobsteplog SET jslstatus='d' WHERE jslid IN ( "
@@ -233,6 +227,8 @@ void MainLoop()
 				);
 			}
 
+			CheckJobStatusNotify(serviceConn);
+
 #ifdef WIN32
 			Initialized();
 #endif
@@ -0,0 +1,322 @@
+/*
+// pgAgent - PostgreSQL Tools
+//
+// Copyright (C) 2002 - 2024, The pgAdmin Development Team
+// This software is released under the PostgreSQL Licence
+//
+// pgagent--4.10--4.11.sql - Upgrade the pgAgent schema from 4.10 to 4.11
+//
+*/
+
+\echo Use "ALTER EXTENSION pgagent UPDATE" to load this file. \quit
+
+-- The retention of the job logs, globally or per job class.
+CREATE TABLE pgagent.pga_log_retention (
+lrtid                serial               NOT NULL PRIMARY KEY,
+lrtjclid             int4                 NULL REFERENCES pgagent.pga_jobclass (jclid) ON DELETE CASCADE ON UPDATE RESTRICT,
+lrtkeep              interval             NOT NULL CHECK (lrtkeep > '0'::interval),
+lrtdetach            bool                 NOT NULL DEFAULT false
+) WITHOUT OIDS;
+CREATE UNIQUE INDEX pga_log_retention_jclid ON pgagent.pga_log_retention (COALESCE(lrtjclid, 0));
+COMMENT ON TABLE pgagent.pga_log_retention IS 'Retention of the job logs, globally when lrtjclid is NULL or for a job class';
+COMMENT ON COLUMN pgagent.pga_log_retention.lrtkeep IS 'Age of the oldest runs kept';
+COMMENT ON COLUMN pgagent.pga_log_retention.lrtdetach IS 'Detach the expired partitions of the logs instead of dropping them, for the global retention';
+
+SELECT pg_catalog.pg_extension_config_dump('pga_log_retention', '');
+
+-- The ids of the runs are kept by pg_dump, the restored runs would be
+-- mixed up with the new ones otherwise.
+SELECT pg_catalog.pg_extension_config_dump('pga_joblog_jlgid_seq', '');
+SELECT pg_catalog.pg_extension_config_dump('pga_jobsteplog_jslid_seq', '');
+
+
+CREATE OR REPLACE FUNCTION pgagent.pga_log_partition_create(text, date) RETURNS bool AS $$
+DECLARE
+    v_table         ALIAS FOR $1;
+    v_month         ALIAS FOR $2;
+
+    v_column        text := CASE v_table WHEN 'pga_joblog' THEN 'jlgstart' ELSE 'jslstart' END;
+    v_start         date := date_trunc('month', v_month)::date;
+    v_end           date := (date_trunc('month', v_month) + '1 Month'::interval)::date;
+    v_partition     text := v_table || '_p' || to_char(v_month, 'YYYYMM');
+BEGIN
+    IF to_regclass('pgagent.' || v_partition) IS NOT NULL THEN
+        RETURN false;
+    END IF;
+
+    -- The runs logged to the default partition while the partition was
+    -- missing are moved to it before it is attached.
+    EXECUTE format(
+        'CREATE TABLE pgagent.%I (LIKE pgagent.%I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+        v_partition, v_table);
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM pgagent.%I WHERE %I >= %L AND %I < %L RETURNING *) '
+        'INSERT INTO pgagent.%I SELECT * FROM moved',
+        v_table || '_default', v_column, v_start, v_column, v_end, v_partition);
+    EXECUTE format(
+        'ALTER TABLE pgagent.%I ATTACH PARTITION pgagent.%I FOR VALUES FROM (%L) TO (%L)',
+        v_table, v_partition, v_start, v_end);
+    RETURN true;
+END;
+$$ LANGUAGE 'plpgsql' VOLATILE;
+COMMENT ON FUNCTION pgagent.pga_log_partition_create(text, date) IS 'Create the partition of pga_joblog or pga_jobsteplog for the month of the given date, if it does not exist';
+
+
+CREATE OR REPLACE FUNCTION pgagent.pga_partition_logs() RETURNS void AS $$
+DECLARE
+    v_month         date;
+BEGIN
+    IF (SELECT relkind FROM pg_catalog.pg_class WHERE oid = 'pgagent.pga_joblog'::regclass) = 'p' THEN
+        RAISE NOTICE 'The pgAgent logs are already partitioned';
+        RETURN;
+    END IF;
+
+    LOCK TABLE pgagent.pga_joblog, pgagent.pga_jobsteplog IN ACCESS EXCLUSIVE MODE;
+
+    -- The steps can not reference the runs by jlgid alone once the runs
+    -- are partitioned by their start, their partitions are dropped together.
+    ALTER TABLE pgagent.pga_jobsteplog DROP CONSTRAINT pga_jobsteplog_jsljlgid_fkey;
+    ALTER SEQUENCE pgagent.pga_joblog_jlgid_seq OWNED BY NONE;
+    ALTER SEQUENCE pgagent.pga_jobsteplog_jslid_seq OWNED BY NONE;
+    DROP INDEX pgagent.pga_joblog_jobid, pgagent.pga_joblog_jlgstart,
+        pgagent.pga_joblog_jobstart, pgagent.pga_jobsteplog_jslid,
+        pgagent.pga_jobsteplog_jstid;
+    ALTER TABLE pgagent.pga_joblog RENAME TO pga_joblog_unpartitioned;
+    ALTER TABLE pgagent.pga_joblog_unpartitioned RENAME CONSTRAINT pga_joblog_pkey TO pga_joblog_unpartitioned_pkey;
+    ALTER TABLE pgagent.pga_jobsteplog RENAME TO pga_jobsteplog_unpartitioned;
+    ALTER TABLE pgagent.pga_jobsteplog_unpartitioned RENAME CONSTRAINT pga_jobsteplog_pkey TO pga_jobsteplog_unpartitioned_pkey;
+
+    CREATE TABLE pgagent.pga_joblog (
+    jlgid                int4                 NOT NULL DEFAULT nextval('pgagent.pga_joblog_jlgid_seq'::regclass),
+    jlgjobid             int4                 NOT NULL REFERENCES pgagent.pga_job (jobid) ON DELETE CASCADE ON UPDATE RESTRICT,
+    jlgstatus            char                 NOT NULL CHECK (jlgstatus IN ('r', 's', 'f', 'i', 'd')) DEFAULT 'r', -- running, success, failed, internal failure, aborted
+    jlgstart             timestamptz          NOT NULL DEFAULT current_timestamp,
+    jlgduration          interval             NULL,
+    PRIMARY KEY (jlgid, jlgstart)
+    ) PARTITION BY RANGE (jlgstart);
+    COMMENT ON TABLE pgagent.pga_joblog IS 'Job run logs, partitioned by month.';
+    COMMENT ON COLUMN pgagent.pga_joblog.jlgstatus IS 'Status of job: r=running, s=successfully finished, f=failed, i=no steps to execute, d=aborted';
+
+    CREATE TABLE pgagent.pga_jobsteplog (
+    jslid                int4                 NOT NULL DEFAULT nextval('pgagent.pga_jobsteplog_jslid_seq'::regclass),
+    jsljlgid             int4                 NOT NULL,
+    jsljstid             int4                 NOT NULL REFERENCES pgagent.pga_jobstep (jstid) ON DELETE CASCADE ON UPDATE RESTRICT,
+    jslstatus            char                 NOT NULL CHECK (jslstatus IN ('r', 's', 'i', 'f', 'd')) DEFAULT 'r', -- running, success, ignored, failed, aborted
+    jslresult            int4                 NULL,
+    jslstart             timestamptz          NOT NULL DEFAULT current_timestamp,
+    jslduration          interval             NULL,
+    jsloutput            text,
+    PRIMARY KEY (jslid, jslstart)
+    ) PARTITION BY RANGE (jslstart);
+    COMMENT ON TABLE pgagent.pga_jobsteplog IS 'Job step run logs, partitioned by month.';
+    COMMENT ON COLUMN pgagent.pga_jobsteplog.jslstatus IS 'Status of job step: r=running, s=successfully finished,  f=failed stopping job, i=ignored failure, d=aborted';
+    COMMENT ON COLUMN pgagent.pga_jobsteplog.jslresult IS 'Return code of job step';
+
+    -- The runs of a month without partition are kept in the default ones,
+    -- until pga_log_maintenance creates it.
+    CREATE TABLE pgagent.pga_joblog_default PARTITION OF pgagent.pga_joblog DEFAULT;
+    CREATE TABLE pgagent.pga_jobsteplog_default PARTITION OF pgagent.pga_jobsteplog DEFAULT;
+
+    -- Only the months of the copied runs have a partition, the ones of
+    -- the upcoming months are created by pga_log_maintenance.
+    FOR v_month IN
+        SELECT generate_series(
+                   date_trunc('month', LEAST(
+                       (SELECT MIN(jlgstart) FROM pgagent.pga_joblog_unpartitioned),
+                       (SELECT MIN(jslstart) FROM pgagent.pga_jobsteplog_unpartitioned))),
+                   date_trunc('month', GREATEST(
+                       (SELECT MAX(jlgstart) FROM pgagent.pga_joblog_unpartitioned),
+                       (SELECT MAX(jslstart) FROM pgagent.pga_jobsteplog_unpartitioned))),
+                   '1 Month'::interval)::date
+    LOOP
+        PERFORM pgagent.pga_log_partition_create('pga_joblog', v_month);
+        PERFORM pgagent.pga_log_partition_create('pga_jobsteplog', v_month);
+    END LOOP;
+
+    -- The triggers are created after the copy, the job states and daily
+    -- rollups already cover the copied runs.
+    INSERT INTO pgagent.pga_joblog (jlgid, jlgjobid, jlgstatus, jlgstart, jlgduration)
+    SELECT jlgid, jlgjobid, jlgstatus, jlgstart, jlgduration
+      FROM pgagent.pga_joblog_unpartitioned;
+    INSERT INTO pgagent.pga_jobsteplog (jslid, jsljlgid, jsljstid, jslstatus, jslresult, jslstart, jslduration, jsloutput)
+    SELECT jslid, jsljlgid, jsljstid, jslstatus, jslresult, jslstart, jslduration, jsloutput
+      FROM pgagent.pga_jobsteplog_unpartitioned;
+    DROP TABLE pgagent.pga_jobsteplog_unpartitioned, pgagent.pga_joblog_unpartitioned;
+
+    ALTER SEQUENCE pgagent.pga_joblog_jlgid_seq OWNED BY pgagent.pga_joblog.jlgid;
+    ALTER SEQUENCE pgagent.pga_jobsteplog_jslid_seq OWNED BY pgagent.pga_jobsteplog.jslid;
+
+    CREATE INDEX pga_joblog_jobid ON pgagent.pga_joblog(jlgjobid, jlgid DESC);
+    CREATE INDEX pga_joblog_jlgstart ON pgagent.pga_joblog(jlgstart);
+    CREATE INDEX pga_joblog_jobstart ON pgagent.pga_joblog(jlgjobid, jlgstart DESC, jlgid DESC);
+    CREATE INDEX pga_jobsteplog_jslid ON pgagent.pga_jobsteplog(jsljlgid, jslstart DESC);
+    CREATE INDEX pga_jobsteplog_jstid ON pgagent.pga_jobsteplog(jsljstid, jslid DESC);
+
+    CREATE TRIGGER pga_joblog_state_trigger AFTER INSERT OR UPDATE
+      ON pgagent.pga_joblog FOR EACH ROW
+      EXECUTE PROCEDURE pgagent.pga_joblog_state_trigger();
+    COMMENT ON TRIGGER pga_joblog_state_trigger ON pgagent.pga_joblog IS 'Update the latest run and the run counters of the job.';
+
+    CREATE TRIGGER pga_jobsteplog_state_trigger AFTER INSERT OR UPDATE
+      ON pgagent.pga_jobsteplog FOR EACH ROW
+      EXECUTE PROCEDURE pgagent.pga_jobsteplog_state_trigger();
+    COMMENT ON TRIGGER pga_jobsteplog_state_trigger ON pgagent.pga_jobsteplog IS 'Update the current step and the progress of the latest run of the job.';
+
+    CREATE TRIGGER pga_joblog_daily_insert_trigger AFTER INSERT
+      ON pgagent.pga_joblog REFERENCING NEW TABLE AS pga_new_runs
+      FOR EACH STATEMENT EXECUTE PROCEDURE pgagent.pga_joblog_daily_trigger();
+    COMMENT ON TRIGGER pga_joblog_daily_insert_trigger ON pgagent.pga_joblog IS 'Update the daily rollups of the finished runs.';
+
+    CREATE TRIGGER pga_joblog_daily_update_trigger AFTER UPDATE
+      ON pgagent.pga_joblog REFERENCING OLD TABLE AS pga_old_runs NEW TABLE AS pga_new_runs
+      FOR EACH STATEMENT EXECUTE PROCEDURE pgagent.pga_joblog_daily_trigger();
+    COMMENT ON TRIGGER pga_joblog_daily_update_trigger ON pgagent.pga_joblog IS 'Update the daily rollups of the finished runs.';
+END;
+$$ LANGUAGE 'plpgsql' VOLATILE;
+COMMENT ON FUNCTION pgagent.pga_partition_logs() IS 'Convert pga_joblog and pga_jobsteplog to monthly range partitions on their start time';
+
+
+CREATE OR REPLACE FUNCTION pgagent.pga_log_maintenance(
+    OUT mntaction text, OUT mntrelation text, OUT mntjclid int4, OUT mntrows int8
+) RETURNS SETOF record AS $$
+DECLARE
+    v_partitioned   bool;
+    v_keep          interval;
+    v_detach        bool;
+    v_horizon       interval;
+    v_month         date;
+    v_table         text;
+    v_partition     record;
+    v_class         record;
+BEGIN
+    v_partitioned := (SELECT relkind FROM pg_catalog.pg_class WHERE oid = 'pgagent.pga_joblog'::regclass) = 'p';
+
+    -- The partitions of this month and the next one, so that the runs are
+    -- not logged to the default partitions, and of the months of the runs
+    -- found in the default partitions, as restored by pg_restore.
+    IF v_partitioned THEN
+        FOR v_month IN
+            SELECT date_trunc('month', now())::date
+            UNION SELECT (date_trunc('month', now()) + '1 Month'::interval)::date
+            UNION SELECT date_trunc('month', jlgstart)::date FROM pgagent.pga_joblog_default
+            UNION SELECT date_trunc('month', jslstart)::date FROM pgagent.pga_jobsteplog_default
+            ORDER BY 1
+        LOOP
+            FOR v_table IN VALUES ('pga_joblog'), ('pga_jobsteplog') LOOP
+                IF pgagent.pga_log_partition_create(v_table, v_month) THEN
+                    mntaction := 'create';
+                    mntrelation := v_table || '_p' || to_char(v_month, 'YYYYMM');
+                    mntjclid := NULL;
+                    mntrows := 0;
+                    RETURN NEXT;
+                END IF;
+            END LOOP;
+        END LOOP;
+    END IF;
+
+    SELECT lrtkeep, lrtdetach INTO v_keep, v_detach
+      FROM pgagent.pga_log_retention
+     WHERE lrtjclid IS NULL;
+
+    -- A partition expires once all its runs are older than the retention
+    -- of every job class, which needs the global retention for the classes
+    -- without their own.
+    IF v_partitioned AND v_keep IS NOT NULL THEN
+        v_horizon := GREATEST(v_keep, (
+            SELECT MAX(lrtkeep) FROM pgagent.pga_log_retention
+             WHERE lrtjclid IS NOT NULL
+        ));
+
+        FOR v_partition IN
+            SELECT c.relname, p.relname AS parent, c.reltuples,
+                   to_date(substring(c.relname from '_p([0-9]{6})$'), 'YYYYMM') AS month
+              FROM pg_catalog.pg_inherits i
+              JOIN pg_catalog.pg_class c ON c.oid = i.inhrelid
+              JOIN pg_catalog.pg_class p ON p.oid = i.inhparent
+             WHERE i.inhparent IN ('pgagent.pga_joblog'::regclass, 'pgagent.pga_jobsteplog'::regclass)
+               AND c.relname ~ '_p[0-9]{6}$'
+             ORDER BY 4, 2
+        LOOP
+            CONTINUE WHEN v_partition.month + '1 Month'::interval > now() - v_horizon;
+
+            IF v_detach THEN
+                EXECUTE format('ALTER TABLE pgagent.%I DETACH PARTITION pgagent.%I',
+                               v_partition.parent, v_partition.relname);
+                mntaction := 'detach';
+            ELSE
+                EXECUTE format('DROP TABLE pgagent.%I', v_partition.relname);
+                mntaction := 'drop';
+            END IF;
+            mntrelation := v_partition.relname;
+            mntjclid := NULL;
+            mntrows := GREATEST(v_partition.reltuples, 0)::int8;
+            RETURN NEXT;
+        END LOOP;
+    END IF;
+
+    -- The runs of the job classes kept for less time than the partitions
+    -- are deleted, as are all the expired runs without partitions.
+    FOR v_class IN
+        SELECT jcl.jclid, COALESCE(c.lrtkeep, v_keep) AS keep
+          FROM pgagent.pga_jobclass jcl
+          LEFT JOIN pgagent.pga_log_retention c ON c.lrtjclid = jcl.jclid
+         WHERE COALESCE(c.lrtkeep, v_keep) IS NOT NULL
+           AND (v_horizon IS NULL OR COALESCE(c.lrtkeep, v_keep) < v_horizon)
+    LOOP
+        WITH runs AS (
+            DELETE FROM pgagent.pga_joblog l
+             USING pgagent.pga_job j
+             WHERE j.jobid = l.jlgjobid AND j.jobjclid = v_class.jclid
+               AND l.jlgstart < now() - v_class.keep
+               AND l.jlgstatus != 'r'
+            RETURNING l.jlgid
+        ), steps AS (
+            DELETE FROM pgagent.pga_jobsteplog
+             WHERE jsljlgid IN (SELECT jlgid FROM runs)
+        )
+        SELECT COUNT(*) INTO mntrows FROM runs;
+
+        IF mntrows > 0 THEN
+            mntaction := 'delete';
+            mntrelation := 'pga_joblog';
+            mntjclid := v_class.jclid;
+            RETURN NEXT;
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE 'plpgsql' VOLATILE;
+COMMENT ON FUNCTION pgagent.pga_log_maintenance() IS 'Create the upcoming partitions of the job logs, and drop, detach or delete the runs older than their retention';
+
+
+-- The logs are only partitioned on request, with:
+--   SET pgagent.partition_logs = on;
+--   ALTER EXTENSION pgagent UPDATE TO '4.13';
+DO $$
+DECLARE
+    v_partition     regclass;
+BEGIN
+    IF current_setting('pgagent.partition_logs', true) = 'on' THEN
+        PERFORM pgagent.pga_partition_logs();
+
+        -- The monthly partitions are left out of the extension, like the
+        -- ones pga_log_maintenance() creates later, so that pg_dump dumps
+        -- all of them, with their runs, as partitions of the extension
+        -- tables. The extension keeps the default partitions, created again
+        -- with it, and only their runs are dumped.
+        FOR v_partition IN
+            SELECT i.inhrelid::regclass
+              FROM pg_catalog.pg_inherits i
+              JOIN pg_catalog.pg_class c ON c.oid = i.inhrelid
+             WHERE i.inhparent IN ('pgagent.pga_joblog'::regclass, 'pgagent.pga_jobsteplog'::regclass)
+               AND c.relname ~ '_p[0-9]{6}$'
+        LOOP
+            EXECUTE format('ALTER EXTENSION pgagent DROP TABLE %s', v_partition);
+        END LOOP;
+        PERFORM pg_catalog.pg_extension_config_dump('pgagent.pga_joblog_default', '');
+        PERFORM pg_catalog.pg_extension_config_dump('pgagent.pga_jobsteplog_default', '');
+        -- The statement triggers on the logs do not fire for the runs restored
+        -- to their partitions, the daily rollups are dumped instead.
+        PERFORM pg_catalog.pg_extension_config_dump('pgagent.pga_job_daily', '');
+    END IF;
+END;
+$$;
@@ -0,0 +1,34 @@
+/*
+// pgAgent - PostgreSQL Tools
+//
+// Copyright (C) 2002 - 2024, The pgAdmin Development Team
+// This software is released under the PostgreSQL Licence
+//
+// pgagent--4.11--4.12.sql - Upgrade the pgAgent schema from 4.11 to 4.12
+//
+*/
+
+\echo Use "ALTER EXTENSION pgagent UPDATE" to load this file. \quit
+
+-- The notification settings of the jobs are cached by pgAdmin, which is told
+-- of their changes on the job_notification_update channel.
+CREATE OR REPLACE FUNCTION pgagent.pga_job_notification_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM pg_notify('job_notification_update', OLD.jnjobid::text);
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.jnjobid <> OLD.jnjobid) THEN
+        PERFORM pg_notify('job_notification_update', NEW.jnjobid::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE 'plpgsql' VOLATILE;
+COMMENT ON FUNCTION pgagent.pga_job_notification_trigger() IS 'Send the id of the job whose notification settings changed on the job_notification_update channel.';
+
+-- jnlastnotification is left out, so that the alert throttling does not
+-- invalidate the cached settings.
+CREATE TRIGGER pga_job_notification_trigger AFTER INSERT OR DELETE
+  OR UPDATE OF jnjobid, jnenabled, jnbrowser, jnemail, jnwhen, jnmininterval, jnemailrecipients, jncustomtext
+  ON pgagent.pga_job_notification FOR EACH ROW
+  EXECUTE PROCEDURE pgagent.pga_job_notification_trigger();
+COMMENT ON TRIGGER pga_job_notification_trigger ON pgagent.pga_job_notification IS 'Notify the changes of the notification settings of the jobs.';
@@ -0,0 +1,129 @@
+/*
+// pgAgent - PostgreSQL Tools
+//
+// Copyright (C) 2002 - 2024, The pgAdmin Development Team
+// This software is released under the PostgreSQL Licence
+//
+// pgagent--4.12--4.13.sql - Upgrade the pgAgent schema from 4.12 to 4.13
+//
+*/
+
+\echo Use "ALTER EXTENSION pgagent UPDATE" to load this file. \quit
+
+-- The job class is sent with the job, so that pgAdmin can send the
+-- notifications of the jobs of a class to the clients watching it.
+CREATE OR REPLACE FUNCTION pgagent.pga_job_status_notify(int4, int4, text, text) RETURNS void AS $$
+DECLARE
+    v_jobid         ALIAS FOR $1;
+    v_stepid        ALIAS FOR $2;
+    v_status        ALIAS FOR $3;
+    v_description   ALIAS FOR $4;
+
+    v_payload       json;
+    v_eventid       int4;
+BEGIN
+    SELECT json_build_object(
+        'job_id', j.jobid,
+        'step_id', v_stepid,
+        'status', v_status,
+        'description', COALESCE(v_description, ''),
+        'timestamp', to_char(now(), 'YYYY-MM-DD HH24:MI:SS'),
+        'custom_text', COALESCE(jn.jncustomtext, ''),
+        'notification', json_build_object(
+            'browser', COALESCE(jn.jnbrowser, true),
+            'email', COALESCE(jn.jnemail, false)
+        ),
+        'jlgid', jl.jssjlgid,
+        'jlgstatus', jl.jssstatus,
+        'start', jl.jssstart,
+        'duration', EXTRACT(EPOCH FROM COALESCE(jl.jssduration, now() - jl.jssstart)),
+        'step_status', jl.jssstepstatus,
+        -- Same row as the one of the job in the Job Monitor
+        'job', json_build_object(
+            'jobid', j.jobid,
+            'jobname', j.jobname,
+            'jobdesc', j.jobdesc,
+            'jobjclid', j.jobjclid,
+            'jobenabled', j.jobenabled,
+            'jobnextrun', j.jobnextrun,
+            'status', CASE
+                WHEN jl.jssstatus = 'r' THEN 'Running'
+                WHEN jl.jssstatus = 's' THEN 'Success'
+                WHEN jl.jssstatus = 'f' THEN 'Failed'
+                WHEN jl.jssstatus = 'i' THEN 'Internal Error'
+                WHEN jl.jssstatus = 'd' THEN 'Aborted'
+                WHEN j.jobenabled THEN 'Enabled'
+                ELSE 'Disabled'
+            END,
+            'start_time', jl.jssstart,
+            'duration', jl.jssduration,
+            'joblastrun', jl.jssstart,
+            'current_step', sl.jstname,
+            'current_step_status', CASE
+                WHEN jl.jssstepstatus IS NULL THEN NULL
+                WHEN jl.jssstepstatus = 'r' THEN 'Running'
+                WHEN jl.jssstepstatus = 's' THEN 'Success'
+                WHEN jl.jssstepstatus = 'f' THEN 'Failed'
+                WHEN jl.jssstepstatus = 'i' THEN 'Internal Error'
+                WHEN jl.jssstepstatus = 'd' THEN 'Aborted'
+                ELSE 'Unknown'
+            END,
+            'progress', CASE
+                WHEN jl.jssstatus = 'r' THEN
+                    COALESCE(jl.jssdonesteps::float * 100 / NULLIF(st.total_steps, 0), 0)
+                WHEN jl.jssstatus IN ('s', 'f', 'd', 'i') THEN 100
+                ELSE 0
+            END,
+            'total_steps', st.total_steps
+        ),
+        'summary', (
+            SELECT json_build_object(
+                'total_jobs', COUNT(*),
+                'enabled_jobs', COUNT(*) FILTER (WHERE sj.jobenabled),
+                'disabled_jobs', COUNT(*) FILTER (WHERE NOT sj.jobenabled),
+                'running_jobs', COUNT(*) FILTER (WHERE sjs.jssstatus = 'r'),
+                'successful_jobs', COUNT(*) FILTER (WHERE sjs.jssstatus = 's'),
+                'failed_jobs', COUNT(*) FILTER (WHERE sjs.jssstatus = 'f')
+            )
+              FROM pgagent.pga_job sj
+              LEFT JOIN pgagent.pga_job_state sjs ON sjs.jssjobid = sj.jobid
+        )
+    ) INTO v_payload
+      FROM pgagent.pga_job j
+      LEFT JOIN pgagent.pga_job_notification jn ON jn.jnjobid = j.jobid
+      LEFT JOIN pgagent.pga_job_state jl ON jl.jssjobid = j.jobid
+      LEFT JOIN pgagent.pga_jobstep sl ON sl.jstid = jl.jssjstid
+      LEFT JOIN LATERAL (
+        SELECT COUNT(*) AS total_steps
+          FROM pgagent.pga_jobstep
+         WHERE jstjobid = j.jobid
+      ) st ON true
+     WHERE j.jobid = v_jobid;
+
+    IF v_payload IS NULL THEN
+        -- The job has been deleted
+        v_payload := json_build_object(
+            'job_id', v_jobid, 'step_id', v_stepid, 'status', v_status,
+            'description', COALESCE(v_description, ''),
+            'timestamp', to_char(now(), 'YYYY-MM-DD HH24:MI:SS')
+        );
+    ELSIF octet_length(v_payload::text) > 7900 THEN
+        -- NOTIFY payloads are limited to 8000 bytes, store the event and
+        -- only send its id.
+        DELETE FROM pgagent.pga_job_event
+         WHERE jevtime < current_timestamp - interval '1 hour';
+
+        INSERT INTO pgagent.pga_job_event (jevjobid, jevpayload)
+        VALUES (v_jobid, v_payload)
+        RETURNING jevid INTO v_eventid;
+
+        v_payload := json_build_object(
+            'job_id', v_jobid, 'step_id', v_stepid, 'status', v_status,
+            'event_id', v_eventid
+        );
+    END IF;
+
+    PERFORM pg_notify('job_status_update', v_payload::text);
+END;
+$$ LANGUAGE 'plpgsql' VOLATILE;
+COMMENT ON FUNCTION pgagent.pga_job_status_notify(int4, int4, text, text) IS 'Send the status of a job, its latest run and the job summary on the job_status_update channel';
@@ -0,0 +1,158 @@
+/*
+// pgAgent - PostgreSQL Tools
+//
+// Copyright (C) 2002 - 2024, The pgAdmin Development Team
+// This software is released under the PostgreSQL Licence
+//
+// pgagent--4.3--4.4.sql - Upgrade the pgAgent schema from 4.3 to 4.4
+//
+*/
+
+\echo Use "ALTER EXTENSION pgagent UPDATE" to load this file. \quit
+
+CREATE TABLE pgagent.pga_job_event (
+jevid                serial               NOT NULL PRIMARY KEY,
+jevjobid             int4                 NOT NULL REFERENCES pgagent.pga_job (jobid) ON DELETE CASCADE ON UPDATE RESTRICT,
+jevtime              timestamptz          NOT NULL DEFAULT current_timestamp,
+jevpayload           json                 NOT NULL
+) WITHOUT OIDS;
+CREATE INDEX pga_job_event_jevtime ON pgagent.pga_job_event(jevtime);
+COMMENT ON TABLE pgagent.pga_job_event IS 'Job status notifications too large to be sent with NOTIFY.';
+
+
+CREATE OR REPLACE FUNCTION pgagent.pga_job_status_notify(int4, int4, text, text) RETURNS void AS $$
+DECLARE
+    v_jobid         ALIAS FOR $1;
+    v_stepid        ALIAS FOR $2;
+    v_status        ALIAS FOR $3;
+    v_description   ALIAS FOR $4;
+
+    v_payload       json;
+    v_eventid       int4;
+BEGIN
+    SELECT json_build_object(
+        'job_id', j.jobid,
+        'step_id', v_stepid,
+        'status', v_status,
+        'description', COALESCE(v_description, ''),
+        'timestamp', to_char(now(), 'YYYY-MM-DD HH24:MI:SS'),
+        'custom_text', COALESCE(jn.jncustomtext, ''),
+        'notification', json_build_object(
+            'browser', COALESCE(jn.jnbrowser, true),
+            'email', COALESCE(jn.jnemail, false)
+        ),
+        'jlgid', jl.jlgid,
+        'jlgstatus', jl.jlgstatus,
+        'start', jl.jlgstart,
+        'duration', EXTRACT(EPOCH FROM COALESCE(jl.jlgduration, now() - jl.jlgstart)),
+        'step_status', sl.jslstatus,
+        -- Same row as the one of the job in the Job Monitor
+        'job', json_build_object(
+            'jobid', j.jobid,
+            'jobname', j.jobname,
+            'jobdesc', j.jobdesc,
+            'jobenabled', j.jobenabled,
+            'jobnextrun', j.jobnextrun,
+            'status', CASE
+                WHEN jl.jlgstatus = 'r' THEN 'Running'
+                WHEN jl.jlgstatus = 's' THEN 'Success'
+                WHEN jl.jlgstatus = 'f' THEN 'Failed'
+                WHEN jl.jlgstatus = 'i' THEN 'Internal Error'
+                WHEN jl.jlgstatus = 'd' THEN 'Aborted'
+                WHEN j.jobenabled THEN 'Enabled'
+                ELSE 'Disabled'
+            END,
+            'start_time', jl.jlgstart,
+            'duration', jl.jlgduration,
+            'joblastrun', jl.jlgstart,
+            'current_step', sl.jstname,
+            'current_step_status', CASE
+                WHEN sl.jslstatus IS NULL THEN NULL
+                WHEN sl.jslstatus = 'r' THEN 'Running'
+                WHEN sl.jslstatus = 's' THEN 'Success'
+                WHEN sl.jslstatus = 'f' THEN 'Failed'
+                WHEN sl.jslstatus = 'i' THEN 'Internal Error'
+                WHEN sl.jslstatus = 'd' THEN 'Aborted'
+                ELSE 'Unknown'
+            END,
+            'progress', CASE
+                WHEN jl.jlgstatus = 'r' THEN
+                    COALESCE(pr.done_steps::float * 100 / NULLIF(st.total_steps, 0), 0)
+                WHEN jl.jlgstatus IN ('s', 'f', 'd', 'i') THEN 100
+                ELSE 0
+            END,
+            'total_steps', st.total_steps
+        ),
+        'summary', (
+            SELECT json_build_object(
+                'total_jobs', COUNT(*),
+                'enabled_jobs', COUNT(*) FILTER (WHERE sj.jobenabled),
+                'disabled_jobs', COUNT(*) FILTER (WHERE NOT sj.jobenabled),
+                'running_jobs', COUNT(*) FILTER (WHERE sjl.jlgstatus = 'r'),
+                'successful_jobs', COUNT(*) FILTER (WHERE sjl.jlgstatus = 's'),
+                'failed_jobs', COUNT(*) FILTER (WHERE sjl.jlgstatus = 'f')
+            )
+              FROM pgagent.pga_job sj
+              LEFT JOIN LATERAL (
+                SELECT jlgstatus FROM pgagent.pga_joblog
+                 WHERE jlgjobid = sj.jobid
+                 ORDER BY jlgid DESC LIMIT 1
+              ) sjl ON true
+        )
+    ) INTO v_payload
+      FROM pgagent.pga_job j
+      LEFT JOIN pgagent.pga_job_notification jn ON jn.jnjobid = j.jobid
+      LEFT JOIN LATERAL (
+        SELECT jlgid, jlgstatus, jlgstart, jlgduration
+          FROM pgagent.pga_joblog
+         WHERE jlgjobid = j.jobid
+         ORDER BY jlgid DESC LIMIT 1
+      ) jl ON true
+      LEFT JOIN LATERAL (
+        SELECT js.jstname, sl.jslstatus
+          FROM pgagent.pga_jobsteplog sl
+          JOIN pgagent.pga_jobstep js ON sl.jsljstid = js.jstid
+         WHERE sl.jsljlgid = jl.jlgid
+           AND (v_stepid IS NULL OR sl.jsljstid = v_stepid)
+         ORDER BY sl.jslstart DESC LIMIT 1
+      ) sl ON true
+      LEFT JOIN LATERAL (
+        SELECT COUNT(DISTINCT jsljstid) FILTER (
+                   WHERE jslstatus IN ('s', 'f', 'd', 'i')) AS done_steps
+          FROM pgagent.pga_jobsteplog
+         WHERE jsljlgid = jl.jlgid
+      ) pr ON jl.jlgstatus = 'r'
+      LEFT JOIN LATERAL (
+        SELECT COUNT(*) AS total_steps
+          FROM pgagent.pga_jobstep
+         WHERE jstjobid = j.jobid
+      ) st ON true
+     WHERE j.jobid = v_jobid;
+
+    IF v_payload IS NULL THEN
+        -- The job has been deleted
+        v_payload := json_build_object(
+            'job_id', v_jobid, 'step_id', v_stepid, 'status', v_status,
+            'description', COALESCE(v_description, ''),
+            'timestamp', to_char(now(), 'YYYY-MM-DD HH24:MI:SS')
+        );
+    ELSIF octet_length(v_payload::text) > 7900 THEN
+        -- NOTIFY payloads are limited to 8000 bytes, store the event and
+        -- only send its id.
+        DELETE FROM pgagent.pga_job_event
+         WHERE jevtime < current_timestamp - interval '1 hour';
+
+        INSERT INTO pgagent.pga_job_event (jevjobid, jevpayload)
+        VALUES (v_jobid, v_payload)
+        RETURNING jevid INTO v_eventid;
+
+        v_payload := json_build_object(
+            'job_id', v_jobid, 'step_id', v_stepid, 'status', v_status,
+            'event_id', v_eventid
+        );
+    END IF;
+
+    PERFORM pg_notify('job_status_update', v_payload::text);
+END;
+$$ LANGUAGE 'plpgsql' VOLATILE;
+COMMENT ON FUNCTION pgagent.pga_job_status_notify(int4, int4, text, text) IS 'Send the status of a job, its latest run and the job summary on the job_status_update channel';
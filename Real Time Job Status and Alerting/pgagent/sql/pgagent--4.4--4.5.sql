@@ -0,0 +1,19 @@
+/*
+// pgAgent - PostgreSQL Tools
+//
+// Copyright (C) 2002 - 2024, The pgAdmin Development Team
+// This software is released under the PostgreSQL Licence
+//
+// pgagent--4.4--4.5.sql - Upgrade the pgAgent schema from 4.4 to 4.5
+//
+*/
+
+\echo Use "ALTER EXTENSION pgagent UPDATE" to load this file. \quit
+
+-- The latest run of a job, and the latest step of a run, are read with a
+-- bounded index scan. The new indexes replace the single column ones.
+DROP INDEX IF EXISTS pgagent.pga_joblog_jobid;
+CREATE INDEX pga_joblog_jobid ON pgagent.pga_joblog(jlgjobid, jlgid DESC);
+
+DROP INDEX IF EXISTS pgagent.pga_jobsteplog_jslid;
+CREATE INDEX pga_jobsteplog_jslid ON pgagent.pga_jobsteplog(jsljlgid, jslstart DESC);
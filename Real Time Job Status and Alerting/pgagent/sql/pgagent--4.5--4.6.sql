@@ -0,0 +1,257 @@
+/*
+// pgAgent - PostgreSQL Tools
+//
+// Copyright (C) 2002 - 2024, The pgAdmin Development Team
+// This software is released under the PostgreSQL Licence
+//
+// pgagent--4.5--4.6.sql - Upgrade the pgAgent schema from 4.5 to 4.6
+//
+*/
+
+\echo Use "ALTER EXTENSION pgagent UPDATE" to load this file. \quit
+
+CREATE TABLE pgagent.pga_job_state (
+jssjobid             int4                 NOT NULL PRIMARY KEY REFERENCES pgagent.pga_job (jobid) ON DELETE CASCADE ON UPDATE RESTRICT,
+jssjlgid             int4                 NOT NULL,
+jssstatus            char                 NOT NULL,
+jssstart             timestamptz          NOT NULL,
+jssduration          interval             NULL,
+jssjstid             int4                 NULL,
+jssstepstatus        char                 NULL,
+jssdonesteps         int4                 NOT NULL DEFAULT 0,
+jsssuccesses         int8                 NOT NULL DEFAULT 0,
+jssfailures          int8                 NOT NULL DEFAULT 0
+) WITHOUT OIDS;
+COMMENT ON TABLE pgagent.pga_job_state IS 'Latest run of every job, maintained by the triggers on the job logs.';
+COMMENT ON COLUMN pgagent.pga_job_state.jssjlgid IS 'Latest run (pga_joblog.jlgid) of the job';
+COMMENT ON COLUMN pgagent.pga_job_state.jssjstid IS 'Latest step (pga_jobstep.jstid) of the latest run';
+COMMENT ON COLUMN pgagent.pga_job_state.jssdonesteps IS 'Number of finished steps of the latest run';
+COMMENT ON COLUMN pgagent.pga_job_state.jsssuccesses IS 'Number of successful runs of the job';
+COMMENT ON COLUMN pgagent.pga_job_state.jssfailures IS 'Number of failed, aborted or internal error runs of the job';
+
+
+CREATE OR REPLACE FUNCTION pgagent.pga_joblog_state_trigger() RETURNS trigger AS $$
+DECLARE
+    v_successes     int4 := 0;
+    v_failures      int4 := 0;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF NEW.jlgstatus = 's' THEN
+            v_successes := 1;
+        ELSIF NEW.jlgstatus IN ('f', 'i', 'd') THEN
+            v_failures := 1;
+        END IF;
+    ELSIF OLD.jlgstatus IS DISTINCT FROM NEW.jlgstatus THEN
+        IF NEW.jlgstatus = 's' THEN
+            v_successes := 1;
+        ELSIF NEW.jlgstatus IN ('f', 'i', 'd') AND OLD.jlgstatus NOT IN ('f', 'i', 'd') THEN
+            v_failures := 1;
+        END IF;
+    END IF;
+
+    -- Only the latest run of the job is kept, the counters cover every run.
+    UPDATE pgagent.pga_job_state
+       SET jssjlgid = GREATEST(jssjlgid, NEW.jlgid),
+           jssstatus = CASE WHEN NEW.jlgid >= jssjlgid THEN NEW.jlgstatus ELSE jssstatus END,
+           jssstart = CASE WHEN NEW.jlgid >= jssjlgid THEN NEW.jlgstart ELSE jssstart END,
+           jssduration = CASE WHEN NEW.jlgid >= jssjlgid THEN NEW.jlgduration ELSE jssduration END,
+           jssjstid = CASE WHEN NEW.jlgid > jssjlgid THEN NULL ELSE jssjstid END,
+           jssstepstatus = CASE WHEN NEW.jlgid > jssjlgid THEN NULL ELSE jssstepstatus END,
+           jssdonesteps = CASE WHEN NEW.jlgid > jssjlgid THEN 0 ELSE jssdonesteps END,
+           jsssuccesses = jsssuccesses + v_successes,
+           jssfailures = jssfailures + v_failures
+     WHERE jssjobid = NEW.jlgjobid;
+
+    IF NOT FOUND THEN
+        INSERT INTO pgagent.pga_job_state (jssjobid, jssjlgid, jssstatus, jssstart, jssduration, jsssuccesses, jssfailures)
+        VALUES (NEW.jlgjobid, NEW.jlgid, NEW.jlgstatus, NEW.jlgstart, NEW.jlgduration, v_successes, v_failures)
+        ON CONFLICT (jssjobid) DO NOTHING;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE 'plpgsql' VOLATILE;
+COMMENT ON FUNCTION pgagent.pga_joblog_state_trigger() IS 'Update the latest run and the run counters of the job.';
+
+CREATE TRIGGER pga_joblog_state_trigger AFTER INSERT OR UPDATE
+  ON pgagent.pga_joblog FOR EACH ROW
+  EXECUTE PROCEDURE pgagent.pga_joblog_state_trigger();
+COMMENT ON TRIGGER pga_joblog_state_trigger ON pgagent.pga_joblog IS 'Update the latest run and the run counters of the job.';
+
+
+CREATE OR REPLACE FUNCTION pgagent.pga_jobsteplog_state_trigger() RETURNS trigger AS $$
+DECLARE
+    v_done          int4 := 0;
+BEGIN
+    IF NEW.jslstatus IN ('s', 'f', 'i', 'd') THEN
+        IF TG_OP = 'INSERT' THEN
+            v_done := 1;
+        ELSIF OLD.jslstatus NOT IN ('s', 'f', 'i', 'd') THEN
+            v_done := 1;
+        END IF;
+    END IF;
+
+    UPDATE pgagent.pga_job_state
+       SET jssjstid = NEW.jsljstid,
+           jssstepstatus = NEW.jslstatus,
+           jssdonesteps = jssdonesteps + v_done
+     WHERE jssjobid = (SELECT jlgjobid FROM pgagent.pga_joblog WHERE jlgid = NEW.jsljlgid)
+       AND jssjlgid = NEW.jsljlgid;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE 'plpgsql' VOLATILE;
+COMMENT ON FUNCTION pgagent.pga_jobsteplog_state_trigger() IS 'Update the current step and the progress of the latest run of the job.';
+
+CREATE TRIGGER pga_jobsteplog_state_trigger AFTER INSERT OR UPDATE
+  ON pgagent.pga_jobsteplog FOR EACH ROW
+  EXECUTE PROCEDURE pgagent.pga_jobsteplog_state_trigger();
+COMMENT ON TRIGGER pga_jobsteplog_state_trigger ON pgagent.pga_jobsteplog IS 'Update the current step and the progress of the latest run of the job.';
+
+
+-- Build the state of the existing jobs from their logs.
+INSERT INTO pgagent.pga_job_state (jssjobid, jssjlgid, jssstatus, jssstart, jssduration, jssjstid, jssstepstatus, jssdonesteps, jsssuccesses, jssfailures)
+SELECT j.jobid, jl.jlgid, jl.jlgstatus, jl.jlgstart, jl.jlgduration,
+       sl.jsljstid, sl.jslstatus, COALESCE(pr.done_steps, 0),
+       rc.successes, rc.failures
+  FROM pgagent.pga_job j
+  JOIN LATERAL (
+    SELECT jlgid, jlgstatus, jlgstart, jlgduration
+      FROM pgagent.pga_joblog
+     WHERE jlgjobid = j.jobid
+     ORDER BY jlgid DESC LIMIT 1
+  ) jl ON true
+  LEFT JOIN LATERAL (
+    SELECT jsljstid, jslstatus
+      FROM pgagent.pga_jobsteplog
+     WHERE jsljlgid = jl.jlgid
+     ORDER BY jslstart DESC LIMIT 1
+  ) sl ON true
+  LEFT JOIN LATERAL (
+    SELECT COUNT(*) FILTER (WHERE jslstatus IN ('s', 'f', 'i', 'd')) AS done_steps
+      FROM pgagent.pga_jobsteplog
+     WHERE jsljlgid = jl.jlgid
+  ) pr ON true
+  JOIN LATERAL (
+    SELECT COUNT(*) FILTER (WHERE jlgstatus = 's') AS successes,
+           COUNT(*) FILTER (WHERE jlgstatus IN ('f', 'i', 'd')) AS failures
+      FROM pgagent.pga_joblog
+     WHERE jlgjobid = j.jobid
+  ) rc ON true
+ON CONFLICT (jssjobid) DO NOTHING;
+
+
+CREATE OR REPLACE FUNCTION pgagent.pga_job_status_notify(int4, int4, text, text) RETURNS void AS $$
+DECLARE
+    v_jobid         ALIAS FOR $1;
+    v_stepid        ALIAS FOR $2;
+    v_status        ALIAS FOR $3;
+    v_description   ALIAS FOR $4;
+
+    v_payload       json;
+    v_eventid       int4;
+BEGIN
+    SELECT json_build_object(
+        'job_id', j.jobid,
+        'step_id', v_stepid,
+        'status', v_status,
+        'description', COALESCE(v_description, ''),
+        'timestamp', to_char(now(), 'YYYY-MM-DD HH24:MI:SS'),
+        'custom_text', COALESCE(jn.jncustomtext, ''),
+        'notification', json_build_object(
+            'browser', COALESCE(jn.jnbrowser, true),
+            'email', COALESCE(jn.jnemail, false)
+        ),
+        'jlgid', jl.jssjlgid,
+        'jlgstatus', jl.jssstatus,
+        'start', jl.jssstart,
+        'duration', EXTRACT(EPOCH FROM COALESCE(jl.jssduration, now() - jl.jssstart)),
+        'step_status', jl.jssstepstatus,
+        -- Same row as the one of the job in the Job Monitor
+        'job', json_build_object(
+            'jobid', j.jobid,
+            'jobname', j.jobname,
+            'jobdesc', j.jobdesc,
+            'jobenabled', j.jobenabled,
+            'jobnextrun', j.jobnextrun,
+            'status', CASE
+                WHEN jl.jssstatus = 'r' THEN 'Running'
+                WHEN jl.jssstatus = 's' THEN 'Success'
+                WHEN jl.jssstatus = 'f' THEN 'Failed'
+                WHEN jl.jssstatus = 'i' THEN 'Internal Error'
+                WHEN jl.jssstatus = 'd' THEN 'Aborted'
+                WHEN j.jobenabled THEN 'Enabled'
+                ELSE 'Disabled'
+            END,
+            'start_time', jl.jssstart,
+            'duration', jl.jssduration,
+            'joblastrun', jl.jssstart,
+            'current_step', sl.jstname,
+            'current_step_status', CASE
+                WHEN jl.jssstepstatus IS NULL THEN NULL
+                WHEN jl.jssstepstatus = 'r' THEN 'Running'
+                WHEN jl.jssstepstatus = 's' THEN 'Success'
+                WHEN jl.jssstepstatus = 'f' THEN 'Failed'
+                WHEN jl.jssstepstatus = 'i' THEN 'Internal Error'
+                WHEN jl.jssstepstatus = 'd' THEN 'Aborted'
+                ELSE 'Unknown'
+            END,
+            'progress', CASE
+                WHEN jl.jssstatus = 'r' THEN
+                    COALESCE(jl.jssdonesteps::float * 100 / NULLIF(st.total_steps, 0), 0)
+                WHEN jl.jssstatus IN ('s', 'f', 'd', 'i') THEN 100
+                ELSE 0
+            END,
+            'total_steps', st.total_steps
+        ),
+        'summary', (
+            SELECT json_build_object(
+                'total_jobs', COUNT(*),
+                'enabled_jobs', COUNT(*) FILTER (WHERE sj.jobenabled),
+                'disabled_jobs', COUNT(*) FILTER (WHERE NOT sj.jobenabled),
+                'running_jobs', COUNT(*) FILTER (WHERE sjs.jssstatus = 'r'),
+                'successful_jobs', COUNT(*) FILTER (WHERE sjs.jssstatus = 's'),
+                'failed_jobs', COUNT(*) FILTER (WHERE sjs.jssstatus = 'f')
+            )
+              FROM pgagent.pga_job sj
+              LEFT JOIN pgagent.pga_job_state sjs ON sjs.jssjobid = sj.jobid
+        )
+    ) INTO v_payload
+      FROM pgagent.pga_job j
+      LEFT JOIN pgagent.pga_job_notification jn ON jn.jnjobid = j.jobid
+      LEFT JOIN pgagent.pga_job_state jl ON jl.jssjobid = j.jobid
+      LEFT JOIN pgagent.pga_jobstep sl ON sl.jstid = jl.jssjstid
+      LEFT JOIN LATERAL (
+        SELECT COUNT(*) AS total_steps
+          FROM pgagent.pga_jobstep
+         WHERE jstjobid = j.jobid
+      ) st ON true
+     WHERE j.jobid = v_jobid;
+
+    IF v_payload IS NULL THEN
+        -- The job has been deleted
+        v_payload := json_build_object(
+            'job_id', v_jobid, 'step_id', v_stepid, 'status', v_status,
+            'description', COALESCE(v_description, ''),
+            'timestamp', to_char(now(), 'YYYY-MM-DD HH24:MI:SS')
+        );
+    ELSIF octet_length(v_payload::text) > 7900 THEN
+        -- NOTIFY payloads are limited to 8000 bytes, store the event and
+        -- only send its id.
+        DELETE FROM pgagent.pga_job_event
+         WHERE jevtime < current_timestamp - interval '1 hour';
+
+        INSERT INTO pgagent.pga_job_event (jevjobid, jevpayload)
+        VALUES (v_jobid, v_payload)
+        RETURNING jevid INTO v_eventid;
+
+        v_payload := json_build_object(
+            'job_id', v_jobid, 'step_id', v_stepid, 'status', v_status,
+            'event_id', v_eventid
+        );
+    END IF;
+
+    PERFORM pg_notify('job_status_update', v_payload::text);
+END;
+$$ LANGUAGE 'plpgsql' VOLATILE;
+COMMENT ON FUNCTION pgagent.pga_job_status_notify(int4, int4, text, text) IS 'Send the status of a job, its latest run and the job summary on the job_status_update channel';
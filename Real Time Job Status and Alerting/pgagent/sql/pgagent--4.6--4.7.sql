@@ -0,0 +1,117 @@
+/*
+// pgAgent - PostgreSQL Tools
+//
+// Copyright (C) 2002 - 2024, The pgAdmin Development Team
+// This software is released under the PostgreSQL Licence
+//
+// pgagent--4.6--4.7.sql - Upgrade the pgAgent schema from 4.6 to 4.7
+//
+*/
+
+\echo Use "ALTER EXTENSION pgagent UPDATE" to load this file. \quit
+
+-- Today's runs are read by start time for the job history charts.
+CREATE INDEX pga_joblog_jlgstart ON pgagent.pga_joblog(jlgstart);
+
+
+CREATE TABLE pgagent.pga_job_daily (
+jdyjobid             int4                 NOT NULL REFERENCES pgagent.pga_job (jobid) ON DELETE CASCADE ON UPDATE RESTRICT,
+jdyday               date                 NOT NULL,
+jdyfirstlgid         int4                 NOT NULL,
+jdyruns              int4                 NOT NULL DEFAULT 0,
+jdysuccesses         int4                 NOT NULL DEFAULT 0,
+jdyfailures          int4                 NOT NULL DEFAULT 0,
+jdyerrors            int4                 NOT NULL DEFAULT 0,
+jdyaborted           int4                 NOT NULL DEFAULT 0,
+jdyduration          interval             NULL,
+jdyavgduration       interval             NULL,
+jdyp95duration       interval             NULL,
+PRIMARY KEY (jdyjobid, jdyday)
+) WITHOUT OIDS;
+CREATE INDEX pga_job_daily_jdyday ON pgagent.pga_job_daily(jdyday);
+COMMENT ON TABLE pgagent.pga_job_daily IS 'Finished runs of every job per day, maintained by the triggers on pga_joblog.';
+COMMENT ON COLUMN pgagent.pga_job_daily.jdyday IS 'Start date of the runs';
+COMMENT ON COLUMN pgagent.pga_job_daily.jdyfirstlgid IS 'First finished run (pga_joblog.jlgid) of the day';
+COMMENT ON COLUMN pgagent.pga_job_daily.jdyduration IS 'Total duration of the runs';
+
+
+CREATE OR REPLACE FUNCTION pgagent.pga_job_daily_refresh(int4, date, int4) RETURNS void AS $$
+DECLARE
+    v_jobid         ALIAS FOR $1;
+    v_day           ALIAS FOR $2;
+    v_firstlgid     ALIAS FOR $3;
+
+    v_first         int4;
+BEGIN
+    -- The runs of the day are found from the first one finished, with a
+    -- bounded scan of pga_joblog_jobid.
+    v_first := LEAST(v_firstlgid, (
+        SELECT jdyfirstlgid FROM pgagent.pga_job_daily
+         WHERE jdyjobid = v_jobid AND jdyday = v_day
+    ));
+
+    INSERT INTO pgagent.pga_job_daily (jdyjobid, jdyday, jdyfirstlgid, jdyruns, jdysuccesses, jdyfailures, jdyerrors, jdyaborted, jdyduration, jdyavgduration, jdyp95duration)
+    SELECT v_jobid, v_day, MIN(jlgid), COUNT(*),
+           COUNT(*) FILTER (WHERE jlgstatus = 's'),
+           COUNT(*) FILTER (WHERE jlgstatus = 'f'),
+           COUNT(*) FILTER (WHERE jlgstatus = 'i'),
+           COUNT(*) FILTER (WHERE jlgstatus = 'd'),
+           SUM(jlgduration), AVG(jlgduration),
+           percentile_cont(0.95) WITHIN GROUP (ORDER BY jlgduration)
+      FROM pgagent.pga_joblog
+     WHERE jlgjobid = v_jobid AND jlgid >= v_first
+       AND jlgstart >= v_day AND jlgstart < v_day + 1
+       AND jlgstatus IN ('s', 'f', 'i', 'd')
+    HAVING COUNT(*) > 0
+    ON CONFLICT (jdyjobid, jdyday) DO UPDATE SET
+        jdyfirstlgid = EXCLUDED.jdyfirstlgid,
+        jdyruns = EXCLUDED.jdyruns,
+        jdysuccesses = EXCLUDED.jdysuccesses,
+        jdyfailures = EXCLUDED.jdyfailures,
+        jdyerrors = EXCLUDED.jdyerrors,
+        jdyaborted = EXCLUDED.jdyaborted,
+        jdyduration = EXCLUDED.jdyduration,
+        jdyavgduration = EXCLUDED.jdyavgduration,
+        jdyp95duration = EXCLUDED.jdyp95duration;
+END;
+$$ LANGUAGE 'plpgsql' VOLATILE;
+COMMENT ON FUNCTION pgagent.pga_job_daily_refresh(int4, date, int4) IS 'Aggregate the finished runs of a job on a day, from the given run on.';
+
+CREATE OR REPLACE FUNCTION pgagent.pga_joblog_daily_trigger() RETURNS trigger AS $$
+BEGIN
+    -- Refresh the days of the runs finished by the statement, once per job
+    -- and day whatever the number of rows.
+    IF TG_OP = 'INSERT' THEN
+        PERFORM pgagent.pga_job_daily_refresh(jlgjobid, jlgstart::date, MIN(jlgid))
+           FROM pga_new_runs
+          WHERE jlgstatus IN ('s', 'f', 'i', 'd')
+          GROUP BY jlgjobid, jlgstart::date;
+    ELSE
+        PERFORM pgagent.pga_job_daily_refresh(n.jlgjobid, n.jlgstart::date, MIN(n.jlgid))
+           FROM pga_new_runs n
+           JOIN pga_old_runs o ON o.jlgid = n.jlgid
+          WHERE n.jlgstatus IN ('s', 'f', 'i', 'd')
+            AND o.jlgstatus NOT IN ('s', 'f', 'i', 'd')
+          GROUP BY n.jlgjobid, n.jlgstart::date;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE 'plpgsql' VOLATILE;
+COMMENT ON FUNCTION pgagent.pga_joblog_daily_trigger() IS 'Update the daily rollups of the finished runs.';
+
+CREATE TRIGGER pga_joblog_daily_insert_trigger AFTER INSERT
+  ON pgagent.pga_joblog REFERENCING NEW TABLE AS pga_new_runs
+  FOR EACH STATEMENT EXECUTE PROCEDURE pgagent.pga_joblog_daily_trigger();
+COMMENT ON TRIGGER pga_joblog_daily_insert_trigger ON pgagent.pga_joblog IS 'Update the daily rollups of the finished runs.';
+
+CREATE TRIGGER pga_joblog_daily_update_trigger AFTER UPDATE
+  ON pgagent.pga_joblog REFERENCING OLD TABLE AS pga_old_runs NEW TABLE AS pga_new_runs
+  FOR EACH STATEMENT EXECUTE PROCEDURE pgagent.pga_joblog_daily_trigger();
+COMMENT ON TRIGGER pga_joblog_daily_update_trigger ON pgagent.pga_joblog IS 'Update the daily rollups of the finished runs.';
+
+
+-- Build the rollups of the existing runs.
+SELECT pgagent.pga_job_daily_refresh(jlgjobid, jlgstart::date, MIN(jlgid))
+  FROM pgagent.pga_joblog
+ WHERE jlgstatus IN ('s', 'f', 'i', 'd')
+ GROUP BY jlgjobid, jlgstart::date;
@@ -0,0 +1,14 @@
+/*
+// pgAgent - PostgreSQL Tools
+//
+// Copyright (C) 2002 - 2024, The pgAdmin Development Team
+// This software is released under the PostgreSQL Licence
+//
+// pgagent--4.7--4.8.sql - Upgrade the pgAgent schema from 4.7 to 4.8
+//
+*/
+
+\echo Use "ALTER EXTENSION pgagent UPDATE" to load this file. \quit
+
+-- The job log is paged by (jlgstart, jlgid), newest first.
+CREATE INDEX pga_joblog_jobstart ON pgagent.pga_joblog(jlgjobid, jlgstart DESC, jlgid DESC);
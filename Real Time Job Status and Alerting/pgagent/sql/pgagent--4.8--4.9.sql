@@ -0,0 +1,14 @@
+/*
+// pgAgent - PostgreSQL Tools
+//
+// Copyright (C) 2002 - 2024, The pgAdmin Development Team
+// This software is released under the PostgreSQL Licence
+//
+// pgagent--4.8--4.9.sql - Upgrade the pgAgent schema from 4.8 to 4.9
+//
+*/
+
+\echo Use "ALTER EXTENSION pgagent UPDATE" to load this file. \quit
+
+-- The step statistics are paged by jslid, newest first.
+CREATE INDEX pga_jobsteplog_jstid ON pgagent.pga_jobsteplog(jsljstid, jslid DESC);
@@ -0,0 +1,270 @@
+/*
+// pgAgent - PostgreSQL Tools
+//
+// Copyright (C) 2002 - 2024, The pgAdmin Development Team
+// This software is released under the PostgreSQL Licence
+//
+// pgagent--4.9--4.10.sql - Upgrade the pgAgent schema from 4.9 to 4.10
+//
+*/
+
+\echo Use "ALTER EXTENSION pgagent UPDATE" to load this file. \quit
+
+-- The bool arrays of the schedules are kept as bitmasks, so that the next
+-- run of a schedule is found with bit scans instead of array loops.
+CREATE OR REPLACE FUNCTION pgagent.pga_schedule_mask(bool[]) RETURNS int8 AS $$
+    SELECT COALESCE(bit_or(1::int8 << (i - 1)::int4), 0)
+      FROM unnest($1) WITH ORDINALITY AS a(v, i)
+     WHERE v
+$$ LANGUAGE 'sql' IMMUTABLE STRICT;
+COMMENT ON FUNCTION pgagent.pga_schedule_mask(bool[]) IS 'Returns a schedule bool array as a bitmask, bit i being set for the element i + 1';
+
+ALTER TABLE pgagent.pga_schedule
+    ADD COLUMN jscminutesmask int8 GENERATED ALWAYS AS (pgagent.pga_schedule_mask(jscminutes)) STORED,
+    ADD COLUMN jschoursmask int8 GENERATED ALWAYS AS (pgagent.pga_schedule_mask(jschours)) STORED,
+    ADD COLUMN jscweekdaysmask int8 GENERATED ALWAYS AS (pgagent.pga_schedule_mask(jscweekdays)) STORED,
+    ADD COLUMN jscmonthdaysmask int8 GENERATED ALWAYS AS (pgagent.pga_schedule_mask(jscmonthdays)) STORED,
+    ADD COLUMN jscmonthsmask int8 GENERATED ALWAYS AS (pgagent.pga_schedule_mask(jscmonths)) STORED,
+    ADD COLUMN jscoccurrencemask int8 GENERATED ALWAYS AS (pgagent.pga_schedule_mask(jscoccurrence)) STORED;
+
+CREATE OR REPLACE FUNCTION pgagent.pga_first_bit(int8, int4) RETURNS int4 AS $$
+    SELECT CASE WHEN ($1 >> $2) = 0 THEN NULL
+                ELSE $2 + round(ln((($1 >> $2) & -($1 >> $2))::float8) / ln(2::float8))::int4
+           END
+$$ LANGUAGE 'sql' IMMUTABLE STRICT;
+COMMENT ON FUNCTION pgagent.pga_first_bit(int8, int4) IS 'Returns the lowest bit set in $1 at or above bit $2, or NULL if there is none';
+
+
+CREATE OR REPLACE FUNCTION pgagent.pga_month_days(int4, int4) RETURNS int4 AS $$
+    SELECT date_part('DAY', make_date($1, $2, 1) + '1 Month - 1 Day'::interval)::int4
+$$ LANGUAGE 'sql' IMMUTABLE STRICT;
+COMMENT ON FUNCTION pgagent.pga_month_days(int4, int4) IS 'Returns the number of days of the month $2 of the year $1';
+
+
+CREATE OR REPLACE FUNCTION pgagent.pga_next_schedule_mask(int4, timestamptz, timestamptz, int8, int8, int8, int8, int8, int8) RETURNS timestamptz AS $$
+DECLARE
+    jscid           ALIAS FOR $1;
+    jscstart        ALIAS FOR $2;
+    jscend          ALIAS FOR $3;
+    minutes         ALIAS FOR $4;
+    hours           ALIAS FOR $5;
+    weekdays        ALIAS FOR $6;
+    monthdays       ALIAS FOR $7;
+    months          ALIAS FOR $8;
+    occurrences     ALIAS FOR $9;
+
+    nextrun         timestamp;
+    runafter        timestamp;
+
+    foundval        bool := FALSE;
+    daytweak        bool := FALSE;
+    minutetweak     bool := FALSE;
+
+    b               int4;
+    nextminute      int4;
+    nexthour        int4;
+    nextday         int4;
+    nextmonth       int4;
+    nextyear        int4;
+
+BEGIN
+    -- No valid start date has been specified
+    IF jscstart IS NULL THEN RETURN NULL; END IF;
+
+    -- The schedule is past its end date
+    IF jscend IS NOT NULL AND jscend < now() THEN RETURN NULL; END IF;
+
+    runafter := greatest(date_trunc('MINUTE', jscstart), date_trunc('MINUTE', (now() + '1 Minute'::interval)));
+
+    --
+    -- The same search as pga_next_schedule, finding the next selected month,
+    -- day, hour and minute with pga_first_bit instead of a loop over the
+    -- array, so that both return the same runs.
+    --
+    LOOP
+        nextyear := date_part('YEAR', runafter);
+        nextmonth := date_part('MONTH', runafter);
+        nextday := date_part('DAY', runafter);
+
+        --
+        -- Get the next run month
+        --
+        b := pgagent.pga_first_bit(months, nextmonth - 1);
+        IF b IS NULL AND months != 0 THEN
+            -- Wrap into next year
+            b := pgagent.pga_first_bit(months, 0);
+            nextyear := nextyear + 1;
+        END IF;
+        IF b IS NOT NULL THEN
+            nextmonth := b + 1;
+            foundval := TRUE;
+        END IF;
+
+        --
+        -- Get the next run day
+        --
+        IF (nextyear > date_part('YEAR', runafter) OR nextmonth > date_part('MONTH', runafter)) THEN
+            nextday := 1;
+            b := pgagent.pga_first_bit(monthdays, 0);
+        ELSE
+            b := pgagent.pga_first_bit(monthdays, nextday - 1);
+            IF b IS NULL AND monthdays != 0 THEN
+                -- Wrap into next month
+                b := pgagent.pga_first_bit(monthdays, 0);
+                IF nextmonth = 12 THEN
+                    nextyear := nextyear + 1;
+                    nextmonth := 1;
+                ELSE
+                    nextmonth := nextmonth + 1;
+                END IF;
+            END IF;
+        END IF;
+        IF b IS NOT NULL THEN
+            nextday := b + 1;
+            foundval := TRUE;
+        END IF;
+
+        -- Was the last day flag selected?
+        IF nextday = 32 THEN
+            nextday := pgagent.pga_month_days(nextyear, nextmonth);
+        END IF;
+
+        --
+        -- Get the next run hour
+        --
+        IF (nextyear > date_part('YEAR', runafter) OR nextmonth > date_part('MONTH', runafter) OR nextday > date_part('DAY', runafter) OR daytweak = TRUE) THEN
+            nexthour := 0;
+            b := pgagent.pga_first_bit(hours, 0);
+        ELSE
+            nexthour := date_part('HOUR', runafter);
+            b := pgagent.pga_first_bit(hours, nexthour);
+            IF b IS NULL AND hours != 0 THEN
+                -- Wrap into next day
+                b := pgagent.pga_first_bit(hours, 0);
+                IF nextday = pgagent.pga_month_days(nextyear, nextmonth) THEN
+                    nextday := 1;
+                    IF nextmonth = 12 THEN
+                        nextyear := nextyear + 1;
+                        nextmonth := 1;
+                    ELSE
+                        nextmonth := nextmonth + 1;
+                    END IF;
+                ELSE
+                    nextday := nextday + 1;
+                END IF;
+            END IF;
+        END IF;
+        IF b IS NOT NULL THEN
+            nexthour := b;
+            foundval := TRUE;
+        END IF;
+
+        --
+        -- Get the next run minute
+        --
+        IF (nextyear > date_part('YEAR', runafter) OR nextmonth > date_part('MONTH', runafter) OR nextday > date_part('DAY', runafter) OR nexthour > date_part('HOUR', runafter) OR daytweak = TRUE) THEN
+            nextminute := 0;
+            IF minutetweak = TRUE THEN
+                b := pgagent.pga_first_bit(minutes, 0);
+            ELSE
+                -- pga_next_schedule searches from the minute of runafter here
+                b := pgagent.pga_first_bit(minutes, greatest(date_part('MINUTE', runafter)::int4 - 1, 0));
+            END IF;
+        ELSE
+            nextminute := date_part('MINUTE', runafter);
+            b := pgagent.pga_first_bit(minutes, nextminute);
+            IF b IS NULL AND minutes != 0 THEN
+                -- Wrap into next hour
+                b := pgagent.pga_first_bit(minutes, 0);
+                IF nexthour = 23 THEN
+                    nexthour := 0;
+                    IF nextday = pgagent.pga_month_days(nextyear, nextmonth) THEN
+                        nextday := 1;
+                        IF nextmonth = 12 THEN
+                            nextyear := nextyear + 1;
+                            nextmonth := 1;
+                        ELSE
+                            nextmonth := nextmonth + 1;
+                        END IF;
+                    ELSE
+                        nextday := nextday + 1;
+                    END IF;
+                ELSE
+                    nexthour := nexthour + 1;
+                END IF;
+            END IF;
+        END IF;
+        IF b IS NOT NULL THEN
+            nextminute := b;
+            foundval := TRUE;
+        END IF;
+
+        -- Build the result, and check it is not the same as runafter - this may
+        -- happen if all array entries are set to false. In this case, add a minute.
+        nextrun := make_timestamp(nextyear, nextmonth, nextday, nexthour, nextminute, 0)::timestamptz;
+
+        IF nextrun = runafter AND foundval = FALSE THEN
+            nextrun := nextrun + '1 Minute'::interval;
+        END IF;
+
+        -- If the result is past the end date, exit.
+        IF nextrun > jscend THEN
+            RETURN NULL;
+        END IF;
+
+        IF NOT ((minutes = 0 OR ((minutes >> date_part('MINUTE', nextrun)::int4) & 1) = 1) AND
+                (hours = 0 OR ((hours >> date_part('HOUR', nextrun)::int4) & 1) = 1) AND
+                (months = 0 OR ((months >> (date_part('MONTH', nextrun)::int4 - 1)) & 1) = 1) AND
+                (monthdays = 0 OR ((monthdays >> (date_part('DAY', nextrun)::int4 - 1)) & 1) = 1 OR
+                 -- The last day flag alone, which also accepts the 28th of February
+                 (monthdays = (1::int8 << 31) AND
+                  (date_part('DAY', nextrun) = pgagent.pga_month_days(date_part('YEAR', nextrun)::int4, date_part('MONTH', nextrun)::int4) OR
+                   (date_part('MONTH', nextrun) = 2 AND date_part('DAY', nextrun) = 28))))) THEN
+            -- The wrapped values carried the nextrun onto an invalid time or date
+            runafter := nextrun + '1 Minute'::interval;
+            minutetweak := TRUE;
+            daytweak := FALSE;
+        ELSIF NOT (weekdays = 0 OR ((weekdays >> date_part('DOW', nextrun)::int4) & 1) = 1) OR
+              NOT (occurrences = 0 OR ((occurrences >> ((date_part('DAY', nextrun)::int4 - 1) / 7)) & 1) = 1) THEN
+            -- We're on the wrong week day, or its wrong occurrence in the
+            -- month - increment a day and try again.
+            runafter := nextrun + '1 Day'::interval;
+            minutetweak := FALSE;
+            daytweak := TRUE;
+        ELSIF EXISTS (
+            SELECT 1 FROM pgagent.pga_exception
+             WHERE jexscid = jscid
+               AND ((jexdate = nextrun::date AND jextime = nextrun::time) OR
+                    (jexdate = nextrun::date AND jextime IS NULL) OR
+                    (jexdate IS NULL AND jextime = nextrun::time))) THEN
+            -- Nuts - found an exception. Increment the time and try again
+            runafter := nextrun + '1 Minute'::interval;
+            minutetweak := TRUE;
+            daytweak := FALSE;
+        ELSE
+            RETURN nextrun;
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE 'plpgsql' VOLATILE;
+COMMENT ON FUNCTION pgagent.pga_next_schedule_mask(int4, timestamptz, timestamptz, int8, int8, int8, int8, int8, int8) IS 'Calculates the next runtime for a given schedule from its bitmasks';
+
+
+CREATE OR REPLACE FUNCTION pgagent.pga_job_trigger()
+  RETURNS "trigger" AS
+'
+BEGIN
+    IF NEW.jobenabled THEN
+        IF NEW.jobnextrun IS NULL THEN
+             SELECT INTO NEW.jobnextrun
+                    MIN(pgagent.pga_next_schedule_mask(jscid, jscstart, jscend, jscminutesmask, jschoursmask, jscweekdaysmask, jscmonthdaysmask, jscmonthsmask, jscoccurrencemask))
+               FROM pgagent.pga_schedule
+              WHERE jscenabled AND jscjobid=OLD.jobid;
+        END IF;
+    ELSE
+        NEW.jobnextrun := NULL;
+    END IF;
+    RETURN NEW;
+END;
+'
+  LANGUAGE 'plpgsql' VOLATILE;
@@ -80,6 +80,15 @@ COMMENT ON COLUMN pgagent.pga_jobstep.jstonerror IS 'What to do if step returns
 
 
 
+CREATE OR REPLACE FUNCTION pgagent.pga_schedule_mask(bool[]) RETURNS int8 AS $$
+    SELECT COALESCE(bit_or(1::int8 << (i - 1)::int4), 0)
+      FROM unnest($1) WITH ORDINALITY AS a(v, i)
+     WHERE v
+$$ LANGUAGE 'sql' IMMUTABLE STRICT;
+COMMENT ON FUNCTION pgagent.pga_schedule_mask(bool[]) IS 'Returns a schedule bool array as a bitmask, bit i being set for the element i + 1';
+
+
+
 CREATE TABLE pgagent.pga_schedule (
 jscid                serial               NOT NULL PRIMARY KEY,
 jscjobid             int4                 NOT NULL REFERENCES pgagent.pga_job (jobid) ON DELETE CASCADE ON UPDATE RESTRICT,
@@ -94,6 +103,12 @@ jscweekdays          bool[7]              NOT NULL DEFAULT '{f,f,f,f,f,f,f}',
 jscmonthdays         bool[32]             NOT NULL DEFAULT '{f,f,f,f,f,f,f,f,f,f,f,f,f,f,f,f,f,f,f,f,f,f,f,f,f,f,f,f,f,f,f,f}',
 jscmonths            bool[12]             NOT NULL DEFAULT '{f,f,f,f,f,f,f,f,f,f,f,f}',
 jscoccurrence         bool[5]              NOT NULL DEFAULT '{f,f,f,f,f}',
+jscminutesmask       int8                 GENERATED ALWAYS AS (pgagent.pga_schedule_mask(jscminutes)) STORED,
+jschoursmask         int8                 GENERATED ALWAYS AS (pgagent.pga_schedule_mask(jschours)) STORED,
+jscweekdaysmask      int8                 GENERATED ALWAYS AS (pgagent.pga_schedule_mask(jscweekdays)) STORED,
+jscmonthdaysmask     int8                 GENERATED ALWAYS AS (pgagent.pga_schedule_mask(jscmonthdays)) STORED,
+jscmonthsmask        int8                 GENERATED ALWAYS AS (pgagent.pga_schedule_mask(jscmonths)) STORED,
+jscoccurrencemask    int8                 GENERATED ALWAYS AS (pgagent.pga_schedule_mask(jscoccurrence)) STORED,
 CONSTRAINT pga_schedule_jscminutes_size CHECK (array_upper(jscminutes, 1) = 60),
 CONSTRAINT pga_schedule_jschours_size CHECK (array_upper(jschours, 1) = 24),
 CONSTRAINT pga_schedule_jscweekdays_size CHECK (array_upper(jscweekdays, 1) = 7),
@@ -125,7 +140,9 @@ jlgstatus            char                 NOT NULL CHECK (jlgstatus IN ('r', 's'
 jlgstart             timestamptz          NOT NULL DEFAULT current_timestamp,
 jlgduration          interval             NULL
 ) WITHOUT OIDS;
-CREATE INDEX pga_joblog_jobid ON pgagent.pga_joblog(jlgjobid);
+CREATE INDEX pga_joblog_jobid ON pgagent.pga_joblog(jlgjobid, jlgid DESC);
+CREATE INDEX pga_joblog_jlgstart ON pgagent.pga_joblog(jlgstart);
+CREATE INDEX pga_joblog_jobstart ON pgagent.pga_joblog(jlgjobid, jlgstart DESC, jlgid DESC);
 COMMENT ON TABLE pgagent.pga_joblog IS 'Job run logs.';
 COMMENT ON COLUMN pgagent.pga_joblog.jlgstatus IS 'Status of job: r=running, s=successfully finished, f=failed, i=no steps to execute, d=aborted';
 
@@ -141,7 +158,8 @@ jslstart             timestamptz          NOT NULL DEFAULT current_timestamp,
 jslduration          interval             NULL,
 jsloutput            text
 ) WITHOUT OIDS;
-CREATE INDEX pga_jobsteplog_jslid ON pgagent.pga_jobsteplog(jsljlgid);
+CREATE INDEX pga_jobsteplog_jslid ON pgagent.pga_jobsteplog(jsljlgid, jslstart DESC);
+CREATE INDEX pga_jobsteplog_jstid ON pgagent.pga_jobsteplog(jsljstid, jslid DESC);
 COMMENT ON TABLE pgagent.pga_jobsteplog IS 'Job step run logs.';
 COMMENT ON COLUMN pgagent.pga_jobsteplog.jslstatus IS 'Status of job step: r=running, s=successfully finished,  f=failed stopping job, i=ignored failure, d=aborted';
 COMMENT ON COLUMN pgagent.pga_jobsteplog.jslresult IS 'Return code of job step';
@@ -181,6 +199,186 @@ CREATE UNIQUE INDEX pga_job_notification_jnjobid_unique
     ON pgagent.pga_job_notification (jnjobid);
 
 
+CREATE TABLE pgagent.pga_job_event (
+jevid                serial               NOT NULL PRIMARY KEY,
+jevjobid             int4                 NOT NULL REFERENCES pgagent.pga_job (jobid) ON DELETE CASCADE ON UPDATE RESTRICT,
+jevtime              timestamptz          NOT NULL DEFAULT current_timestamp,
+jevpayload           json                 NOT NULL
+) WITHOUT OIDS;
+CREATE INDEX pga_job_event_jevtime ON pgagent.pga_job_event(jevtime);
+COMMENT ON TABLE pgagent.pga_job_event IS 'Job status notifications too large to be sent with NOTIFY.';
+
+
+CREATE TABLE pgagent.pga_job_state (
+jssjobid             int4                 NOT NULL PRIMARY KEY REFERENCES pgagent.pga_job (jobid) ON DELETE CASCADE ON UPDATE RESTRICT,
+jssjlgid             int4                 NOT NULL,
+jssstatus            char                 NOT NULL,
+jssstart             timestamptz          NOT NULL,
+jssduration          interval             NULL,
+jssjstid             int4                 NULL,
+jssstepstatus        char                 NULL,
+jssdonesteps         int4                 NOT NULL DEFAULT 0,
+jsssuccesses         int8                 NOT NULL DEFAULT 0,
+jssfailures          int8                 NOT NULL DEFAULT 0
+) WITHOUT OIDS;
+COMMENT ON TABLE pgagent.pga_job_state IS 'Latest run of every job, maintained by the triggers on the job logs.';
+COMMENT ON COLUMN pgagent.pga_job_state.jssjlgid IS 'Latest run (pga_joblog.jlgid) of the job';
+COMMENT ON COLUMN pgagent.pga_job_state.jssjstid IS 'Latest step (pga_jobstep.jstid) of the latest run';
+COMMENT ON COLUMN pgagent.pga_job_state.jssdonesteps IS 'Number of finished steps of the latest run';
+COMMENT ON COLUMN pgagent.pga_job_state.jsssuccesses IS 'Number of successful runs of the job';
+COMMENT ON COLUMN pgagent.pga_job_state.jssfailures IS 'Number of failed, aborted or internal error runs of the job';
+
+
+CREATE TABLE pgagent.pga_job_daily (
+jdyjobid             int4                 NOT NULL REFERENCES pgagent.pga_job (jobid) ON DELETE CASCADE ON UPDATE RESTRICT,
+jdyday               date                 NOT NULL,
+jdyfirstlgid         int4                 NOT NULL,
+jdyruns              int4                 NOT NULL DEFAULT 0,
+jdysuccesses         int4                 NOT NULL DEFAULT 0,
+jdyfailures          int4                 NOT NULL DEFAULT 0,
+jdyerrors            int4                 NOT NULL DEFAULT 0,
+jdyaborted           int4                 NOT NULL DEFAULT 0,
+jdyduration          interval             NULL,
+jdyavgduration       interval             NULL,
+jdyp95duration       interval             NULL,
+PRIMARY KEY (jdyjobid, jdyday)
+) WITHOUT OIDS;
+CREATE INDEX pga_job_daily_jdyday ON pgagent.pga_job_daily(jdyday);
+COMMENT ON TABLE pgagent.pga_job_daily IS 'Finished runs of every job per day, maintained by the triggers on pga_joblog.';
+COMMENT ON COLUMN pgagent.pga_job_daily.jdyday IS 'Start date of the runs';
+COMMENT ON COLUMN pgagent.pga_job_daily.jdyfirstlgid IS 'First finished run (pga_joblog.jlgid) of the day';
+COMMENT ON COLUMN pgagent.pga_job_daily.jdyduration IS 'Total duration of the runs';
+
+
+CREATE TABLE pgagent.pga_log_retention (
+lrtid                serial               NOT NULL PRIMARY KEY,
+lrtjclid             int4                 NULL REFERENCES pgagent.pga_jobclass (jclid) ON DELETE CASCADE ON UPDATE RESTRICT,
+lrtkeep              interval             NOT NULL CHECK (lrtkeep > '0'::interval),
+lrtdetach            bool                 NOT NULL DEFAULT false
+) WITHOUT OIDS;
+CREATE UNIQUE INDEX pga_log_retention_jclid ON pgagent.pga_log_retention (COALESCE(lrtjclid, 0));
+COMMENT ON TABLE pgagent.pga_log_retention IS 'Retention of the job logs, globally when lrtjclid is NULL or for a job class';
+COMMENT ON COLUMN pgagent.pga_log_retention.lrtkeep IS 'Age of the oldest runs kept';
+COMMENT ON COLUMN pgagent.pga_log_retention.lrtdetach IS 'Detach the expired partitions of the logs instead of dropping them, for the global retention';
+
+
+CREATE OR REPLACE FUNCTION pgagent.pga_job_status_notify(int4, int4, text, text) RETURNS void AS $$
+DECLARE
+    v_jobid         ALIAS FOR $1;
+    v_stepid        ALIAS FOR $2;
+    v_status        ALIAS FOR $3;
+    v_description   ALIAS FOR $4;
+
+    v_payload       json;
+    v_eventid       int4;
+BEGIN
+    SELECT json_build_object(
+        'job_id', j.jobid,
+        'step_id', v_stepid,
+        'status', v_status,
+        'description', COALESCE(v_description, ''),
+        'timestamp', to_char(now(), 'YYYY-MM-DD HH24:MI:SS'),
+        'custom_text', COALESCE(jn.jncustomtext, ''),
+        'notification', json_build_object(
+            'browser', COALESCE(jn.jnbrowser, true),
+            'email', COALESCE(jn.jnemail, false)
+        ),
+        'jlgid', jl.jssjlgid,
+        'jlgstatus', jl.jssstatus,
+        'start', jl.jssstart,
+        'duration', EXTRACT(EPOCH FROM COALESCE(jl.jssduration, now() - jl.jssstart)),
+        'step_status', jl.jssstepstatus,
+        -- Same row as the one of the job in the Job Monitor
+        'job', json_build_object(
+            'jobid', j.jobid,
+            'jobname', j.jobname,
+            'jobdesc', j.jobdesc,
+            'jobjclid', j.jobjclid,
+            'jobenabled', j.jobenabled,
+            'jobnextrun', j.jobnextrun,
+            'status', CASE
+                WHEN jl.jssstatus = 'r' THEN 'Running'
+                WHEN jl.jssstatus = 's' THEN 'Success'
+                WHEN jl.jssstatus = 'f' THEN 'Failed'
+                WHEN jl.jssstatus = 'i' THEN 'Internal Error'
+                WHEN jl.jssstatus = 'd' THEN 'Aborted'
+                WHEN j.jobenabled THEN 'Enabled'
+                ELSE 'Disabled'
+            END,
+            'start_time', jl.jssstart,
+            'duration', jl.jssduration,
+            'joblastrun', jl.jssstart,
+            'current_step', sl.jstname,
+            'current_step_status', CASE
+                WHEN jl.jssstepstatus IS NULL THEN NULL
+                WHEN jl.jssstepstatus = 'r' THEN 'Running'
+                WHEN jl.jssstepstatus = 's' THEN 'Success'
+                WHEN jl.jssstepstatus = 'f' THEN 'Failed'
+                WHEN jl.jssstepstatus = 'i' THEN 'Internal Error'
+                WHEN jl.jssstepstatus = 'd' THEN 'Aborted'
+                ELSE 'Unknown'
+            END,
+            'progress', CASE
+                WHEN jl.jssstatus = 'r' THEN
+                    COALESCE(jl.jssdonesteps::float * 100 / NULLIF(st.total_steps, 0), 0)
+                WHEN jl.jssstatus IN ('s', 'f', 'd', 'i') THEN 100
+                ELSE 0
+            END,
+            'total_steps', st.total_steps
+        ),
+        'summary', (
+            SELECT json_build_object(
+                'total_jobs', COUNT(*),
+                'enabled_jobs', COUNT(*) FILTER (WHERE sj.jobenabled),
+                'disabled_jobs', COUNT(*) FILTER (WHERE NOT sj.jobenabled),
+                'running_jobs', COUNT(*) FILTER (WHERE sjs.jssstatus = 'r'),
+                'successful_jobs', COUNT(*) FILTER (WHERE sjs.jssstatus = 's'),
+                'failed_jobs', COUNT(*) FILTER (WHERE sjs.jssstatus = 'f')
+            )
+              FROM pgagent.pga_job sj
+              LEFT JOIN pgagent.pga_job_state sjs ON sjs.jssjobid = sj.jobid
+        )
+    ) INTO v_payload
+      FROM pgagent.pga_job j
+      LEFT JOIN pgagent.pga_job_notification jn ON jn.jnjobid = j.jobid
+      LEFT JOIN pgagent.pga_job_state jl ON jl.jssjobid = j.jobid
+      LEFT JOIN pgagent.pga_jobstep sl ON sl.jstid = jl.jssjstid
+      LEFT JOIN LATERAL (
+        SELECT COUNT(*) AS total_steps
+          FROM pgagent.pga_jobstep
+         WHERE jstjobid = j.jobid
+      ) st ON true
+     WHERE j.jobid = v_jobid;
+
+    IF v_payload IS NULL THEN
+        -- The job has been deleted
+        v_payload := json_build_object(
+            'job_id', v_jobid, 'step_id', v_stepid, 'status', v_status,
+            'description', COALESCE(v_description, ''),
+            'timestamp', to_char(now(), 'YYYY-MM-DD HH24:MI:SS')
+        );
+    ELSIF octet_length(v_payload::text) > 7900 THEN
+        -- NOTIFY payloads are limited to 8000 bytes, store the event and
+        -- only send its id.
+        DELETE FROM pgagent.pga_job_event
+         WHERE jevtime < current_timestamp - interval '1 hour';
+
+        INSERT INTO pgagent.pga_job_event (jevjobid, jevpayload)
+        VALUES (v_jobid, v_payload)
+        RETURNING jevid INTO v_eventid;
+
+        v_payload := json_build_object(
+            'job_id', v_jobid, 'step_id', v_stepid, 'status', v_status,
+            'event_id', v_eventid
+        );
+    END IF;
+
+    PERFORM pg_notify('job_status_update', v_payload::text);
+END;
+$$ LANGUAGE 'plpgsql' VOLATILE;
+COMMENT ON FUNCTION pgagent.pga_job_status_notify(int4, int4, text, text) IS 'Send the status of a job, its latest run and the job summary on the job_status_update channel';
+
+
 CREATE OR REPLACE FUNCTION pgagent.pga_next_schedule(int4, timestamptz, timestamptz, _bool, _bool, _bool, _bool, _bool, _bool) RETURNS timestamptz AS '
 DECLARE
     jscid           ALIAS FOR $1;
@@ -635,6 +833,229 @@ END;
 COMMENT ON FUNCTION pgagent.pga_is_leap_year(int2) IS 'Returns TRUE if $1 is a leap year';
 
 
+CREATE OR REPLACE FUNCTION pgagent.pga_first_bit(int8, int4) RETURNS int4 AS $$
+    SELECT CASE WHEN ($1 >> $2) = 0 THEN NULL
+                ELSE $2 + round(ln((($1 >> $2) & -($1 >> $2))::float8) / ln(2::float8))::int4
+           END
+$$ LANGUAGE 'sql' IMMUTABLE STRICT;
+COMMENT ON FUNCTION pgagent.pga_first_bit(int8, int4) IS 'Returns the lowest bit set in $1 at or above bit $2, or NULL if there is none';
+
+
+CREATE OR REPLACE FUNCTION pgagent.pga_month_days(int4, int4) RETURNS int4 AS $$
+    SELECT date_part('DAY', make_date($1, $2, 1) + '1 Month - 1 Day'::interval)::int4
+$$ LANGUAGE 'sql' IMMUTABLE STRICT;
+COMMENT ON FUNCTION pgagent.pga_month_days(int4, int4) IS 'Returns the number of days of the month $2 of the year $1';
+
+
+CREATE OR REPLACE FUNCTION pgagent.pga_next_schedule_mask(int4, timestamptz, timestamptz, int8, int8, int8, int8, int8, int8) RETURNS timestamptz AS $$
+DECLARE
+    jscid           ALIAS FOR $1;
+    jscstart        ALIAS FOR $2;
+    jscend          ALIAS FOR $3;
+    minutes         ALIAS FOR $4;
+    hours           ALIAS FOR $5;
+    weekdays        ALIAS FOR $6;
+    monthdays       ALIAS FOR $7;
+    months          ALIAS FOR $8;
+    occurrences     ALIAS FOR $9;
+
+    nextrun         timestamp;
+    runafter        timestamp;
+
+    foundval        bool := FALSE;
+    daytweak        bool := FALSE;
+    minutetweak     bool := FALSE;
+
+    b               int4;
+    nextminute      int4;
+    nexthour        int4;
+    nextday         int4;
+    nextmonth       int4;
+    nextyear        int4;
+
+BEGIN
+    -- No valid start date has been specified
+    IF jscstart IS NULL THEN RETURN NULL; END IF;
+
+    -- The schedule is past its end date
+    IF jscend IS NOT NULL AND jscend < now() THEN RETURN NULL; END IF;
+
+    runafter := greatest(date_trunc('MINUTE', jscstart), date_trunc('MINUTE', (now() + '1 Minute'::interval)));
+
+    --
+    -- The same search as pga_next_schedule, finding the next selected month,
+    -- day, hour and minute with pga_first_bit instead of a loop over the
+    -- array, so that both return the same runs.
+    --
+    LOOP
+        nextyear := date_part('YEAR', runafter);
+        nextmonth := date_part('MONTH', runafter);
+        nextday := date_part('DAY', runafter);
+
+        --
+        -- Get the next run month
+        --
+        b := pgagent.pga_first_bit(months, nextmonth - 1);
+        IF b IS NULL AND months != 0 THEN
+            -- Wrap into next year
+            b := pgagent.pga_first_bit(months, 0);
+            nextyear := nextyear + 1;
+        END IF;
+        IF b IS NOT NULL THEN
+            nextmonth := b + 1;
+            foundval := TRUE;
+        END IF;
+
+        --
+        -- Get the next run day
+        --
+        IF (nextyear > date_part('YEAR', runafter) OR nextmonth > date_part('MONTH', runafter)) THEN
+            nextday := 1;
+            b := pgagent.pga_first_bit(monthdays, 0);
+        ELSE
+            b := pgagent.pga_first_bit(monthdays, nextday - 1);
+            IF b IS NULL AND monthdays != 0 THEN
+                -- Wrap into next month
+                b := pgagent.pga_first_bit(monthdays, 0);
+                IF nextmonth = 12 THEN
+                    nextyear := nextyear + 1;
+                    nextmonth := 1;
+                ELSE
+                    nextmonth := nextmonth + 1;
+                END IF;
+            END IF;
+        END IF;
+        IF b IS NOT NULL THEN
+            nextday := b + 1;
+            foundval := TRUE;
+        END IF;
+
+        -- Was the last day flag selected?
+        IF nextday = 32 THEN
+            nextday := pgagent.pga_month_days(nextyear, nextmonth);
+        END IF;
+
+        --
+        -- Get the next run hour
+        --
+        IF (nextyear > date_part('YEAR', runafter) OR nextmonth > date_part('MONTH', runafter) OR nextday > date_part('DAY', runafter) OR daytweak = TRUE) THEN
+            nexthour := 0;
+            b := pgagent.pga_first_bit(hours, 0);
+        ELSE
+            nexthour := date_part('HOUR', runafter);
+            b := pgagent.pga_first_bit(hours, nexthour);
+            IF b IS NULL AND hours != 0 THEN
+                -- Wrap into next day
+                b := pgagent.pga_first_bit(hours, 0);
+                IF nextday = pgagent.pga_month_days(nextyear, nextmonth) THEN
+                    nextday := 1;
+                    IF nextmonth = 12 THEN
+                        nextyear := nextyear + 1;
+                        nextmonth := 1;
+                    ELSE
+                        nextmonth := nextmonth + 1;
+                    END IF;
+                ELSE
+                    nextday := nextday + 1;
+                END IF;
+            END IF;
+        END IF;
+        IF b IS NOT NULL THEN
+            nexthour := b;
+            foundval := TRUE;
+        END IF;
+
+        --
+        -- Get the next run minute
+        --
+        IF (nextyear > date_part('YEAR', runafter) OR nextmonth > date_part('MONTH', runafter) OR nextday > date_part('DAY', runafter) OR nexthour > date_part('HOUR', runafter) OR daytweak = TRUE) THEN
+            nextminute := 0;
+            IF minutetweak = TRUE THEN
+                b := pgagent.pga_first_bit(minutes, 0);
+            ELSE
+                -- pga_next_schedule searches from the minute of runafter here
+                b := pgagent.pga_first_bit(minutes, greatest(date_part('MINUTE', runafter)::int4 - 1, 0));
+            END IF;
+        ELSE
+            nextminute := date_part('MINUTE', runafter);
+            b := pgagent.pga_first_bit(minutes, nextminute);
+            IF b IS NULL AND minutes != 0 THEN
+                -- Wrap into next hour
+                b := pgagent.pga_first_bit(minutes, 0);
+                IF nexthour = 23 THEN
+                    nexthour := 0;
+                    IF nextday = pgagent.pga_month_days(nextyear, nextmonth) THEN
+                        nextday := 1;
+                        IF nextmonth = 12 THEN
+                            nextyear := nextyear + 1;
+                            nextmonth := 1;
+                        ELSE
+                            nextmonth := nextmonth + 1;
+                        END IF;
+                    ELSE
+                        nextday := nextday + 1;
+                    END IF;
+                ELSE
+                    nexthour := nexthour + 1;
+                END IF;
+            END IF;
+        END IF;
+        IF b IS NOT NULL THEN
+            nextminute := b;
+            foundval := TRUE;
+        END IF;
+
+        -- Build the result, and check it is not the same as runafter - this may
+        -- happen if all array entries are set to false. In this case, add a minute.
+        nextrun := make_timestamp(nextyear, nextmonth, nextday, nexthour, nextminute, 0)::timestamptz;
+
+        IF nextrun = runafter AND foundval = FALSE THEN
+            nextrun := nextrun + '1 Minute'::interval;
+        END IF;
+
+        -- If the result is past the end date, exit.
+        IF nextrun > jscend THEN
+            RETURN NULL;
+        END IF;
+
+        IF NOT ((minutes = 0 OR ((minutes >> date_part('MINUTE', nextrun)::int4) & 1) = 1) AND
+                (hours = 0 OR ((hours >> date_part('HOUR', nextrun)::int4) & 1) = 1) AND
+                (months = 0 OR ((months >> (date_part('MONTH', nextrun)::int4 - 1)) & 1) = 1) AND
+                (monthdays = 0 OR ((monthdays >> (date_part('DAY', nextrun)::int4 - 1)) & 1) = 1 OR
+                 -- The last day flag alone, which also accepts the 28th of February
+                 (monthdays = (1::int8 << 31) AND
+                  (date_part('DAY', nextrun) = pgagent.pga_month_days(date_part('YEAR', nextrun)::int4, date_part('MONTH', nextrun)::int4) OR
+                   (date_part('MONTH', nextrun) = 2 AND date_part('DAY', nextrun) = 28))))) THEN
+            -- The wrapped values carried the nextrun onto an invalid time or date
+            runafter := nextrun + '1 Minute'::interval;
+            minutetweak := TRUE;
+            daytweak := FALSE;
+        ELSIF NOT (weekdays = 0 OR ((weekdays >> date_part('DOW', nextrun)::int4) & 1) = 1) OR
+              NOT (occurrences = 0 OR ((occurrences >> ((date_part('DAY', nextrun)::int4 - 1) / 7)) & 1) = 1) THEN
+            -- We're on the wrong week day, or its wrong occurrence in the
+            -- month - increment a day and try again.
+            runafter := nextrun + '1 Day'::interval;
+            minutetweak := FALSE;
+            daytweak := TRUE;
+        ELSIF EXISTS (
+            SELECT 1 FROM pgagent.pga_exception
+             WHERE jexscid = jscid
+               AND ((jexdate = nextrun::date AND jextime = nextrun::time) OR
+                    (jexdate = nextrun::date AND jextime IS NULL) OR
+                    (jexdate IS NULL AND jextime = nextrun::time))) THEN
+            -- Nuts - found an exception. Increment the time and try again
+            runafter := nextrun + '1 Minute'::interval;
+            minutetweak := TRUE;
+            daytweak := FALSE;
+        ELSE
+            RETURN nextrun;
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE 'plpgsql' VOLATILE;
+COMMENT ON FUNCTION pgagent.pga_next_schedule_mask(int4, timestamptz, timestamptz, int8, int8, int8, int8, int8, int8) IS 'Calculates the next runtime for a given schedule from its bitmasks';
+
+
 CREATE OR REPLACE FUNCTION pgagent.pga_job_trigger()
   RETURNS "trigger" AS
 '
@@ -642,7 +1063,7 @@ BEGIN
     IF NEW.jobenabled THEN
         IF NEW.jobnextrun IS NULL THEN
              SELECT INTO NEW.jobnextrun
-                    MIN(pgagent.pga_next_schedule(jscid, jscstart, jscend, jscminutes, jschours, jscweekdays, jscmonthdays, jscmonths, jscoccurrence))
+                    MIN(pgagent.pga_next_schedule_mask(jscid, jscstart, jscend, jscminutesmask, jschoursmask, jscweekdaysmask, jscmonthdaysmask, jscmonthsmask, jscoccurrencemask))
                FROM pgagent.pga_schedule
               WHERE jscenabled AND jscjobid=OLD.jobid;
         END IF;
@@ -725,7 +1146,473 @@ CREATE TRIGGER pga_exception_trigger AFTER INSERT OR UPDATE OR DELETE
   EXECUTE PROCEDURE pgagent.pga_exception_trigger();
 COMMENT ON TRIGGER pga_exception_trigger ON pgagent.pga_exception IS 'Update the job''s next run time whenever an exception changes';
 
+CREATE OR REPLACE FUNCTION pgagent.pga_joblog_state_trigger() RETURNS trigger AS $$
+DECLARE
+    v_successes     int4 := 0;
+    v_failures      int4 := 0;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF NEW.jlgstatus = 's' THEN
+            v_successes := 1;
+        ELSIF NEW.jlgstatus IN ('f', 'i', 'd') THEN
+            v_failures := 1;
+        END IF;
+    ELSIF OLD.jlgstatus IS DISTINCT FROM NEW.jlgstatus THEN
+        IF NEW.jlgstatus = 's' THEN
+            v_successes := 1;
+        ELSIF NEW.jlgstatus IN ('f', 'i', 'd') AND OLD.jlgstatus NOT IN ('f', 'i', 'd') THEN
+            v_failures := 1;
+        END IF;
+    END IF;
+
+    -- Only the latest run of the job is kept, the counters cover every run.
+    UPDATE pgagent.pga_job_state
+       SET jssjlgid = GREATEST(jssjlgid, NEW.jlgid),
+           jssstatus = CASE WHEN NEW.jlgid >= jssjlgid THEN NEW.jlgstatus ELSE jssstatus END,
+           jssstart = CASE WHEN NEW.jlgid >= jssjlgid THEN NEW.jlgstart ELSE jssstart END,
+           jssduration = CASE WHEN NEW.jlgid >= jssjlgid THEN NEW.jlgduration ELSE jssduration END,
+           jssjstid = CASE WHEN NEW.jlgid > jssjlgid THEN NULL ELSE jssjstid END,
+           jssstepstatus = CASE WHEN NEW.jlgid > jssjlgid THEN NULL ELSE jssstepstatus END,
+           jssdonesteps = CASE WHEN NEW.jlgid > jssjlgid THEN 0 ELSE jssdonesteps END,
+           jsssuccesses = jsssuccesses + v_successes,
+           jssfailures = jssfailures + v_failures
+     WHERE jssjobid = NEW.jlgjobid;
+
+    IF NOT FOUND THEN
+        INSERT INTO pgagent.pga_job_state (jssjobid, jssjlgid, jssstatus, jssstart, jssduration, jsssuccesses, jssfailures)
+        VALUES (NEW.jlgjobid, NEW.jlgid, NEW.jlgstatus, NEW.jlgstart, NEW.jlgduration, v_successes, v_failures)
+        ON CONFLICT (jssjobid) DO NOTHING;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE 'plpgsql' VOLATILE;
+COMMENT ON FUNCTION pgagent.pga_joblog_state_trigger() IS 'Update the latest run and the run counters of the job.';
+
+CREATE TRIGGER pga_joblog_state_trigger AFTER INSERT OR UPDATE
+  ON pgagent.pga_joblog FOR EACH ROW
+  EXECUTE PROCEDURE pgagent.pga_joblog_state_trigger();
+COMMENT ON TRIGGER pga_joblog_state_trigger ON pgagent.pga_joblog IS 'Update the latest run and the run counters of the job.';
+
+
+CREATE OR REPLACE FUNCTION pgagent.pga_jobsteplog_state_trigger() RETURNS trigger AS $$
+DECLARE
+    v_done          int4 := 0;
+BEGIN
+    IF NEW.jslstatus IN ('s', 'f', 'i', 'd') THEN
+        IF TG_OP = 'INSERT' THEN
+            v_done := 1;
+        ELSIF OLD.jslstatus NOT IN ('s', 'f', 'i', 'd') THEN
+            v_done := 1;
+        END IF;
+    END IF;
+
+    UPDATE pgagent.pga_job_state
+       SET jssjstid = NEW.jsljstid,
+           jssstepstatus = NEW.jslstatus,
+           jssdonesteps = jssdonesteps + v_done
+     WHERE jssjobid = (SELECT jlgjobid FROM pgagent.pga_joblog WHERE jlgid = NEW.jsljlgid)
+       AND jssjlgid = NEW.jsljlgid;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE 'plpgsql' VOLATILE;
+COMMENT ON FUNCTION pgagent.pga_jobsteplog_state_trigger() IS 'Update the current step and the progress of the latest run of the job.';
+
+CREATE TRIGGER pga_jobsteplog_state_trigger AFTER INSERT OR UPDATE
+  ON pgagent.pga_jobsteplog FOR EACH ROW
+  EXECUTE PROCEDURE pgagent.pga_jobsteplog_state_trigger();
+COMMENT ON TRIGGER pga_jobsteplog_state_trigger ON pgagent.pga_jobsteplog IS 'Update the current step and the progress of the latest run of the job.';
+
+CREATE OR REPLACE FUNCTION pgagent.pga_job_daily_refresh(int4, date, int4) RETURNS void AS $$
+DECLARE
+    v_jobid         ALIAS FOR $1;
+    v_day           ALIAS FOR $2;
+    v_firstlgid     ALIAS FOR $3;
+
+    v_first         int4;
+BEGIN
+    -- The runs of the day are found from the first one finished, with a
+    -- bounded scan of pga_joblog_jobid.
+    v_first := LEAST(v_firstlgid, (
+        SELECT jdyfirstlgid FROM pgagent.pga_job_daily
+         WHERE jdyjobid = v_jobid AND jdyday = v_day
+    ));
+
+    INSERT INTO pgagent.pga_job_daily (jdyjobid, jdyday, jdyfirstlgid, jdyruns, jdysuccesses, jdyfailures, jdyerrors, jdyaborted, jdyduration, jdyavgduration, jdyp95duration)
+    SELECT v_jobid, v_day, MIN(jlgid), COUNT(*),
+           COUNT(*) FILTER (WHERE jlgstatus = 's'),
+           COUNT(*) FILTER (WHERE jlgstatus = 'f'),
+           COUNT(*) FILTER (WHERE jlgstatus = 'i'),
+           COUNT(*) FILTER (WHERE jlgstatus = 'd'),
+           SUM(jlgduration), AVG(jlgduration),
+           percentile_cont(0.95) WITHIN GROUP (ORDER BY jlgduration)
+      FROM pgagent.pga_joblog
+     WHERE jlgjobid = v_jobid AND jlgid >= v_first
+       AND jlgstart >= v_day AND jlgstart < v_day + 1
+       AND jlgstatus IN ('s', 'f', 'i', 'd')
+    HAVING COUNT(*) > 0
+    ON CONFLICT (jdyjobid, jdyday) DO UPDATE SET
+        jdyfirstlgid = EXCLUDED.jdyfirstlgid,
+        jdyruns = EXCLUDED.jdyruns,
+        jdysuccesses = EXCLUDED.jdysuccesses,
+        jdyfailures = EXCLUDED.jdyfailures,
+        jdyerrors = EXCLUDED.jdyerrors,
+        jdyaborted = EXCLUDED.jdyaborted,
+        jdyduration = EXCLUDED.jdyduration,
+        jdyavgduration = EXCLUDED.jdyavgduration,
+        jdyp95duration = EXCLUDED.jdyp95duration;
+END;
+$$ LANGUAGE 'plpgsql' VOLATILE;
+COMMENT ON FUNCTION pgagent.pga_job_daily_refresh(int4, date, int4) IS 'Aggregate the finished runs of a job on a day, from the given run on.';
+
+CREATE OR REPLACE FUNCTION pgagent.pga_joblog_daily_trigger() RETURNS trigger AS $$
+BEGIN
+    -- Refresh the days of the runs finished by the statement, once per job
+    -- and day whatever the number of rows.
+    IF TG_OP = 'INSERT' THEN
+        PERFORM pgagent.pga_job_daily_refresh(jlgjobid, jlgstart::date, MIN(jlgid))
+           FROM pga_new_runs
+          WHERE jlgstatus IN ('s', 'f', 'i', 'd')
+          GROUP BY jlgjobid, jlgstart::date;
+    ELSE
+        PERFORM pgagent.pga_job_daily_refresh(n.jlgjobid, n.jlgstart::date, MIN(n.jlgid))
+           FROM pga_new_runs n
+           JOIN pga_old_runs o ON o.jlgid = n.jlgid
+          WHERE n.jlgstatus IN ('s', 'f', 'i', 'd')
+            AND o.jlgstatus NOT IN ('s', 'f', 'i', 'd')
+          GROUP BY n.jlgjobid, n.jlgstart::date;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE 'plpgsql' VOLATILE;
+COMMENT ON FUNCTION pgagent.pga_joblog_daily_trigger() IS 'Update the daily rollups of the finished runs.';
+
+CREATE TRIGGER pga_joblog_daily_insert_trigger AFTER INSERT
+  ON pgagent.pga_joblog REFERENCING NEW TABLE AS pga_new_runs
+  FOR EACH STATEMENT EXECUTE PROCEDURE pgagent.pga_joblog_daily_trigger();
+COMMENT ON TRIGGER pga_joblog_daily_insert_trigger ON pgagent.pga_joblog IS 'Update the daily rollups of the finished runs.';
+
+CREATE TRIGGER pga_joblog_daily_update_trigger AFTER UPDATE
+  ON pgagent.pga_joblog REFERENCING OLD TABLE AS pga_old_runs NEW TABLE AS pga_new_runs
+  FOR EACH STATEMENT EXECUTE PROCEDURE pgagent.pga_joblog_daily_trigger();
+COMMENT ON TRIGGER pga_joblog_daily_update_trigger ON pgagent.pga_joblog IS 'Update the daily rollups of the finished runs.';
+
+CREATE OR REPLACE FUNCTION pgagent.pga_job_notification_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM pg_notify('job_notification_update', OLD.jnjobid::text);
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.jnjobid <> OLD.jnjobid) THEN
+        PERFORM pg_notify('job_notification_update', NEW.jnjobid::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE 'plpgsql' VOLATILE;
+COMMENT ON FUNCTION pgagent.pga_job_notification_trigger() IS 'Send the id of the job whose notification settings changed on the job_notification_update channel.';
+
+-- jnlastnotification is left out, so that the alert throttling does not
+-- invalidate the cached settings.
+CREATE TRIGGER pga_job_notification_trigger AFTER INSERT OR DELETE
+  OR UPDATE OF jnjobid, jnenabled, jnbrowser, jnemail, jnwhen, jnmininterval, jnemailrecipients, jncustomtext
+  ON pgagent.pga_job_notification FOR EACH ROW
+  EXECUTE PROCEDURE pgagent.pga_job_notification_trigger();
+COMMENT ON TRIGGER pga_job_notification_trigger ON pgagent.pga_job_notification IS 'Notify the changes of the notification settings of the jobs.';
+
+CREATE OR REPLACE FUNCTION pgagent.pga_log_partition_create(text, date) RETURNS bool AS $$
+DECLARE
+    v_table         ALIAS FOR $1;
+    v_month         ALIAS FOR $2;
+
+    v_column        text := CASE v_table WHEN 'pga_joblog' THEN 'jlgstart' ELSE 'jslstart' END;
+    v_start         date := date_trunc('month', v_month)::date;
+    v_end           date := (date_trunc('month', v_month) + '1 Month'::interval)::date;
+    v_partition     text := v_table || '_p' || to_char(v_month, 'YYYYMM');
+BEGIN
+    IF to_regclass('pgagent.' || v_partition) IS NOT NULL THEN
+        RETURN false;
+    END IF;
+
+    -- The runs logged to the default partition while the partition was
+    -- missing are moved to it before it is attached.
+    EXECUTE format(
+        'CREATE TABLE pgagent.%I (LIKE pgagent.%I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+        v_partition, v_table);
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM pgagent.%I WHERE %I >= %L AND %I < %L RETURNING *) '
+        'INSERT INTO pgagent.%I SELECT * FROM moved',
+        v_table || '_default', v_column, v_start, v_column, v_end, v_partition);
+    EXECUTE format(
+        'ALTER TABLE pgagent.%I ATTACH PARTITION pgagent.%I FOR VALUES FROM (%L) TO (%L)',
+        v_table, v_partition, v_start, v_end);
+    RETURN true;
+END;
+$$ LANGUAGE 'plpgsql' VOLATILE;
+COMMENT ON FUNCTION pgagent.pga_log_partition_create(text, date) IS 'Create the partition of pga_joblog or pga_jobsteplog for the month of the given date, if it does not exist';
+
+
+CREATE OR REPLACE FUNCTION pgagent.pga_partition_logs() RETURNS void AS $$
+DECLARE
+    v_month         date;
+BEGIN
+    IF (SELECT relkind FROM pg_catalog.pg_class WHERE oid = 'pgagent.pga_joblog'::regclass) = 'p' THEN
+        RAISE NOTICE 'The pgAgent logs are already partitioned';
+        RETURN;
+    END IF;
+
+    LOCK TABLE pgagent.pga_joblog, pgagent.pga_jobsteplog IN ACCESS EXCLUSIVE MODE;
+
+    -- The steps can not reference the runs by jlgid alone once the runs
+    -- are partitioned by their start, their partitions are dropped together.
+    ALTER TABLE pgagent.pga_jobsteplog DROP CONSTRAINT pga_jobsteplog_jsljlgid_fkey;
+    ALTER SEQUENCE pgagent.pga_joblog_jlgid_seq OWNED BY NONE;
+    ALTER SEQUENCE pgagent.pga_jobsteplog_jslid_seq OWNED BY NONE;
+    DROP INDEX pgagent.pga_joblog_jobid, pgagent.pga_joblog_jlgstart,
+        pgagent.pga_joblog_jobstart, pgagent.pga_jobsteplog_jslid,
+        pgagent.pga_jobsteplog_jstid;
+    ALTER TABLE pgagent.pga_joblog RENAME TO pga_joblog_unpartitioned;
+    ALTER TABLE pgagent.pga_joblog_unpartitioned RENAME CONSTRAINT pga_joblog_pkey TO pga_joblog_unpartitioned_pkey;
+    ALTER TABLE pgagent.pga_jobsteplog RENAME TO pga_jobsteplog_unpartitioned;
+    ALTER TABLE pgagent.pga_jobsteplog_unpartitioned RENAME CONSTRAINT pga_jobsteplog_pkey TO pga_jobsteplog_unpartitioned_pkey;
+
+    CREATE TABLE pgagent.pga_joblog (
+    jlgid                int4                 NOT NULL DEFAULT nextval('pgagent.pga_joblog_jlgid_seq'::regclass),
+    jlgjobid             int4                 NOT NULL REFERENCES pgagent.pga_job (jobid) ON DELETE CASCADE ON UPDATE RESTRICT,
+    jlgstatus            char                 NOT NULL CHECK (jlgstatus IN ('r', 's', 'f', 'i', 'd')) DEFAULT 'r', -- running, success, failed, internal failure, aborted
+    jlgstart             timestamptz          NOT NULL DEFAULT current_timestamp,
+    jlgduration          interval             NULL,
+    PRIMARY KEY (jlgid, jlgstart)
+    ) PARTITION BY RANGE (jlgstart);
+    COMMENT ON TABLE pgagent.pga_joblog IS 'Job run logs, partitioned by month.';
+    COMMENT ON COLUMN pgagent.pga_joblog.jlgstatus IS 'Status of job: r=running, s=successfully finished, f=failed, i=no steps to execute, d=aborted';
+
+    CREATE TABLE pgagent.pga_jobsteplog (
+    jslid                int4                 NOT NULL DEFAULT nextval('pgagent.pga_jobsteplog_jslid_seq'::regclass),
+    jsljlgid             int4                 NOT NULL,
+    jsljstid             int4                 NOT NULL REFERENCES pgagent.pga_jobstep (jstid) ON DELETE CASCADE ON UPDATE RESTRICT,
+    jslstatus            char                 NOT NULL CHECK (jslstatus IN ('r', 's', 'i', 'f', 'd')) DEFAULT 'r', -- running, success, ignored, failed, aborted
+    jslresult            int4                 NULL,
+    jslstart             timestamptz          NOT NULL DEFAULT current_timestamp,
+    jslduration          interval             NULL,
+    jsloutput            text,
+    PRIMARY KEY (jslid, jslstart)
+    ) PARTITION BY RANGE (jslstart);
+    COMMENT ON TABLE pgagent.pga_jobsteplog IS 'Job step run logs, partitioned by month.';
+    COMMENT ON COLUMN pgagent.pga_jobsteplog.jslstatus IS 'Status of job step: r=running, s=successfully finished,  f=failed stopping job, i=ignored failure, d=aborted';
+    COMMENT ON COLUMN pgagent.pga_jobsteplog.jslresult IS 'Return code of job step';
+
+    -- The runs of a month without partition are kept in the default ones,
+    -- until pga_log_maintenance creates it.
+    CREATE TABLE pgagent.pga_joblog_default PARTITION OF pgagent.pga_joblog DEFAULT;
+    CREATE TABLE pgagent.pga_jobsteplog_default PARTITION OF pgagent.pga_jobsteplog DEFAULT;
+
+    -- Only the months of the copied runs have a partition, the ones of
+    -- the upcoming months are created by pga_log_maintenance.
+    FOR v_month IN
+        SELECT generate_series(
+                   date_trunc('month', LEAST(
+                       (SELECT MIN(jlgstart) FROM pgagent.pga_joblog_unpartitioned),
+                       (SELECT MIN(jslstart) FROM pgagent.pga_jobsteplog_unpartitioned))),
+                   date_trunc('month', GREATEST(
+                       (SELECT MAX(jlgstart) FROM pgagent.pga_joblog_unpartitioned),
+                       (SELECT MAX(jslstart) FROM pgagent.pga_jobsteplog_unpartitioned))),
+                   '1 Month'::interval)::date
+    LOOP
+        PERFORM pgagent.pga_log_partition_create('pga_joblog', v_month);
+        PERFORM pgagent.pga_log_partition_create('pga_jobsteplog', v_month);
+    END LOOP;
+
+    -- The triggers are created after the copy, the job states and daily
+    -- rollups already cover the copied runs.
+    INSERT INTO pgagent.pga_joblog (jlgid, jlgjobid, jlgstatus, jlgstart, jlgduration)
+    SELECT jlgid, jlgjobid, jlgstatus, jlgstart, jlgduration
+      FROM pgagent.pga_joblog_unpartitioned;
+    INSERT INTO pgagent.pga_jobsteplog (jslid, jsljlgid, jsljstid, jslstatus, jslresult, jslstart, jslduration, jsloutput)
+    SELECT jslid, jsljlgid, jsljstid, jslstatus, jslresult, jslstart, jslduration, jsloutput
+      FROM pgagent.pga_jobsteplog_unpartitioned;
+    DROP TABLE pgagent.pga_jobsteplog_unpartitioned, pgagent.pga_joblog_unpartitioned;
+
+    ALTER SEQUENCE pgagent.pga_joblog_jlgid_seq OWNED BY pgagent.pga_joblog.jlgid;
+    ALTER SEQUENCE pgagent.pga_jobsteplog_jslid_seq OWNED BY pgagent.pga_jobsteplog.jslid;
+
+    CREATE INDEX pga_joblog_jobid ON pgagent.pga_joblog(jlgjobid, jlgid DESC);
+    CREATE INDEX pga_joblog_jlgstart ON pgagent.pga_joblog(jlgstart);
+    CREATE INDEX pga_joblog_jobstart ON pgagent.pga_joblog(jlgjobid, jlgstart DESC, jlgid DESC);
+    CREATE INDEX pga_jobsteplog_jslid ON pgagent.pga_jobsteplog(jsljlgid, jslstart DESC);
+    CREATE INDEX pga_jobsteplog_jstid ON pgagent.pga_jobsteplog(jsljstid, jslid DESC);
+
+    CREATE TRIGGER pga_joblog_state_trigger AFTER INSERT OR UPDATE
+      ON pgagent.pga_joblog FOR EACH ROW
+      EXECUTE PROCEDURE pgagent.pga_joblog_state_trigger();
+    COMMENT ON TRIGGER pga_joblog_state_trigger ON pgagent.pga_joblog IS 'Update the latest run and the run counters of the job.';
+
+    CREATE TRIGGER pga_jobsteplog_state_trigger AFTER INSERT OR UPDATE
+      ON pgagent.pga_jobsteplog FOR EACH ROW
+      EXECUTE PROCEDURE pgagent.pga_jobsteplog_state_trigger();
+    COMMENT ON TRIGGER pga_jobsteplog_state_trigger ON pgagent.pga_jobsteplog IS 'Update the current step and the progress of the latest run of the job.';
+
+    CREATE TRIGGER pga_joblog_daily_insert_trigger AFTER INSERT
+      ON pgagent.pga_joblog REFERENCING NEW TABLE AS pga_new_runs
+      FOR EACH STATEMENT EXECUTE PROCEDURE pgagent.pga_joblog_daily_trigger();
+    COMMENT ON TRIGGER pga_joblog_daily_insert_trigger ON pgagent.pga_joblog IS 'Update the daily rollups of the finished runs.';
+
+    CREATE TRIGGER pga_joblog_daily_update_trigger AFTER UPDATE
+      ON pgagent.pga_joblog REFERENCING OLD TABLE AS pga_old_runs NEW TABLE AS pga_new_runs
+      FOR EACH STATEMENT EXECUTE PROCEDURE pgagent.pga_joblog_daily_trigger();
+    COMMENT ON TRIGGER pga_joblog_daily_update_trigger ON pgagent.pga_joblog IS 'Update the daily rollups of the finished runs.';
+END;
+$$ LANGUAGE 'plpgsql' VOLATILE;
+COMMENT ON FUNCTION pgagent.pga_partition_logs() IS 'Convert pga_joblog and pga_jobsteplog to monthly range partitions on their start time';
+
+
+CREATE OR REPLACE FUNCTION pgagent.pga_log_maintenance(
+    OUT mntaction text, OUT mntrelation text, OUT mntjclid int4, OUT mntrows int8
+) RETURNS SETOF record AS $$
+DECLARE
+    v_partitioned   bool;
+    v_keep          interval;
+    v_detach        bool;
+    v_horizon       interval;
+    v_month         date;
+    v_table         text;
+    v_partition     record;
+    v_class         record;
+BEGIN
+    v_partitioned := (SELECT relkind FROM pg_catalog.pg_class WHERE oid = 'pgagent.pga_joblog'::regclass) = 'p';
+
+    -- The partitions of this month and the next one, so that the runs are
+    -- not logged to the default partitions, and of the months of the runs
+    -- found in the default partitions, as restored by pg_restore.
+    IF v_partitioned THEN
+        FOR v_month IN
+            SELECT date_trunc('month', now())::date
+            UNION SELECT (date_trunc('month', now()) + '1 Month'::interval)::date
+            UNION SELECT date_trunc('month', jlgstart)::date FROM pgagent.pga_joblog_default
+            UNION SELECT date_trunc('month', jslstart)::date FROM pgagent.pga_jobsteplog_default
+            ORDER BY 1
+        LOOP
+            FOR v_table IN VALUES ('pga_joblog'), ('pga_jobsteplog') LOOP
+                IF pgagent.pga_log_partition_create(v_table, v_month) THEN
+                    mntaction := 'create';
+                    mntrelation := v_table || '_p' || to_char(v_month, 'YYYYMM');
+                    mntjclid := NULL;
+                    mntrows := 0;
+                    RETURN NEXT;
+                END IF;
+            END LOOP;
+        END LOOP;
+    END IF;
+
+    SELECT lrtkeep, lrtdetach INTO v_keep, v_detach
+      FROM pgagent.pga_log_retention
+     WHERE lrtjclid IS NULL;
+
+    -- A partition expires once all its runs are older than the retention
+    -- of every job class, which needs the global retention for the classes
+    -- without their own.
+    IF v_partitioned AND v_keep IS NOT NULL THEN
+        v_horizon := GREATEST(v_keep, (
+            SELECT MAX(lrtkeep) FROM pgagent.pga_log_retention
+             WHERE lrtjclid IS NOT NULL
+        ));
+
+        FOR v_partition IN
+            SELECT c.relname, p.relname AS parent, c.reltuples,
+                   to_date(substring(c.relname from '_p([0-9]{6})$'), 'YYYYMM') AS month
+              FROM pg_catalog.pg_inherits i
+              JOIN pg_catalog.pg_class c ON c.oid = i.inhrelid
+              JOIN pg_catalog.pg_class p ON p.oid = i.inhparent
+             WHERE i.inhparent IN ('pgagent.pga_joblog'::regclass, 'pgagent.pga_jobsteplog'::regclass)
+               AND c.relname ~ '_p[0-9]{6}$'
+             ORDER BY 4, 2
+        LOOP
+            CONTINUE WHEN v_partition.month + '1 Month'::interval > now() - v_horizon;
+
+            IF v_detach THEN
+                EXECUTE format('ALTER TABLE pgagent.%I DETACH PARTITION pgagent.%I',
+                               v_partition.parent, v_partition.relname);
+                mntaction := 'detach';
+            ELSE
+                EXECUTE format('DROP TABLE pgagent.%I', v_partition.relname);
+                mntaction := 'drop';
+            END IF;
+            mntrelation := v_partition.relname;
+            mntjclid := NULL;
+            mntrows := GREATEST(v_partition.reltuples, 0)::int8;
+            RETURN NEXT;
+        END LOOP;
+    END IF;
+
+    -- The runs of the job classes kept for less time than the partitions
+    -- are deleted, as are all the expired runs without partitions.
+    FOR v_class IN
+        SELECT jcl.jclid, COALESCE(c.lrtkeep, v_keep) AS keep
+          FROM pgagent.pga_jobclass jcl
+          LEFT JOIN pgagent.pga_log_retention c ON c.lrtjclid = jcl.jclid
+         WHERE COALESCE(c.lrtkeep, v_keep) IS NOT NULL
+           AND (v_horizon IS NULL OR COALESCE(c.lrtkeep, v_keep) < v_horizon)
+    LOOP
+        WITH runs AS (
+            DELETE FROM pgagent.pga_joblog l
+             USING pgagent.pga_job j
+             WHERE j.jobid = l.jlgjobid AND j.jobjclid = v_class.jclid
+               AND l.jlgstart < now() - v_class.keep
+               AND l.jlgstatus != 'r'
+            RETURNING l.jlgid
+        ), steps AS (
+            DELETE FROM pgagent.pga_jobsteplog
+             WHERE jsljlgid IN (SELECT jlgid FROM runs)
+        )
+        SELECT COUNT(*) INTO mntrows FROM runs;
+
+        IF mntrows > 0 THEN
+            mntaction := 'delete';
+            mntrelation := 'pga_joblog';
+            mntjclid := v_class.jclid;
+            RETURN NEXT;
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE 'plpgsql' VOLATILE;
+COMMENT ON FUNCTION pgagent.pga_log_maintenance() IS 'Create the upcoming partitions of the job logs, and drop, detach or delete the runs older than their retention';
+
+
+-- The logs are only partitioned on request, by setting pgagent.partition_logs
+-- to on before creating the schema.
+DO $$
+DECLARE
+    v_partition     regclass;
+BEGIN
+    IF current_setting('pgagent.partition_logs', true) = 'on' THEN
+        PERFORM pgagent.pga_partition_logs();
+
+        IF EXISTS (SELECT 1 FROM pg_catalog.pg_extension WHERE extname = 'pgagent') THEN
+            -- The monthly partitions are left out of the extension, like the
+            -- ones pga_log_maintenance() creates later, so that pg_dump dumps
+            -- all of them, with their runs, as partitions of the extension
+            -- tables. The extension keeps the default partitions, created again
+            -- with it, and only their runs are dumped.
+            FOR v_partition IN
+                SELECT i.inhrelid::regclass
+                  FROM pg_catalog.pg_inherits i
+                  JOIN pg_catalog.pg_class c ON c.oid = i.inhrelid
+                 WHERE i.inhparent IN ('pgagent.pga_joblog'::regclass, 'pgagent.pga_jobsteplog'::regclass)
+                   AND c.relname ~ '_p[0-9]{6}$'
+            LOOP
+                EXECUTE format('ALTER EXTENSION pgagent DROP TABLE %s', v_partition);
+            END LOOP;
+            PERFORM pg_catalog.pg_extension_config_dump('pgagent.pga_joblog_default', '');
+            PERFORM pg_catalog.pg_extension_config_dump('pgagent.pga_jobsteplog_default', '');
+            -- The statement triggers on the logs do not fire for the runs restored
+            -- to their partitions, the daily rollups are dumped instead.
+            PERFORM pg_catalog.pg_extension_config_dump('pgagent.pga_job_daily', '');
+        END IF;
+    END IF;
+END;
+$$;
+
 -- Extension dump support.
+-- pga_job_state and pga_job_daily are not dumped, the triggers rebuild them when the job logs are restored, except pga_job_daily when the logs are partitioned.
 -- EXT SELECT pg_catalog.pg_extension_config_dump('pga_jobagent', '');
 -- EXT SELECT pg_catalog.pg_extension_config_dump('pga_jobclass', $$WHERE jclname NOT IN ('Routine Maintenance', 'Data Import', 'Data Export', 'Data Summarisation', 'Miscellaneous')$$);
 -- EXT SELECT pg_catalog.pg_extension_config_dump('pga_job', '');
@@ -734,5 +1621,8 @@ COMMENT ON TRIGGER pga_exception_trigger ON pgagent.pga_exception IS 'Update the
 -- EXT SELECT pg_catalog.pg_extension_config_dump('pga_exception', '');
 -- EXT SELECT pg_catalog.pg_extension_config_dump('pga_joblog', '');
 -- EXT SELECT pg_catalog.pg_extension_config_dump('pga_jobsteplog', '');
+-- EXT SELECT pg_catalog.pg_extension_config_dump('pga_log_retention', '');
+-- EXT SELECT pg_catalog.pg_extension_config_dump('pga_joblog_jlgid_seq', '');
+-- EXT SELECT pg_catalog.pg_extension_config_dump('pga_jobsteplog_jslid_seq', '');
 
 COMMIT TRANSACTION;
\ No newline at end of file
@@ -0,0 +1,69 @@
+--
+-- Job monitor benchmark
+--
+-- Grows the job history of 1000 jobs to 100k, 1M and 5M runs (two steps
+-- each) and shows the plan and timing of the latest run lookups used by
+-- the pgAdmin job monitor after every step. The latest run of every job
+-- and the current step of that run must stay bounded index scans on
+-- pga_joblog_jobid and pga_jobsteplog_jslid, whatever the history size.
+--
+-- Run it against a scratch database with the pgagent extension installed:
+--
+--   psql -d pgagent_bench -f job_monitor.sql
+--
+-- The benchmark jobs are named bench_job_<n>, and are deleted at the end.
+--
+
+\set ON_ERROR_STOP on
+
+DELETE FROM pgagent.pga_job WHERE jobname LIKE 'bench\_job\_%';
+
+INSERT INTO pgagent.pga_job (jobjclid, jobname, jobdesc, jobhostagent, jobenabled)
+SELECT jcl.jclid, 'bench_job_' || n, '', '', true
+  FROM pgagent.pga_jobclass jcl, generate_series(1, 1000) n
+ WHERE jcl.jclname = 'Miscellaneous';
+
+INSERT INTO pgagent.pga_jobstep (jstjobid, jstname, jstkind, jstcode, jstdbname)
+SELECT j.jobid, 'step' || n, 's', 'SELECT 1', current_database()
+  FROM pgagent.pga_job j, generate_series(1, 2) n
+ WHERE j.jobname LIKE 'bench\_job\_%';
+
+-- Add p_runs runs of the benchmark jobs, spread over their history
+CREATE FUNCTION pg_temp.bench_grow(p_runs int4) RETURNS void AS $$
+DECLARE
+    v_lastid    int4;
+BEGIN
+    SELECT COALESCE(MAX(jlgid), 0) INTO v_lastid FROM pgagent.pga_joblog;
+
+    INSERT INTO pgagent.pga_joblog (jlgjobid, jlgstatus, jlgstart, jlgduration)
+    SELECT j.jobid,
+           CASE WHEN r % 20 = 0 THEN 'f' ELSE 's' END,
+           now() - (p_runs - r) * interval '1 second',
+           interval '2 seconds'
+      FROM generate_series(1, p_runs) r
+      JOIN (SELECT jobid, row_number() OVER (ORDER BY jobid) - 1 AS n
+              FROM pgagent.pga_job
+             WHERE jobname LIKE 'bench\_job\_%') j
+        ON j.n = r % 1000;
+
+    INSERT INTO pgagent.pga_jobsteplog (jsljlgid, jsljstid, jslstatus, jslresult, jslstart, jslduration)
+    SELECT jl.jlgid, js.jstid, jl.jlgstatus, 0, jl.jlgstart, interval '1 second'
+      FROM pgagent.pga_joblog jl
+      JOIN pgagent.pga_jobstep js ON js.jstjobid = jl.jlgjobid
+     WHERE jl.jlgid > v_lastid;
+END;
+$$ LANGUAGE plpgsql;
+
+\echo '### 100k runs'
+SELECT pg_temp.bench_grow(100000);
+\ir job_monitor_explain.sql
+
+\echo '### 1M runs'
+SELECT pg_temp.bench_grow(900000);
+\ir job_monitor_explain.sql
+
+\echo '### 5M runs'
+SELECT pg_temp.bench_grow(4000000);
+\ir job_monitor_explain.sql
+
+DELETE FROM pgagent.pga_job WHERE jobname LIKE 'bench\_job\_%';
@@ -0,0 +1,47 @@
+--
+-- Plan and timing of the latest run lookups and of the job history of the
+-- job monitor, included by job_monitor.sql after every history growth step.
+--
+
+ANALYZE pgagent.pga_job;
+ANALYZE pgagent.pga_joblog;
+ANALYZE pgagent.pga_jobsteplog;
+
+SELECT COUNT(*) AS runs FROM pgagent.pga_joblog;
+
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT j.jobid, jl.jlgstatus, jl.jlgstart, sl.jstname, sl.jslstatus
+  FROM pgagent.pga_job j
+  LEFT JOIN LATERAL (
+    SELECT jlgid, jlgstatus, jlgstart, jlgduration
+      FROM pgagent.pga_joblog
+     WHERE jlgjobid = j.jobid
+     ORDER BY jlgid DESC
+     LIMIT 1
+  ) jl ON true
+  LEFT JOIN LATERAL (
+    SELECT js.jstname, sl.jslstatus
+      FROM pgagent.pga_jobsteplog sl
+      JOIN pgagent.pga_jobstep js ON sl.jsljstid = js.jstid
+     WHERE sl.jsljlgid = jl.jlgid
+     ORDER BY sl.jslstart DESC
+     LIMIT 1
+  ) sl ON true;
+
+-- The job history charts read the daily rollups of the closed days and
+-- today's runs only.
+ANALYZE pgagent.pga_job_daily;
+
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT jdyday, jdyjobid, jdyruns, jdysuccesses, jdyfailures, jdyavgduration, jdyp95duration
+  FROM pgagent.pga_job_daily
+ WHERE jdyday >= CURRENT_DATE - 30 AND jdyday < CURRENT_DATE
+UNION ALL
+SELECT jlgstart::date, jlgjobid, COUNT(*),
+       COUNT(*) FILTER (WHERE jlgstatus = 's'),
+       COUNT(*) FILTER (WHERE jlgstatus = 'f'),
+       AVG(jlgduration),
+       percentile_cont(0.95) WITHIN GROUP (ORDER BY jlgduration)
+  FROM pgagent.pga_joblog
+ WHERE jlgstart >= CURRENT_DATE
+ GROUP BY 1, 2;
@@ -0,0 +1,88 @@
+--
+-- Job properties benchmark
+--
+-- Grows the job history of 1000 jobs to 10M runs and shows the plan and
+-- timing of the pgAdmin pga_job properties query, for a single job and for
+-- the job collection. The single job properties read the latest run with a
+-- bounded index scan on pga_joblog_jobid and must stay under a millisecond.
+-- The collection reads pga_job_state.
+--
+-- Run it against a scratch database with the pgagent extension installed:
+--
+--   psql -d pgagent_bench -f job_properties.sql
+--
+-- The benchmark jobs are named bench_job_<n>, and are deleted at the end.
+-- Loading the runs fires the job log triggers, and takes a few minutes.
+--
+
+\set ON_ERROR_STOP on
+
+DELETE FROM pgagent.pga_job WHERE jobname LIKE 'bench\_job\_%';
+
+INSERT INTO pgagent.pga_job (jobjclid, jobname, jobdesc, jobhostagent, jobenabled)
+SELECT jcl.jclid, 'bench_job_' || n, '', '', true
+  FROM pgagent.pga_jobclass jcl, generate_series(1, 1000) n
+ WHERE jcl.jclname = 'Miscellaneous';
+
+-- 10M runs, spread over the history
+INSERT INTO pgagent.pga_joblog (jlgjobid, jlgstatus, jlgstart, jlgduration)
+SELECT j.jobid,
+       CASE WHEN r % 20 = 0 THEN 'f' ELSE 's' END,
+       now() - (10000000 - r) * interval '1 second',
+       interval '2 seconds'
+  FROM generate_series(1, 10000000) r
+  JOIN (SELECT jobid, row_number() OVER (ORDER BY jobid) - 1 AS n
+          FROM pgagent.pga_job
+         WHERE jobname LIKE 'bench\_job\_%') j
+    ON j.n = r % 1000;
+
+ANALYZE pgagent.pga_job;
+ANALYZE pgagent.pga_joblog;
+ANALYZE pgagent.pga_job_state;
+
+SELECT COUNT(*) AS runs FROM pgagent.pga_joblog;
+
+SELECT MIN(jobid) AS bench_jobid FROM pgagent.pga_job
+ WHERE jobname LIKE 'bench\_job\_%' \gset
+
+\echo '### Single job properties'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT j.jobid, j.jobname, ag.jagstation, sub.jlgstatus, jc.jclname, n.jnenabled
+  FROM pgagent.pga_job j
+  LEFT OUTER JOIN pgagent.pga_jobagent ag ON ag.jagpid = jobagentid
+  LEFT OUTER JOIN LATERAL (
+    SELECT jlgstatus
+      FROM pgagent.pga_joblog
+     WHERE jlgjobid = j.jobid
+     ORDER BY jlgid DESC
+     LIMIT 1
+  ) sub ON true
+  LEFT JOIN pgagent.pga_jobclass jc ON (j.jobjclid = jc.jclid)
+  LEFT JOIN pgagent.pga_job_notification n ON (j.jobid = n.jnjobid)
+ WHERE j.jobid = :bench_jobid;
+
+\echo '### Job collection properties'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT j.jobid, j.jobname, ag.jagstation, sub.jlgstatus, jc.jclname, n.jnenabled
+  FROM pgagent.pga_job j
+  LEFT OUTER JOIN pgagent.pga_jobagent ag ON ag.jagpid = jobagentid
+  LEFT OUTER JOIN (
+    SELECT jssjobid AS jlgjobid, jssstatus AS jlgstatus
+      FROM pgagent.pga_job_state
+  ) sub ON sub.jlgjobid = j.jobid
+  LEFT JOIN pgagent.pga_jobclass jc ON (j.jobjclid = jc.jclid)
+  LEFT JOIN pgagent.pga_job_notification n ON (j.jobid = n.jnjobid)
+ ORDER BY j.jobname;
+
+\echo '### Single job properties with DISTINCT ON, as before'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT j.jobid, j.jobname, sub.jlgstatus
+  FROM pgagent.pga_job j
+  LEFT OUTER JOIN (
+    SELECT DISTINCT ON (jlgjobid) jlgstatus, jlgjobid
+      FROM pgagent.pga_joblog
+     ORDER BY jlgjobid, jlgid DESC
+  ) sub ON sub.jlgjobid = j.jobid
+ WHERE j.jobid = :bench_jobid;
+
+DELETE FROM pgagent.pga_job WHERE jobname LIKE 'bench\_job\_%';
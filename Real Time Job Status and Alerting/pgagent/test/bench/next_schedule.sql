@@ -0,0 +1,97 @@
+--
+-- Next schedule benchmark
+--
+-- Creates 100k schedules over 1000 jobs and times the next run of every
+-- schedule with pga_next_schedule, which loops over the bool arrays, and
+-- with pga_next_schedule_mask, which scans the bitmask columns, then checks
+-- that both find the same runs. It then times the job trigger, which finds
+-- the next run of all the enabled schedules of a job whenever it changes.
+--
+-- Run it against a scratch database with the pgagent extension installed:
+--
+--   psql -d pgagent_bench -f next_schedule.sql
+--
+-- The benchmark jobs are named bench_job_<n>, and are deleted at the end.
+-- The jobs are created disabled, so that loading the schedules does not run
+-- the job trigger. The month days are kept to the 28 first days, or the last
+-- day flag alone, and the occurrences are only set for any month day, so
+-- that every schedule has a next run.
+--
+
+\set ON_ERROR_STOP on
+
+DELETE FROM pgagent.pga_job WHERE jobname LIKE 'bench\_job\_%';
+
+INSERT INTO pgagent.pga_job (jobjclid, jobname, jobdesc, jobhostagent, jobenabled)
+SELECT jcl.jclid, 'bench_job_' || n, '', '', false
+  FROM pgagent.pga_jobclass jcl, generate_series(1, 1000) n
+ WHERE jcl.jclname = 'Miscellaneous';
+
+-- 100 schedules per job, from every minute to a few runs a year
+INSERT INTO pgagent.pga_schedule (
+    jscjobid, jscname, jscstart, jscminutes, jschours, jscweekdays,
+    jscmonthdays, jscmonths, jscoccurrence
+)
+SELECT j.jobid, 'bench_schedule_' || s, now(),
+       ARRAY(SELECT s % 5 != 0 AND random() < 0.05 FROM generate_series(1, 60)),
+       ARRAY(SELECT s % 3 != 0 AND random() < 0.2 FROM generate_series(1, 24)),
+       ARRAY(SELECT s % 2 != 0 AND random() < 0.5 FROM generate_series(1, 7)),
+       ARRAY(SELECT CASE s % 7
+                    WHEN 0 THEN d <= 28 AND random() < 0.2
+                    WHEN 1 THEN d = 32
+                    ELSE false END
+               FROM generate_series(1, 32) d),
+       ARRAY(SELECT s % 4 = 0 AND random() < 0.5 FROM generate_series(1, 12)),
+       ARRAY(SELECT s % 7 > 1 AND s % 6 = 0 AND random() < 0.4 FROM generate_series(1, 5))
+  FROM generate_series(1, 100000) s
+  JOIN (SELECT jobid, row_number() OVER (ORDER BY jobid) - 1 AS idx
+          FROM pgagent.pga_job
+         WHERE jobname LIKE 'bench\_job\_%') j
+    ON j.idx = s % 1000;
+
+ANALYZE pgagent.pga_schedule;
+
+SELECT COUNT(*) AS schedules FROM pgagent.pga_schedule
+ WHERE jscname LIKE 'bench\_schedule\_%';
+
+\timing on
+
+\echo '### pga_next_schedule, looping over the bool arrays'
+SELECT COUNT(pgagent.pga_next_schedule(
+           jscid, jscstart, jscend, jscminutes, jschours, jscweekdays,
+           jscmonthdays, jscmonths, jscoccurrence)) AS runs
+  FROM pgagent.pga_schedule
+ WHERE jscname LIKE 'bench\_schedule\_%';
+
+\echo '### pga_next_schedule_mask, scanning the bitmasks'
+SELECT COUNT(pgagent.pga_next_schedule_mask(
+           jscid, jscstart, jscend, jscminutesmask, jschoursmask,
+           jscweekdaysmask, jscmonthdaysmask, jscmonthsmask,
+           jscoccurrencemask)) AS runs
+  FROM pgagent.pga_schedule
+ WHERE jscname LIKE 'bench\_schedule\_%';
+
+\echo '### Job trigger, 100 schedules per job'
+UPDATE pgagent.pga_job SET jobenabled = true
+ WHERE jobname LIKE 'bench\_job\_%';
+
+\timing off
+
+\echo '### Schedules whose next runs differ, must be 0'
+SELECT COUNT(*) AS mismatches
+  FROM pgagent.pga_schedule
+ WHERE jscname LIKE 'bench\_schedule\_%'
+   AND pgagent.pga_next_schedule(
+           jscid, jscstart, jscend, jscminutes, jschours, jscweekdays,
+           jscmonthdays, jscmonths, jscoccurrence)
+       IS DISTINCT FROM
+       pgagent.pga_next_schedule_mask(
+           jscid, jscstart, jscend, jscminutesmask, jschoursmask,
+           jscweekdaysmask, jscmonthdaysmask, jscmonthsmask,
+           jscoccurrencemask);
+
+-- Disable the jobs first, so that deleting their schedules does not run the
+-- job trigger.
+UPDATE pgagent.pga_job SET jobenabled = false
+ WHERE jobname LIKE 'bench\_job\_%';
+DELETE FROM pgagent.pga_job WHERE jobname LIKE 'bench\_job\_%';
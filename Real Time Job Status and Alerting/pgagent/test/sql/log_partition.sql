@@ -0,0 +1,25 @@
+\! createdb pgagent_partition
+\c pgagent_partition
+SET pgagent.partition_logs = on;
+CREATE EXTENSION pgagent;
+INSERT INTO pgagent.pga_job (jobjclid, jobname, jobdesc, jobenabled, jobhostagent)
+ SELECT jclid, 'job1', '', true, ''
+  FROM pgagent.pga_jobclass WHERE jclname='Routine Maintenance';
+INSERT INTO pgagent.pga_joblog (jlgjobid, jlgstatus, jlgstart, jlgduration)
+ SELECT jobid, 's', '2020-01-15 12:00:00+00', '1 minute' FROM pgagent.pga_job;
+SELECT count(*) = 2 AS created FROM pgagent.pga_log_maintenance() WHERE mntrelation LIKE '%_p202001';
+INSERT INTO pgagent.pga_joblog (jlgjobid, jlgstatus, jlgstart, jlgduration)
+ SELECT jobid, 's', '2020-02-15 12:00:00+00', '1 minute' FROM pgagent.pga_job;
+SELECT count(*) = 0 AS not_member FROM pg_depend
+ WHERE classid = 'pg_class'::regclass AND objid = 'pgagent.pga_joblog_p202001'::regclass AND deptype = 'e';
+\c contrib_regression
+\! pg_dump -Fc -f pgagent_partition.dump pgagent_partition && createdb pgagent_restore && PGOPTIONS='-c pgagent.partition_logs=on' pg_restore -d pgagent_restore pgagent_partition.dump
+\c pgagent_restore
+SELECT count(*) = 1 AS restored FROM pgagent.pga_joblog_p202001;
+SELECT count(*) = 1 AS restored FROM pgagent.pga_joblog_default;
+SELECT count(*) = 2 AS restored FROM pgagent.pga_job_daily;
+SELECT count(*) = 2 AS created FROM pgagent.pga_log_maintenance() WHERE mntrelation LIKE '%_p202002';
+SELECT count(*) = 1 AS restored FROM pgagent.pga_joblog_p202002;
+SELECT last_value >= (SELECT max(jlgid) FROM pgagent.pga_joblog) AS restored FROM pgagent.pga_joblog_jlgid_seq;
+\c contrib_regression
+\! dropdb pgagent_partition; dropdb pgagent_restore; rm -f pgagent_partition.dump